@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Resident daemon for LLM-powered Linux Distribution (ai-system --daemon)
+Keeps the NLP client, caches and history warm and serves thin-client shell sessions over a Unix socket
+"""
+
+import argparse
+import json
+import logging
+import os
+import selectors
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+import sd_daemon
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SYSTEM_SOCKET = "/run/ai-system/ai-system.sock"
+CONFIG_PATH = os.getenv("AI_CONFIG_PATH", "/etc/ai-system")
+HISTORY_LIMIT = 1000
+
+POLICY_KEYS = ("safe_commands", "confirmation_required", "blocked_commands")
+ROUTING_KEYS = ("model", "ollama_host")
+
+
+def default_socket_path() -> str:
+    """Socket to use: $LINUXAI_SOCKET, then the system daemon's, then a per-user one"""
+    if os.getenv("LINUXAI_SOCKET"):
+        return os.environ["LINUXAI_SOCKET"]
+    if os.path.exists(SYSTEM_SOCKET):
+        return SYSTEM_SOCKET
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR") or f"/tmp/linuxai-{os.getuid()}"
+    return os.path.join(runtime_dir, "linuxai", "daemon.sock")
+
+
+def can_switch_users() -> bool:
+    """True when running as root or with CAP_SETUID, as the ai-system service does"""
+    if os.geteuid() == 0:
+        return True
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("CapEff:"):
+                    return bool(int(line.split()[1], 16) & (1 << 7))
+    except OSError:
+        pass
+    return False
+
+
+def load_config(config_path: str = CONFIG_PATH) -> Dict[str, Dict[str, Any]]:
+    """Read policy.json and routing.json from the config directory
+
+    Missing files mean "use the built-in defaults". Malformed files raise
+    ValueError so a bad edit never replaces a working configuration.
+    """
+    config = {"policy": {}, "routing": {}}
+
+    for name, keys in (("policy", POLICY_KEYS), ("routing", ROUTING_KEYS)):
+        path = os.path.join(config_path, f"{name}.json")
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: expected a JSON object")
+        unknown = set(data) - set(keys)
+        if unknown:
+            raise ValueError(f"{path}: unknown keys {sorted(unknown)}")
+        for key, value in data.items():
+            if name == "policy":
+                if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                    raise ValueError(f"{path}: '{key}' must be a list of command names")
+                config[name][key] = frozenset(value)
+            else:
+                if not isinstance(value, str):
+                    raise ValueError(f"{path}: '{key}' must be a string")
+                config[name][key] = value
+
+    return config
+
+
+def run_client(kind: str, argv: Optional[List[str]] = None, socket_path: Optional[str] = None) -> Optional[int]:
+    """Hand this terminal to a session in the resident daemon and wait for it to end
+
+    Only the TTY file descriptors, cwd and environment are sent. Returns the
+    session's exit code, or None if no daemon is reachable so the caller can
+    fall back to running in-process.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path or default_socket_path())
+    except OSError:
+        sock.close()
+        return None
+
+    request = {
+        "op": "session",
+        "kind": kind,
+        "argv": argv or [],
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+    }
+    socket.send_fds(sock, [json.dumps(request).encode() + b"\n"], [0, 1, 2])
+
+    # The session owns the terminal now; forward the signals the TTY sends us
+    def forward(signum, frame):
+        try:
+            sock.sendall(json.dumps({"op": "signal", "signal": signum}).encode() + b"\n")
+        except OSError:
+            pass
+
+    for signum in (signal.SIGINT, signal.SIGQUIT, signal.SIGWINCH):
+        signal.signal(signum, forward)
+    signal.signal(signal.SIGTSTP, signal.SIG_IGN)
+
+    buffer = b""
+    while True:
+        try:
+            data = sock.recv(65536)
+        except InterruptedError:
+            continue
+        if not data:
+            return 1
+        buffer += data
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            message = json.loads(line)
+            if message.get("op") == "error":
+                sys.stderr.write(f"ai-system: {message['message']}\n")
+                return None
+            if message.get("op") == "exit":
+                return message.get("code", 0)
+
+
+class LinuxAIDaemon:
+    """Resident process that holds warm state and forks one child per shell session
+
+    Sessions are forked from the warm daemon, so they start with the NLP client,
+    caches and the connecting user's conversation history already loaded. Each
+    child switches to that user's credentials before running the shell on the
+    passed TTY. History is kept per uid: one user's requests never reach
+    another user's session.
+    """
+
+    def __init__(self, socket_path: str, config_path: str = CONFIG_PATH):
+        self.socket_path = socket_path
+        self.config_path = config_path
+        self.config = None
+        self.listener = None
+        self.socket_activated = False
+        self.reload_requested = False
+        self.sessions = {}  # child pid -> history pipe read fd
+        self.history: Dict[int, List[Dict[str, Any]]] = {}  # uid -> that user's conversation history
+        self.prototypes: Dict[str, Any] = {}
+        self.running = True
+        self.selector = selectors.DefaultSelector()
+
+    # Warm state
+
+    def warm_up(self):
+        """Import and initialise everything a session needs before the first client arrives"""
+        from main import LinuxAI
+        from tracing import configure_from_env
+
+        # Forked sessions inherit this; use "{pid}" in LINUXAI_TRACE for one file per session
+        configure_from_env()
+        self.config = load_config(self.config_path)
+        app = LinuxAI(tools=os.getenv("LINUXAI_TOOLS") == "1")
+        app.apply_config(self.config)
+        started = time.monotonic()
+        app.system_ready = app.check_system_status(report=logger.info)
+        # The file and size indexes cover one home directory and all three are
+        # cached under it, so only a per-user daemon can share them with its sessions
+        if not can_switch_users():
+            app.load_indexes()
+        logger.info(f"LinuxAI session prototype ready in {time.monotonic() - started:.2f}s")
+        self.prototypes["linuxai"] = app
+
+        shell_path = os.getenv("AI_SHELL_PATH", "/usr/lib/ai-system/ai-shell.py")
+        if os.path.exists(shell_path):
+            import importlib.util
+            sys.path.insert(0, os.path.dirname(shell_path))
+            spec = importlib.util.spec_from_file_location("ai_shell", shell_path)
+            module = importlib.util.module_from_spec(spec)
+            try:
+                spec.loader.exec_module(module)
+                self.prototypes["ai-shell"] = module
+            except Exception as e:
+                logger.warning(f"AI shell sessions unavailable: {e}")
+
+    # Listening
+
+    def listen(self):
+        # Prefer the socket systemd is already listening on (ai-system.socket)
+        activated = sd_daemon.listen_fds()
+        if activated:
+            self.listener = activated[0]
+            self.socket_activated = True
+            logger.info(f"Using socket-activated listener {self.listener.getsockname()}")
+            return
+
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socket_path)
+        # The system socket is open to everyone; callers are identified by SO_PEERCRED
+        os.chmod(self.socket_path, 0o666 if can_switch_users() else 0o600)
+        self.listener.listen(64)
+        logger.info(f"Listening on {self.socket_path}")
+
+    def serve_forever(self):
+        self.selector.register(self.listener, selectors.EVENT_READ, self.accept)
+
+        # Signal handlers only set flags; the wakeup fd makes select() return at once
+        wake_r, wake_w = socket.socketpair()
+        wake_r.setblocking(False)
+        wake_w.setblocking(False)
+        self.selector.register(wake_r, selectors.EVENT_READ, lambda sock: sock.recv(4096))
+        signal.set_wakeup_fd(wake_w.fileno())
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        signal.signal(signal.SIGHUP, lambda signum, frame: self.request_reload())
+        self._wake_sockets = (wake_r, wake_w)
+
+        sd_daemon.notify_ready(self.status_line())
+
+        while self.running:
+            for key, _ in self.selector.select(timeout=1.0):
+                key.data(key.fileobj)
+            if self.reload_requested:
+                self.reload()
+            self.reap_sessions()
+
+        sd_daemon.notify_stopping("Shutting down")
+        signal.set_wakeup_fd(-1)
+        self.selector.close()
+        self.listener.close()
+        wake_r.close()
+        wake_w.close()
+        if not self.socket_activated and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def status_line(self) -> str:
+        return f"Serving {len(self.sessions)} session(s)"
+
+    def request_reload(self):
+        self.reload_requested = True
+
+    def reload(self):
+        """Re-read the config and swap policy and routing in one step
+
+        Runs between accepts on the main loop, so every session is forked
+        entirely from the old or entirely from the new configuration. Warm
+        caches, history and running sessions are left untouched.
+        """
+        self.reload_requested = False
+        sd_daemon.notify_reloading("Reloading configuration")
+        try:
+            config = load_config(self.config_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Reload failed, keeping current configuration: {e}")
+            sd_daemon.notify_ready(f"Reload failed: {e}")
+            return
+
+        self.config = config
+        self.prototypes["linuxai"].apply_config(config)
+        logger.info(f"Configuration reloaded from {self.config_path}")
+        sd_daemon.notify_ready(self.status_line())
+
+    def stop(self):
+        self.running = False
+
+    def accept(self, listener):
+        conn, _ = listener.accept()
+        try:
+            self.start_session(conn)
+        except Exception as e:
+            logger.error(f"Failed to start session: {e}")
+            self.send(conn, {"op": "error", "message": str(e)})
+        finally:
+            conn.close()
+
+    @staticmethod
+    def send(conn, message: Dict[str, Any]):
+        try:
+            conn.sendall(json.dumps(message).encode() + b"\n")
+        except OSError:
+            pass
+
+    # Sessions
+
+    def start_session(self, conn: socket.socket):
+        """Fork a session for a new connection; the request is read in the child
+
+        Nothing here waits on the client, so a slow or stalled client cannot
+        hold up the accept loop, reloads or other sessions.
+        """
+        pid, uid, gid = self.peer_credentials(conn)
+        history_r, history_w = os.pipe()
+        child = os.fork()
+        if child == 0:
+            code = 1
+            try:
+                os.close(history_r)
+                self.leave_daemon()
+                received = self.receive_request(conn, uid)
+                if received is not None:
+                    code = self.run_session(conn, *received, uid, gid, history_w)
+            except BaseException as e:
+                logger.error(f"Session error: {e}")
+            finally:
+                self.send(conn, {"op": "exit", "code": code})
+                os._exit(code)
+
+        os.close(history_w)
+        self.sessions[child] = history_r
+        self.selector.register(history_r, selectors.EVENT_READ, lambda fd: self.collect_history(child, uid))
+        logger.info(f"Session {child} started for uid {uid} (client pid {pid})")
+        sd_daemon.notify_status(self.status_line())
+
+    def leave_daemon(self):
+        """Runs in the forked child: drop the daemon's sockets, pipes and signal handlers"""
+        self.listener.close()
+        self.selector.close()
+        for fd in self.sessions.values():
+            os.close(fd)
+        signal.set_wakeup_fd(-1)
+        for sock in self._wake_sockets:
+            sock.close()
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+
+    def receive_request(self, conn: socket.socket, uid: int):
+        """Runs in the forked child: read the session request and the client's terminal fds
+
+        Returns (request, fds), or None after telling the client why it was refused.
+        """
+        conn.settimeout(5)
+        msg, fds, _, _ = socket.recv_fds(conn, 1 << 20, 3)
+        conn.settimeout(None)
+        if not msg:
+            return None  # client went away before sending a request
+        try:
+            request = json.loads(msg.split(b"\n", 1)[0])
+            if request.get("op") != "session" or len(fds) != 3:
+                raise ValueError("expected a session request with three terminal fds")
+            if request.get("kind") not in self.prototypes:
+                raise ValueError(f"unsupported session kind: {request.get('kind')}")
+            if uid != os.geteuid() and not can_switch_users():
+                raise PermissionError("per-user daemon only serves its own user")
+        except Exception as e:
+            for fd in fds:
+                os.close(fd)
+            logger.error(f"Failed to start session: {e}")
+            self.send(conn, {"op": "error", "message": str(e)})
+            return None
+        return request, fds
+
+    @staticmethod
+    def peer_credentials(conn: socket.socket):
+        import struct
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", creds)
+
+    def run_session(self, conn, request, fds, uid, gid, history_w) -> int:
+        """Runs in the forked child: take over the client's terminal and run its shell"""
+        # Become the connecting user
+        if os.geteuid() != uid:
+            import pwd
+            user = pwd.getpwuid(uid)
+            os.setgroups(os.getgrouplist(user.pw_name, gid))
+            os.setgid(gid)
+            os.setuid(uid)
+
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", buffering=1, closefd=False)
+        sys.stderr = open(2, "w", buffering=1, closefd=False)
+
+        os.environ.clear()
+        os.environ.update(request["env"])
+        os.chdir(request["cwd"])
+
+        if request["kind"] == "linuxai":
+            app = self.prototypes["linuxai"]
+            history = self.history.get(uid, [])
+            app.prepare_session(history)  # forks this user's sandbox zygote: before any thread starts
+
+        # Relay Ctrl-C and friends from the client
+        def relay_signals():
+            for line in conn.makefile("rb"):
+                message = json.loads(line)
+                if message.get("op") == "signal":
+                    os.kill(os.getpid(), message["signal"])
+
+        threading.Thread(target=relay_signals, name="signal-relay", daemon=True).start()
+
+        if request["kind"] == "linuxai":
+            app.run()
+            new_entries = app.nlp.conversation_history[len(history):]
+        else:
+            import asyncio
+            shell = self.prototypes["ai-shell"].LinuxAIShell()
+            asyncio.run(shell.run())
+            new_entries = []
+
+        with os.fdopen(history_w, "w") as f:
+            json.dump(new_entries, f, default=str)
+        return 0
+
+    def collect_history(self, child: int, uid: int):
+        """Merge a finished session's conversation history into its user's warm history"""
+        fd = self.sessions.get(child)
+        if fd is None:
+            return
+        chunks = []
+        while True:
+            data = os.read(fd, 65536)
+            if not data:
+                break
+            chunks.append(data)
+        self.selector.unregister(fd)
+        os.close(fd)
+        del self.sessions[child]
+        try:
+            entries = json.loads(b"".join(chunks) or b"[]")
+        except ValueError:
+            entries = []
+        history = self.history.setdefault(uid, [])
+        history.extend(entries)
+        del history[:-HISTORY_LIMIT]
+        sd_daemon.notify_status(self.status_line())
+
+    def reap_sessions(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            logger.info(f"Session {pid} ended (exit code {os.waitstatus_to_exitcode(status)})")
+
+
+def main():
+    """Entry point for ai-system"""
+    parser = argparse.ArgumentParser(description="LinuxAI core system service")
+    parser.add_argument("--daemon", action="store_true", help="run the resident session daemon")
+    parser.add_argument("--socket", default=None, help="Unix socket path to listen on")
+    parser.add_argument("--config", default=CONFIG_PATH, help="configuration directory")
+    args = parser.parse_args()
+
+    if not args.daemon:
+        parser.print_help()
+        return
+
+    socket_path = args.socket or (SYSTEM_SOCKET if can_switch_users() else default_socket_path())
+    daemon = LinuxAIDaemon(socket_path, config_path=args.config)
+    daemon.warm_up()
+    daemon.listen()
+    daemon.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
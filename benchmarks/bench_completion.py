@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Predictive completion benchmark
+Replays a synthetic request history through the completion model the way a user types it, measuring suggestion
+latency, keystrokes saved and LLM requests avoided, then checks persistence and the shell's LLM bypass end to end
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from completion import CompletionModel, CompletionUI, normalize
+
+# request -> command; the shape of a real history: a few requests make up most turns
+REQUESTS = [
+    ("show disk usage", "df -h"), ("list all files", "ls -la"), ("show running processes", "ps aux"),
+    ("what is my ip address", "ip -brief addr"), ("show memory usage", "free -h"),
+    ("show the last 50 lines of syslog", "tail -n 50 /var/log/syslog"), ("check git status", "git status"),
+    ("show disk usage of /var", "du -sh /var"), ("list python files in src", "find src -name '*.py'"),
+    ("restart nginx", "sudo systemctl restart nginx"), ("show nginx status", "systemctl status nginx"),
+    ("count lines in main.py", "wc -l main.py"), ("show kernel version", "uname -r"),
+    ("list docker containers", "docker ps"), ("show open ports", "ss -tuln"),
+    ("find large files in downloads", "find ~/Downloads -size +100M"), ("show uptime", "uptime"),
+    ("compress the logs directory", "tar czf logs.tar.gz logs"), ("show cpu info", "lscpu"),
+    ("list block devices", "lsblk"), ("show environment variables", "env"),
+    ("search for error in app.log", "grep -i error app.log"), ("show who is logged in", "who"),
+    ("list installed python packages", "pip list"), ("show the date", "date"),
+    ("update package lists", "sudo apt update"), ("show failed services", "systemctl --failed"),
+    ("list files by size", "ls -lS"), ("show hidden files", "ls -a"), ("print working directory", "pwd"),
+]
+NOVEL_WORDS = ["show", "list", "find", "the", "files", "in", "logs", "of", "size", "config", "user", "service",
+               "status", "recent", "old", "backup", "directory", "disk", "network", "home", "tmp", "errors"]
+
+
+def history(turns: int, novel_rate: float, seed: int = 7):
+    """Zipf-distributed repeats of REQUESTS, mixed with one-off requests"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(REQUESTS))]
+    for _ in range(turns):
+        if rng.random() < novel_rate:
+            yield " ".join(rng.choice(NOVEL_WORDS) for _ in range(rng.randint(3, 7))), None
+        else:
+            yield rng.choices(REQUESTS, weights)[0]
+
+
+def replay(model: CompletionModel, turns: int, novel_rate: float, start: float):
+    """Type each request character by character; accept the ghost text (Tab) once it shows the request"""
+    samples, typed_total, length_total, bypassed, commands = [], 0, 0, 0, 0
+    for turn, (request, command) in enumerate(history(turns, novel_rate)):
+        accepted = None
+        for typed in range(1, len(request) + 1):
+            started = time.perf_counter()
+            suggestion = model.suggest(request[:typed])
+            samples.append((time.perf_counter() - started) * 1000)
+            if suggestion is not None and normalize(suggestion.text) == request:
+                accepted = suggestion
+                break
+        typed_total += typed + (1 if accepted is not None else 0)  # Tab is a keystroke
+        length_total += len(request)
+        if command is not None:
+            commands += 1
+            if accepted is not None and accepted.command == command:
+                bypassed += 1
+        model.learn(request, command, when=start + turn * 60)
+    return samples, 1 - typed_total / length_total, bypassed / max(1, commands)
+
+
+def fill(model: CompletionModel, entries: int, start: float):
+    """One-off requests, to measure lookups in a full model"""
+    rng = random.Random(3)
+    for i in range(entries):
+        words = " ".join(rng.choice(NOVEL_WORDS) for _ in range(rng.randint(3, 9)))
+        model.learn(f"{words} {i}", f"echo {i}" if i % 3 == 0 else None, when=start - 86400 * rng.random() * 60)
+
+
+def check_persistence(workdir: str) -> bool:
+    path = os.path.join(workdir, "completion.json")
+    first, second = CompletionModel(path), CompletionModel(path)
+    first.learn("show disk usage", "df -h")
+    first.save()
+    second.load()
+    second.learn("list block devices", "lsblk")
+    first.learn("show memory usage", "free -h")
+    second.save()
+    first.save()  # merges what the second session wrote meanwhile
+    merged = CompletionModel(path)
+    merged.load()
+    found = {e.text: e.command for e in merged.entries}
+    expected = {"show disk usage": "df -h", "list block devices": "lsblk", "show memory usage": "free -h"}
+    if found != expected or merged.entries[merged.ids["show disk usage"]].count != 1:
+        print(f"FAIL: two sessions saving should merge: {found}")
+        return False
+    return True
+
+
+class ScriptedModel:
+    def __init__(self):
+        self.requests = 0
+
+    def serve(self) -> ThreadingHTTPServer:
+        model = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send(self, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self.send({"models": [{"name": "scripted"}]})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                model.requests += 1
+                self.send({"response": "pwd", "done": True, "prompt_eval_count": 100, "eval_count": 2})
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def check_shell_bypass(workdir: str) -> bool:
+    """In the shell, the first turn asks the LLM and learns the command; accepting the suggestion later does not"""
+    from main import PROMPT, LinuxAI
+    from nlp_frontend import NLPFrontend
+
+    scripted = ScriptedModel()
+    server = scripted.serve()
+    app = LinuxAI()
+    app._nlp = NLPFrontend(ollama_host=f"http://127.0.0.1:{server.server_address[1]}", model="scripted")
+    app.completion = CompletionUI(CompletionModel(os.path.join(workdir, "shell.json")), PROMPT, ghost=False)
+    output = io.StringIO()
+    try:
+        with redirect_stdout(output):
+            app.handle_input("print the working directory")
+            app.completion.begin_input()
+            suggestion = app.completion.suggest("print the w")
+            app.completion.end_input(suggestion.text if suggestion else "")
+            if suggestion is not None:
+                app.handle_input(suggestion.text)
+    finally:
+        server.shutdown()
+        if app._orchestrator is not None:
+            app._orchestrator.shutdown()
+    ok = suggestion is not None and suggestion.command == "pwd" and scripted.requests == 1 and \
+        output.getvalue().count("✅ Command executed") == 2 and "⚡ From your history: pwd" in output.getvalue()
+    if not ok:
+        print(f"FAIL: accepted suggestion should run pwd without an LLM request "
+              f"({scripted.requests} requests):\n{output.getvalue()}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--novel-rate", type=float, default=0.2)
+    parser.add_argument("--entries", type=int, default=5000, help="one-off requests already in the model")
+    parser.add_argument("--max-ms", type=float, default=5.0, help="budget for one suggestion")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.time() - 30 * 86400
+        model = CompletionModel(os.path.join(workdir, "model.json"))
+        fill(model, args.entries, start)
+        samples, saved, bypassed = replay(model, args.turns, args.novel_rate, start)
+        samples.sort()
+        p99 = samples[int(len(samples) * 0.99)]
+        print(f"{len(samples)} suggestions over {args.turns} turns with {model.stats['entries']} requests in the model")
+        print(f"{'suggest()':<40} p50 {statistics.median(samples):8.3f} ms   p99 {p99:8.3f} ms   "
+              f"max {samples[-1]:8.3f} ms")
+        print(f"keystrokes saved: {saved:.0%}; repeated requests answered without the LLM: {bypassed:.0%}")
+        started = time.perf_counter()
+        model.dirty = True
+        model.save()
+        save_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        CompletionModel(model.path).load()
+        print(f"save {save_ms:.0f} ms, load {(time.perf_counter() - started) * 1000:.0f} ms "
+              f"({os.path.getsize(model.path) / 1e3:.0f} kB)")
+        if p99 > args.max_ms:
+            print(f"FAIL: suggestion p99 {p99:.2f} ms over the {args.max_ms} ms budget")
+            failed = True
+        if bypassed < 0.5 or saved < 0.3:
+            print("FAIL: the model should complete most repeated requests")
+            failed = True
+        if check_persistence(workdir) & check_shell_bypass(workdir):
+            print("persistence: sessions merge on save; shell: accepted suggestion ran pwd without an LLM request")
+        else:
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Working directory context benchmark
+Builds a project directory with a git repository, checks the snapshot's content, token budget and cache
+invalidation, and times cold and cached snapshots against gathering the same facts with ls and git per turn
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cwd_context import CwdContext, estimate_tokens
+
+
+def measure(label: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<40} p50 {statistics.median(samples):8.3f} ms   max {max(samples):8.3f} ms")
+    return statistics.median(samples)
+
+
+def make_project(root: str, files: int):
+    os.makedirs(os.path.join(root, "src"))
+    os.makedirs(os.path.join(root, "logs"))
+    with open(os.path.join(root, "pyproject.toml"), "w") as f:
+        f.write("[project]\nname = 'demo'\n")
+    for i in range(files):
+        with open(os.path.join(root, "src" if i % 2 else "", f"module_{i}.py"), "w") as f:
+            f.write("x = 1\n" * (i + 1))
+    for i in range(5):
+        path = os.path.join(root, f"app-{i}.log")
+        with open(path, "w") as f:
+            f.write("line\n" * 1000)
+        os.utime(path, (time.time() - 86400 * (30 + i),) * 2)
+    git = ["git", "-C", root, "-c", "user.name=bench", "-c", "user.email=bench@localhost"]
+    subprocess.run(git + ["init", "-q", "-b", "main"], check=True)
+    subprocess.run(git + ["add", "."], check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "initial"], check=True)
+    with open(os.path.join(root, "module_0.py"), "a") as f:
+        f.write("y = 2\n")
+    open(os.path.join(root, "notes.txt"), "w").close()
+
+
+def check(root: str) -> bool:
+    ok = True
+    context = CwdContext()
+    text = context.render(root)
+    for expected in ("Python project", "git branch main: 1 modified, 1 untracked", "M module_0.py",
+                     "?? notes.txt", "File types:", ".py", "notes.txt (0,"):
+        if expected not in text:
+            print(f"FAIL: snapshot lacks {expected!r}:\n{text}")
+            ok = False
+    for budget in (40, 80, 160, 400):
+        rendered = context.render(root, max_tokens=budget)
+        if estimate_tokens(rendered) > budget or not rendered.startswith("Current directory:"):
+            print(f"FAIL: {estimate_tokens(rendered)} tokens rendered for a budget of {budget}:\n{rendered}")
+            ok = False
+
+    scans = context.stats["scans"]
+    context.render(root)
+    if context.stats["scans"] != scans:
+        print("FAIL: an unchanged directory was rescanned")
+        ok = False
+    open(os.path.join(root, "config.yaml"), "w").close()
+    text = context.render(root)
+    if context.stats["scans"] != scans + 1 or "config.yaml" not in text:
+        print(f"FAIL: a new file should trigger one rescan and show up first:\n{text}")
+        ok = False
+    subprocess.run(["git", "-C", root, "add", "config.yaml"], check=True)
+    text = context.render(root)
+    if "A config.yaml" not in text or "1 staged" not in text:
+        print(f"FAIL: git add should show through the index mtime:\n{text}")
+        ok = False
+    with open(os.path.join(root, "module_0.py"), "a") as f:
+        f.write("z = 3\n")  # written in place: no mtime the cache watches moves
+    context.invalidate()
+    if context.render(root) == text:
+        print("FAIL: invalidate() should refresh sizes and ages")
+        ok = False
+    if ok:
+        print("snapshot: project type, git branch and changes, types, budgets and invalidation correct")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=400)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--max-cached-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    if shutil.which("git") is None:
+        print("git is needed for this benchmark")
+        sys.exit(1)
+    workdir = tempfile.mkdtemp(prefix="linuxai-cwd-")
+    try:
+        root = os.path.join(workdir, "project")
+        make_project(root, args.files)
+        failed = not check(root)
+
+        context = CwdContext()
+        print(context.render(root))
+        measure("cold snapshot (scan + git status)", lambda: CwdContext().render(root), args.iterations // 10)
+        cached = measure("cached snapshot (per turn)", lambda: context.render(root), args.iterations)
+        measure("ls -la + git status per turn", lambda: (
+            subprocess.run(["ls", "-la", root], capture_output=True),
+            subprocess.run(["git", "-C", root, "status", "--porcelain", "-b"], capture_output=True)),
+            args.iterations // 10)
+        if cached > args.max_cached_ms:
+            print(f"FAIL: cached snapshot p50 {cached:.3f} ms (budget {args.max_cached_ms} ms)")
+            failed = True
+    finally:
+        shutil.rmtree(workdir)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Daemon service-manager benchmark
+Runs ai_daemon.py the way systemd does (a pre-bound socket via LISTEN_FDS/LISTEN_PID and a NOTIFY_SOCKET datagram socket), checks the READY/RELOADING/STATUS protocol and that a bad policy.json is rejected on SIGHUP, then measures reload latency
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import sd_daemon
+
+POLICY = {"safe_commands": ["ls", "df"], "blocked_commands": ["mkfs"]}
+
+
+class NotifyListener:
+    """Stands in for systemd's end of $NOTIFY_SOCKET"""
+
+    def __init__(self, path: str):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(path)
+
+    def expect(self, state: str, timeout: float = 30.0) -> dict:
+        """Wait for a message carrying state (e.g. "READY=1") and return all of its fields"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise AssertionError(f"timed out waiting for {state}")
+            self.sock.settimeout(remaining)
+            try:
+                data = self.sock.recv(4096).decode()
+            except socket.timeout:
+                continue
+            fields = dict(line.split("=", 1) for line in data.split("\n") if "=" in line)
+            if state in data.split("\n"):
+                return fields
+
+    def close(self):
+        self.sock.close()
+
+
+def check_helpers(workdir: str):
+    """sd_daemon on its own: no manager, a manager, and fds meant for another process"""
+    os.environ.pop("NOTIFY_SOCKET", None)
+    assert sd_daemon.notify_ready() is False
+
+    notify = NotifyListener(os.path.join(workdir, "helper-notify"))
+    os.environ["NOTIFY_SOCKET"] = notify.sock.getsockname()
+    try:
+        assert sd_daemon.notify_reloading("Reloading")
+        fields = notify.expect("RELOADING=1", timeout=1)
+        assert fields["STATUS"] == "Reloading", fields
+        assert abs(int(fields["MONOTONIC_USEC"]) - time.monotonic_ns() // 1000) < 1_000_000, fields
+    finally:
+        del os.environ["NOTIFY_SOCKET"]
+        notify.close()
+
+    os.environ.update(LISTEN_PID="1", LISTEN_FDS="1")
+    assert sd_daemon.listen_fds() == [], "fds for another pid must be ignored"
+    assert "LISTEN_FDS" not in os.environ
+
+
+def send_request(path: str, request: dict) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(10)
+        conn.connect(path)
+        conn.sendall(json.dumps(request).encode() + b"\n")
+        return json.loads(conn.makefile().readline())
+
+
+def write_policy(config_dir: str, text: str):
+    with open(os.path.join(config_dir, "policy.json"), "w") as f:
+        f.write(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    daemon = None
+    try:
+        check_helpers(workdir)
+
+        config_dir = os.path.join(workdir, "config")
+        os.mkdir(config_dir)
+        write_policy(config_dir, json.dumps(POLICY))
+
+        notify = NotifyListener(os.path.join(workdir, "notify"))
+        socket_path = os.path.join(workdir, "ai-system.sock")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(socket_path)
+        listener.listen(8)
+
+        # Like systemd: the listener is fd 3 and LISTEN_PID is the daemon's own pid after exec
+        env = dict(os.environ, NOTIFY_SOCKET=notify.sock.getsockname(), LISTEN_FDS="1")
+        started = time.perf_counter()
+        daemon = subprocess.Popen(
+            ["sh", "-c", f'LISTEN_PID=$$ exec "$0" "$1" --daemon --config "$2" 3<&{listener.fileno()}',
+             sys.executable, os.path.join(ROOT, "ai_daemon.py"), config_dir],
+            env=env, pass_fds=(listener.fileno(),), stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        listener.close()
+
+        ready = notify.expect("READY=1")
+        print(f"READY=1 after {(time.perf_counter() - started) * 1000:.0f} ms: {ready.get('STATUS')}")
+        assert ready.get("STATUS", "").startswith("Serving"), ready
+
+        # The pre-bound socket is the one being served, not a socket the daemon made itself
+        reply = send_request(socket_path, {"op": "ping"})
+        assert reply["op"] == "error" and "session request" in reply["message"], reply
+
+        write_policy(config_dir, '{"safe_commands": "ls"}')
+        daemon.send_signal(signal.SIGHUP)
+        reloading = notify.expect("RELOADING=1")
+        assert "MONOTONIC_USEC" in reloading and reloading.get("STATUS"), reloading
+        rejected = notify.expect("READY=1")
+        assert rejected.get("STATUS", "").startswith("Reload failed"), rejected
+        print(f"bad policy.json rejected: {rejected['STATUS']}")
+        assert daemon.poll() is None, "a bad config must not stop the daemon"
+
+        write_policy(config_dir, json.dumps(POLICY))
+        samples = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            daemon.send_signal(signal.SIGHUP)
+            notify.expect("RELOADING=1")
+            reloaded = notify.expect("READY=1")
+            samples.append((time.perf_counter() - start) * 1000)
+            assert reloaded.get("STATUS", "").startswith("Serving"), reloaded
+        print(f"{'SIGHUP -> READY=1':<28} p50 {statistics.median(samples):8.2f} ms   max {max(samples):8.2f} ms")
+
+        daemon.send_signal(signal.SIGTERM)
+        notify.expect("STOPPING=1")
+        assert daemon.wait(timeout=10) == 0, daemon.returncode
+        assert os.path.exists(socket_path), "a socket-activated daemon must leave the socket to systemd"
+        notify.close()
+    except AssertionError as e:
+        print(f"FAIL: {e}")
+        sys.exit(1)
+    finally:
+        if daemon is not None and daemon.poll() is None:
+            daemon.kill()
+            daemon.wait()
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
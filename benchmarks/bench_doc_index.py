@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Documentation index benchmark
+Checks man page parsing and incremental refresh on fixture pages, then builds the index over
+this system's man pages and times queries and the retrieval hit rate for common questions
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from doc_index import DocIndex, MAN_DIRS
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "man")
+
+# question -> commands that answer it (any of them in the top 3 counts as a hit)
+QUESTIONS = {
+    "show disk usage of a directory in human readable sizes": {"du"},
+    "find files modified in the last day": {"find"},
+    "extract a tar.gz archive": {"tar"},
+    "count lines in a file": {"wc"},
+    "show the last 20 lines of a log file": {"tail"},
+    "replace text in a file": {"sed"},
+    "sort lines numerically": {"sort"},
+    "compress a file with gzip": {"gzip"},
+    "print the current working directory": {"pwd"},
+    "change file permissions": {"chmod"},
+    "search for a pattern in files recursively": {"grep", "rgrep"},
+    "show free memory": {"free"},
+    "list running processes": {"ps", "top", "pgrep"},
+    "kill a process by name": {"pkill", "killall"},
+    "copy a directory recursively": {"cp", "rsync"},
+    "create a symbolic link": {"ln"},
+    "show the first lines of a file": {"head"},
+    "remove duplicate lines": {"uniq"},
+    "change the owner of a file": {"chown"},
+    "show free disk space on filesystems": {"df"},
+    "download a file from a url": {"wget", "curl"},
+    "list block devices": {"lsblk"},
+    "rename a file": {"mv", "rename"},
+    "delete an empty directory": {"rmdir"},
+    "create a directory and its parents": {"mkdir"},
+}
+
+
+def measure(label: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<40} p50 {statistics.median(samples):8.2f} ms   max {max(samples):8.2f} ms")
+    return result
+
+
+def check_fixtures(workdir: str) -> bool:
+    """man(7), mdoc(7), asciidoctor and .so pages parse; rewriting one page re-parses only that page"""
+    pages = os.path.join(workdir, "man")
+    shutil.copytree(FIXTURES, pages)
+    status = os.path.join(workdir, "status")
+    open(status, "w").close()
+    index = DocIndex(os.path.join(workdir, "docs.bin"), man_dirs=[os.path.join(pages, "man1"),
+                     os.path.join(pages, "man8")], help_commands=(), status_path=status)
+    index.build(incremental=False)
+    ok = True
+    expected = {
+        "frob": ["frob - frobnicate files in place",
+                 "-r, --recursive: frobnicate directories and their contents recursively"],
+        "quux": ["quux - count the blank lines of text files", "-a: Also count lines holding only whitespace."],
+        "zapdisk": ["zapdisk - wipe the partition table of a block device",
+                    "-f, --force: Wipe the device even when one of its partitions is mounted."],
+    }
+    for command, passages in expected.items():
+        doc = index.doc_id(command)
+        found = index.base.passages(doc) if doc is not None else []
+        missing = [p for p in passages if p not in found]
+        if missing:
+            print(f"FAIL: {command} lacks passages {missing}; parsed {found}")
+            ok = False
+    if index.doc_id("unfrob") != index.doc_id("frob") or index.base.n_docs != 3:
+        print("FAIL: the .so page should be an alias of frob, not a document of its own")
+        ok = False
+    top = index.search("wipe it even when mounted", limit=1)
+    if not top or top[0]["command"] != "zapdisk" or "--force" not in top[0]["text"]:
+        print(f"FAIL: option search returned {top}")
+        ok = False
+
+    if index.refresh() != 0:
+        print("FAIL: refresh without changes re-parsed pages")
+        ok = False
+    # Replace one page the way dpkg does: write a new file and rename it over the old one
+    page = os.path.join(pages, "man1", "quux.1")
+    with open(page) as f:
+        source = f.read().replace("Also count lines holding only whitespace.",
+                                  "Also count lines holding only whitespace or tabs.")
+    with open(page + ".dpkg-new", "w") as f:
+        f.write(source)
+    os.replace(page + ".dpkg-new", page)
+    parsed = index.refresh()
+    if parsed != 1 or index.stats["reused"] != 3 or \
+            "-a: Also count lines holding only whitespace or tabs." not in index.base.passages(index.doc_id("quux")):
+        print(f"FAIL: refresh after one changed page: {parsed} parsed, {index.stats}")
+        ok = False
+    index.close()
+    if ok:
+        print("fixtures: man, mdoc, asciidoctor and .so pages parsed; one changed page -> 1 re-parsed")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=20.0, help="query budget passed to context()")
+    parser.add_argument("--min-hit-rate", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        failed = not check_fixtures(workdir)
+        if not any(os.path.isdir(d) for d in MAN_DIRS):
+            print("no man pages installed; skipping the system index")
+            sys.exit(1 if failed else 0)
+
+        index = DocIndex(os.path.join(workdir, "system.bin"))
+        index.build(incremental=False)
+        base = index.base
+        print(f"system: {base.n_docs} commands, {base.n_passages} passages, {base.n_terms} terms, "
+              f"{os.path.getsize(index.path) / 1e6:.1f} MB, built in {index.stats['build_ms'] / 1000:.1f} s")
+        start = time.perf_counter()
+        index.refresh()
+        print(f"refresh without changes: {(time.perf_counter() - start) * 1000:.2f} ms")
+        start = time.perf_counter()
+        index.build(incremental=True)
+        print(f"incremental rebuild (all reused): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        questions = {q: commands for q, commands in QUESTIONS.items() if any(index.doc_id(c) is not None
+                                                                              for c in commands)}
+        samples, hits = [], 0
+        for question, commands in questions.items():
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                index.context(question, budget_ms=args.budget_ms)
+                samples.append((time.perf_counter() - start) * 1000)
+            top = [command for command, _ in index.relevant_commands(question, budget_ms=args.budget_ms)]
+            hits += bool(commands & set(top))
+        p50 = statistics.median(samples)
+        print(f"{'context() per question':<40} p50 {p50:8.2f} ms   max {max(samples):8.2f} ms")
+        measure("search('compress a file with gzip')", lambda: index.search("compress a file with gzip"),
+                args.iterations)
+        rate = hits / max(1, len(questions))
+        print(f"hit@3: {hits}/{len(questions)} questions ({rate:.0%})")
+        if p50 > args.budget_ms:
+            print(f"FAIL: context() p50 {p50:.1f} ms over the {args.budget_ms} ms budget")
+            failed = True
+        if rate < args.min_hit_rate:
+            print(f"FAIL: hit@3 {rate:.0%} below {args.min_hit_rate:.0%}")
+            failed = True
+        index.close()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
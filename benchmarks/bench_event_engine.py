@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Event engine benchmark
+Checks inotify, pidfd, threshold and coalescing/rate-limiting delivery with synthetic files and child processes, then measures emit-to-delivery latency
+"""
+
+import argparse
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "distro-dev", "src", "ai-core"))
+
+from ai_core.event_engine import EventEngine, SystemEvent, describe_event
+
+
+def measure(label: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<28} p50 {statistics.median(samples):8.2f} ms   max {max(samples):8.2f} ms")
+
+
+def collect(engine: EventEngine, until, timeout: float = 5.0):
+    """Dispatch until until(events) holds for everything delivered so far"""
+    events = []
+    engine.subscribe(events.extend)
+    deadline = time.monotonic() + timeout
+    while not until(events) and time.monotonic() < deadline:
+        engine.dispatch(0.05)
+    return events
+
+
+def check_inotify():
+    workdir = tempfile.mkdtemp()
+    engine = EventEngine(batch_window=0.05, rate_limit=0)
+    try:
+        engine.watch_path(workdir)
+        path = os.path.join(workdir, "notes.txt")
+        with open(path, "w") as f:
+            f.write("hello\n")
+        events = collect(engine, lambda events: any("written" in e.data["events"] for e in events))
+        files = [e for e in events if e.kind == "file" and e.key == path]
+        assert files, events
+        seen = {name for e in files for name in e.data["events"]}
+        assert {"created", "written"} <= seen, seen
+        print(f"  {describe_event(files[0])}")
+    finally:
+        engine.close()
+        shutil.rmtree(workdir)
+
+
+def check_process_exit():
+    engine = EventEngine(batch_window=0.05, rate_limit=0)
+    exited = subprocess.Popen([sys.executable, "-c", "import sys; sys.exit(3)"])
+    killed = subprocess.Popen(["sleep", "60"])
+    try:
+        assert engine.watch_process(exited.pid, "exit3")
+        assert engine.watch_process(killed.pid, "sleep")
+        killed.send_signal(signal.SIGKILL)
+        events = collect(engine, lambda events: len(events) >= 2)
+        by_pid = {e.data["pid"]: e.data for e in events if e.kind == "process_exit"}
+        assert by_pid[exited.pid]["returncode"] == 3 and by_pid[exited.pid]["crashed"] is False, by_pid
+        assert by_pid[killed.pid]["returncode"] == -signal.SIGKILL and by_pid[killed.pid]["crashed"] is True, by_pid
+        for event in events:
+            print(f"  {describe_event(event)}")
+    finally:
+        engine.close()
+        for child in (exited, killed):
+            child.kill()
+            child.wait()
+
+    # WNOWAIT leaves the child for its owner: Popen must still get the real status
+    assert exited.returncode == 3 and killed.returncode == -signal.SIGKILL
+
+    engine = EventEngine(batch_window=0.05, rate_limit=0)
+    child = subprocess.Popen([sys.executable, "-c", "import sys; sys.exit(3)"])
+    try:
+        engine.watch_process(child.pid, crashes_only=True)
+        events = collect(engine, lambda events: False, timeout=0.5)
+        assert not events, "crashes_only should not report a normal exit"
+    finally:
+        engine.close()
+        child.wait()
+
+
+def check_threshold():
+    engine = EventEngine(batch_window=0.01, rate_limit=0)
+    readings = iter([50.0, 5.0, 4.0, 11.0, 50.0, 3.0])
+    probe = lambda: next(readings, 50.0)
+    closed = []
+    engine.watch_threshold("low_disk", "/bench", probe, 10.0, interval=0.02,
+                           close=lambda: closed.append(True))
+    try:
+        events = collect(engine, lambda events: len(events) >= 2)
+        values = [e.data["value"] for e in events]
+        # 4.0 stays triggered and 11.0 is inside the hysteresis band; only 50.0 re-arms
+        assert values == [5.0, 3.0], values
+    finally:
+        engine.close()
+    assert closed, "close() should run the probe's closer"
+
+
+def check_coalescing():
+    engine = EventEngine(batch_window=0.05, rate_limit=0.3)
+    try:
+        batches = []
+        engine.subscribe(batches.append)
+        for n in range(100):
+            engine.emit(SystemEvent("file", "/var/log/app.log", {"events": ["modified"], "n": n}))
+        engine.emit(SystemEvent("device", "sdb", {"action": "add"}))
+        deadline = time.monotonic() + 1.0
+        while not batches and time.monotonic() < deadline:
+            engine.dispatch(0.05)
+        assert len(batches) == 1 and len(batches[0]) == 2, batches
+        merged = next(e for e in batches[0] if e.kind == "file")
+        assert merged.count == 100 and merged.data["n"] == 99, merged
+
+        # A repeat inside the rate limit is held back, then delivered once the limit passes
+        start = time.monotonic()
+        engine.emit(SystemEvent("file", "/var/log/app.log", {"events": ["modified"]}))
+        while len(batches) < 2 and time.monotonic() - start < 2.0:
+            engine.dispatch(0.05)
+        delay = time.monotonic() - start
+        assert len(batches) == 2 and delay >= 0.2, f"delivered after {delay:.2f}s"
+        print(f"  {engine.stats['raw_events']} raw events delivered as {engine.stats['delivered_events']} "
+              f"in {engine.stats['batches']} batches; repeat held back {delay * 1000:.0f} ms")
+    finally:
+        engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    for check in (check_inotify, check_process_exit, check_threshold, check_coalescing):
+        try:
+            check()
+        except AssertionError as e:
+            print(f"FAIL: {check.__name__}: {e}")
+            sys.exit(1)
+        print(f"ok   {check.__name__}")
+
+    engine = EventEngine(batch_window=0.001, rate_limit=0)
+    delivered = []
+    engine.subscribe(delivered.extend)
+
+    def round_trip():
+        count = len(delivered)
+        engine.emit(SystemEvent("bench", str(count)))
+        while len(delivered) == count:
+            engine.dispatch(0.1)
+
+    try:
+        measure("emit -> subscriber", round_trip, args.iterations)
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Few-shot selection benchmark
+Offline accuracy of the prompt's examples on requests phrased unlike any stored example: how often an example uses the
+expected program, how often the nearest example alone predicts it, and the prompt tokens spent, for the four fixed
+examples against dynamic selection. With --ollama, also compares the commands a model generates with either prompt.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from few_shot import EXAMPLES, ExampleStore, estimate_tokens
+
+# request -> programs a correct answer starts with; no request appears verbatim in EXAMPLES
+EVALUATION = [
+    ("which folders take up the most room here", {"du"}),
+    ("how much space is left on my drives", {"df"}),
+    ("print the path of the directory I am in", {"pwd"}),
+    ("display everything in this folder including dotfiles", {"ls"}),
+    ("newest files first", {"ls"}),
+    ("make a directory named projects", {"mkdir"}),
+    ("look for all markdown files under docs", {"find"}),
+    ("files bigger than 1GB in /var", {"find", "du"}),
+    ("what changed in the last hour in this folder", {"find", "ls"}),
+    ("print the top 10 lines of README.md", {"head"}),
+    ("last lines of the nginx error log", {"tail"}),
+    ("keep watching the output of server.log", {"tail"}),
+    ("how many lines does setup.py have", {"wc"}),
+    ("grep for the string timeout in all yaml files", {"grep"}),
+    ("which files mention the api key", {"grep"}),
+    ("sort the scores file from highest to lowest", {"sort"}),
+    ("get rid of repeated lines in emails.txt", {"sort", "uniq"}),
+    ("pack the build directory into an archive", {"tar", "zip"}),
+    ("unpack release.tar.gz", {"tar"}),
+    ("what's inside backup.tar.gz", {"tar"}),
+    ("unzip the file assets.zip", {"unzip"}),
+    ("which programs are using the most ram", {"ps", "top"}),
+    ("is postgres running", {"pgrep", "ps", "systemctl"}),
+    ("stop every chrome process", {"killall", "pkill"}),
+    ("how much memory is free", {"free"}),
+    ("system uptime", {"uptime"}),
+    ("what is listening on port 443", {"lsof", "ss"}),
+    ("which linux kernel am i running", {"uname"}),
+    ("what processor does this machine have", {"lscpu"}),
+    ("show my disks and their partitions", {"lsblk", "fdisk"}),
+    ("what ubuntu version is installed", {"cat", "lsb_release"}),
+    ("who am i logged in as", {"whoami"}),
+    ("is the docker service up", {"systemctl"}),
+    ("restart the ssh daemon", {"sudo", "systemctl"}),
+    ("show journal entries for cron from today", {"journalctl"}),
+    ("what is my machine's address on the network", {"ip", "hostname"}),
+    ("list open tcp ports", {"ss", "netstat"}),
+    ("check if example.org is reachable", {"ping"}),
+    ("download the installer from https://example.com/setup.sh", {"wget", "curl"}),
+    ("refresh the apt package index", {"sudo", "apt"}),
+    ("install the curl package", {"sudo", "apt"}),
+    ("what changed in my git repo", {"git"}),
+    ("show containers that are running", {"docker"}),
+    ("make build.sh runnable", {"chmod"}),
+    ("give www-data ownership of the uploads folder", {"sudo", "chown"}),
+]
+
+
+class FixedExamples(ExampleStore):
+    """The prompt before: the same four examples for every request"""
+
+    def select(self, request, k=4, max_tokens=0, min_score=0.0):
+        return self.examples[:4]
+
+
+def program(command: str) -> str:
+    return command.split()[0] if command.split() else ""
+
+
+def evaluate(store: ExampleStore, k: int, max_tokens: int):
+    covered = predicted = 0
+    tokens, timings = [], []
+    for request, expected in EVALUATION:
+        started = time.perf_counter()
+        block = store.render(request, k, max_tokens)
+        timings.append((time.perf_counter() - started) * 1000)
+        chosen = store.select(request, k, max_tokens)
+        covered += any(program(e.command) in expected for e in chosen)
+        predicted += program(chosen[0].command) in expected
+        tokens.append(estimate_tokens(block))
+    n = len(EVALUATION)
+    return {"coverage": covered / n, "top1": predicted / n, "tokens": statistics.mean(tokens),
+            "max_tokens": max(tokens), "ms": statistics.median(timings)}
+
+
+def evaluate_model(store: ExampleStore, host: str, model: str, k: int, max_tokens: int):
+    """Fraction of EVALUATION requests the model answers with an expected program"""
+    from nlp_frontend import NLPFrontend
+
+    nlp = NLPFrontend(ollama_host=host, model=model)
+    nlp.few_shot, nlp.few_shot_k, nlp.few_shot_tokens = store, k, max_tokens
+    correct = 0
+    for request, expected in EVALUATION:
+        result = nlp.parse_llm_response(nlp.send_prompt_to_llm(request) or "")
+        correct += result["type"] == "command" and program(result["command"]) in expected
+    return correct / len(EVALUATION)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=45)
+    parser.add_argument("--ollama", metavar="URL", help="also generate commands with this Ollama server")
+    parser.add_argument("--model", default="llama3.2:1b")
+    args = parser.parse_args()
+
+    leaked = {request for request, _ in EVALUATION} & {request for request, _ in EXAMPLES}
+    if leaked:
+        print(f"FAIL: evaluation requests also stored as examples: {leaked}")
+        sys.exit(1)
+    fixed, dynamic = FixedExamples(EXAMPLES), ExampleStore()
+    results = {"fixed": evaluate(fixed, 4, 0), "dynamic": evaluate(dynamic, args.k, args.max_tokens)}
+    print(f"{len(EVALUATION)} requests, {len(dynamic.examples)} stored examples")
+    for name, r in results.items():
+        print(f"{name:<8} example uses expected program {r['coverage']:5.0%}   nearest example predicts it "
+              f"{r['top1']:5.0%}   examples {r['tokens']:5.1f} tokens (max {r['max_tokens']})   "
+              f"select p50 {r['ms']:.3f} ms")
+
+    if args.ollama:
+        for name, store in (("fixed", fixed), ("dynamic", dynamic)):
+            print(f"{name:<8} {args.model} answers with an expected program "
+                  f"{evaluate_model(store, args.ollama, args.model, args.k, args.max_tokens):5.0%}")
+
+    failed = False
+    if results["dynamic"]["coverage"] <= results["fixed"]["coverage"]:
+        print("FAIL: dynamic examples should cover more requests than the fixed ones")
+        failed = True
+    if results["dynamic"]["tokens"] >= results["fixed"]["tokens"]:
+        print("FAIL: dynamic examples should cost fewer prompt tokens than the fixed ones")
+        failed = True
+    if results["dynamic"]["max_tokens"] > args.max_tokens + 10:  # + the "Examples:" header
+        print(f"FAIL: an examples block exceeded the {args.max_tokens} token budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Filename index benchmark
+Builds the index over a generated tree, checks queries against find, then measures query latency and incremental refresh
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_index import FileIndex
+
+
+def measure(label: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<36} p50 {statistics.median(samples):8.2f} ms   max {max(samples):8.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--directories", type=int, default=2000)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--max-query-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="linuxai-index-bench-")
+    root = os.path.join(tmp, "home")
+    suffixes = (".py", ".txt", ".pdf", ".jpg", ".md")
+    for d in range(args.directories):
+        path = os.path.join(root, f"project{d % 20}", f"module{d % 113}", f"pkg{d}")
+        os.makedirs(path, exist_ok=True)
+        for i in range(args.files):
+            open(os.path.join(path, f"item{i}_{d}{suffixes[i % len(suffixes)]}"), "w").close()
+    failed = False
+    try:
+        index = FileIndex(root, os.path.join(tmp, "index.bin"))
+        measure("build (full walk + write)", index.build, 1)
+        print(f"  {len(index)} paths, {os.path.getsize(index.path) / 1048576:.1f} MB on disk")
+        measure("load (mmap)", lambda: FileIndex(root, index.path).load(), args.iterations)
+
+        queries = (("item7_1", "substring", "-name '*item7_1*'"), ("*_19.pdf", "glob", "-name '*_19.pdf'"),
+                   ("jpg", "ext", "-name '*.jpg'"))
+        for pattern, mode, find_args in queries:
+            expected = subprocess.run(f"find {root} -mindepth 1 {find_args}", shell=True,
+                                      capture_output=True, text=True).stdout.split()
+            measure(f"find {find_args}", lambda: subprocess.run(
+                f"find {root} {find_args}", shell=True, capture_output=True), 3)
+            paths, total = measure(f"index {mode} {pattern} (all paths)",
+                                   lambda: index.search(pattern, mode, limit=len(expected)), 3)
+            if sorted(paths) != sorted(expected):
+                print(f"FAIL: {mode} {pattern} found {total} paths, find found {len(expected)}")
+                failed = True
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                index.search(pattern, mode)
+            per_query = (time.perf_counter() - start) * 1000 / args.iterations
+            print(f"{f'index {mode} {pattern} (first 50)':<36} mean {per_query:7.2f} ms")
+            if per_query > args.max_query_ms:
+                print(f"FAIL: {mode} {pattern} took {per_query:.1f} ms (budget {args.max_query_ms} ms)")
+                failed = True
+
+        # Change a few directories and pick the changes up by mtime
+        changed = os.path.join(root, "project3", "module3", "pkg3")
+        open(os.path.join(changed, "fresh_report.pdf"), "w").close()
+        os.remove(os.path.join(changed, "item0_3.py"))
+        os.makedirs(os.path.join(root, "project4", "new_dir", "deeper"))
+        open(os.path.join(root, "project4", "new_dir", "deeper", "fresh_notes.md"), "w").close()
+        rescanned = measure("refresh after 3 changed directories", index.refresh, 1)
+        print(f"  rescanned {rescanned} directories")
+        paths, _ = index.search("fresh_")
+        if len(paths) != 2 or index.search("item0_3.py")[1] != 0:
+            print(f"FAIL: refresh missed changes: {paths}")
+            failed = True
+        measure("refresh with nothing changed", index.refresh, 3)
+        index.close()
+    finally:
+        shutil.rmtree(tmp)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Filesystem tools benchmark
+Compares find/du subprocesses with the native parallel walker on a tree (default: a generated one), checking they agree
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fs_tools import find_large_files, run_native
+
+
+def measure(label: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<40} p50 {statistics.median(samples):8.1f} ms   max {max(samples):8.1f} ms")
+    return result
+
+
+def build_tree(root: str, directories: int, files: int):
+    """directories spread over three levels, each with files of varied size and suffix"""
+    suffixes = (".py", ".txt", ".log", ".json")
+    for d in range(directories):
+        path = os.path.join(root, f"d{d % 10}", f"e{d % 97}", f"f{d}")
+        os.makedirs(path, exist_ok=True)
+        for i in range(files):
+            with open(os.path.join(path, f"file{i}{suffixes[i % len(suffixes)]}"), "wb") as f:
+                f.write(b"x" * ((i * 7919 + d) % 20000))
+    with open(os.path.join(root, "big.bin"), "wb") as f:
+        f.truncate(5 * 1024 * 1024)  # sparse: large apparent size, no disk usage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=5)
+    parser.add_argument("--root", help="existing tree to walk instead of a generated one")
+    parser.add_argument("--directories", type=int, default=1000)
+    parser.add_argument("--files", type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = None
+    root = args.root
+    if root is None:
+        tmp = root = tempfile.mkdtemp(prefix="linuxai-fs-bench-")
+        build_tree(root, args.directories, args.files)
+        print(f"generated {args.directories} directories x {args.files} files in {root}")
+    failed = False
+    try:
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        for command in (f"find {root} -name '*.py'", f"find {root} -type f -size +1M", f"du -sh {root}"):
+            expected = measure(f"subprocess: {command.replace(root, 'ROOT')}", lambda: subprocess.run(
+                command, shell=True, capture_output=True, text=True).stdout, args.iterations)
+            native = measure(f"native:     {command.replace(root, 'ROOT')}",
+                             lambda: run_native(command)["stdout"], args.iterations)
+            if sorted(expected.splitlines()) != sorted(native.splitlines()):
+                print(f"FAIL: output differs for {command}")
+                failed = True
+
+        largest = measure("native: 10 largest files", lambda: find_large_files([root], 10, 0), args.iterations)
+        print(f"  largest: {largest[0].path.replace(root, 'ROOT')} ({largest[0].size} bytes)")
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+        print(f"peak RSS growth during native walks: {rss_growth / 1024:.1f} MB")
+    finally:
+        if tmp is not None:
+            shutil.rmtree(tmp)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Install planner benchmark
+Plans installs against the fixture repository (no network), checks closure, order and schedule, then times planning on a synthetic archive
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from install_planner import InstallPlanner, parse_install_command, schedule_downloads
+from package_index import PackageIndex
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+DOCKER_CLOSURE = {
+    "docker.io", "containerd", "runc", "tini", "libseccomp2", "iptables", "libip4tc2", "libip6tc2", "libxtables12",
+    "libmnl0", "libnetfilter-conntrack3", "libnfnetlink0", "libnftnl11", "libdevmapper1.02.1", "dmsetup",
+}
+
+
+def measure(label: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<40} p50 {statistics.median(samples):8.2f} ms   max {max(samples):8.2f} ms")
+    return result
+
+
+def check_order(plan) -> bool:
+    """Every package comes after the selected packages it depends on, unless they share a cycle group"""
+    position = {name: i for i, group in enumerate(plan.install_order) for name in group}
+    for name, record in plan.selected.items():
+        for relation in record.relations():
+            for target, _, _ in relation:
+                if target in position and position[target] > position[name]:
+                    print(f"FAIL: {name} is installed before its dependency {target}")
+                    return False
+    return True
+
+
+def check_fixtures() -> bool:
+    index = PackageIndex(os.path.join(FIXTURES, "dpkg", "status"), os.path.join(FIXTURES, "apt", "lists"),
+                         os.path.join(FIXTURES, "dpkg", "updates"), arch="amd64")
+    ok = True
+    request = parse_install_command("sudo apt-get install -y --no-install-recommends docker.io")
+    plan = InstallPlanner(index, recommends=request["recommends"]).plan(request["packages"])
+    if set(plan.selected) != DOCKER_CLOSURE or plan.problems:
+        print(f"FAIL: docker.io closure {sorted(set(plan.selected) ^ DOCKER_CLOSURE)} differs, {plan.problems}")
+        ok = False
+    if plan.upgrades != {"libseccomp2": "2.5.4-1+b3"} or plan.selected["runc"].version != "1.1.5+ds1-1+deb12u1":
+        print(f"FAIL: expected the security update of runc and a libseccomp2 upgrade, got {plan.upgrades}")
+        ok = False
+    if ["dmsetup", "libdevmapper1.02.1"] not in plan.install_order or plan.install_order[-1] != ["docker.io"]:
+        print(f"FAIL: unexpected install order {plan.install_order}")
+        ok = False
+    ok = check_order(plan) and ok
+
+    full = InstallPlanner(index).plan(["docker.io", "curl"])
+    if not DOCKER_CLOSURE < set(full.selected) or "git" not in full.optional or "containerd" in full.optional:
+        print(f"FAIL: recommends not resolved as expected: optional={full.optional}")
+        ok = False
+    if full.already_installed != ["curl 7.88.1-10+deb12u8"] or full.problems:
+        print(f"FAIL: {full.already_installed} {full.problems}")
+        ok = False
+    ok = check_order(full) and ok
+    broken = InstallPlanner(index).plan(["podman", "no-such-package"])
+    if len(broken.problems) != 5:
+        print(f"FAIL: expected 4 missing podman dependencies and 1 unknown package: {broken.problems}")
+        ok = False
+
+    slots = schedule_downloads({name: r.size for name, r in full.selected.items()}, 4)
+    loads = sorted(sum(full.selected[name].size for name in slot) for slot in slots)
+    if sorted(name for slot in slots for name in slot) != sorted(full.selected) or \
+            loads[-1] > full.download_bytes / 4 + max(r.size for r in full.selected.values()):
+        print(f"FAIL: unbalanced download schedule {loads}")
+        ok = False
+    if ok:
+        print(f"fixtures: closure, upgrades, recommends, cycles, order and schedule OK "
+              f"({len(full.selected)} packages, {full.download_seconds:.1f}s parallel vs "
+              f"{full.serial_download_seconds:.1f}s serial estimated download)")
+    return ok
+
+
+def synthetic_lists(path: str, packages: int, seed: int = 0):
+    """A Packages file with layered dependencies, or-groups, version constraints and a few cycles"""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for i in range(packages):
+            depends = []
+            for _ in range(rng.randrange(0, 6)):
+                target = rng.randrange(i + 1, packages + 1) if i < packages - 1 else None
+                if target is None or target >= packages:
+                    continue
+                if rng.random() < 0.2:
+                    depends.append(f"alt{target} | pkg{target} (>= 1.0)")
+                else:
+                    depends.append(f"pkg{target}")
+            if i % 50 == 7:
+                depends.append(f"pkg{i + 1}")
+            elif i % 50 == 8:
+                depends.append(f"pkg{i - 1}")  # a dependency cycle with the previous package
+            f.write(f"Package: pkg{i}\nVersion: 1.{rng.randrange(5)}-1\nArchitecture: amd64\n"
+                    f"Installed-Size: {rng.randrange(10, 5000)}\nSize: {rng.randrange(10000, 5000000)}\n"
+                    f"Filename: pool/main/p/pkg{i}/pkg{i}_1.0-1_amd64.deb\n"
+                    + (f"Depends: {', '.join(depends)}\n" if depends else "") + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=int, default=20000)
+    parser.add_argument("--max-plan-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    failed = not check_fixtures()
+    workdir = tempfile.mkdtemp()
+    try:
+        lists = os.path.join(workdir, "lists")
+        os.makedirs(lists)
+        synthetic_lists(os.path.join(lists, "synthetic_binary-amd64_Packages"), args.packages)
+        status = os.path.join(workdir, "status")
+        open(status, "w").close()
+        index = measure(f"index {args.packages} available packages",
+                        lambda: PackageIndex(status, lists, None, arch="amd64"), 1)
+        planner = InstallPlanner(index)
+        plan = measure("plan pkg0 (deep closure)", lambda: planner.plan(["pkg0"]), 3)
+        print(f"  {len(plan.selected)} packages in {len(plan.install_order)} install steps, "
+              f"{sum(len(g) > 1 for g in plan.install_order)} cycle groups, "
+              f"{len(plan.download_slots)} download slots")
+        if plan.problems:
+            print(f"FAIL: {plan.problems[:3]}")
+            failed = True
+        failed = not check_order(plan) or failed
+        start = time.perf_counter()
+        planner.plan(["pkg0"])
+        elapsed = (time.perf_counter() - start) * 1000
+        if elapsed > args.max_plan_ms:
+            print(f"FAIL: planning took {elapsed:.0f} ms (budget {args.max_plan_ms} ms)")
+            failed = True
+    finally:
+        shutil.rmtree(workdir)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Log index benchmark
+Checks ingestion and cursor resume against the recorded fixtures, then measures query latency on a large synthetic index
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_index import LogIndex, LogIngestor, format_log_record
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+UNITS = ["nginx.service", "sshd.service", "cron.service", "docker.service", "kernel",
+         "systemd-logind.service", "NetworkManager.service", "postgresql.service"]
+MESSAGES = [
+    "Accepted publickey for user{n} from 10.0.{n}.1 port 22",
+    "connection reset by peer while reading upstream {n}",
+    "Started session {n} of user root",
+    "worker process {n} exited on signal 9",
+    "device eth0 link is up, speed {n} Mbps",
+    "Out of memory: Killed process {n} (java)",
+    "checkpoint complete: wrote {n} buffers",
+    "pam_unix(cron:session): session opened for user {n}",
+]
+
+
+def check_fixtures():
+    """Ingest the fixtures, query them, and verify that a reopened ingestor resumes from its cursor"""
+    workdir = tempfile.mkdtemp()
+    try:
+        journal = os.path.join(workdir, "journal.json")
+        shutil.copy(os.path.join(FIXTURES, "journal.json"), journal)
+        state = os.path.join(workdir, "state.json")
+
+        ingestor = LogIngestor(state)
+        ingestor.add_file(journal, journal_json=True)
+        ingestor.add_file(os.path.join(FIXTURES, "syslog.log"))
+        assert ingestor.refresh() == 20, "expected 12 journal + 8 syslog records"
+
+        failed = ingestor.query(unit="nginx", text="failed")
+        assert [r["priority"] for r in failed] == [3], failed
+        assert len(ingestor.query(priority="err")) == 8
+        assert ingestor.query(text="killed process python3")[0]["unit"] == "kernel"
+        assert ingestor.query(text="segfault")[0]["unit"] == "myapp"
+        assert ingestor.query(unit="postgresql@15-main", text="permission denied")
+        for record in ingestor.query(priority="err", limit=3):
+            print("  " + format_log_record(record))
+        ingestor.save_state()
+        ingestor.close()
+
+        with open(journal, "a") as f:
+            f.write('{"__CURSOR": "s=fixture;i=d", "__REALTIME_TIMESTAMP": "1792300090000000", '
+                    '"PRIORITY": "2", "_SYSTEMD_UNIT": "nginx.service", "MESSAGE": "worker crashed"}\n')
+        resumed = LogIngestor(state)
+        resumed.add_file(journal, journal_json=True)
+        resumed.add_file(os.path.join(FIXTURES, "syslog.log"))
+        assert resumed.refresh() == 1, "resume should only read the appended entry"
+        assert len(resumed.index) == 21
+        assert resumed.query(unit="nginx", priority="crit")[0]["message"] == "worker crashed"
+        print("fixtures: ingestion, queries and cursor resume OK")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def build_synthetic(records: int) -> LogIndex:
+    rng = random.Random(0)
+    index = LogIndex(max_records=records)
+    now = time.time()
+    for i in range(records):
+        template = rng.randrange(len(MESSAGES))
+        index.add((now - (records - i), rng.choice((3, 4, 6, 6, 6, 6, 7)), UNITS[template],
+                   MESSAGES[template].format(n=rng.randrange(1000))))
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--records", type=int, default=200000)
+    parser.add_argument("--max-query-ms", type=float, default=5.0,
+                        help="fail if any query's p95 latency exceeds this")
+    args = parser.parse_args()
+
+    check_fixtures()
+
+    start = time.perf_counter()
+    index = build_synthetic(args.records)
+    print(f"indexed {args.records} records in {time.perf_counter() - start:.2f} s")
+
+    queries = {
+        "unit + priority": dict(unit="nginx", priority="err"),
+        "tokens": dict(text="killed process java"),
+        "unit + tokens + since": dict(unit="sshd", text="connection reset", since="1h"),
+        "rare token": dict(text="user999"),
+        "priority only": dict(priority="warning"),
+        "no match": dict(text="nonexistent-token"),
+    }
+    worst = 0.0
+    for label, filters in queries.items():
+        samples = []
+        for _ in range(50):
+            t = time.perf_counter()
+            results = index.query(**filters)
+            samples.append((time.perf_counter() - t) * 1000)
+        samples.sort()
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        worst = max(worst, p95)
+        print(f"{label:<24} {len(results):>3} hits   p50 {statistics.median(samples):7.3f} ms   p95 {p95:7.3f} ms")
+
+    if worst > args.max_query_ms:
+        print(f"FAIL: p95 query latency {worst:.2f} ms exceeds {args.max_query_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
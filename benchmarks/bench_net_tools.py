@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Network introspection benchmark
+Opens listeners and connections, checks net_tools against ss and ip, then times the native lookups against the subprocesses
+"""
+
+import argparse
+import os
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from net_tools import interfaces, listeners, parse_network_query, routes, sockets
+
+
+def measure(label: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<40} p50 {statistics.median(samples):8.2f} ms   max {max(samples):8.2f} ms")
+    return result
+
+
+def open_sockets(count: int):
+    """count TCP listeners on loopback (one also on IPv6), a UDP socket and an established connection to each listener"""
+    opened = []
+    for i in range(count):
+        family, address = (socket.AF_INET6, "::1") if i == 0 and socket.has_ipv6 else (socket.AF_INET, "127.0.0.1")
+        server = socket.socket(family, socket.SOCK_STREAM)
+        server.bind((address, 0))
+        server.listen()
+        client = socket.create_connection((address, server.getsockname()[1]))
+        opened += [server, client]
+    udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp.bind(("127.0.0.1", 0))
+    opened.append(udp)
+    return opened
+
+
+def ss_listeners():
+    """{(protocol, port): pids} from ss -tulnp"""
+    output = subprocess.run(["ss", "-H", "-tulnp"], capture_output=True, text=True).stdout
+    found = {}
+    for line in output.splitlines():
+        fields = line.split()
+        port = int(fields[4].rsplit(":", 1)[1])
+        found[(fields[0], port)] = {int(pid) for pid in re.findall(r"pid=(\d+)", line)}
+    return found
+
+
+def check_against_ss(opened) -> bool:
+    ok = True
+    native = {}
+    for record in listeners():
+        native.setdefault((record.protocol[:3], record.local_port), set()).update(pid for pid, _ in record.processes)
+    expected = ss_listeners()
+    if native != expected:
+        print(f"FAIL: listeners differ from ss -tulnp: native-only {sorted(set(native.items()) - set(expected.items()))}, "
+              f"ss-only {sorted(set(expected.items()) - set(native.items()))}")
+        ok = False
+    port = opened[0].getsockname()[1]
+    found = listeners(port)
+    if [(r.protocol, r.local, r.processes[0][0] if r.processes else None) for r in found] != \
+            [("tcp6", f"[::1]:{port}", os.getpid())]:
+        print(f"FAIL: listeners({port}) returned {[r.to_dict() for r in found]}")
+        ok = False
+    # The accepted ends sit in the listen queues, held by no process; the clients are ours
+    clients = {sock.getsockname()[1] for sock in opened[1::2]}
+    established = [r for r in sockets(("tcp", "tcp6"), listening=False, process="python") if r.state == "ESTAB"]
+    if {r.local_port for r in established} != clients or any(r.processes[0][0] != os.getpid() for r in established):
+        print(f"FAIL: expected {len(clients)} established sockets of this process, found {len(established)}")
+        ok = False
+    if parse_network_query(f"who is listening on {port}?") != {"kind": "port", "port": port} or \
+            parse_network_query("what is my ip address") != {"kind": "interfaces", "port": None} or \
+            parse_network_query("list all python files") is not None:
+        print("FAIL: network question parsing")
+        ok = False
+    return ok
+
+
+def check_against_ip() -> bool:
+    ok = True
+    native = {link["name"]: set(link["addresses"]) for link in interfaces()}
+    output = subprocess.run(["ip", "-o", "addr"], capture_output=True, text=True).stdout
+    expected = {}
+    for line in output.splitlines():
+        fields = line.split()
+        expected.setdefault(fields[1], set()).add(fields[3])
+    for name, addresses in expected.items():
+        if native.get(name) != addresses:
+            print(f"FAIL: {name} has addresses {native.get(name)}, ip reports {addresses}")
+            ok = False
+    native_routes = {r["destination"].replace("/32", "") for r in routes(socket.AF_INET)}
+    output = subprocess.run(["ip", "route"], capture_output=True, text=True).stdout
+    expected_routes = {line.split()[0] for line in output.splitlines()}
+    if native_routes != expected_routes:
+        print(f"FAIL: routes {sorted(native_routes)} differ from ip route {sorted(expected_routes)}")
+        ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sockets", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--max-port-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if not (shutil.which("ss") and shutil.which("ip")):
+        print("ss and ip are needed for the comparison")
+        sys.exit(1)
+    opened = open_sockets(args.sockets)
+    try:
+        failed = not (check_against_ss(opened) & check_against_ip())
+        if not failed:
+            print(f"ss/ip: listeners, pids, addresses and routes match ({2 * args.sockets + 1} sockets open)")
+        port = opened[-3].getsockname()[1]
+        measure(f"native listeners({port})", lambda: listeners(port), args.iterations)
+        measure(f"ss -ltnp sport = :{port}", lambda: subprocess.run(
+            ["ss", "-H", "-ltnp", f"sport = :{port}"], capture_output=True), args.iterations)
+        measure("native listeners() with processes", listeners, args.iterations)
+        measure("ss -tulnp", lambda: subprocess.run(["ss", "-H", "-tulnp"], capture_output=True), args.iterations)
+        measure("native sockets() with processes", sockets, args.iterations)
+        measure("ss -tuanp", lambda: subprocess.run(["ss", "-H", "-tuanp"], capture_output=True), args.iterations)
+        measure("native interfaces()", interfaces, args.iterations)
+        measure("ip -s addr", lambda: subprocess.run(["ip", "-s", "addr"], capture_output=True), args.iterations)
+        measure("native routes()", routes, args.iterations)
+        measure("ip route", lambda: subprocess.run(["ip", "route"], capture_output=True), args.iterations)
+
+        start = time.perf_counter()
+        listeners(port)
+        elapsed = (time.perf_counter() - start) * 1000
+        if elapsed > args.max_port_ms:
+            print(f"FAIL: port lookup took {elapsed:.1f} ms (budget {args.max_port_ms} ms)")
+            failed = True
+    finally:
+        for sock in opened:
+            sock.close()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Package index benchmark
+Checks queries against the fixture dpkg/apt database, then measures load and query latency against dpkg-query
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from package_index import DPKG_STATUS, PackageIndex, answer_package_query, compare_versions, parse_package_query
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def measure(label: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<40} p50 {statistics.median(samples):9.3f} ms   max {max(samples):9.3f} ms")
+    return result
+
+
+def fixture_index(workdir: str) -> PackageIndex:
+    shutil.copytree(os.path.join(FIXTURES, "dpkg"), os.path.join(workdir, "dpkg"))
+    return PackageIndex(os.path.join(workdir, "dpkg", "status"), os.path.join(FIXTURES, "apt", "lists"),
+                        os.path.join(workdir, "dpkg", "updates"), arch="amd64", check_interval=0)
+
+
+def check_fixtures():
+    """Installed/version/provides/reverse-dependency queries and mtime refresh on the fixture database"""
+    workdir = tempfile.mkdtemp()
+    try:
+        index = fixture_index(workdir)
+        assert len(index) == 28, len(index)
+        assert index.is_installed("curl") and index.version("curl") == "7.88.1-10+deb12u8"
+        assert not index.is_installed("docker-ce"), "config-files only is not installed"
+        assert index.is_installed("awk") and index.providers("awk") == ["mawk"]
+        assert index.version("openssl") == "3.0.15-1~deb12u1", "the updates journal overrides the status file"
+        assert index.rdepends("libssl3") == ["libcurl4", "openssl"], index.rdepends("libssl3")
+        assert "ca-certificates" in index.rdepends("debconf-2.0") + index.rdepends("debconf")
+        assert index.candidate("runc").version == "1.1.5+ds1-1+deb12u1", "newest version across lists"
+        assert [r.version for r in index.versions("containerd")] == ["1.6.20~ds1-1+b1", "1.4.13~ds1-1~deb11u4"]
+        assert compare_versions("2:1.02.185-2", "1:9") > 0 and compare_versions("1.0~rc1", "1.0") < 0
+        assert answer_package_query(index, parse_package_query("is docker installed?")) == [
+            "docker is not installed (docker.io 20.10.24+dfsg1-1+b3 is available: sudo apt install docker.io)."]
+        assert index.resolve_name("libssl") == ["libssl3"], "one obvious match answers for the loose name"
+        assert answer_package_query(index, parse_package_query("is perl installed?")) == [
+            "perl is not installed; related installed packages: perl-base",
+            "  perl 5.36.0-7+deb12u1 is available: sudo apt install perl"], "perl-base is not perl"
+        assert answer_package_query(index, parse_package_query("what packages depend on libssl3?"), limit=1) == [
+            "2 installed packages depend on libssl3:", "  libcurl4", "  ... and 1 more"]
+        print("  " + "\n  ".join(answer_package_query(index, parse_package_query("what version of libc6 do I have?"))))
+
+        # dpkg rewrites the status file on every change; only new stanzas are parsed again
+        status = os.path.join(workdir, "dpkg", "status")
+        with open(status, "a") as f:
+            f.write("\nPackage: tini\nStatus: install ok installed\nArchitecture: amd64\nVersion: 0.19.0-1\n"
+                    "Depends: libc6 (>= 2.34)\nDescription: tiny but valid init for containers\n")
+        os.utime(status, ns=(time.time_ns(), time.time_ns() + 1000))
+        assert index.refresh() == 1 and index.is_installed("tini")
+        assert index.refresh() == 0
+        print("fixtures: installed, version, provides, rdepends and incremental refresh OK")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=10000)
+    parser.add_argument("--max-query-us", type=float, default=50.0)
+    args = parser.parse_args()
+
+    check_fixtures()
+    if not os.path.exists(DPKG_STATUS):
+        print(f"{DPKG_STATUS} not found; skipping the system database")
+        return
+    index = measure("load system status", PackageIndex, 3)
+    print(f"  {len(index)} installed, {len(index.available)} available")
+    if shutil.which("dpkg-query"):
+        measure("dpkg-query -W libc6 (subprocess)", lambda: subprocess.run(
+            ["dpkg-query", "-W", "libc6"], capture_output=True), 10)
+    failed = False
+    index.rdepends("libc6")  # builds the reverse map once
+    for label, fn in (("is_installed", lambda: index.is_installed("libc6")),
+                      ("version", lambda: index.version("bash")),
+                      ("providers", lambda: index.providers("awk")),
+                      ("rdepends", lambda: index.rdepends("libssl3"))):
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            fn()
+        per_query = (time.perf_counter() - start) * 1e6 / args.iterations
+        print(f"{label:<40} mean {per_query:8.2f} us")
+        if per_query > args.max_query_us:
+            print(f"FAIL: {label} took {per_query:.1f} us (budget {args.max_query_us} us)")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
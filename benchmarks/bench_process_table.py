@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Process table benchmark
+Compares `ps aux --sort=-%cpu | head` with full and incremental ProcessTable refreshes, optionally with extra idle processes
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_table import ProcessTable
+
+
+def measure(label: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<28} p50 {statistics.median(samples):8.2f} ms   max {max(samples):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--spawn", type=int, default=500, help="idle processes to add to the table")
+    args = parser.parse_args()
+
+    children = [subprocess.Popen(["sleep", "600"]) for _ in range(args.spawn)]
+    busy = subprocess.Popen([sys.executable, "-c", "while True: pass"])
+    try:
+        time.sleep(0.5)
+        measure("ps aux | sort | head", lambda: subprocess.run(
+            "ps aux --sort=-%cpu | head -10", shell=True, stdout=subprocess.DEVNULL), args.iterations)
+
+        measure("ProcessTable cold refresh", lambda: ProcessTable().refresh(), args.iterations)
+
+        table = ProcessTable()
+        table.refresh()
+        measure("ProcessTable incremental", table.refresh, args.iterations)
+        print(f"  {table.stats['scanned']} processes, {table.stats['parsed']} re-parsed on the last refresh")
+
+        time.sleep(0.5)
+        top = table.top(1, "cpu")[0]
+        print(f"top by CPU: pid {top['pid']} {top['cpu_percent']:.0f}% {top['command'][:40]}")
+        if top["pid"] != busy.pid:
+            print("FAIL: the busy child should be the top CPU consumer")
+            sys.exit(1)
+    finally:
+        busy.kill()
+        for child in children:
+            child.kill()
+        for child in children + [busy]:
+            child.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Spawn latency benchmark for sandboxed command execution
+Compares direct exec, fresh-namespace exec per command, and forking from the sandbox zygote
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sandbox_zygote import SandboxZygote, enter_sandbox
+
+COMMAND = "/bin/true"
+
+
+def measure(label: str, fn, iterations: int):
+    """Time a spawn function and print latency percentiles in milliseconds"""
+    fn()  # warm up
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p50 = statistics.median(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<24} mean {statistics.mean(samples):7.3f} ms   p50 {p50:7.3f} ms   p95 {p95:7.3f} ms")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    env = {"PATH": "/usr/local/bin:/usr/bin:/bin"}
+
+    print(f"Spawning '{COMMAND}' {args.iterations} times per mode")
+    print("-" * 72)
+
+    measure("direct exec", lambda: subprocess.run(COMMAND, shell=True, env=env), args.iterations)
+
+    try:
+        measure(
+            "fresh-namespace exec",
+            lambda: subprocess.run(COMMAND, shell=True, env=env, preexec_fn=enter_sandbox, check=True),
+            args.iterations,
+        )
+    except subprocess.SubprocessError as e:
+        print(f"{'fresh-namespace exec':<24} unavailable: {e}")
+
+    zygote = SandboxZygote()
+    if zygote.start():
+        try:
+            measure("zygote fork", lambda: zygote.run(COMMAND, env=env), args.iterations)
+        finally:
+            zygote.stop()
+    else:
+        print(f"{'zygote fork':<24} unavailable: user namespaces disabled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Size tree benchmark
+Builds the size tree over a generated tree, checks it against a full walk, then measures cached queries and incremental refresh
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fs_tools import directory_size, find_large_files
+from size_tree import SizeTree
+
+
+def measure(label: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<40} p50 {statistics.median(samples):8.2f} ms   max {max(samples):8.2f} ms")
+    return result
+
+
+def write(path: str, size: int):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--directories", type=int, default=2000)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--max-query-ms", type=float, default=10.0)
+    parser.add_argument("--max-ops", type=int, default=5000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="linuxai-size-bench-")
+    root = os.path.join(tmp, "home")
+    for d in range(args.directories):
+        path = os.path.join(root, f"d{d % 10}", f"e{d % 97}", f"f{d}")
+        os.makedirs(path, exist_ok=True)
+        for i in range(args.files):
+            write(os.path.join(path, f"file{i}.dat"), (i * 7919 + d) % 20000)
+    failed = False
+    try:
+        tree = SizeTree(root, os.path.join(tmp, "size_tree.json"))
+        measure("build (full walk)", tree.build, 1)
+        measure("save", tree.save, 1)
+        print(f"  {len(tree)} directories, {os.path.getsize(tree.path) / 1048576:.1f} MB on disk")
+        measure("load", lambda: SizeTree(root, tree.path).load(), 3)
+
+        def check(label):
+            nonlocal failed
+            walked = directory_size([root])
+            usage = tree.usage(root)
+            # directory_size also counts the directories' own sizes, the tree only files
+            if (usage["files"], usage["directories"]) != (walked["files"], walked["directories"] - 1):
+                print(f"FAIL: {label}: tree has {usage['files']} files / {usage['directories']} directories, "
+                      f"walk found {walked['files']} / {walked['directories'] - 1}")
+                failed = True
+            expected = [(r.path, r.size) for r in find_large_files([root], 10, 0)]
+            if [size for _, size in tree.largest_files(root, 10)] != [size for _, size in expected]:
+                print(f"FAIL: {label}: largest files differ from a full walk")
+                failed = True
+
+        check("after build")
+        measure("full walk (directory_size)", lambda: directory_size([root]), 3)
+        for label, fn in (("usage(root)", lambda: tree.usage(root)),
+                          ("largest_dirs(root, 10)", lambda: tree.largest_dirs(root, 10)),
+                          ("largest_dirs(root, 10, depth 1)", lambda: tree.largest_dirs(root, 10, 1)),
+                          ("largest_files(root, 10)", lambda: tree.largest_files(root, 10))):
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                fn()
+            per_query = (time.perf_counter() - start) * 1000 / args.iterations
+            print(f"{label:<40} mean {per_query:7.3f} ms")
+            if per_query > args.max_query_ms:
+                print(f"FAIL: {label} took {per_query:.1f} ms (budget {args.max_query_ms} ms)")
+                failed = True
+
+        # Grow, shrink and add directories, then pick the changes up by mtime
+        time.sleep(0.01)
+        changed = os.path.join(root, "d3", "e3", "f3")
+        write(os.path.join(changed, "huge.iso"), 3 * 1024 * 1024)
+        os.remove(os.path.join(changed, "file1.dat"))
+        shutil.rmtree(os.path.join(root, "d4", "e4"))
+        new = os.path.join(root, "d5", "new", "deeper")
+        os.makedirs(new)
+        write(os.path.join(new, "video.mkv"), 2 * 1024 * 1024)
+        rounds = 0
+        start = time.perf_counter()
+        while True:
+            rounds += 1
+            rescanned = tree.refresh(args.max_ops)
+            if not rescanned and not tree.pending:
+                break
+        print(f"{'refresh after changes':<40} {(time.perf_counter() - start) * 1000:8.2f} ms "
+              f"in {rounds} rounds of {args.max_ops} ops")
+        check("after refresh")
+        if tree.largest_files(root, 1)[0][0] != os.path.join(changed, "huge.iso"):
+            print("FAIL: refresh missed the new largest file")
+            failed = True
+        measure(f"refresh, nothing changed ({args.max_ops} ops)", lambda: tree.refresh(args.max_ops), 5)
+        measure("refresh of one watched subtree", lambda: tree.refresh(args.max_ops, under=changed), 5)
+        tree.close()
+    finally:
+        shutil.rmtree(tmp)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for main.py
+Measures import time (-X importtime) and time-to-prompt, failing when either regresses past its budget
+"""
+
+import argparse
+import os
+import pty
+import re
+import select
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = "LinuxAI> ".encode()
+
+
+def measure_import_ms(module: str) -> float:
+    """Cumulative import time of a module in milliseconds, as reported by -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S+)", line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise RuntimeError(f"no importtime entry for {module}")
+
+
+def measure_prompt_ms(timeout: float = 10.0) -> float:
+    """Time from process start until main.py shows its input prompt on a terminal"""
+    master, slave = pty.openpty()
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=ROOT, env=env,
+        stdin=slave, stdout=slave, stderr=subprocess.DEVNULL, close_fds=True,
+    )
+    os.close(slave)
+
+    output = b""
+    try:
+        deadline = start + timeout
+        while PROMPT not in output:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise TimeoutError("prompt did not appear")
+            ready, _, _ = select.select([master], [], [], remaining)
+            if ready:
+                try:
+                    output += os.read(master, 65536)
+                except OSError:
+                    raise RuntimeError("main.py exited before showing the prompt")
+        elapsed = (time.perf_counter() - start) * 1000
+        os.write(master, b"exit\n")
+        process.wait(timeout=timeout)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        os.close(master)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=60.0,
+                        help="budget for the cumulative import time of main")
+    parser.add_argument("--max-prompt-ms", type=float, default=400.0,
+                        help="budget for the time until the prompt is shown")
+    args = parser.parse_args()
+
+    import_ms = statistics.median(measure_import_ms("main") for _ in range(args.runs))
+    prompt_ms = statistics.median(measure_prompt_ms() for _ in range(args.runs))
+
+    failures = []
+    print(f"import main      {import_ms:8.1f} ms  (budget {args.max_import_ms:.0f} ms)")
+    if import_ms > args.max_import_ms:
+        failures.append("import time")
+    print(f"time to prompt   {prompt_ms:8.1f} ms  (budget {args.max_prompt_ms:.0f} ms)")
+    if prompt_ms > args.max_prompt_ms:
+        failures.append("time to prompt")
+
+    if failures:
+        print(f"❌ Startup regression: {', '.join(failures)} over budget")
+        sys.exit(1)
+    print("✅ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Tool calling benchmark
+Replays compound questions against a scripted Ollama /api/chat endpoint and counts LLM round trips
+with batched tool calls (all calls in one response) against one call per response
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlp_frontend import NLPFrontend
+from tool_registry import ToolExecutor, ToolRegistry
+
+# question -> tool calls a tool-capable model makes for it
+SCENARIOS = {
+    "Is nginx installed, is anything listening on port 80, and how much disk space is free?": [
+        ("package_info", {"name": "nginx"}), ("listening_ports", {"port": 80}), ("filesystems", {})],
+    "Give me a health check: load, memory, the busiest processes and the network": [
+        ("system_status", {}), ("top_processes", {"sort_by": "cpu", "limit": 5}),
+        ("top_processes", {"sort_by": "mem", "limit": "5"}), ("network_config", {}), ("system_status", {})],
+    "Is python3 installed and what is my IP address?": [
+        ("package_info", {"name": "python3"}), ("network_config", {})],
+    "What is using port 2024 and which processes use the most CPU?": [
+        ("listening_ports", {"port": 2024}), ("top_processes", {})],
+}
+COMMAND_SCENARIO = ("Delete files in /tmp older than a week", "find /tmp -type f -mtime +7 -delete")
+
+
+class ScriptedModel:
+    """Answers /api/chat like a tool-capable model would, from SCENARIOS
+
+    In "batched" mode the first response requests every call of the scenario;
+    in "sequential" mode one call per response, as a model limited to one
+    action per round trip would.
+    """
+
+    def __init__(self, mode: str, latency: float):
+        self.mode = mode
+        self.latency = latency
+        self.requests = 0
+        self.problems = []
+
+    def reply(self, body):
+        self.requests += 1
+        time.sleep(self.latency)
+        messages = body["messages"]
+        question = messages[1]["content"]
+        results = [m for m in messages if m["role"] == "tool"]
+        for m in results:
+            if '"error"' in m["content"][:20]:
+                self.problems.append(f"{m['tool_name']}: {m['content'][:120]}")
+        if question == COMMAND_SCENARIO[0]:
+            return self.calls([("run_command", {"command": COMMAND_SCENARIO[1]})])
+        script = SCENARIOS[question]
+        if "tools" not in body:
+            self.problems.append("final round without tools reached")
+        elif self.mode == "batched" and not results:
+            return self.calls(script)
+        elif self.mode == "sequential" and len(results) < len(script):
+            return self.calls([script[len(results)]])
+        if len(results) != len(script):
+            self.problems.append(f"{question}: {len(results)} tool results for {len(script)} calls")
+        return {"model": body["model"], "done": True, "prompt_eval_count": 200, "eval_count": 20,
+                "message": {"role": "assistant", "content": f"Answered from {len(results)} tool results."}}
+
+    @staticmethod
+    def calls(script):
+        return {"done": True, "message": {"role": "assistant", "content": "", "tool_calls": [
+            {"function": {"name": name, "arguments": arguments}} for name, arguments in script]}}
+
+
+def serve(model: ScriptedModel) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send(self, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self.send({"models": [{"name": "scripted"}]})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            self.send(model.reply(body))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_mode(mode: str, latency: float):
+    model = ScriptedModel(mode, latency)
+    server = serve(model)
+    nlp = NLPFrontend(ollama_host=f"http://127.0.0.1:{server.server_address[1]}", model="scripted")
+    nlp.tools_enabled = True
+    nlp.max_tool_rounds = 8  # room for the one-call-per-response baseline
+    rows = []
+    try:
+        for question in list(SCENARIOS) + [COMMAND_SCENARIO[0]]:
+            before = model.requests
+            started = time.perf_counter()
+            result = nlp.process_input(question)
+            rows.append((question, result, model.requests - before, (time.perf_counter() - started) * 1000))
+    finally:
+        server.shutdown()
+    return rows, model.problems, nlp._tool_executor.stats
+
+
+def check_executor() -> bool:
+    """Calls of one batch overlap, and identical calls run once"""
+    registry = ToolRegistry()
+    runs = []
+
+    @registry.tool("Sleep, then echo", {"type": "object", "properties": {"value": {"type": "integer"}}})
+    def slow_echo(context, value: int = 0):
+        runs.append(value)
+        time.sleep(0.1)
+        return value
+
+    executor = ToolExecutor(registry)
+    started = time.perf_counter()
+    results = executor.run([{"name": "slow_echo", "arguments": {"value": i % 4}} for i in range(8)] +
+                           [{"name": "slow_echo", "arguments": {"value": "x"}}, {"name": "missing"}])
+    elapsed = time.perf_counter() - started
+    executor.shutdown()
+    ok = True
+    if results[:8] != [i % 4 for i in range(8)] or sorted(runs) != [0, 1, 2, 3]:
+        print(f"FAIL: expected 4 executions for 8 calls, got {results[:8]} from {runs}")
+        ok = False
+    if "error" not in results[8] or "error" not in results[9]:
+        print(f"FAIL: invalid arguments and unknown tools should return errors: {results[8:]}")
+        ok = False
+    if elapsed > 0.25:
+        print(f"FAIL: 4 concurrent 100 ms calls took {elapsed * 1000:.0f} ms")
+        ok = False
+    if ok:
+        print(f"executor: 8 calls -> 4 executions in {elapsed * 1000:.0f} ms (4 x 100 ms tools), errors reported")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-ms", type=float, default=150.0, help="simulated latency of one LLM request")
+    args = parser.parse_args()
+
+    failed = not check_executor()
+    totals = {}
+    for mode in ("sequential", "batched"):
+        rows, problems, stats = run_mode(mode, args.model_ms / 1000)
+        print(f"\n{mode}:")
+        for question, result, round_trips, elapsed in rows:
+            print(f"  {round_trips} round trips {elapsed:8.0f} ms  {result['type']:<8} {question[:60]}")
+        print(f"  tool calls: {stats}")
+        totals[mode] = (sum(r[2] for r in rows), statistics.mean(r[3] for r in rows))
+        for problem in problems:
+            print(f"FAIL: {problem}")
+            failed = True
+        for question, result, round_trips, _ in rows:
+            if question == COMMAND_SCENARIO[0]:
+                expected = {"type": "command", "command": COMMAND_SCENARIO[1]}
+                if {k: result.get(k) for k in expected} != expected or round_trips != 1:
+                    print(f"FAIL: run_command should end the turn with the command: {result}")
+                    failed = True
+            elif result["type"] != "answer" or result["round_trips"] != round_trips or \
+                    round_trips != (2 if mode == "batched" else len(SCENARIOS[question]) + 1):
+                print(f"FAIL: {mode} {question!r} took {round_trips} round trips: {result}")
+                failed = True
+        if mode == "batched" and stats["cached"] != 1:
+            print(f"FAIL: the repeated system_status call should be served from the turn cache: {stats}")
+            failed = True
+
+    (sequential, sequential_ms), (batched, batched_ms) = totals["sequential"], totals["batched"]
+    print(f"\nround trips: {sequential} -> {batched} ({100 * (1 - batched / sequential):.0f}% fewer), "
+          f"mean turn {sequential_ms:.0f} ms -> {batched_ms:.0f} ms")
+    if batched >= sequential:
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,16 +14,31 @@ import shlex
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
+import resource
 import tempfile
+import time
+from sandbox_zygote import SandboxZygote
+from resource_accounting import CgroupLeaf, ResourceStats, format_resources, run_with_rusage, rusage_to_dict
+from fs_tools import run_native
+from metrics import COMMAND_SECONDS, COMMANDS, VALIDATION_VERDICTS
+from tracing import annotate, span, traced
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+POLICY_LISTS = ('safe_commands', 'confirmation_required', 'blocked_commands')
+
 class CommandOrchestrator:
-    def __init__(self, log_file: str = "/tmp/llm_commands.log", sandbox_enabled: bool = True):
+    def __init__(self, log_file: str = "/tmp/llm_commands.log", sandbox_enabled: bool = True,
+                 native_tools: bool = False):
         self.log_file = log_file
         self.sandbox_enabled = sandbox_enabled
+        # Run plain find / du -s commands in-process with the parallel walker (fs_tools.py).
+        # Off by default: bench_fs_tools.py shows it slower than find/du on small hosts.
+        self.native_tools = native_tools
         self.command_history = []
+        self.zygote = None
+        self.resource_stats = ResourceStats()
         self.setup_logging()
         
         # Define whitelisted commands for safety
@@ -54,6 +69,10 @@ class CommandOrchestrator:
             'rm', 'dd', 'mkfs', 'fdisk', 'parted', 'format',
             'shutdown', 'reboot', 'halt', 'init', 'telinit'
         }
+        self.default_policy = {key: frozenset(getattr(self, key)) for key in POLICY_LISTS}
+        
+        # Pay the namespace setup cost once, before any threads exist
+        self.get_sandbox_zygote()
     
     def setup_logging(self):
         """Setup command execution logging"""
@@ -79,6 +98,7 @@ class CommandOrchestrator:
             logger.error(f"Failed to parse command: {command}, error: {e}")
             return "", []
     
+    @traced()
     def validate_command(self, command: str, args: List[str]) -> Dict[str, Any]:
         """Validate command for security and safety"""
         full_command = f"{command} {' '.join(args)}".strip()
@@ -148,6 +168,41 @@ class CommandOrchestrator:
         
         return safe_env
     
+    def apply_policy(self, policy: Dict[str, Any]):
+        """Replace the command policy with the built-in lists, overridden by those given in policy
+
+        Lists missing from policy go back to their defaults, so applying a
+        reloaded config leaves the same policy as a fresh start with it.
+        """
+        lists = {key: set(policy.get(key, self.default_policy[key])) for key in POLICY_LISTS}
+        self.safe_commands, self.confirmation_required, self.blocked_commands = (lists[key] for key in POLICY_LISTS)
+    
+    def get_sandbox_zygote(self) -> Optional[SandboxZygote]:
+        """Start the namespace sandbox zygote on first use"""
+        if not self.sandbox_enabled:
+            return None
+        
+        if self.zygote is None:
+            self.zygote = SandboxZygote()
+            if not self.zygote.start():
+                logger.warning("Namespace isolation unavailable, falling back to environment-only sandbox")
+        
+        return self.zygote if self.zygote.running else None
+    
+    def after_fork(self):
+        """Start a zygote of our own in a forked child, e.g. after switching user"""
+        if self.zygote is not None:
+            self.zygote.detach()
+            self.zygote = None
+        self.get_sandbox_zygote()
+    
+    def shutdown(self):
+        """Stop the sandbox zygote, if one was started"""
+        if self.zygote is not None:
+            self.zygote.stop()
+            self.zygote = None
+    
+    @traced()
     def execute_shell_command(self, command: str, timeout: int = 30) -> Dict[str, Any]:
         """Execute shell command with logging and sandboxing"""
         cmd_parts = self.parse_command(command)
@@ -161,6 +216,11 @@ class CommandOrchestrator:
         
         cmd_name, cmd_args = cmd_parts
         validation = self.validate_command(cmd_name, cmd_args)
+        if not validation["allowed"]:
+            verdict = "blocked"
+        else:
+            verdict = "confirmation" if validation["requires_confirmation"] else "allowed"
+        VALIDATION_VERDICTS.labels("orchestrator", verdict).inc()
         
         # Log the attempt
         log_entry = {
@@ -186,40 +246,80 @@ class CommandOrchestrator:
             # Create sandbox environment
             env = self.create_sandbox_environment()
             
-            # Execute command
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                env=env,
-                cwd=os.getcwd()
-            )
-            
+            # Read-only find / du -s need no subprocess: walk natively, in parallel. An
+            # in-process walk cannot enter the namespace sandbox, so only without one.
+            started = time.monotonic()
+            result = None
+            if self.native_tools and self.get_sandbox_zygote() is None:
+                before = rusage_to_dict(resource.getrusage(resource.RUSAGE_SELF))
+                with span("native_fs", "command", command=cmd_name):
+                    result = run_native(command, cwd=os.getcwd(), timeout=timeout)
+            if result is not None:
+                # The walker threads are ours: charge this process's usage delta to the command
+                after = rusage_to_dict(resource.getrusage(resource.RUSAGE_SELF))
+                resources = {"wall_time": time.monotonic() - started, "source": "rusage"}
+                resources.update({field: after[field] - before[field] for field in after})
+                resources["max_rss_kb"] = after["max_rss_kb"]  # a peak, not a counter
+            else:
+                # Account for the whole process tree in a cgroup leaf when we can
+                cgroup = CgroupLeaf.create(f"llm-cmd-{os.getpid()}-{len(self.command_history)}")
+                on_start = cgroup.attach if cgroup is not None else None
+                
+                # Execute command, inside the namespace sandbox when available
+                try:
+                    zygote = self.get_sandbox_zygote()
+                    with span("subprocess", "command", command=cmd_name, sandbox=zygote is not None):
+                        if zygote is not None:
+                            result = zygote.run(command, env=env, cwd=os.getcwd(), timeout=timeout, on_start=on_start)
+                        else:
+                            result = run_with_rusage(command, env=env, cwd=os.getcwd(), timeout=timeout, on_start=on_start)
+                        annotate(return_code=result["returncode"])
+                
+                    resources = {"wall_time": time.monotonic() - started, "source": "rusage"}
+                    resources.update(result["rusage"] or {})
+                    if cgroup is not None:
+                        # The leaf is joined just after exec, so rusage may still be the larger figure
+                        cgroup_usage = cgroup.read_usage()
+                        for field, value in cgroup_usage.items():
+                            resources[field] = max(resources.get(field) or 0, value)
+                        if cgroup_usage:
+                            resources["source"] = "cgroup"
+                finally:
+                    if cgroup is not None:
+                        cgroup.remove()
+                
             log_entry["executed"] = True
-            log_entry["return_code"] = result.returncode
-            log_entry["success"] = result.returncode == 0
+            log_entry["return_code"] = result["returncode"]
+            log_entry["success"] = result["returncode"] == 0
+            log_entry["resources"] = resources
+            self.resource_stats.record(cmd_name, resources)
+            COMMAND_SECONDS.labels(cmd_name).observe(resources["wall_time"])
+            COMMANDS.labels(cmd_name, "success" if result["returncode"] == 0 else "failure").inc()
             
-            if result.returncode == 0:
-                self.command_logger.info(f"Executed successfully: {command}")
+            if result["returncode"] == 0:
+                self.command_logger.info(f"Executed successfully: {command} ({format_resources(resources)})")
             else:
-                self.command_logger.warning(f"Command failed: {command} (exit code: {result.returncode})")
+                self.command_logger.warning(f"Command failed: {command} (exit code: {result['returncode']}, {format_resources(resources)})")
             
             self.command_history.append(log_entry)
             
             return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "error": result.stderr,
-                "return_code": result.returncode,
-                "blocked": False
+                "success": result["returncode"] == 0,
+                "output": result["stdout"],
+                "error": result["stderr"],
+                "return_code": result["returncode"],
+                "blocked": False,
+                "resources": resources
             }
             
         except subprocess.TimeoutExpired:
             error_msg = f"Command timed out after {timeout} seconds"
             self.command_logger.error(f"Timeout: {command}")
             log_entry["result"] = "timeout"
+            log_entry["resources"] = {"wall_time": time.monotonic() - started}
+            self.resource_stats.record(cmd_name, log_entry["resources"])
+            COMMAND_SECONDS.labels(cmd_name).observe(log_entry["resources"]["wall_time"])
+            COMMANDS.labels(cmd_name, "timeout").inc()
             self.command_history.append(log_entry)
             
             return {
@@ -248,9 +348,18 @@ class CommandOrchestrator:
         """Get recent command execution history"""
         return self.command_history[-limit:]
     
+    def get_resource_summary(self, sort_by: str = "wall_time", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get per-command-name resource usage, most expensive first"""
+        return self.resource_stats.summary(sort_by=sort_by, limit=limit)
+    
+    def get_command_cost(self, cmd_name: str) -> Optional[Dict[str, float]]:
+        """Get the average observed cost of a command name, for routing decisions"""
+        return self.resource_stats.average_cost(cmd_name)
+    
     def clear_history(self):
         """Clear command history"""
         self.command_history.clear()
+        self.resource_stats.clear()
         self.command_logger.info("Command history cleared")
 
 def main():
@@ -258,7 +367,7 @@ def main():
     orchestrator = CommandOrchestrator()
     
     print("LLM-powered Linux AI - Command Orchestrator")
-    print("Type 'exit' to quit, 'history' to see execution history")
+    print("Type 'exit' to quit, 'history' to see execution history, 'usage' for resource usage")
     print("-" * 50)
     
     while True:
@@ -276,6 +385,12 @@ def main():
                 else:
                     print("No command history yet.")
                 continue
+            elif command.lower() == 'usage':
+                for row in orchestrator.get_resource_summary():
+                    print(f"{row['command']}: {row['count']} runs, "
+                          f"avg {row['avg_wall_time']:.3f}s wall, {row['avg_cpu_time']:.3f}s CPU, "
+                          f"max {row['max_rss_kb']} KB RSS")
+                continue
             elif command.lower() == 'clear':
                 orchestrator.clear_history()
                 print("History cleared.")
@@ -305,6 +420,8 @@ def main():
             break
         except Exception as e:
             print(f"Error: {e}")
+    
+    orchestrator.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
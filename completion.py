@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Predictive Completion for LLM-powered Linux Distribution
+Offline suggestions from past requests: a prefix trie of whole requests and a word n-gram model, for Tab and ghost text
+"""
+
+import bisect
+import json
+import logging
+import math
+import os
+import shutil
+import sys
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from metrics import CACHE_REQUESTS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.expanduser("~/.cache/linuxai/completion.json")
+MODEL_VERSION = 1
+MAX_ENTRIES = 5000
+TOP_K = 5             # suggestions kept per trie node
+MAX_DEPTH = 24        # deeper prefixes filter the bucket of the node at this depth
+HALF_LIFE = 14 * 86400  # a use counts half as much after two weeks
+MIN_PREFIX = 2
+START = "<s>"
+
+_DECAY = math.log(2) / HALF_LIFE
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _log_add(a: float, b: float) -> float:
+    if a < b:
+        a, b = b, a
+    return a + math.log1p(math.exp(b - a)) if b > -math.inf else a
+
+
+class Entry:
+    """One distinct request, with the command it last ran and its frecency"""
+
+    __slots__ = ("text", "key", "command", "score", "count", "last")
+
+    def __init__(self, text: str, command: Optional[str] = None, score: float = -math.inf,
+                 count: int = 0, last: float = 0.0):
+        self.text = " ".join(text.split())
+        self.key = self.text.lower()
+        self.command = command
+        # log of sum(2 ** (use_time / HALF_LIFE)): comparable across entries without ever rescoring
+        self.score = score
+        self.count = count
+        self.last = last
+
+    def use(self, when: float):
+        self.score = _log_add(self.score, when * _DECAY)
+        self.count += 1
+        self.last = max(self.last, when)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"text": self.text, "command": self.command, "score": self.score, "count": self.count,
+                "last": self.last}
+
+
+class _Node:
+    __slots__ = ("children", "top", "bucket")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.top: List[int] = []       # entry ids, best first
+        self.bucket: Optional[List[int]] = None  # every entry below, at MAX_DEPTH only
+
+
+class Suggestion:
+    __slots__ = ("text", "completion", "command", "source", "entry")
+
+    def __init__(self, text: str, completion: str, command: Optional[str], source: str,
+                 entry: Optional[int] = None):
+        self.text = text              # the whole line
+        self.completion = completion  # what is appended to the typed text
+        self.command = command        # the command the request ran before, for history suggestions
+        self.source = source          # "history" (trie) or "ngram"
+        self.entry = entry
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"text": self.text, "completion": self.completion, "command": self.command, "source": self.source}
+
+
+class CompletionModel:
+    """Suggests how the line being typed continues, in microseconds
+
+    Whole requests seen before come from a character trie whose nodes keep
+    their TOP_K entries by frecency, so a lookup walks the prefix and reads a
+    list. Scores only grow, so recording a use just offers the entry to the
+    nodes on its path. When no past request matches, a word trigram model
+    (with bigram and unigram backoff) completes the current or next word.
+    Entries remember the command that ran successfully for them; accepting
+    such a suggestion reuses that command instead of asking the LLM.
+    """
+
+    def __init__(self, path: str = DEFAULT_MODEL_PATH):
+        self.path = path
+        self.entries: List[Entry] = []
+        self.ids: Dict[str, int] = {}
+        self.root = _Node()
+        self.trigrams: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        self.bigrams: Dict[str, Counter] = defaultdict(Counter)
+        self.unigrams: Counter = Counter()
+        self.vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    # Persistence
+
+    def load(self) -> bool:
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("version") != MODEL_VERSION:
+            return False
+        with self._lock:
+            for item in state["entries"]:
+                entry = Entry(item["text"], item.get("command"), item["score"], item["count"], item["last"])
+                if entry.key not in self.ids:  # learned while loading: keep the newer entry
+                    self._add(entry)
+        return True
+
+    def save(self):
+        """Merge with the file (other sessions may have learned meanwhile) and write it atomically"""
+        if not self.dirty:
+            return
+        merged = {e.key: e for e in self._read_entries()}
+        with self._lock:
+            for entry in self.entries:
+                other = merged.get(entry.key)
+                if other is None or entry.last >= other.last:
+                    merged[entry.key] = entry
+            self.dirty = False
+        kept = sorted(merged.values(), key=lambda e: -e.score)[:MAX_ENTRIES]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": MODEL_VERSION, "entries": [e.to_dict() for e in kept]}, f,
+                      separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def _read_entries(self) -> List[Entry]:
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if state.get("version") != MODEL_VERSION:
+            return []
+        return [Entry(i["text"], i.get("command"), i["score"], i["count"], i["last"]) for i in state["entries"]]
+
+    # Training
+
+    def learn(self, text: str, command: Optional[str] = None, when: Optional[float] = None):
+        """Record one use of a request; command is what ran successfully for it"""
+        if not text.strip():
+            return
+        when = time.time() if when is None else when
+        key = normalize(text)
+        with self._lock:
+            i = self.ids.get(key)
+            if i is None:
+                entry = Entry(text)
+                entry.use(when)
+                entry.command = command
+                self._add(entry)
+            else:
+                entry = self.entries[i]
+                if entry.text != " ".join(text.split()):
+                    entry.text = " ".join(text.split())
+                if command:
+                    entry.command = command
+                entry.use(when)
+                self._count_words(key, 1)
+                self._offer(i)
+            self.dirty = True
+
+    def train(self, history: Iterable[Dict[str, Any]]):
+        """Learn from conversation history entries ({"user_input", "parsed_result", "executed"})"""
+        for item in history:
+            result = item.get("parsed_result") or {}
+            command = result.get("command") if result.get("type") == "command" and item.get("executed") else None
+            self.learn(item["user_input"], command, item.get("time"))
+
+    def _add(self, entry: Entry):
+        i = len(self.entries)
+        self.entries.append(entry)
+        self.ids[entry.key] = i
+        self._count_words(entry.key, entry.count)
+        self._offer(i, new=True)
+
+    def _count_words(self, key: str, weight: int):
+        words = [START, START] + key.split(" ")
+        for a, b, c in zip(words, words[1:], words[2:]):
+            self.trigrams[(a, b)][c] += weight
+            self.bigrams[b][c] += weight
+            if c not in self.unigrams:
+                self._vocabulary_dirty = True
+            self.unigrams[c] += weight
+
+    def _offer(self, i: int, new: bool = False):
+        """Place entry i in the top lists along its path (its score only grew)"""
+        entries = self.entries
+        score = entries[i].score
+        node = self.root
+        for depth, char in enumerate(entries[i].key[:MAX_DEPTH]):
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+            top = node.top
+            if not new and i in top:
+                top.remove(i)
+            if len(top) < TOP_K or score > entries[top[-1]].score:
+                position = 0
+                while position < len(top) and entries[top[position]].score >= score:
+                    position += 1
+                top.insert(position, i)
+                del top[TOP_K:]
+            if depth == MAX_DEPTH - 1 and new:
+                if node.bucket is None:
+                    node.bucket = []
+                node.bucket.append(i)
+
+    # Suggestions
+
+    def complete(self, text: str, limit: int = TOP_K) -> List[Suggestion]:
+        """Past requests extending text, best first"""
+        key = normalize(text)
+        if len(key) < MIN_PREFIX:
+            return []
+        if text[-1].isspace():
+            key += " "  # "show disk usage " wants "show disk usage of /var", not itself
+        node = self.root
+        for char in key[:MAX_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        if len(key) > MAX_DEPTH:
+            ids = sorted((j for j in node.bucket or () if self.entries[j].key.startswith(key)),
+                         key=lambda j: -self.entries[j].score)
+        else:
+            ids = node.top
+        suggestions = []
+        for j in ids[:limit]:
+            entry = self.entries[j]
+            completion = entry.text[len(key):]
+            suggestions.append(Suggestion(text + completion, completion, entry.command, "history", j))
+        return suggestions
+
+    def next_word(self, text: str) -> Optional[Suggestion]:
+        """Completion of the current word (or the next one after a space) from the n-gram model"""
+        key = normalize(text)
+        if not key:
+            return None
+        words = key.split(" ")
+        if text.endswith(" "):
+            partial, context = "", words
+        else:
+            partial, context = words[-1], words[:-1]
+        context = [START, START] + context
+        for counts in (self.trigrams.get((context[-2], context[-1])), self.bigrams.get(context[-1])):
+            if counts:
+                best = self._best(counts, partial)
+                if best is not None:
+                    return Suggestion(text + best[len(partial):], best[len(partial):], None, "ngram")
+        if len(partial) >= 3:
+            best = self._best_unigram(partial)
+            if best is not None:
+                return Suggestion(text + best[len(partial):], best[len(partial):], None, "ngram")
+        return None
+
+    @staticmethod
+    def _best(counts: Counter, partial: str) -> Optional[str]:
+        best, best_count = None, 0
+        for word, count in counts.items():
+            if count > best_count and word.startswith(partial) and word != partial:
+                best, best_count = word, count
+        return best
+
+    def _best_unigram(self, partial: str) -> Optional[str]:
+        if self._vocabulary_dirty:
+            with self._lock:
+                self.vocabulary = sorted(self.unigrams)
+                self._vocabulary_dirty = False
+        vocabulary = self.vocabulary
+        start = bisect.bisect_left(vocabulary, partial)
+        best, best_count = None, 0
+        for word in vocabulary[start:start + 200]:
+            if not word.startswith(partial):
+                break
+            if word != partial and self.unigrams[word] > best_count:
+                best, best_count = word, self.unigrams[word]
+        return best
+
+    def suggest(self, text: str) -> Optional[Suggestion]:
+        """The single best continuation of text: a past request, else the next word"""
+        if not text.strip():
+            return None
+        found = self.complete(text, limit=1)
+        if found:
+            return found[0]
+        return self.next_word(text)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self.entries), "with_command": sum(1 for e in self.entries if e.command),
+                "vocabulary": len(self.unigrams)}
+
+
+def display_width(text: str) -> int:
+    return sum(2 if unicodedata.east_asian_width(c) in "WF" else 0 if unicodedata.combining(c) else 1
+               for c in text)
+
+
+class CompletionUI:
+    """Tab completion and ghost text for a readline input() prompt
+
+    Tab replaces the line with the best suggestion. While the prompt waits, a
+    watcher thread polls readline's line buffer and, whenever the line grew at
+    its end, draws the suggestion's continuation dimmed after the cursor (and
+    the command a past request ran). When the submitted line equals a shown
+    or Tab-inserted history suggestion that carries a command, accepted()
+    returns that command so the shell can skip the LLM.
+    """
+
+    def __init__(self, model: CompletionModel, prompt: str, ghost: bool = True, poll_interval: float = 0.015):
+        self.model = model
+        self.prompt = prompt
+        self.ghost = ghost and sys.stdout.isatty() and os.getenv("TERM", "dumb") != "dumb"
+        self.poll_interval = poll_interval
+        self.offered: Dict[str, str] = {}  # normalized line -> command, for this prompt
+        self._prompting = threading.Event()
+        self._stop = threading.Event()
+        self._shown = ""   # line the ghost text is drawn after
+        self._drawn = 0    # width of the ghost text on screen
+        self._readline = None
+        self.stats = {"suggestions": 0, "accepted": 0, "suggest_ms": 0.0}
+
+    def install(self) -> bool:
+        try:
+            import readline
+        except ImportError:
+            logger.warning("readline not available, completion disabled")
+            return False
+        self._readline = readline
+        readline.set_completer_delims("")  # complete whole lines
+        readline.set_completer(self._complete)
+        readline.parse_and_bind("tab: complete")
+        if self.ghost:
+            threading.Thread(target=self._watch, name="ghost-text", daemon=True).start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def suggest(self, text: str) -> Optional[Suggestion]:
+        started = time.perf_counter()
+        suggestion = self.model.suggest(text)
+        self.stats["suggest_ms"] = max(self.stats["suggest_ms"], (time.perf_counter() - started) * 1000)
+        if suggestion is not None:
+            self.stats["suggestions"] += 1
+            if suggestion.command:
+                self.offered[normalize(suggestion.text)] = suggestion.command
+        return suggestion
+
+    def _complete(self, text: str, state: int) -> Optional[str]:
+        if state > 0:
+            return None
+        line = self._readline.get_line_buffer()
+        suggestion = self.suggest(line)
+        if suggestion is None or not suggestion.completion:
+            return None
+        self._shown, self._drawn = suggestion.text, 0  # readline redraws the line
+        return text + suggestion.completion
+
+    def begin_input(self):
+        self.offered.clear()
+        self._shown, self._drawn = "", 0
+        self._prompting.set()
+
+    def end_input(self, line: str):
+        """Input returned: erase ghost text left on the submitted line"""
+        self._prompting.clear()
+        if self._drawn:
+            column = display_width(self.prompt) + display_width(line)
+            width = shutil.get_terminal_size().columns
+            if column + self._drawn < width:
+                sys.stdout.write(f"\x1b[A\r\x1b[{column}C\x1b[K\x1b[B\r")
+                sys.stdout.flush()
+            self._drawn = 0
+
+    def accepted(self, line: str) -> Optional[str]:
+        """The stored command when line is a suggestion the user accepted"""
+        command = self.offered.get(normalize(line))
+        if command:
+            self.stats["accepted"] += 1
+            CACHE_REQUESTS.labels("completion", "hit").inc()
+        else:
+            CACHE_REQUESTS.labels("completion", "miss").inc()
+        return command
+
+    def _watch(self):
+        last = ""
+        while not self._stop.wait(self.poll_interval):
+            if not self._prompting.is_set():
+                last = ""
+                continue
+            line = self._readline.get_line_buffer()
+            if line == last:
+                continue
+            grew, shrank = line.startswith(last), last.startswith(line)
+            last = line
+            # Only edits at the end of the line tell where the cursor is
+            if not (grew or shrank):
+                continue
+            ghost = ""
+            suggestion = self.suggest(line) if line.strip() else None
+            if suggestion is not None:
+                ghost = suggestion.completion
+                if suggestion.command:
+                    ghost += f"  → {suggestion.command}"
+            width = shutil.get_terminal_size().columns
+            room = width - display_width(self.prompt) - display_width(line) - 1
+            ghost = ghost[:max(0, room)]
+            if not ghost and not self._drawn:
+                continue
+            if not self._prompting.is_set():
+                continue
+            sys.stdout.write(f"\x1b7\x1b[K\x1b[2m{ghost}\x1b[0m\x1b8")
+            sys.stdout.flush()
+            self._shown, self._drawn = line, display_width(ghost)
+
+
+def main():
+    """CLI: train from history JSON, list suggestions for a prefix, or time lookups"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline predictive completion")
+    parser.add_argument("prefix", nargs="*")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--train", metavar="HISTORY_JSON", help="conversation history entries to learn from")
+    args = parser.parse_args()
+
+    model = CompletionModel(args.model)
+    model.load()
+    if args.train:
+        with open(args.train) as f:
+            model.train(json.load(f))
+        model.save()
+    print(f"{model.stats}")
+    if args.prefix:
+        text = " ".join(args.prefix)
+        started = time.perf_counter()
+        suggestions = model.complete(text) or [s for s in [model.next_word(text)] if s]
+        elapsed = (time.perf_counter() - started) * 1000
+        for s in suggestions:
+            print(f"{s.source:<8} {s.text}" + (f"  → {s.command}" if s.command else ""))
+        print(f"({elapsed:.3f} ms)")
+
+
+if __name__ == "__main__":
+    main()
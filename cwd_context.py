@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Working Directory Context for LLM-powered Linux Distribution
+A compact, cached snapshot of the current directory (entries, file types, git status, project type) for prompts
+"""
+
+import logging
+import os
+import subprocess
+import threading
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+from fs_tools import format_size
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TOKENS = 160
+CHARS_PER_TOKEN = 4  # rough average for English text and file names with llama tokenizers
+MAX_ENTRIES = 200    # entries kept per listing; larger directories report a count
+MAX_GIT_CHANGES = 8
+GIT_TTL = 10.0       # edits inside the work tree move no mtime we watch, so git status expires
+GIT_TIMEOUT = 1.0
+CACHE_SIZE = 32
+
+# marker file -> project type, in order of precedence
+PROJECT_MARKERS = (
+    ("pyproject.toml", "Python"), ("setup.py", "Python"), ("requirements.txt", "Python"),
+    ("package.json", "Node.js"), ("Cargo.toml", "Rust"), ("go.mod", "Go"),
+    ("pom.xml", "Java (Maven)"), ("build.gradle", "Java (Gradle)"), ("build.gradle.kts", "Kotlin (Gradle)"),
+    ("Gemfile", "Ruby"), ("composer.json", "PHP"), ("CMakeLists.txt", "C/C++ (CMake)"),
+    ("meson.build", "C/C++ (Meson)"), ("configure.ac", "C (autotools)"), ("Makefile", "Make"),
+    ("debian", "Debian package"), ("Dockerfile", "Docker"), ("docker-compose.yml", "Docker Compose"),
+    ("compose.yaml", "Docker Compose"), ("ansible.cfg", "Ansible"), ("main.tf", "Terraform"),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def format_age(seconds: float) -> str:
+    """"45s", "12m", "5h", "3d", "8w", "2y\""""
+    for unit, length in (("y", 365 * 86400), ("w", 7 * 86400), ("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= length:
+            return f"{int(seconds // length)}{unit}"
+    return f"{max(0, int(seconds))}s"
+
+
+class Listing:
+    """The scanned entries of one directory, valid while its inode and mtime stay the same"""
+
+    __slots__ = ("key", "entries", "total", "dirs", "types", "project")
+
+    def __init__(self, key: Tuple[int, int, int], entries: List[Tuple[str, bool, int, float]], total: int,
+                 dirs: int, types: Counter, project: List[str]):
+        self.key = key              # (st_dev, st_ino, st_mtime_ns)
+        self.entries = entries      # (name, is_dir, size, mtime), newest first
+        self.total = total
+        self.dirs = dirs
+        self.types = types          # extension -> file count
+        self.project = project
+
+
+def scan_directory(path: str, key: Tuple[int, int, int]) -> Listing:
+    """One scandir pass; hidden entries only count towards the project type"""
+    entries, names = [], set()
+    total = dirs = 0
+    types: Counter = Counter()
+    with os.scandir(path) as it:
+        for entry in it:
+            names.add(entry.name)
+            if entry.name.startswith("."):
+                continue
+            total += 1
+            try:
+                is_dir = entry.is_dir()
+                st = entry.stat()
+            except OSError:
+                continue
+            if is_dir:
+                dirs += 1
+            else:
+                ext = os.path.splitext(entry.name)[1].lower()
+                types[ext or "no extension"] += 1
+            entries.append((entry.name, is_dir, 0 if is_dir else st.st_size, st.st_mtime))
+    entries.sort(key=lambda e: -e[3])
+    project = []
+    for marker, kind in PROJECT_MARKERS:
+        if marker in names and kind not in project:
+            project.append(kind)
+    return Listing(key, entries[:MAX_ENTRIES], total, dirs, types, project)
+
+
+def find_git_root(path: str) -> Optional[str]:
+    while True:
+        if os.path.exists(os.path.join(path, ".git")):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _git_dir(root: str) -> str:
+    """The .git directory, following the "gitdir:" file of worktrees and submodules"""
+    dot_git = os.path.join(root, ".git")
+    if os.path.isfile(dot_git):
+        try:
+            with open(dot_git) as f:
+                content = f.read().strip()
+            if content.startswith("gitdir:"):
+                return os.path.normpath(os.path.join(root, content[7:].strip()))
+        except OSError:
+            pass
+    return dot_git
+
+
+class GitState:
+    __slots__ = ("key", "checked", "branch", "changes", "counts")
+
+    def __init__(self, key: Tuple, checked: float, branch: str, changes: List[str], counts: Dict[str, int]):
+        self.key = key
+        self.checked = checked
+        self.branch = branch
+        self.changes = changes  # porcelain lines ("M  main.py", "?? notes.txt"), relative to the repository root
+        self.counts = counts    # "modified", "staged", "untracked", "conflicts"
+
+
+def read_branch(git_dir: str) -> str:
+    """Branch from HEAD without running git; a short hash when detached"""
+    try:
+        with open(os.path.join(git_dir, "HEAD")) as f:
+            head = f.read().strip()
+    except OSError:
+        return "?"
+    if head.startswith("ref: "):
+        return head[5:].rsplit("refs/heads/", 1)[-1]
+    return f"detached at {head[:8]}"
+
+
+def git_status(root: str) -> Tuple[List[str], Dict[str, int]]:
+    """Porcelain status lines and counts; empty when git is missing or too slow"""
+    try:
+        output = subprocess.run(["git", "-C", root, "status", "--porcelain=v1", "--untracked-files=normal",
+                                 "--ignore-submodules"], capture_output=True, text=True, timeout=GIT_TIMEOUT,
+                                env={**os.environ, "GIT_OPTIONAL_LOCKS": "0", "LC_ALL": "C"}).stdout
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.debug(f"git status unavailable in {root}: {e}")
+        return [], {}
+    changes = output.splitlines()
+    counts = Counter()
+    for line in changes:
+        x, y = line[0], line[1]
+        if x == "?":
+            counts["untracked"] += 1
+        elif "U" in (x, y) or (x, y) in (("A", "A"), ("D", "D")):
+            counts["conflicts"] += 1
+        else:
+            if x != " ":
+                counts["staged"] += 1
+            if y != " ":
+                counts["modified"] += 1
+    return changes, dict(counts)
+
+
+class CwdContext:
+    """Builds the "where am I" block of the prompt, at the cost of a few stat calls per turn
+
+    A directory's listing is cached under its (device, inode, mtime), so it is
+    rescanned only after entries are created, removed or renamed. Git status is
+    cached under the mtimes of HEAD and the index and additionally expires
+    after GIT_TTL seconds, or when invalidate() is called after a command ran.
+    The rendered text is cut to max_tokens: the header line always stays,
+    then the file types, git changes and as many of the newest entries as fit.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS, git: bool = True):
+        self.max_tokens = max_tokens
+        self.git = git
+        self._listings: Dict[str, Listing] = {}
+        self._git: Dict[str, GitState] = {}
+        self._roots: Dict[str, Optional[str]] = {}
+        self._rendered: Dict[str, Tuple[Tuple, str]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "scans": 0, "git_runs": 0}
+
+    def invalidate(self, path: Optional[str] = None):
+        """Forget cached state so the next snapshot rescans: files written in place keep their directory's mtime"""
+        with self._lock:
+            if path is None:
+                self._listings.clear()
+                self._git.clear()
+                self._rendered.clear()
+            else:
+                self._listings.pop(path, None)
+                self._git.pop(self._roots.get(path), None)
+                self._rendered.pop(path, None)
+
+    def listing(self, path: str) -> Optional[Listing]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns)
+        cached = self._listings.get(path)
+        if cached is not None and cached.key == key:
+            return cached
+        try:
+            listing = scan_directory(path, key)
+        except OSError as e:
+            logger.debug(f"Cannot list {path}: {e}")
+            return None
+        self.stats["scans"] += 1
+        with self._lock:
+            if len(self._listings) >= CACHE_SIZE:
+                self._listings.pop(next(iter(self._listings)))
+            self._listings[path] = listing
+        return listing
+
+    def git_state(self, path: str) -> Optional[GitState]:
+        if path not in self._roots:
+            self._roots[path] = find_git_root(path)
+        root = self._roots[path]
+        if root is None:
+            return None
+        git_dir = _git_dir(root)
+        key = []
+        for name in ("HEAD", "index"):
+            try:
+                key.append(os.stat(os.path.join(git_dir, name)).st_mtime_ns)
+            except OSError:
+                key.append(0)
+        key = tuple(key)
+        now = time.monotonic()
+        cached = self._git.get(root)
+        if cached is not None and cached.key == key and now - cached.checked < GIT_TTL:
+            return cached
+        changes, counts = git_status(root)
+        self.stats["git_runs"] += 1
+        state = GitState(key, now, read_branch(git_dir), changes, counts)
+        with self._lock:
+            self._git[root] = state
+        return state
+
+    def snapshot(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """Structured snapshot of path (default: the current directory)"""
+        path = os.path.abspath(path or os.getcwd())
+        listing = self.listing(path)
+        git = self.git_state(path) if self.git else None
+        return {"path": path, "listing": listing, "git": git, "root": self._roots.get(path)}
+
+    def render(self, path: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        """The snapshot as prompt text within max_tokens; "" for unreadable directories"""
+        path = os.path.abspath(path or os.getcwd())
+        max_tokens = max_tokens or self.max_tokens
+        snapshot = self.snapshot(path)
+        listing, git = snapshot["listing"], snapshot["git"]
+        if listing is None:
+            return ""
+        # Ages are shown in whole units, so the text is reused within the minute
+        key = (listing.key, git.key if git else None, git.checked if git else None, max_tokens,
+               int(time.time() // 60))
+        cached = self._rendered.get(path)
+        if cached is not None and cached[0] == key:
+            self.stats["hits"] += 1
+            return cached[1]
+        text = self._format(snapshot, max_tokens)
+        with self._lock:
+            if len(self._rendered) >= CACHE_SIZE:
+                self._rendered.pop(next(iter(self._rendered)))
+            self._rendered[path] = (key, text)
+        return text
+
+    @staticmethod
+    def _format(snapshot: Dict[str, Any], max_tokens: int) -> str:
+        listing, git, path = snapshot["listing"], snapshot["git"], snapshot["path"]
+        home = os.path.expanduser("~")
+        shown = "~" + path[len(home):] if path == home or path.startswith(home + "/") else path
+        if len(shown) > 80:
+            shown = "..." + shown[-77:]
+        header = f"Current directory: {shown} ({listing.total} entries, {listing.dirs} directories)"
+        details = []
+        if listing.project:
+            details.append(" + ".join(listing.project[:2]) + " project")
+        if git is not None:
+            counts = ", ".join(f"{n} {kind}" for kind, n in git.counts.items()) or "clean"
+            details.append(f"git branch {git.branch}: {counts}")
+        if details:
+            header += "; " + "; ".join(details)
+        budget = max_tokens * CHARS_PER_TOKEN
+        lines = [header[:budget]]
+        used = len(lines[0]) + 1
+
+        if listing.types:
+            types = "File types: " + ", ".join(f"{n} {ext}" for ext, n in listing.types.most_common(6))
+            if used + len(types) < budget * 0.6:
+                lines.append(types)
+                used += len(types) + 1
+        if git is not None and git.changes:
+            relative = os.path.relpath(snapshot["root"], path) if snapshot["root"] != path else ""
+            changes = [c[:2].strip() + " " + c[3:] for c in git.changes[:MAX_GIT_CHANGES]]
+            more = len(git.changes) - len(changes)
+            text = "Git changes" + (f" (relative to {relative})" if relative else "") + ": " + ", ".join(changes) + \
+                   (f" (+{more} more)" if more else "")
+            if used + len(text) > budget * 0.75:
+                text = text[:max(0, int(budget * 0.75) - used - 3)].rsplit(", ", 1)[0] + " ..."
+            if len(text) > 20:
+                lines.append(text)
+                used += len(text) + 1
+
+        now = time.time()
+        prefix = "Newest entries: "
+        items = []
+        for name, is_dir, size, mtime in listing.entries:
+            if is_dir:
+                item = f"{name}/ ({format_age(now - mtime)})"
+            else:
+                item = f"{name} ({format_size(size)}, {format_age(now - mtime)})"
+            remaining = listing.total - len(items) - 1
+            tail = len(f", +{remaining} more") if remaining else 0
+            if used + len(prefix) + sum(len(i) + 2 for i in items) + len(item) + tail > budget:
+                break
+            items.append(item)
+        if items:
+            more = listing.total - len(items)
+            lines.append(prefix + ", ".join(items) + (f", +{more} more" if more else ""))
+        return "\n".join(lines)
+
+
+def main():
+    """CLI: print the snapshot of a directory"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Working directory context for prompts")
+    parser.add_argument("path", nargs="?", default=".")
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS)
+    args = parser.parse_args()
+
+    context = CwdContext(max_tokens=args.max_tokens)
+    started = time.perf_counter()
+    text = context.render(args.path)
+    cold = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    context.render(args.path)
+    warm = (time.perf_counter() - started) * 1000
+    print(text)
+    print(f"({estimate_tokens(text)} tokens; {cold:.2f} ms cold, {warm:.3f} ms cached)")
+
+
+if __name__ == "__main__":
+    main()
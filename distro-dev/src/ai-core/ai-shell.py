@@ -12,11 +12,12 @@ import logging
 from typing import Dict, Any, Optional
 from pathlib import Path
 
-# LinuxAI system imports
-from ai_core.nlp_processor import NLPProcessor
-from ai_core.command_executor import SystemCommandExecutor
-from ai_core.voice_interface import VoiceInterface
-from ai_core.system_monitor import SystemMonitor
+# LinuxAI system imports; the heavy AI components are imported in
+# LinuxAIShell.__init__ so that thin-client mode starts instantly
+from ai_core.line_reader import AsyncLineReader, InputEvent
+
+# Services whose exit or crash is reported to the AI (pidfd); AI_WATCH_PROCESSES overrides
+WATCHED_PROCESSES = "ollama,ai-system,ai-voice,ai-nlp"
 
 class LinuxAIShell:
     """AI-enhanced shell for LinuxAI distribution"""
@@ -30,10 +31,27 @@ class LinuxAIShell:
         self.setup_logging()
         
         # Core AI components
+        from ai_core.nlp_processor import NLPProcessor
+        from ai_core.command_executor import SystemCommandExecutor
+        from ai_core.voice_interface import VoiceInterface
+        from ai_core.system_monitor import SystemMonitor
+        from ai_core.event_engine import EventEngine
+        from ai_core.anomaly_detector import AnomalyDetector
+        
         self.nlp = NLPProcessor(model_path=self.model_path)
         self.executor = SystemCommandExecutor()
         self.voice = VoiceInterface()
         self.monitor = SystemMonitor()
+        self.events = EventEngine(rate_limits={"low_disk": 600.0, "low_memory": 600.0, "device": 5.0})
+        self.detector = AnomalyDetector(self.monitor.history.metrics)
+        self.detector.add_default_rules()
+        self.monitor.listeners.append(self.check_anomalies)
+        
+        # Every input source (REPL, voice, monitoring) feeds this queue
+        self.reader = AsyncLineReader()
+        self.input_queue: asyncio.Queue = asyncio.Queue()
+        self.pending_answer: Optional[asyncio.Future] = None
+        self.llm_lock = asyncio.Lock()
         
         # Shell state
         self.session_active = True
@@ -90,46 +108,56 @@ class LinuxAIShell:
         
         return f"{blue}{self.current_user}@{self.hostname}{reset}:{green}{cwd_display}{reset}$ "
     
+    def process_builtin(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """Answer built-in commands immediately, without touching the AI system"""
+        command = user_input.lower()
+        if command in ['exit', 'quit']:
+            self.session_active = False
+            return {"type": "exit", "message": "Goodbye!"}
+        
+        if command == 'help':
+            return {"type": "help", "message": self.get_help_text()}
+        
+        if command == 'status':
+            status = self.monitor.get_detailed_status()
+            return {"type": "status", "data": status}
+        
+        return None
+    
     async def process_input(self, user_input: str) -> Dict[str, Any]:
         """Process user input through AI system"""
         try:
             # Check for built-in commands first
-            if user_input.lower() in ['exit', 'quit']:
-                self.session_active = False
-                return {"type": "exit", "message": "Goodbye!"}
-            
-            if user_input.lower() == 'help':
-                return {"type": "help", "message": self.get_help_text()}
-            
-            if user_input.lower() == 'status':
-                status = self.monitor.get_detailed_status()
-                return {"type": "status", "data": status}
+            builtin = self.process_builtin(user_input)
+            if builtin is not None:
+                return builtin
             
-            # Process through AI NLP system
+            # Process through AI NLP system, one request at a time
             self.logger.info(f"Processing input: {user_input[:50]}...")
             
-            # Natural language processing
-            nlp_result = await self.nlp.process_command(user_input)
-            
-            if nlp_result["type"] == "system_command":
-                # Execute system command through secure executor
-                exec_result = await self.executor.execute_command(
-                    nlp_result["command"],
-                    user=self.current_user,
-                    safe_mode=True
-                )
-                return exec_result
-            
-            elif nlp_result["type"] == "conversation":
-                # Handle conversational AI responses
-                return nlp_result
-            
-            elif nlp_result["type"] == "clarification":
-                # Ask for clarification
-                return nlp_result
-            
-            else:
-                return {"type": "error", "message": "Could not understand the request"}
+            async with self.llm_lock:
+                # Natural language processing
+                nlp_result = await self.nlp.process_command(user_input)
+                
+                if nlp_result["type"] == "system_command":
+                    # Execute system command through secure executor
+                    exec_result = await self.executor.execute_command(
+                        nlp_result["command"],
+                        user=self.current_user,
+                        safe_mode=True
+                    )
+                    return exec_result
+                
+                elif nlp_result["type"] == "conversation":
+                    # Handle conversational AI responses
+                    return nlp_result
+                
+                elif nlp_result["type"] == "clarification":
+                    # Ask for clarification
+                    return nlp_result
+                
+                else:
+                    return {"type": "error", "message": "Could not understand the request"}
                 
         except Exception as e:
             self.logger.error(f"Error processing input: {e}")
@@ -167,94 +195,169 @@ LinuxAI Shell Help:
   - All commands are logged for security
         """
     
+    def submit_input(self, source: str, text: str):
+        """Queue input from any source (voice, monitoring, ...) for the shell"""
+        self.input_queue.put_nowait(InputEvent(source, text))
+    
+    def start_event_monitoring(self):
+        """Feed low-disk, low-memory, device, service-exit and anomaly events to the AI as "monitor" input"""
+        from ai_core.event_engine import describe_events
+        
+        self.events.watch_disk("/")
+        self.events.watch_memory()
+        self.events.watch_devices(subsystems=("block", "usb", "net"))
+        self.events.watch_processes_named(os.getenv("AI_WATCH_PROCESSES", WATCHED_PROCESSES).split(","))
+        self.events.subscribe(
+            lambda batch: self.submit_input(
+                "monitor", describe_events(batch) + ". Explain what happened and suggest what to do."))
+        asyncio.get_running_loop().add_reader(self.events.fileno(), self.events.dispatch)
+    
+    def check_anomalies(self):
+        """Runs on the monitor thread after each sample; only fired alerts reach the AI"""
+        for alert in self.detector.update(self.monitor.history):
+            self.events.emit(alert.to_event())
+    
+    async def read_repl_input(self):
+        """Feed typed lines into the input queue without blocking the event loop"""
+        while self.session_active:
+            try:
+                line = await self.reader.readline(self.get_prompt())
+            except KeyboardInterrupt:
+                self.reader.print_above("Use 'exit' to quit the AI shell.")
+                continue
+            except EOFError:
+                self.submit_input("repl", "exit")
+                return
+            
+            line = line.strip()
+            # A pending confirmation takes the next typed line
+            if self.pending_answer is not None and not self.pending_answer.done():
+                self.pending_answer.set_result(line)
+            elif line:
+                self.submit_input("repl", line)
+    
     async def handle_voice_input(self):
         """Handle voice input in background"""
         while self.session_active and self.voice_enabled:
             try:
                 voice_input = await self.voice.listen_for_wake_word()
                 if voice_input:
-                    print(f"\n🎤 Voice: {voice_input}")
-                    result = await self.process_input(voice_input)
-                    self.display_result(result)
-                    print(self.get_prompt(), end="", flush=True)
+                    self.submit_input("voice", voice_input)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 self.logger.error(f"Voice input error: {e}")
-            
-            await asyncio.sleep(0.1)
+                # Back off so a broken audio device does not spin the loop
+                await asyncio.sleep(1)
     
-    def display_result(self, result: Dict[str, Any]):
+    async def ask(self, question: str) -> str:
+        """Ask the user a question; the answer is the next line typed at the prompt"""
+        self.pending_answer = asyncio.get_running_loop().create_future()
+        self.reader.print_above(question)
+        try:
+            return await self.pending_answer
+        finally:
+            self.pending_answer = None
+    
+    async def handle_request(self, event: InputEvent):
+        """Run one AI request and print its result above the prompt"""
+        if event.source == "voice":
+            self.reader.print_above(f"🎤 Voice: {event.text}")
+        elif event.source == "monitor":
+            self.reader.print_above(f"📡 {event.text}")
+        result = await self.process_input(event.text)
+        await self.display_result(result)
+    
+    async def display_result(self, result: Dict[str, Any]):
         """Display command execution results"""
         if result["type"] == "success":
             if "output" in result and result["output"]:
-                print(result["output"])
+                self.reader.print_above(result["output"])
         
         elif result["type"] == "error":
-            print(f"❌ Error: {result['message']}")
+            self.reader.print_above(f"❌ Error: {result['message']}")
         
         elif result["type"] == "clarification":
-            print(f"🤔 {result['message']}")
+            self.reader.print_above(f"🤔 {result['message']}")
         
         elif result["type"] == "status":
             self.display_system_status(result["data"])
         
         elif result["type"] == "help":
-            print(result["message"])
+            self.reader.print_above(result["message"])
         
         elif result["type"] == "confirmation":
-            response = input(f"⚠️  {result['message']} (y/N): ")
+            response = await self.ask(f"⚠️  {result['message']} (y/N)")
             return response.lower().startswith('y')
     
     def display_system_status(self, status: Dict[str, Any]):
         """Display formatted system status"""
-        print("📊 System Status:")
-        print(f"  🖥️  Hostname: {status['hostname']}")
-        print(f"  ⏰ Uptime: {status['uptime']}")
-        print(f"  💾 Memory: {status['memory_used']:.1f}GB / {status['memory_total']:.1f}GB ({status['memory_percent']:.1f}%)")
-        print(f"  💽 Disk: {status['disk_used']:.1f}GB / {status['disk_total']:.1f}GB ({status['disk_percent']:.1f}%)")
-        print(f"  🔥 CPU: {status['cpu_percent']:.1f}%")
-        print(f"  🌡️  Temperature: {status.get('temperature', 'N/A')}")
+        lines = ["📊 System Status:"]
+        lines.append(f"  🖥️  Hostname: {status['hostname']}")
+        lines.append(f"  ⏰ Uptime: {status['uptime']}")
+        lines.append(f"  💾 Memory: {status['memory_used']:.1f}GB / {status['memory_total']:.1f}GB ({status['memory_percent']:.1f}%)")
+        lines.append(f"  💽 Disk: {status['disk_used']:.1f}GB / {status['disk_total']:.1f}GB ({status['disk_percent']:.1f}%)")
+        lines.append(f"  🔥 CPU: {status['cpu_percent']:.1f}%")
+        lines.append(f"  🌡️  Temperature: {status.get('temperature', 'N/A')}")
+        self.reader.print_above("\n".join(lines))
     
     async def run(self):
         """Main shell loop"""
         self.display_banner()
+        self.monitor.start()
+        self.start_event_monitoring()
         
-        # Start voice input handler
-        voice_task = asyncio.create_task(self.handle_voice_input())
+        # Input producers; the loop below is the only consumer
+        producers = [asyncio.create_task(self.read_repl_input())]
+        if self.voice_enabled:
+            producers.append(asyncio.create_task(self.handle_voice_input()))
+        in_flight = set()
         
         try:
             while self.session_active:
-                try:
-                    # Display prompt and get input
-                    user_input = input(self.get_prompt()).strip()
-                    
-                    if not user_input:
-                        continue
-                    
-                    # Process input
-                    result = await self.process_input(user_input)
-                    
-                    # Display result
+                event = await self.input_queue.get()
+                
+                # Builtins answer at once, even while an AI request is in flight
+                result = self.process_builtin(event.text)
+                if result is not None:
                     if result["type"] == "exit":
-                        print(result["message"])
+                        self.reader.print_above(result["message"])
                         break
-                    else:
-                        self.display_result(result)
-                
-                except KeyboardInterrupt:
-                    print("\n\nUse 'exit' to quit the AI shell.")
+                    await self.display_result(result)
                     continue
                 
-                except EOFError:
-                    print("\nGoodbye!")
-                    break
+                task = asyncio.create_task(self.handle_request(event))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
         
         finally:
             # Cleanup
-            voice_task.cancel()
+            for task in producers + list(in_flight):
+                task.cancel()
+            self.monitor.stop()
+            asyncio.get_running_loop().remove_reader(self.events.fileno())
+            self.events.close()
             self.logger.info("AI Shell session ended")
 
+def linuxai_home() -> Path:
+    """Directory holding ai_daemon.py: $LINUXAI_HOME, else the checkout this shell lives in"""
+    return Path(os.getenv("LINUXAI_HOME") or Path(__file__).resolve().parents[3])
+
 def main():
     """Entry point for LinuxAI shell"""
+    # Thin client: hand the terminal to a session in the warm ai-system daemon
+    if "--client" in sys.argv[1:] or os.getenv("LINUXAI_CLIENT") == "1":
+        sys.path.append(str(linuxai_home()))
+        try:
+            from ai_daemon import run_client
+        except ImportError as e:
+            print(f"⚠️  Thin client unavailable ({e}; set LINUXAI_HOME to the LinuxAI directory), starting locally")
+        else:
+            code = run_client("ai-shell", argv=sys.argv[1:])
+            if code is not None:
+                sys.exit(code)
+            print("⚠️  ai-system daemon not reachable, starting locally")
+    
     try:
         shell = LinuxAIShell()
         asyncio.run(shell.run())
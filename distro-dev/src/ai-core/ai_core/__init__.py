@@ -0,0 +1,3 @@
+"""
+LinuxAI core system components used by the AI shell and the ai-system daemon
+"""
@@ -0,0 +1,191 @@
+"""
+Anomaly detection for the LinuxAI shell
+Computes EWMA, z-score and trend slope for the monitored metrics in one NumPy pass and raises alerts with hysteresis and cooldowns
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ai_core.system_monitor import RingBuffer
+
+# Signals a rule can watch, in the row order of the signal matrix
+SIGNALS = ("level", "zscore", "slope")
+
+# (metric, signal, fire above, clear below, cooldown seconds, message)
+DEFAULT_RULES = (
+    ("memory_percent", "level", 90.0, 85.0, 900.0, "Memory usage is high ({current:.0f}%)."),
+    ("swap_percent", "level", 50.0, 40.0, 900.0, "The system is swapping heavily ({current:.0f}% of swap in use)."),
+    ("disk_percent", "level", 90.0, 88.0, 3600.0, "The root filesystem is almost full ({current:.0f}% used)."),
+    ("temperature", "level", 85.0, 75.0, 900.0, "The CPU is running hot ({current:.0f}°C)."),
+    ("cpu_percent", "zscore", 4.0, 1.0, 600.0, "CPU usage jumped to {current:.0f}%, far above its recent average."),
+    ("load_1", "zscore", 4.0, 1.0, 600.0, "The load average spiked to {current:.2f}."),
+    ("memory_percent", "slope", 0.5, 0.1, 1800.0,
+     "Memory usage is climbing steadily ({value:.2f}%/min, now {current:.0f}%){eta}; something may be leaking."),
+    ("disk_percent", "slope", 0.2, 0.05, 3600.0,
+     "The root filesystem is filling up ({value:.2f}%/min, now {current:.0f}%){eta}."),
+)
+
+
+@dataclass
+class Alert:
+    """A rule that has just fired"""
+    metric: str
+    signal: str
+    value: float     # the watched signal: level, z-score, or slope per minute
+    current: float   # the metric's latest value
+    message: str
+    timestamp: float = field(default_factory=time.time)
+
+    def to_event(self):
+        from ai_core.event_engine import SystemEvent
+        return SystemEvent("alert", f"{self.metric}:{self.signal}", {
+            "metric": self.metric,
+            "signal": self.signal,
+            "value": self.value,
+            "current": self.current,
+            "message": self.message,
+        }, self.timestamp)
+
+
+class AnomalyDetector:
+    """Vectorized detector over a RingBuffer of metrics
+
+    Levels and z-scores are updated for every metric on every sample, which
+    is O(metrics). Slopes need the whole window, so each update() refits
+    only the next slope_block metrics in round-robin order, and the others
+    keep the slope from their last turn. A trend over a 120-sample window
+    barely moves in a few samples, and the cost stays O(slope_block x
+    slope_window) however many metrics are monitored. All rules are
+    evaluated with one fancy-indexed gather and a handful of boolean array
+    operations. A rule fires when its signal rises above fire_above, then
+    stays quiet until the signal drops below clear_below (hysteresis) and
+    its cooldown has passed.
+    """
+
+    def __init__(self, metrics: Sequence[str], alpha: float = 0.05, slope_window: int = 120,
+                 warmup: int = 30, min_std: float = 1.0, slope_block: int = 4):
+        self.metrics = tuple(metrics)
+        self.index = {name: i for i, name in enumerate(self.metrics)}
+        self.alpha = alpha
+        self.slope_window = slope_window
+        self.warmup = warmup
+        # Floor on the EWMA deviation so a perfectly flat metric does not turn noise into huge z-scores
+        self.min_std = np.full(len(self.metrics), min_std)
+        self.mean = np.full(len(self.metrics), np.nan)
+        self.var = np.zeros(len(self.metrics))
+        self.samples = 0
+        self.slope_block = max(1, min(slope_block, len(self.metrics)))
+        self.slope = np.zeros(len(self.metrics))
+        self._slope_cursor = 0
+        self.last_signals = np.zeros((len(SIGNALS), len(self.metrics)))
+
+        self._rules: List[Dict[str, Any]] = []
+        self._rule_metric = np.zeros(0, dtype=np.intp)
+        self._rule_signal = np.zeros(0, dtype=np.intp)
+        self._fire_above = np.zeros(0)
+        self._clear_below = np.zeros(0)
+        self._cooldown = np.zeros(0)
+        self._active = np.zeros(0, dtype=bool)
+        self._last_fired = np.zeros(0)
+
+    def add_rule(self, metric: str, signal: str, fire_above: float, clear_below: float,
+                 cooldown: float = 600.0, message: str = "{metric} is anomalous ({current:.1f})"):
+        if metric not in self.index:
+            raise ValueError(f"Unknown metric '{metric}'")
+        if signal not in SIGNALS:
+            raise ValueError(f"Unknown signal '{signal}', expected one of: {', '.join(SIGNALS)}")
+        self._rules.append({"metric": metric, "signal": signal, "message": message})
+        self._rule_metric = np.append(self._rule_metric, self.index[metric])
+        self._rule_signal = np.append(self._rule_signal, SIGNALS.index(signal))
+        self._fire_above = np.append(self._fire_above, fire_above)
+        self._clear_below = np.append(self._clear_below, clear_below)
+        self._cooldown = np.append(self._cooldown, cooldown)
+        self._active = np.append(self._active, False)
+        self._last_fired = np.append(self._last_fired, -np.inf)
+
+    def add_default_rules(self):
+        for metric, signal, fire_above, clear_below, cooldown, message in DEFAULT_RULES:
+            if metric in self.index:
+                self.add_rule(metric, signal, fire_above, clear_below, cooldown, message)
+
+    def next_slope_block(self) -> np.ndarray:
+        """Indexes of the metrics whose slope the next update refits"""
+        block = (self._slope_cursor + np.arange(self.slope_block)) % len(self.metrics)
+        self._slope_cursor = int(block[-1] + 1) % len(self.metrics)
+        return block
+
+    def compute_signals(self, latest: np.ndarray, times: np.ndarray, window: np.ndarray,
+                        block: Optional[np.ndarray] = None) -> np.ndarray:
+        """Level, z-score and slope (per minute) of every metric, as a (signals x metrics) matrix
+
+        latest holds every metric's newest value; window holds the recent
+        samples of the metrics in block (default: all), whose slopes are refit.
+        """
+        if block is None:
+            block = np.arange(len(self.metrics))
+        valid = ~np.isnan(latest)
+
+        # z-score of the newest sample against the EWMA of the samples before it
+        std = np.maximum(np.sqrt(self.var), self.min_std)
+        zscore = np.where(valid & ~np.isnan(self.mean), (latest - self.mean) / std, 0.0)
+        if self.samples < self.warmup:
+            zscore[:] = 0.0
+
+        # Exponentially weighted mean and variance, updated in place for all metrics
+        first = valid & np.isnan(self.mean)
+        self.mean[first] = latest[first]
+        delta = np.where(valid, latest - self.mean, 0.0)
+        self.mean += self.alpha * delta
+        self.var = (1 - self.alpha) * (self.var + self.alpha * delta * delta)
+        self.samples += 1
+
+        # Least-squares slope over the window for the whole block at once
+        slope = np.zeros(len(block))
+        # Trends need a reasonably full window, or start-up noise looks like a steep slope
+        if window.shape[1] >= max(self.slope_window // 2, 2):
+            t = times - times.mean()
+            denom = float(t @ t)
+            complete = ~np.isnan(window).any(axis=1)
+            if denom > 0 and complete.any():
+                centered = window[complete] - window[complete].mean(axis=1, keepdims=True)
+                slope[complete] = centered @ t / denom * 60.0
+        self.slope[block] = slope
+
+        return np.vstack((np.where(valid, latest, np.nan), zscore, self.slope))
+
+    def update(self, history: RingBuffer, now: Optional[float] = None) -> List[Alert]:
+        """Evaluate every rule against the newest sample in history; returns the alerts that fired"""
+        if history.count == 0 or not self._rules:
+            return []
+        now = time.time() if now is None else now
+        rows = np.array([history.index[name] for name in self.metrics], dtype=np.intp)
+        block = self.next_slope_block()
+        times, window = history.last(self.slope_window, rows[block])
+        signals = self.compute_signals(history.latest()[1][rows], times, window, block)
+        self.last_signals = signals
+
+        values = signals[self._rule_signal, self._rule_metric]
+        fire = ~self._active & (values > self._fire_above) & (now - self._last_fired >= self._cooldown)
+        clear = self._active & (values < self._clear_below)
+        self._active[clear] = False
+        self._active[fire] = True
+        self._last_fired[fire] = now
+
+        alerts = []
+        for i in np.flatnonzero(fire):
+            rule = self._rules[i]
+            value = float(values[i])
+            current = float(signals[0, self._rule_metric[i]])
+            eta = ""
+            if rule["signal"] == "slope" and rule["metric"].endswith("_percent") and value > 0:
+                minutes = (100.0 - current) / value
+                eta = f", full in about {minutes / 60:.1f} hours" if minutes >= 90 else f", full in about {minutes:.0f} minutes"
+            message = rule["message"].format(metric=rule["metric"], value=value, current=current, eta=eta)
+            alerts.append(Alert(rule["metric"], rule["signal"], value, current, message, now))
+        return alerts
+
+    def active_alerts(self) -> List[str]:
+        return [f"{rule['metric']}:{rule['signal']}" for rule, active in zip(self._rules, self._active) if active]
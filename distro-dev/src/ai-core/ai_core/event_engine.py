@@ -0,0 +1,552 @@
+"""
+System event engine for the LinuxAI shell
+Watches files (inotify), devices (kernel uevents), process exits (pidfd) and
+disk/memory thresholds (timerfd) from a single epoll set, and hands coalesced,
+rate-limited batches of events to subscribers
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+DEFAULT_INOTIFY_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+                        IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+INOTIFY_EVENT_NAMES = {
+    IN_MODIFY: "modified",
+    IN_ATTRIB: "attrib",
+    IN_CLOSE_WRITE: "written",
+    IN_MOVED_FROM: "moved_from",
+    IN_MOVED_TO: "moved_to",
+    IN_CREATE: "created",
+    IN_DELETE: "deleted",
+    IN_DELETE_SELF: "deleted",
+    IN_MOVE_SELF: "moved",
+}
+_INOTIFY_HEADER = struct.Struct("iIII")
+
+# timerfd_create(2)
+CLOCK_MONOTONIC = 1
+TFD_NONBLOCK = os.O_NONBLOCK
+TFD_CLOEXEC = os.O_CLOEXEC
+
+# netlink(7)
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_KERNEL_GROUP = 1
+
+# waitid(2) si_code values
+CLD_EXITED = 1
+CLD_KILLED = 2
+CLD_DUMPED = 3
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", _Timespec), ("it_value", _Timespec)]
+
+
+def _check(ret: int, what: str) -> int:
+    if ret < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, f"{what}: {os.strerror(err)}")
+    return ret
+
+
+def _timespec(seconds: float) -> _Timespec:
+    sec = int(seconds)
+    return _Timespec(sec, int((seconds - sec) * 1e9))
+
+
+@dataclass
+class SystemEvent:
+    """One (possibly coalesced) system event"""
+    kind: str   # "file", "device", "process_exit", "low_disk", "low_memory", ...
+    key: str    # events with the same kind and key are coalesced
+    data: Dict[str, Any] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+    count: int = 1
+
+    def merge(self, other: "SystemEvent"):
+        """Fold a newer event with the same kind and key into this one"""
+        self.count += other.count
+        self.timestamp = other.timestamp
+        for name, value in other.data.items():
+            current = self.data.get(name)
+            if isinstance(value, list) and isinstance(current, list):
+                self.data[name] = current + [v for v in value if v not in current]
+            else:
+                self.data[name] = value
+
+
+class TimerFD:
+    """A CLOCK_MONOTONIC timerfd"""
+
+    def __init__(self):
+        self.fd = _check(_libc.timerfd_create(CLOCK_MONOTONIC, TFD_NONBLOCK | TFD_CLOEXEC),
+                         "timerfd_create")
+
+    def arm(self, delay: float, interval: float = 0.0):
+        # An all-zero it_value would disarm the timer instead of firing at once
+        spec = _Itimerspec(_timespec(interval), _timespec(max(delay, 1e-6)))
+        _check(_libc.timerfd_settime(self.fd, 0, ctypes.byref(spec), None), "timerfd_settime")
+
+    def disarm(self):
+        spec = _Itimerspec()
+        _check(_libc.timerfd_settime(self.fd, 0, ctypes.byref(spec), None), "timerfd_settime")
+
+    def read(self) -> int:
+        """Expirations since the last read (0 if none)"""
+        try:
+            return struct.unpack("Q", os.read(self.fd, 8))[0]
+        except BlockingIOError:
+            return 0
+
+    def close(self):
+        os.close(self.fd)
+
+
+def parse_uevent(message: bytes) -> Optional[SystemEvent]:
+    """Parse a kernel uevent ("action@devpath\\0KEY=VALUE\\0...") into a device event"""
+    parts = message.split(b"\0")
+    if not parts or b"@" not in parts[0] or parts[0].startswith(b"libudev"):
+        return None
+    fields = {}
+    for part in parts[1:]:
+        name, sep, value = part.partition(b"=")
+        if sep:
+            fields[name.decode(errors="replace")] = value.decode(errors="replace")
+    action, _, devpath = parts[0].decode(errors="replace").partition("@")
+    action = fields.get("ACTION", action)
+    devpath = fields.get("DEVPATH", devpath)
+    return SystemEvent("device", devpath, {
+        "action": action,
+        "actions": [action],
+        "devpath": devpath,
+        "subsystem": fields.get("SUBSYSTEM", ""),
+        "devname": fields.get("DEVNAME", ""),
+        "devtype": fields.get("DEVTYPE", ""),
+    })
+
+
+def disk_free_percent(path: str) -> float:
+    """Space available to unprivileged users, as a percentage of the filesystem"""
+    st = os.statvfs(path)
+    return 100.0 * st.f_bavail / st.f_blocks if st.f_blocks else 100.0
+
+
+class _MemoryProbe:
+    """MemAvailable as a percentage of MemTotal, re-read from an open /proc/meminfo"""
+
+    def __init__(self):
+        self.fd = os.open("/proc/meminfo", os.O_RDONLY | os.O_CLOEXEC)
+
+    def __call__(self) -> float:
+        info = {}
+        for line in os.pread(self.fd, 8192, 0).split(b"\n"):
+            key, _, rest = line.partition(b":")
+            if key in (b"MemTotal", b"MemAvailable"):
+                info[key] = int(rest.split()[0])
+        total = info.get(b"MemTotal", 0)
+        return 100.0 * info.get(b"MemAvailable", 0) / total if total else 100.0
+
+    def close(self):
+        os.close(self.fd)
+
+
+class EventEngine:
+    """epoll-driven event sources with coalescing, per-key rate limits and batched delivery
+
+    Raw events are merged by (kind, key) while they wait in the pending set.
+    A flush timer delivers them batch_window seconds after the first one
+    arrives, and a key is delivered at most once per rate limit interval;
+    later occurrences are coalesced into a single event with a count.
+
+    The engine can be driven by start() (a background thread) or by an
+    asyncio loop: loop.add_reader(engine.fileno(), engine.dispatch).
+    Subscribers are called on whichever thread runs dispatch().
+    """
+
+    def __init__(self, batch_window: float = 0.5, rate_limit: float = 60.0,
+                 rate_limits: Optional[Dict[str, float]] = None, max_batch: int = 50):
+        self.batch_window = batch_window
+        self.rate_limit = rate_limit
+        self.rate_limits = dict(rate_limits or {})
+        self.max_batch = max_batch
+
+        self._epoll = select.epoll()
+        self._handlers: Dict[int, Callable[[], None]] = {}
+        self._closers: Dict[int, Callable[[], None]] = {}
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], SystemEvent] = {}
+        self._last_delivered: Dict[Tuple[str, str], float] = {}
+        self._subscribers: List[Tuple[Callable[[List[SystemEvent]], None], Optional[frozenset]]] = []
+
+        self._flush_timer = TimerFD()
+        self._flush_armed = False
+        self._register(self._flush_timer.fd, self._flush, self._flush_timer.close)
+
+        self._wakeup = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        self._register(self._wakeup, lambda: os.eventfd_read(self._wakeup),
+                       lambda: os.close(self._wakeup))
+
+        self._inotify = None
+        self._watches: Dict[int, str] = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self.stats = {"raw_events": 0, "delivered_events": 0, "batches": 0}
+
+    # Registration
+
+    def _register(self, fd: int, handler: Callable[[], None], closer: Callable[[], None]):
+        self._handlers[fd] = handler
+        self._closers[fd] = closer
+        self._epoll.register(fd, select.EPOLLIN)
+
+    def _unregister(self, fd: int):
+        self._handlers.pop(fd, None)
+        closer = self._closers.pop(fd, None)
+        try:
+            self._epoll.unregister(fd)
+        except (OSError, ValueError):
+            pass
+        if closer is not None:
+            closer()
+
+    def fileno(self) -> int:
+        """The epoll fd; readable whenever dispatch() has work to do"""
+        return self._epoll.fileno()
+
+    def subscribe(self, callback: Callable[[List[SystemEvent]], None],
+                  kinds: Optional[Iterable[str]] = None):
+        """Receive batches of events, optionally only of the given kinds"""
+        self._subscribers.append((callback, frozenset(kinds) if kinds is not None else None))
+
+    # Sources
+
+    def watch_path(self, path: str, mask: int = DEFAULT_INOTIFY_MASK) -> int:
+        """Report changes to a file or the entries of a directory (not recursive)"""
+        if self._inotify is None:
+            fd = _check(_libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC), "inotify_init1")
+            self._inotify = fd
+            self._register(fd, self._read_inotify, lambda: os.close(fd))
+        wd = _check(_libc.inotify_add_watch(self._inotify, os.fsencode(path), mask),
+                    f"inotify_add_watch {path}")
+        self._watches[wd] = path
+        return wd
+
+    def unwatch_path(self, path: str):
+        for wd, watched in list(self._watches.items()):
+            if watched == path:
+                _libc.inotify_rm_watch(self._inotify, wd)
+                del self._watches[wd]
+
+    def _read_inotify(self):
+        while True:
+            try:
+                data = os.read(self._inotify, 64 * 1024)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset + _INOTIFY_HEADER.size <= len(data):
+                wd, mask, _cookie, length = _INOTIFY_HEADER.unpack_from(data, offset)
+                offset += _INOTIFY_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    self.emit(SystemEvent("file_overflow", "inotify", {}))
+                    continue
+                base = self._watches.get(wd)
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+                if base is None:
+                    continue
+                path = os.path.join(base, os.fsdecode(name)) if name else base
+                events = [label for bit, label in INOTIFY_EVENT_NAMES.items() if mask & bit]
+                self.emit(SystemEvent("file", path, {
+                    "path": path,
+                    "events": events,
+                    "is_dir": bool(mask & IN_ISDIR),
+                }))
+
+    def watch_devices(self, subsystems: Optional[Iterable[str]] = None,
+                      actions: Iterable[str] = ("add", "remove")) -> bool:
+        """Report kernel device uevents; returns False if the netlink socket is unavailable"""
+        try:
+            sock = socket.socket(socket.AF_NETLINK,
+                                 socket.SOCK_DGRAM | socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC,
+                                 NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, UEVENT_KERNEL_GROUP))
+        except OSError as e:
+            logger.warning(f"Device events unavailable: {e}")
+            return False
+
+        subsystems = frozenset(subsystems) if subsystems is not None else None
+        actions = frozenset(actions)
+
+        def read():
+            while True:
+                try:
+                    message = sock.recv(64 * 1024)
+                except BlockingIOError:
+                    return
+                event = parse_uevent(message)
+                if event is None or event.data["action"] not in actions:
+                    continue
+                if subsystems is not None and event.data["subsystem"] not in subsystems:
+                    continue
+                self.emit(event)
+
+        self._register(sock.fileno(), read, sock.close)
+        return True
+
+    def watch_process(self, pid: int, name: Optional[str] = None, crashes_only: bool = False) -> bool:
+        """Report when a process exits; returns False if it is already gone
+
+        The exit status is only known for our own children, and is read with
+        WNOWAIT so whoever owns the child can still reap it. Only deaths by
+        signal count as crashes; a non-zero exit code is a normal exit.
+        """
+        try:
+            fd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return False
+        def comm(fallback: str) -> str:
+            try:
+                with open(f"/proc/{pid}/comm") as f:
+                    return f.read().strip()
+            except OSError:
+                return fallback
+
+        # Read again at exit: right after fork the child may not have exec'd yet
+        initial_name = comm(str(pid))
+
+        def exited():
+            returncode, crashed = None, None
+            try:
+                info = os.waitid(os.P_PIDFD, fd, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+            except ChildProcessError:
+                info = None
+            if info is not None:
+                if info.si_code == CLD_EXITED:
+                    returncode, crashed = info.si_status, False
+                else:
+                    returncode, crashed = -info.si_status, True
+            process_name = name or comm(initial_name)
+            self._unregister(fd)
+            if crashes_only and crashed is False:
+                return
+            self.emit(SystemEvent("process_exit", str(pid), {
+                "pid": pid,
+                "name": process_name,
+                "returncode": returncode,
+                "crashed": crashed,
+                "core_dumped": info is not None and info.si_code == CLD_DUMPED,
+            }))
+
+        self._register(fd, exited, lambda: os.close(fd))
+        return True
+
+    def watch_processes_named(self, names: Iterable[str], interval: float = 30.0):
+        """Watch every process whose /proc comm is in names, rescanning for restarts every interval"""
+        names, timer, watched = frozenset(names), TimerFD(), set()
+
+        def scan():
+            timer.read()
+            watched.intersection_update(pid for pid in watched if os.path.exists(f"/proc/{pid}"))
+            for entry in os.scandir("/proc"):
+                if not entry.name.isdigit() or int(entry.name) in watched:
+                    continue
+                try:
+                    with open(f"/proc/{entry.name}/comm") as f:
+                        name = f.read().strip()
+                except OSError:
+                    continue
+                if name in names and self.watch_process(int(entry.name), name, crashes_only=True):
+                    watched.add(int(entry.name))
+
+        self._register(timer.fd, scan, timer.close)
+        timer.arm(0, interval)
+
+    def watch_threshold(self, kind: str, key: str, probe: Callable[[], float], limit: float,
+                        interval: float = 30.0, hysteresis: float = 2.0,
+                        close: Optional[Callable[[], None]] = None):
+        """Emit once when probe() drops below limit; re-arm after it recovers past limit + hysteresis"""
+        timer = TimerFD()
+        state = {"triggered": False}
+
+        def check():
+            timer.read()
+            try:
+                value = probe()
+            except OSError as e:
+                logger.warning(f"Threshold check {kind} {key} failed: {e}")
+                return
+            if not state["triggered"] and value < limit:
+                state["triggered"] = True
+                self.emit(SystemEvent(kind, key, {"key": key, "value": value, "limit": limit}))
+            elif state["triggered"] and value >= limit + hysteresis:
+                state["triggered"] = False
+
+        def closer():
+            timer.close()
+            if close is not None:
+                close()
+
+        self._register(timer.fd, check, closer)
+        timer.arm(0, interval)
+
+    def watch_disk(self, path: str = "/", min_free_percent: float = 10.0, interval: float = 30.0):
+        self.watch_threshold("low_disk", path, lambda: disk_free_percent(path),
+                             min_free_percent, interval)
+
+    def watch_memory(self, min_available_percent: float = 10.0, interval: float = 10.0):
+        probe = _MemoryProbe()
+        self.watch_threshold("low_memory", "memory", probe, min_available_percent,
+                             interval, close=probe.close)
+
+    # Coalescing and delivery
+
+    def emit(self, event: SystemEvent):
+        """Queue an event for the next batch; safe to call from any thread"""
+        key = (event.kind, event.key)
+        with self._lock:
+            self.stats["raw_events"] += 1
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending.merge(event)
+            else:
+                self._pending[key] = event
+            if not self._flush_armed:
+                self._flush_armed = True
+                self._flush_timer.arm(self.batch_window)
+
+    def _flush(self):
+        self._flush_timer.read()
+        now = time.monotonic()
+        ready, next_due = [], None
+        with self._lock:
+            self._flush_armed = False
+            for key, event in list(self._pending.items()):
+                due = self._last_delivered.get(key, float("-inf")) + self.rate_limits.get(key[0], self.rate_limit)
+                if len(ready) >= self.max_batch:
+                    due = now + self.batch_window
+                elif due <= now:
+                    ready.append(self._pending.pop(key))
+                    self._last_delivered[key] = now
+                    continue
+                next_due = due if next_due is None else min(next_due, due)
+            if next_due is not None:
+                self._flush_armed = True
+                self._flush_timer.arm(next_due - now)
+
+        if not ready:
+            return
+        self.stats["batches"] += 1
+        self.stats["delivered_events"] += len(ready)
+        for callback, kinds in self._subscribers:
+            batch = ready if kinds is None else [e for e in ready if e.kind in kinds]
+            if batch:
+                try:
+                    callback(batch)
+                except Exception as e:
+                    logger.error(f"Event subscriber failed: {e}")
+
+    # Running
+
+    def dispatch(self, timeout: float = 0):
+        """Handle whatever is ready on the epoll set, waiting up to timeout seconds"""
+        for fd, _mask in self._epoll.poll(timeout):
+            handler = self._handlers.get(fd)
+            if handler is None:
+                continue
+            try:
+                handler()
+            except Exception as e:
+                logger.error(f"Event source on fd {fd} failed: {e}")
+
+    def start(self):
+        """Dispatch events on a background thread"""
+        if self._thread is not None:
+            return
+
+        def run():
+            while not self._stop.is_set():
+                self.dispatch(-1)
+
+        self._thread = threading.Thread(target=run, name="event-engine", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            os.eventfd_write(self._wakeup, 1)
+            self._thread.join()
+            self._thread = None
+        for fd in list(self._handlers):
+            self._unregister(fd)
+        self._epoll.close()
+
+
+def describe_event(event: SystemEvent) -> str:
+    """One-line description of an event, worded for the LLM"""
+    data = event.data
+    if event.kind == "low_disk":
+        text = f"low disk space on {event.key} ({data['value']:.1f}% free)"
+    elif event.kind == "low_memory":
+        text = f"low memory ({data['value']:.1f}% available)"
+    elif event.kind == "process_exit":
+        if data["returncode"] is None:
+            status = "exited"
+        elif data["returncode"] < 0:
+            status = f"was killed by signal {-data['returncode']}"
+            if data["core_dumped"]:
+                status += " (core dumped)"
+        else:
+            status = f"exited with status {data['returncode']}"
+        text = f"process {data['name']} (pid {data['pid']}) {status}"
+    elif event.kind == "device":
+        device = data["devname"] or data["devpath"]
+        subsystem = f" ({data['subsystem']})" if data["subsystem"] else ""
+        text = f"device {'/'.join(data['actions'])}: {device}{subsystem}"
+    elif event.kind == "alert":
+        text = data["message"].rstrip(".")
+    elif event.kind == "file":
+        text = f"{data['path']} {', '.join(data['events'])}"
+    else:
+        text = f"{event.kind} {event.key}"
+    if event.count > 1:
+        text += f" (x{event.count})"
+    return text
+
+
+def describe_events(events: List[SystemEvent]) -> str:
+    return "System events: " + "; ".join(describe_event(e) for e in events)
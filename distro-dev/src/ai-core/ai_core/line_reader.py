@@ -0,0 +1,228 @@
+"""
+Asyncio-native line reader for the LinuxAI shell
+Reads stdin through the event loop with emacs-style line editing, so background tasks keep running at the prompt
+"""
+
+import asyncio
+import os
+import sys
+import termios
+import tty
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class InputEvent:
+    """One unit of input for the shell, whatever produced it"""
+    source: str  # "repl", "voice" or "monitor"
+    text: str
+
+
+class AsyncLineReader:
+    """Line editor driven by loop.add_reader instead of a blocking input()
+
+    Supports the common readline (emacs mode) bindings: arrows, Home/End,
+    Ctrl-A/E/B/F, Ctrl-K/U/W, Backspace, history with Up/Down, Ctrl-C and
+    Ctrl-D. Falls back to plain line reading when stdin is not a terminal.
+    """
+
+    def __init__(self, history_size: int = 500):
+        self.fd = sys.stdin.fileno()
+        self.interactive = os.isatty(self.fd)
+        self.history: List[str] = []
+        self.history_size = history_size
+        self.prompt = ""
+        self.buffer = ""
+        self.cursor = 0
+        self._history_index = 0
+        self._pending = b""
+        self._future: Optional[asyncio.Future] = None
+        self._saved_attrs = None
+
+    # Terminal handling
+
+    def _enter_raw(self):
+        if self.interactive and self._saved_attrs is None:
+            self._saved_attrs = termios.tcgetattr(self.fd)
+            tty.setcbreak(self.fd)
+            attrs = termios.tcgetattr(self.fd)
+            attrs[3] &= ~termios.ISIG  # deliver Ctrl-C as a key, not SIGINT
+            termios.tcsetattr(self.fd, termios.TCSANOW, attrs)
+
+    def _leave_raw(self):
+        if self._saved_attrs is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self._saved_attrs)
+            self._saved_attrs = None
+
+    def _write(self, text: str):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def redraw(self):
+        """Repaint the prompt and the current edit buffer"""
+        if not self.interactive:
+            return
+        tail = len(self.buffer) - self.cursor
+        self._write("\r" + self.prompt + self.buffer + "\x1b[K" + (f"\x1b[{tail}D" if tail else ""))
+
+    def print_above(self, text: str):
+        """Print output from a background task without corrupting the line being edited"""
+        if self._future is not None and self.interactive:
+            self._write("\r\x1b[K" + text + "\n")
+            self.redraw()
+        else:
+            print(text, flush=True)
+
+    # Reading
+
+    async def readline(self, prompt: str = "") -> str:
+        """Read one edited line; raises EOFError on Ctrl-D and KeyboardInterrupt on Ctrl-C"""
+        loop = asyncio.get_running_loop()
+        self.prompt, self.buffer, self.cursor = prompt, "", 0
+        self._history_index = len(self.history)
+        self._future = loop.create_future()
+        self._enter_raw()
+        self._write(prompt)
+        loop.add_reader(self.fd, self._on_readable)
+        try:
+            # Keys already buffered from a previous read (type-ahead)
+            if self._pending:
+                self._feed(b"")
+            return await self._future
+        finally:
+            loop.remove_reader(self.fd)
+            self._leave_raw()
+            self._future = None
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.fd, 1024)
+        except BlockingIOError:
+            return
+        if not data:
+            self._finish(exception=EOFError())
+            return
+        self._feed(data)
+
+    def _finish(self, line: Optional[str] = None, exception: Optional[BaseException] = None):
+        if self._future is None or self._future.done():
+            return
+        if exception is not None:
+            self._future.set_exception(exception)
+        else:
+            self._future.set_result(line)
+
+    def _feed(self, data: bytes):
+        self._pending += data
+        if not self.interactive:
+            if b"\n" in self._pending:
+                line, self._pending = self._pending.split(b"\n", 1)
+                self._finish(line.decode(errors="replace"))
+            return
+
+        while self._pending and self._future is not None and not self._future.done():
+            consumed = self._handle_key(self._pending)
+            if consumed == 0:
+                break  # incomplete escape or UTF-8 sequence
+            self._pending = self._pending[consumed:]
+
+    def _handle_key(self, data: bytes) -> int:
+        """Apply one keystroke from the front of data, returning how many bytes it used"""
+        key = data[0]
+
+        if key in (0x0d, 0x0a):  # Enter
+            line = self.buffer
+            self._write("\n")
+            if line.strip() and (not self.history or self.history[-1] != line):
+                self.history.append(line)
+                del self.history[:-self.history_size]
+            self._finish(line)
+            return 1
+        if key == 0x03:  # Ctrl-C
+            self._write("^C\n")
+            self._finish(exception=KeyboardInterrupt())
+            return 1
+        if key == 0x04:  # Ctrl-D
+            if not self.buffer:
+                self._write("\n")
+                self._finish(exception=EOFError())
+            elif self.cursor < len(self.buffer):
+                self.buffer = self.buffer[:self.cursor] + self.buffer[self.cursor + 1:]
+            self.redraw()
+            return 1
+        if key in (0x7f, 0x08):  # Backspace
+            if self.cursor:
+                self.buffer = self.buffer[:self.cursor - 1] + self.buffer[self.cursor:]
+                self.cursor -= 1
+            self.redraw()
+            return 1
+        if key == 0x1b:  # Escape sequences
+            if len(data) < 3:
+                return 0 if data in (b"\x1b", b"\x1b[", b"\x1bO") else 1
+            seq = data[1:3]
+            if seq in (b"[A", b"OA"):
+                self._history_move(-1)
+            elif seq in (b"[B", b"OB"):
+                self._history_move(1)
+            elif seq in (b"[C", b"OC"):
+                self.cursor = min(self.cursor + 1, len(self.buffer))
+            elif seq in (b"[D", b"OD"):
+                self.cursor = max(self.cursor - 1, 0)
+            elif seq in (b"[H", b"OH"):
+                self.cursor = 0
+            elif seq in (b"[F", b"OF"):
+                self.cursor = len(self.buffer)
+            elif seq == b"[3" and data[3:4] == b"~":  # Delete
+                self.buffer = self.buffer[:self.cursor] + self.buffer[self.cursor + 1:]
+                self.redraw()
+                return 4
+            self.redraw()
+            return 3
+
+        control = {
+            0x01: lambda: setattr(self, "cursor", 0),                          # Ctrl-A
+            0x05: lambda: setattr(self, "cursor", len(self.buffer)),           # Ctrl-E
+            0x02: lambda: setattr(self, "cursor", max(self.cursor - 1, 0)),    # Ctrl-B
+            0x06: lambda: setattr(self, "cursor", min(self.cursor + 1, len(self.buffer))),  # Ctrl-F
+            0x0b: self._kill_to_end,                                           # Ctrl-K
+            0x15: self._kill_to_start,                                         # Ctrl-U
+            0x17: self._kill_word,                                             # Ctrl-W
+            0x0c: lambda: self._write("\x1b[H\x1b[2J"),                        # Ctrl-L
+        }
+        if key in control:
+            control[key]()
+            self.redraw()
+            return 1
+        if key < 0x20:
+            return 1
+
+        # Printable text, possibly a multi-byte UTF-8 character
+        length = 1 if key < 0x80 else 2 if key < 0xe0 else 3 if key < 0xf0 else 4
+        if len(data) < length:
+            return 0
+        char = data[:length].decode(errors="replace")
+        self.buffer = self.buffer[:self.cursor] + char + self.buffer[self.cursor:]
+        self.cursor += len(char)
+        self.redraw()
+        return length
+
+    def _history_move(self, step: int):
+        index = self._history_index + step
+        if 0 <= index <= len(self.history):
+            self._history_index = index
+            self.buffer = self.history[index] if index < len(self.history) else ""
+            self.cursor = len(self.buffer)
+
+    def _kill_to_end(self):
+        self.buffer = self.buffer[:self.cursor]
+
+    def _kill_to_start(self):
+        self.buffer = self.buffer[self.cursor:]
+        self.cursor = 0
+
+    def _kill_word(self):
+        start = len(self.buffer[:self.cursor].rstrip())
+        start = self.buffer.rfind(" ", 0, start) + 1
+        self.buffer = self.buffer[:start] + self.buffer[self.cursor:]
+        self.cursor = start
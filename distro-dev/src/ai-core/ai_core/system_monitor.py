@@ -0,0 +1,263 @@
+"""
+System monitor for the LinuxAI shell
+Samples /proc with pread on long-lived descriptors and keeps recent history in NumPy ring buffers
+"""
+
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Metrics recorded on every sample, in ring buffer row order
+METRICS = (
+    "cpu_percent",
+    "memory_percent",
+    "memory_used",
+    "swap_percent",
+    "load_1",
+    "load_5",
+    "load_15",
+    "disk_percent",
+    "temperature",
+)
+
+GB = 1024 ** 3
+
+
+class RingBuffer:
+    """Fixed-size per-metric history; one column per sample, one row per metric"""
+
+    def __init__(self, metrics=METRICS, capacity: int = 600):
+        self.metrics = tuple(metrics)
+        self.index = {name: row for row, name in enumerate(self.metrics)}
+        self.capacity = capacity
+        self.values = np.full((len(self.metrics), capacity), np.nan)
+        self.times = np.full(capacity, np.nan)
+        self.count = 0  # total samples ever written
+
+    def append(self, timestamp: float, sample: np.ndarray):
+        col = self.count % self.capacity
+        self.values[:, col] = sample
+        self.times[col] = timestamp
+        self.count += 1
+
+    def latest(self) -> Tuple[float, np.ndarray]:
+        col = (self.count - 1) % self.capacity
+        return self.times[col], self.values[:, col]
+
+    def last(self, n: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """The n most recent samples of all rows, or only of rows, oldest first (copies, never wrapped views)"""
+        n = min(n, self.count, self.capacity)
+        end = self.count % self.capacity
+        cols = np.arange(end - n, end) % self.capacity
+        if rows is not None:
+            return self.times[cols], self.values[np.ix_(rows, cols)]
+        return self.times[cols], self.values[:, cols]
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Samples taken within the last `seconds`, oldest first"""
+        times, values = self.last(self.capacity)
+        if now is None:
+            now = times[-1] if len(times) else time.time()
+        mask = times >= now - seconds
+        return times[mask], values[:, mask]
+
+
+class ProcReader:
+    """A /proc or /sys file kept open and re-read from offset 0 with pread"""
+
+    def __init__(self, path: str, size: int = 8192):
+        self.path = path
+        self.size = size
+        self.fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+
+    def read(self) -> bytes:
+        return os.pread(self.fd, self.size, 0)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _find_thermal_zone() -> Optional[str]:
+    base = "/sys/class/thermal"
+    try:
+        for name in sorted(os.listdir(base)):
+            path = os.path.join(base, name, "temp")
+            if name.startswith("thermal_zone") and os.path.exists(path):
+                return path
+    except OSError:
+        pass
+    return None
+
+
+class SystemMonitor:
+    """Low-overhead system sampler backing the shell banner and `status` builtin
+
+    A background thread takes one sample per interval. Status calls only read
+    the newest column of the ring buffer and never touch /proc themselves.
+    """
+
+    def __init__(self, interval: float = 1.0, history_seconds: int = 600, disk_path: str = "/"):
+        self.interval = interval
+        self.disk_path = disk_path
+        self.hostname = os.uname().nodename
+        self.history = RingBuffer(capacity=max(int(history_seconds / interval), 1))
+
+        self._stat = ProcReader("/proc/stat", 1024)
+        self._meminfo = ProcReader("/proc/meminfo")
+        self._loadavg = ProcReader("/proc/loadavg", 256)
+        thermal = _find_thermal_zone()
+        self._thermal = ProcReader(thermal, 64) if thermal else None
+
+        with open("/proc/uptime") as f:
+            self.boot_time = time.time() - float(f.read().split()[0])
+
+        self._prev_cpu = None
+        self._memory_total = 0
+        self._disk = (0.0, 0.0)
+        self._thread = None
+        self._stop = threading.Event()
+        self.sample_cost = 0.0  # CPU seconds spent sampling, for overhead reporting
+        self.listeners: List[Callable[[], None]] = []  # called after every sample
+
+        # One synchronous sample so status is available immediately
+        self.sample()
+
+    # Sampling
+
+    def _read_cpu(self) -> float:
+        fields = self._stat.read().split(b"\n", 1)[0].split()[1:]
+        ticks = [int(v) for v in fields]
+        idle = ticks[3] + (ticks[4] if len(ticks) > 4 else 0)  # idle + iowait
+        total = sum(ticks[:8])  # guest time is already included in user
+        prev, self._prev_cpu = self._prev_cpu, (idle, total)
+        if prev is None or total == prev[1]:
+            return 0.0
+        return 100.0 * (1.0 - (idle - prev[0]) / (total - prev[1]))
+
+    def _read_memory(self) -> Tuple[float, float, float]:
+        info = {}
+        for line in self._meminfo.read().split(b"\n"):
+            key, _, rest = line.partition(b":")
+            if key in (b"MemTotal", b"MemAvailable", b"SwapTotal", b"SwapFree"):
+                info[key] = int(rest.split()[0]) * 1024
+        total = info.get(b"MemTotal", 0)
+        used = total - info.get(b"MemAvailable", 0)
+        swap_total = info.get(b"SwapTotal", 0)
+        swap_used = swap_total - info.get(b"SwapFree", 0)
+        self._memory_total = total
+        return (
+            100.0 * used / total if total else 0.0,
+            used,
+            100.0 * swap_used / swap_total if swap_total else 0.0,
+        )
+
+    def _read_disk(self) -> float:
+        st = os.statvfs(self.disk_path)
+        total = st.f_blocks * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        self._disk = (used, total)
+        # Match df: percentage of the space available to unprivileged users
+        usable = used + st.f_bavail * st.f_frsize
+        return 100.0 * used / usable if usable else 0.0
+
+    def _read_temperature(self) -> float:
+        if self._thermal is None:
+            return np.nan
+        try:
+            return int(self._thermal.read()) / 1000.0
+        except (OSError, ValueError):
+            return np.nan
+
+    def sample(self):
+        """Take one sample of every metric and append it to the ring buffer"""
+        started = time.thread_time()
+        memory_percent, memory_used, swap_percent = self._read_memory()
+        load = self._loadavg.read().split()[:3]
+        sample = np.array([
+            self._read_cpu(),
+            memory_percent,
+            memory_used,
+            swap_percent,
+            float(load[0]),
+            float(load[1]),
+            float(load[2]),
+            self._read_disk(),
+            self._read_temperature(),
+        ])
+        self.history.append(time.time(), sample)
+        self.sample_cost += time.thread_time() - started
+        for listener in self.listeners:
+            listener()
+
+    def start(self):
+        """Sample in a background thread until stop() is called"""
+        if self._thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(self.interval):
+                self.sample()
+
+        self._thread = threading.Thread(target=run, name="system-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for reader in (self._stat, self._meminfo, self._loadavg, self._thermal):
+            if reader is not None:
+                reader.close()
+
+    # Queries
+
+    def latest(self) -> Dict[str, float]:
+        """Newest value of every metric"""
+        _, values = self.history.latest()
+        return dict(zip(self.history.metrics, values.tolist()))
+
+    def series(self, metric: str, seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps and values of one metric over the last `seconds`"""
+        times, values = self.history.window(seconds)
+        return times, values[self.history.index[metric]]
+
+    def overhead_percent(self) -> float:
+        """Sampling CPU time as a percentage of one core over the sampled period"""
+        if self.history.count < 2:
+            return 0.0
+        return 100.0 * self.sample_cost / (self.history.count * self.interval)
+
+    def get_system_status(self) -> Dict[str, Any]:
+        """Summary for the shell banner"""
+        latest = self.latest()
+        return {
+            "hostname": self.hostname,
+            "memory_percent": latest["memory_percent"],
+            "disk_percent": latest["disk_percent"],
+            "cpu_percent": latest["cpu_percent"],
+        }
+
+    def get_detailed_status(self) -> Dict[str, Any]:
+        """Full status for the `status` builtin"""
+        latest = self.latest()
+        uptime_seconds = time.time() - self.boot_time
+        disk_used, disk_total = self._disk
+        temperature = latest["temperature"]
+        return {
+            "hostname": self.hostname,
+            "uptime": str(timedelta(seconds=int(uptime_seconds))),
+            "memory_used": latest["memory_used"] / GB,
+            "memory_total": self._memory_total / GB,
+            "memory_percent": latest["memory_percent"],
+            "disk_used": disk_used / GB,
+            "disk_total": disk_total / GB,
+            "disk_percent": latest["disk_percent"],
+            "cpu_percent": latest["cpu_percent"],
+            "load_average": (latest["load_1"], latest["load_5"], latest["load_15"]),
+            "temperature": "N/A" if np.isnan(temperature) else f"{temperature:.1f}°C",
+        }
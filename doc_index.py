@@ -0,0 +1,764 @@
+#!/usr/bin/env python3
+"""
+Documentation Index for LLM-powered Linux Distribution
+A BM25 index over installed man pages and --help output, memory-mapped, for grounding generated commands in real flags
+"""
+
+import bisect
+import gzip
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import shutil
+import struct
+import subprocess
+import threading
+import time
+from array import array
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = os.path.expanduser("~/.cache/linuxai/doc_index.bin")
+MAN_DIRS = ("/usr/share/man/man1", "/usr/share/man/man8", "/usr/local/share/man/man1", "/usr/local/share/man/man8")
+DPKG_STATUS = "/var/lib/dpkg/status"
+# Commands the shell commonly generates; their --help output is indexed when they have no man page
+HELP_COMMANDS = (
+    "ls", "cp", "mv", "rm", "mkdir", "find", "grep", "sed", "awk", "tar", "gzip", "zip", "unzip", "du", "df",
+    "free", "ps", "kill", "top", "ip", "ss", "ping", "curl", "wget", "git", "docker", "systemctl", "journalctl",
+    "apt", "apt-get", "dpkg", "pip", "pip3", "python3", "node", "npm", "rsync", "ssh", "scp", "chmod", "chown",
+    "ln", "head", "tail", "sort", "uniq", "wc", "cut", "tr", "xargs", "lsblk", "mount", "lsof", "crontab",
+)
+
+MAGIC = b"LAIDOCX1"
+# magic, version, documents, passages, terms, postings, meta length, names length, text length, terms length,
+# average passage length, built at
+_HEADER = struct.Struct("<8sIIIIIIIIIdd")
+VERSION = 1
+
+MAX_PASSAGE_CHARS = 400
+MAX_PASSAGES_PER_DOC = 300
+K1, B = 1.2, 0.75
+NAME_BOOST = 3.0     # a match in "du - estimate file space usage" says what the command is for
+COMMAND_BONUS = 5.0  # the query names the command ("... with tar")
+SKIP_SECTIONS = {"SEE ALSO", "AUTHOR", "AUTHORS", "COPYRIGHT", "REPORTING BUGS", "BUGS", "HISTORY", "LICENSE",
+                 "AVAILABILITY", "COLOPHON", "STANDARDS", "CONFORMING TO", "TRANSLATION", "TRANSLATIONS"}
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in into is it its me my of on or so than that the "
+    "then there these this to use used using was what when which will with you your all show me please".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _pad(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def stem(token: str) -> str:
+    """A light suffix stripper, applied the same way to documents and queries"""
+    if len(token) > 4:
+        if token.endswith(("ies", "ied")):
+            token = token[:-3] + "y"
+        elif token.endswith("sses"):
+            token = token[:-2]
+        elif token.endswith("ing") and len(token) > 5:
+            token = token[:-3]
+        elif token.endswith("ed"):
+            token = token[:-2]
+        elif token.endswith(("ches", "shes", "xes", "zes")):
+            token = token[:-2]
+        elif token.endswith("s") and not token.endswith(("ss", "us", "is")):
+            token = token[:-1]
+    elif len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+    if len(token) > 3 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(t) for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+# roff
+
+_ESCAPE = re.compile(r"\\(f(?:\(..|\[[^\]]*\]|.)|s[+-]?\d+|\*(?:\(..|\[[^\]]*\]|.)|\(..|\[[^\]]*\]|.)")
+_GLYPHS = {"(aq": "'", "(dq": '"', "(em": "-", "(en": "-", "(bu": "*", "(lq": '"', "(rq": '"', "(oq": "'",
+           "(cq": "'", "(ti": "~", "(ha": "^", "(rs": "\\", "(mi": "-", "(hy": "-", "(co": "(c)", "[aq]": "'",
+           "[dq]": '"', "[em]": "-", "[en]": "-", "[bu]": "*", "[rs]": "\\", "[ti]": "~", "[ha]": "^"}
+
+
+def _unescape(match: re.Match) -> str:
+    escape = match.group(1)
+    first = escape[0]
+    if first == "-" or first == "e" or first == "\\":
+        return "-" if first == "-" else "\\"
+    if first in " ~0":
+        return " "
+    if first in "(" "[":
+        return _GLYPHS.get(escape, "")
+    if first == "'" or first == "`":
+        return first
+    if first == "." :
+        return "."
+    return ""  # font and size changes, \&, \|, \^, \c, \, \/, strings
+
+
+def roff_text(line: str) -> str:
+    return _ESCAPE.sub(_unescape, line)
+
+
+def _arguments(text: str) -> List[str]:
+    """Macro arguments, honouring double quotes"""
+    args, current, quoted, i = [], [], False, 0
+    while i < len(text):
+        c = text[i]
+        if c == '"':
+            if quoted and text[i + 1:i + 2] == '"':
+                current.append('"')
+                i += 1
+            else:
+                quoted = not quoted
+        elif c in " \t" and not quoted:
+            if current:
+                args.append("".join(current))
+                current = []
+        else:
+            current.append(c)
+        i += 1
+    if current:
+        args.append("".join(current))
+    return args
+
+
+_MDOC_DROP = {"Ar", "Pa", "Cm", "Ic", "Em", "Sy", "Li", "Dq", "Qq", "Sq", "Op", "Oo", "Oc", "Ql", "Ns", "No", "Va",
+              "Ev", "Dv", "Er", "Fa", "Fn", "Xo", "Xc", "Pq", "Po", "Pc", "Aq", "Bq", "Brq", "Ad", "Ms", "Tn", "Ux"}
+_ROFF_JOINED = {"BR", "BI", "IB", "IR", "RB", "RI"}
+_ROFF_TEXT = {"B", "I", "SM", "SB"}
+_PARAGRAPH = {"PP", "P", "LP", "Pp", "sp", "Bl", "El", "Bd", "Ed", "RE", "SS", "Ss", "HP", "TQ"}
+
+
+def _mdoc_inline(args: List[str]) -> str:
+    words, flag = [], False
+    for arg in args:
+        if arg == "Fl":
+            flag = True
+            continue
+        if arg in _MDOC_DROP or arg == "Nm":
+            continue
+        words.append(("-" + arg) if flag else arg)
+        flag = False
+    if flag:
+        words.append("-")
+    return " ".join(words)
+
+
+def parse_roff(source: str, name: str = "") -> List[Tuple[str, str, str]]:
+    """Paragraphs of a man page (man or mdoc macros) as (section, tag, text)
+
+    Macro definitions, conditionals and formatting requests are dropped; a
+    tagged paragraph (.TP, .IP, .It) keeps its tag, which is usually the option.
+    """
+    paragraphs: List[Tuple[str, str, str]] = []
+    section, tag, words = "", "", []
+    pending_tag = False
+    skip_until = None
+
+    def flush():
+        nonlocal tag, words
+        text = " ".join(" ".join(words).split())
+        if text or tag:
+            paragraphs.append((section, tag, text))
+        tag, words = "", []
+
+    for raw in source.splitlines():
+        if skip_until is not None:
+            if raw.startswith("..") or raw.replace(" ", "") == "..":
+                skip_until = None
+            continue
+        if raw.startswith((".\\\"", "'\\\"", '.\\"')) or raw in (".", "'"):
+            continue
+        if raw.endswith("\\") and not raw.endswith("\\\\"):
+            raw = raw[:-1]
+        if raw[:1] in (".", "'"):
+            request, _, rest = raw[1:].strip().partition(" ")
+            if request in ("de", "de1", "am", "ig"):
+                skip_until = True
+                continue
+            args = _arguments(roff_text(rest))
+            if request in ("SH", "Sh"):
+                flush()
+                section = " ".join(args).upper()
+                pending_tag = False
+            elif request in _PARAGRAPH:
+                flush()
+            elif request == "TP":
+                flush()
+                pending_tag = True
+            elif request == "RS":
+                # asciidoctor pages: "\fB-a\fP, \fB--all\fP" then the indented description
+                if words and not tag and len(" ".join(words)) < 80:
+                    tag, words = " ".join(words).strip(), []
+                else:
+                    flush()
+            elif request == "IP":
+                flush()
+                if args and args[0] not in ("*", "-", "o"):
+                    tag = args[0]
+            elif request == "It":
+                flush()
+                tag = _mdoc_inline(args)
+            elif request in _ROFF_JOINED:
+                text = "".join(args)
+                if pending_tag:
+                    tag, pending_tag = text, False
+                else:
+                    words.append(text)
+            elif request in _ROFF_TEXT:
+                text = " ".join(args)
+                if pending_tag:
+                    tag, pending_tag = text, False
+                else:
+                    words.append(text)
+            elif request == "Nm":
+                words.append(" ".join(args) if args else name)
+            elif request == "Nd":
+                words.append("- " + " ".join(args))
+            elif request in ("Fl", "Ar", "Op", "Xr", "Pa", "Cm", "Ic", "Dq", "Qq", "Em", "Sy", "Li", "Va", "Ev"):
+                words.append(_mdoc_inline([request] + args))
+            # everything else (.TH, .if, .ds, .nf, .fi, .br, .in, ...) carries no text worth indexing
+            continue
+        text = roff_text(raw)
+        if pending_tag:
+            tag, pending_tag = text.strip(), False
+        elif text.strip():
+            words.append(text)
+        elif words:
+            flush()
+    flush()
+    return paragraphs
+
+
+def man_passages(paragraphs: List[Tuple[str, str, str]], name: str) -> List[str]:
+    """Passages to index from a page's paragraphs: its NAME line, synopsis, description and options"""
+    passages, synopsis, seen_description = [], [], 0
+    for section, tag, text in paragraphs:
+        if section in SKIP_SECTIONS:
+            continue
+        if section == "NAME":
+            passages.insert(0, text)
+            continue
+        if section == "SYNOPSIS":
+            synopsis.append(" ".join(filter(None, (tag, text))))
+            continue
+        if section == "DESCRIPTION" and not tag:
+            seen_description += 1
+            if seen_description > 3:
+                continue
+        passages.append(f"{tag}: {text}" if tag and text else tag or text)
+        if len(passages) >= MAX_PASSAGES_PER_DOC:
+            break
+    if synopsis:
+        passages.insert(1 if passages and paragraphs and paragraphs[0][0] == "NAME" else 0,
+                        "Usage: " + " | ".join(synopsis))
+    if not passages or not passages[0].lower().startswith(name.lower()):
+        passages.insert(0, name)
+    return list(dict.fromkeys(p[:MAX_PASSAGE_CHARS] for p in passages if p.strip()))
+
+
+_HELP_OPTION = re.compile(r"^\s{1,12}(-{1,2}[^\s,][^\s]*(?:,?\s-{1,2}[^\s,]+)*(?:[ =]\S+)?)(?:\s{2,}(.*))?$")
+
+
+def help_passages(output: str, name: str) -> List[str]:
+    """Passages from --help output: the usage line, description paragraphs and one per option"""
+    passages = [name]
+    current: Optional[List[str]] = None
+    paragraph: List[str] = []
+
+    def flush():
+        nonlocal current, paragraph
+        if current is not None:
+            passages.append(f"{current[0]}: {' '.join(current[1:])}".rstrip(": "))
+        elif paragraph:
+            passages.append(" ".join(paragraph))
+        current, paragraph = None, []
+
+    for line in output.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            flush()
+            continue
+        option = _HELP_OPTION.match(line)
+        if option:
+            flush()
+            current = [option.group(1).strip()] + ([option.group(2).strip()] if option.group(2) else [])
+        elif current is not None and line[:1] in " \t":
+            current.append(stripped)
+        else:
+            if current is not None:
+                flush()
+            paragraph.append(stripped)
+    flush()
+    if len(passages) > 1 and not passages[1].lower().startswith("usage"):
+        passages[0] = f"{name} - {passages[1][:120]}"
+    return list(dict.fromkeys(" ".join(p.split())[:MAX_PASSAGE_CHARS] for p in passages[:MAX_PASSAGES_PER_DOC]))
+
+
+def _page_name(filename: str) -> str:
+    """"du.1.gz" -> "du", "CA.pl.1ssl.gz" -> "CA.pl\""""
+    for suffix in (".gz", ".xz", ".bz2"):
+        if filename.endswith(suffix):
+            filename = filename[:-len(suffix)]
+    base, _, section = filename.rpartition(".")
+    return base if base and section[:1].isdigit() else filename
+
+
+def read_page(path: str) -> str:
+    if path.endswith(".gz"):
+        opener = gzip.open
+    elif path.endswith(".xz"):
+        import lzma
+        opener = lzma.open
+    elif path.endswith(".bz2"):
+        import bz2
+        opener = bz2.open
+    else:
+        opener = open
+    with opener(path, "rb") as f:
+        return f.read(4 << 20).decode("utf-8", "replace")
+
+
+def help_output(executable: str, timeout: float = 2.0) -> str:
+    """stdout (or stderr) of "executable --help", with no stdin, a C locale and a fixed width"""
+    env = {"PATH": os.environ.get("PATH", "/usr/bin:/bin"), "LANG": "C.UTF-8", "COLUMNS": "100",
+           "HOME": os.environ.get("HOME", "/"), "PAGER": "cat", "GIT_PAGER": "cat", "SYSTEMD_PAGER": ""}
+    try:
+        result = subprocess.run([executable, "--help"], stdin=subprocess.DEVNULL, capture_output=True,
+                                timeout=timeout, env=env)
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    output = result.stdout or result.stderr
+    return output[:256 * 1024].decode("utf-8", "replace")
+
+
+class _Base:
+    """The on-disk index, memory-mapped
+
+    Sections, each padded to 8 bytes:
+
+      meta       JSON: source signatures (path -> [mtime_ns, size, document]),
+                 watched directory mtimes and aliases, for incremental rebuilds
+      names      document (command) names, newline-terminated
+      doc_offs   uint32 per document (+1): where each name starts in names
+      doc_first  uint32 per document (+1): its first passage (passages are contiguous)
+      text       passage text, UTF-8
+      pass_offs  uint32 per passage (+1): where each passage starts in text
+      pass_len   uint16 per passage: length in tokens, for BM25 normalization
+      terms      sorted distinct terms, newline-terminated
+      term_offs  uint32 per term (+1): where each term starts in terms
+      post_offs  uint32 per term (+1): where its postings start
+      post_ids   uint32 per posting: passage number, ascending
+      post_tf    uint16 per posting: term frequency in that passage
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise
+        (magic, version, self.n_docs, self.n_passages, self.n_terms, n_postings, meta_len, names_len, text_len,
+         terms_len, self.avg_len, self.built_at) = _HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            self.file.close()
+            raise ValueError(f"{path} is not a version {VERSION} documentation index")
+        view = memoryview(self.map)
+        pos = _HEADER.size
+        sections = []
+
+        def take(length: int, fmt: Optional[str] = None):
+            nonlocal pos
+            section = view[pos:pos + length]
+            pos += _pad(length)
+            if fmt is not None:
+                section = section.cast(fmt)
+            sections.append(section)
+            return section
+
+        self.meta = json.loads(bytes(take(meta_len)))
+        self.names = take(names_len)
+        self.doc_offs = take(4 * (self.n_docs + 1), "I")
+        self.doc_first = take(4 * (self.n_docs + 1), "I")
+        self.text = take(text_len)
+        self.pass_offs = take(4 * (self.n_passages + 1), "I")
+        self.pass_len = take(2 * self.n_passages, "H")
+        self.terms = take(terms_len)
+        self.term_offs = take(4 * (self.n_terms + 1), "I")
+        self.post_offs = take(4 * (self.n_terms + 1), "I")
+        self.post_ids = take(4 * n_postings, "I")
+        self.post_tf = take(2 * n_postings, "H")
+        self._views = sections + [view]
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self.map.close()
+        self.file.close()
+
+    def name(self, doc: int) -> str:
+        return bytes(self.names[self.doc_offs[doc]:self.doc_offs[doc + 1] - 1]).decode()
+
+    def passage(self, i: int) -> str:
+        return bytes(self.text[self.pass_offs[i]:self.pass_offs[i + 1]]).decode("utf-8", "replace")
+
+    def passages(self, doc: int) -> List[str]:
+        return [self.passage(i) for i in range(self.doc_first[doc], self.doc_first[doc + 1])]
+
+    def term_index(self, term: bytes) -> int:
+        """Position of term in the sorted term table, or -1"""
+        offs, terms = self.term_offs, self.terms
+        i = bisect.bisect_left(range(self.n_terms), term, key=lambda k: terms[offs[k]:offs[k + 1] - 1].tobytes())
+        if i < self.n_terms and terms[offs[i]:offs[i + 1] - 1] == term:
+            return i
+        return -1
+
+
+def write_index(path: str, documents: List[Tuple[str, List[str]]], meta: Dict[str, Any], built_at: float):
+    """Tokenize documents ((name, passages), ...) into an index file, atomically"""
+    names = bytearray()
+    doc_offs, doc_first = array("I", [0]), array("I", [0])
+    text = bytearray()
+    pass_offs, pass_len = array("I", [0]), array("H")
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    total_tokens = 0
+    passage = 0
+    for name, passages in documents:
+        names += name.encode() + b"\n"
+        doc_offs.append(len(names))
+        for content in passages:
+            tokens = tokenize(content)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                postings.setdefault(token, []).append((passage, min(count, 65535)))
+            text += content.encode()
+            pass_offs.append(len(text))
+            pass_len.append(min(len(tokens), 65535))
+            total_tokens += len(tokens)
+            passage += 1
+        doc_first.append(passage)
+
+    terms = bytearray()
+    term_offs, post_offs = array("I", [0]), array("I", [0])
+    post_ids, post_tf = array("I"), array("H")
+    for term in sorted(postings, key=str.encode):
+        terms += term.encode() + b"\n"
+        term_offs.append(len(terms))
+        for passage_id, count in postings[term]:
+            post_ids.append(passage_id)
+            post_tf.append(count)
+        post_offs.append(len(post_ids))
+
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(documents), passage, len(term_offs) - 1, len(post_ids),
+                             len(meta_bytes), len(names), len(text), len(terms),
+                             total_tokens / passage if passage else 0.0, built_at))
+        for section in (meta_bytes, names, doc_offs, doc_first, text, pass_offs, pass_len, terms, term_offs,
+                        post_offs, post_ids, post_tf):
+            data = section.tobytes() if isinstance(section, array) else bytes(section)
+            f.write(data + b"\0" * (_pad(len(data)) - len(data)))
+    os.replace(tmp_path, path)
+
+
+class DocIndex:
+    """BM25 retrieval over man pages and --help output
+
+    build() parses every page once; refresh() compares the man directories'
+    and the dpkg status file's mtimes with the ones recorded in the index and,
+    only when packages changed, re-parses the pages whose size or mtime moved,
+    reusing the stored passages of all others.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, man_dirs: Iterable[str] = MAN_DIRS,
+                 help_commands: Iterable[str] = HELP_COMMANDS, status_path: str = DPKG_STATUS):
+        self.path = path
+        self.man_dirs = tuple(man_dirs)
+        self.help_commands = tuple(help_commands)
+        self.status_path = status_path
+        self.base: Optional[_Base] = None
+        self._doc_ids: Optional[Dict[str, int]] = None
+        self._first_passages: Optional[frozenset] = None
+        self._lock = threading.Lock()
+        self.stats = {"parsed": 0, "reused": 0, "build_ms": 0.0}
+
+    # Persistence
+
+    def load(self) -> bool:
+        """Map the index file; False if it is missing or unreadable"""
+        try:
+            base = _Base(self.path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.debug(f"No usable documentation index at {self.path}: {e}")
+            return False
+        self._replace_base(base)
+        return True
+
+    def _replace_base(self, base: Optional[_Base]):
+        with self._lock:
+            old, self.base, self._doc_ids, self._first_passages = self.base, base, None, None
+        if old is not None:
+            old.close()
+
+    def close(self):
+        self._replace_base(None)
+
+    def _watched(self) -> Dict[str, int]:
+        mtimes = {}
+        for path in self.man_dirs + (self.status_path,):
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    def stale(self) -> bool:
+        """Whether packages (or man pages) changed since the index was written"""
+        return self.base is None or self.base.meta.get("watched") != self._watched()
+
+    def _sources(self) -> Tuple[Dict[str, Tuple[str, str, List[int]]], Dict[str, str]]:
+        """Pages and --help commands to index: key -> (kind, name, [mtime_ns, size]), plus aliases"""
+        sources: Dict[str, Tuple[str, str, List[int]]] = {}
+        aliases: Dict[str, str] = {}
+        for directory in self.man_dirs:
+            try:
+                entries = sorted(os.scandir(directory), key=lambda e: e.name)
+            except OSError:
+                continue
+            for entry in entries:
+                name = _page_name(entry.name)
+                try:
+                    real = os.path.realpath(entry.path)
+                    st = os.stat(real)
+                except OSError:
+                    continue  # dangling alternatives link
+                if real != entry.path:
+                    # egrep.1.gz -> grep.1.gz: index the page once, under the name of the file itself
+                    canonical = _page_name(os.path.basename(real))
+                    if canonical != name:
+                        aliases[name] = canonical
+                    name = canonical
+                if real not in sources:
+                    sources[real] = ("man", name, [st.st_mtime_ns, st.st_size])
+        names = {source[1] for source in sources.values()} | set(aliases)
+        for command in self.help_commands:
+            if command in names:
+                continue
+            executable = shutil.which(command)
+            if executable is None:
+                continue
+            try:
+                st = os.stat(executable)
+            except OSError:
+                continue
+            sources["help:" + executable] = ("help", command, [st.st_mtime_ns, st.st_size])
+        return sources, aliases
+
+    def build(self, incremental: bool = True) -> int:
+        """Write a fresh index, reusing unchanged documents of the current one; returns pages parsed"""
+        started = time.perf_counter()
+        sources, aliases = self._sources()
+        base = self.base if incremental else None
+        previous = base.meta.get("sources", {}) if base is not None else {}
+        documents: List[Tuple[str, List[str]]] = []
+        signatures: Dict[str, List[int]] = {}
+        redirects: Dict[str, str] = {}
+        parsed = reused = 0
+        for key, (kind, name, signature) in sources.items():
+            old = previous.get(key)
+            if old is not None and old[:2] == signature:
+                reused += 1
+                if old[2] < 0:  # a .so page: keep its alias
+                    if name in base.meta["aliases"]:
+                        redirects[name] = base.meta["aliases"][name]
+                    signatures[key] = old
+                    continue
+                passages = base.passages(old[2])
+            else:
+                passages = self._parse(kind, key, name, redirects)
+                parsed += 1
+            if not passages:
+                if name in redirects:
+                    signatures[key] = signature + [-1]
+                continue
+            signatures[key] = signature + [len(documents)]
+            documents.append((name, passages))
+        for name, target in redirects.items():
+            aliases.setdefault(name, target)
+        meta = {"sources": signatures, "aliases": aliases, "watched": self._watched()}
+        write_index(self.path, documents, meta, time.time())
+        self.load()
+        self.stats.update(parsed=parsed, reused=reused, build_ms=(time.perf_counter() - started) * 1000)
+        logger.info(f"Documentation index: {len(documents)} commands, {parsed} parsed, {reused} reused "
+                    f"in {self.stats['build_ms'] / 1000:.1f}s")
+        return parsed
+
+    def _parse(self, kind: str, key: str, name: str, redirects: Dict[str, str]) -> List[str]:
+        if kind == "help":
+            output = help_output(key[5:])
+            return help_passages(output, name) if output.strip() else []
+        try:
+            source = read_page(key)
+        except (OSError, EOFError, ValueError) as e:
+            logger.debug(f"Cannot read {key}: {e}")
+            return []
+        first = source.lstrip().split("\n", 1)[0]
+        if first.startswith(".so "):
+            redirects[name] = _page_name(os.path.basename(first[4:].strip()))
+            return []
+        return man_passages(parse_roff(source, name), name)
+
+    def refresh(self) -> int:
+        """Rebuild incrementally when packages changed; returns pages parsed (0 when current)"""
+        if not self.stale():
+            return 0
+        return self.build(incremental=True)
+
+    # Queries
+
+    def doc_id(self, name: str) -> Optional[int]:
+        base = self.base
+        if base is None:
+            return None
+        if self._doc_ids is None:
+            ids = {base.name(doc): doc for doc in range(base.n_docs)}
+            for alias, target in base.meta.get("aliases", {}).items():
+                if target in ids:
+                    ids.setdefault(alias, ids[target])
+            self._doc_ids = ids
+        return self._doc_ids.get(name)
+
+    def search(self, query: str, limit: int = 10, budget_ms: Optional[float] = None,
+               boost_commands: bool = True) -> List[Dict[str, Any]]:
+        """The best passages for query by BM25, as {"command", "text", "score"}
+
+        Terms are scored rarest first, so when budget_ms runs out the most
+        selective terms have already been counted. A passage of a command
+        named in the query ("du", "tar") gets a bonus.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000 if budget_ms is not None else None
+        base = self.base
+        if base is None or not base.n_passages:
+            return []
+        words = _TOKEN.findall(query.lower())
+        terms = []
+        for token in dict.fromkeys(stem(w) for w in words if w not in STOPWORDS):
+            i = base.term_index(token.encode())
+            if i >= 0:
+                terms.append((base.post_offs[i + 1] - base.post_offs[i], i))
+        terms.sort()
+        n, avg = base.n_passages, base.avg_len or 1.0
+        scores: Dict[int, float] = {}
+        post_ids, post_tf, pass_len = base.post_ids, base.post_tf, base.pass_len
+        for df, i in terms:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            start, end = base.post_offs[i], base.post_offs[i + 1]
+            for passage, tf in zip(post_ids[start:end], post_tf[start:end]):
+                norm = K1 * (1 - B + B * pass_len[passage] / avg)
+                scores[passage] = scores.get(passage, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        firsts = self._firsts()
+        for passage in scores.keys() & firsts:
+            scores[passage] *= NAME_BOOST
+        if boost_commands:
+            for word in dict.fromkeys(words):
+                doc = self.doc_id(word)
+                if doc is not None:
+                    first = base.doc_first[doc]
+                    scores[first] = scores.get(first, 0.0) + COMMAND_BONUS
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [{"command": base.name(self._doc_of(passage)), "text": base.passage(passage), "score": round(score, 3)}
+                for passage, score in ranked]
+
+    def _firsts(self) -> frozenset:
+        """Passage numbers of every document's NAME line"""
+        if self._first_passages is None:
+            self._first_passages = frozenset(self.base.doc_first[:-1])
+        return self._first_passages
+
+    def _doc_of(self, passage: int) -> int:
+        return bisect.bisect_right(self.base.doc_first, passage) - 1
+
+    def relevant_commands(self, query: str, commands: int = 3, per_command: int = 3,
+                          budget_ms: Optional[float] = None) -> List[Tuple[str, List[Dict[str, Any]]]]:
+        """The likeliest commands for query with their best passages, ranked by their best passage"""
+        by_command: Dict[str, List[Dict[str, Any]]] = {}
+        for hit in self.search(query, limit=60, budget_ms=budget_ms):
+            group = by_command.setdefault(hit["command"], [])
+            if len(group) < per_command:
+                group.append(hit)
+        ranked = sorted(by_command.items(),
+                        key=lambda item: -(item[1][0]["score"] + 0.25 * sum(h["score"] for h in item[1][1:])))
+        return ranked[:commands]
+
+    def context(self, query: str, commands: int = 3, per_command: int = 3, max_chars: int = 1500,
+                budget_ms: Optional[float] = 25.0) -> str:
+        """Reference text for a prompt: for the likeliest commands, their NAME line and best matching passages"""
+        base = self.base
+        if base is None:
+            return ""
+        lines, used = [], 0
+        for command, group in self.relevant_commands(query, commands, per_command, budget_ms):
+            summary = base.passage(base.doc_first[self.doc_id(command)])
+            text = "\n".join([summary] + [f"  {h['text']}" for h in group if h["text"] != summary])
+            text = text[:max(0, max_chars - used)]
+            if text:
+                lines.append(text)
+                used += len(text)
+            if used >= max_chars:
+                break
+        return "\n".join(lines)
+
+
+def main():
+    """CLI for the documentation index"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="BM25 index over man pages and --help output")
+    parser.add_argument("query", nargs="*")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="parse every page again")
+    parser.add_argument("--context", action="store_true", help="print the prompt reference block")
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    index = DocIndex(args.index)
+    if args.rebuild or not index.load():
+        index.build(incremental=False)
+    elif index.refresh():
+        print(f"Refreshed: {index.stats}")
+    if not args.query:
+        print(f"{index.base.n_docs} commands, {index.base.n_passages} passages, {index.base.n_terms} terms")
+        return
+    query = " ".join(args.query)
+    started = time.perf_counter()
+    if args.context:
+        print(index.context(query, budget_ms=args.budget_ms))
+    else:
+        for hit in index.search(query, budget_ms=args.budget_ms):
+            print(f"{hit['score']:7.2f}  {hit['command']:<14} {hit['text'][:110]}")
+    print(f"({(time.perf_counter() - started) * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Few-Shot Example Selection for LLM-powered Linux Distribution
+Picks the vetted request -> command examples most similar to a request, within a token budget, for the prompt
+"""
+
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_K = 3
+DEFAULT_MAX_TOKENS = 45
+MIN_SCORE = 0.12  # below this an example shares little more than stopwords with the request
+CHARS_PER_TOKEN = 4
+CHAR_WEIGHT = 0.5  # character trigrams catch inflections and typos: "compresing", "configs"
+
+# Vetted pairs: each command runs as-is on Debian/Ubuntu and sticks to the orchestrator's safe or
+# confirmable commands. The first four are the examples the prompt used to inline on every call.
+EXAMPLES: Tuple[Tuple[str, str], ...] = (
+    ("show me my current directory", "pwd"),
+    ("list all files", "ls -la"),
+    ("create a folder called test", "mkdir test"),
+    ("check disk usage", "df -h"),
+    # files and directories
+    ("list files sorted by modification time", "ls -lt"),
+    ("list files sorted by size", "ls -lhS"),
+    ("show hidden files in my home directory", "ls -a ~"),
+    ("show the directory tree two levels deep", "tree -L 2"),
+    ("create nested directories a/b/c", "mkdir -p a/b/c"),
+    ("create an empty file named notes.txt", "touch notes.txt"),
+    ("copy the folder src to backup", "cp -r src backup"),
+    ("rename report.txt to report-old.txt", "mv report.txt report-old.txt"),
+    ("make deploy.sh executable", "chmod +x deploy.sh"),
+    ("change the owner of app.log to www-data", "sudo chown www-data app.log"),
+    ("create a symbolic link to /opt/app/bin/app in ~/bin", "ln -s /opt/app/bin/app ~/bin/app"),
+    ("delete the empty directory old", "rmdir old"),
+    ("show the size of each folder here", "du -sh */"),
+    ("how big is the downloads folder", "du -sh ~/Downloads"),
+    ("show free space on all filesystems", "df -h"),
+    ("show inode usage", "df -i"),
+    # finding things
+    ("find all python files", "find . -name '*.py'"),
+    ("find files larger than 100 MB in my home", "find ~ -type f -size +100M"),
+    ("find files modified in the last 24 hours", "find . -type f -mtime -1"),
+    ("find empty directories", "find . -type d -empty"),
+    ("find log files older than 30 days in /var/log", "find /var/log -name '*.log' -mtime +30"),
+    ("where is the nginx binary", "which nginx"),
+    ("locate the file named hosts", "locate -b '\\hosts'"),
+    # file contents
+    ("show the first 20 lines of config.yaml", "head -n 20 config.yaml"),
+    ("show the last 50 lines of syslog", "tail -n 50 /var/log/syslog"),
+    ("follow the application log as it grows", "tail -f app.log"),
+    ("count the lines in main.py", "wc -l main.py"),
+    ("count the words in essay.txt", "wc -w essay.txt"),
+    ("search for error in app.log ignoring case", "grep -i error app.log"),
+    ("search recursively for TODO in the source tree", "grep -rn TODO ."),
+    ("list files that contain the word password", "grep -rl password ."),
+    ("sort names.txt alphabetically", "sort names.txt"),
+    ("sort numbers.txt numerically in reverse", "sort -nr numbers.txt"),
+    ("remove duplicate lines from list.txt", "sort list.txt | uniq"),
+    ("count how often each line appears in access.log", "sort access.log | uniq -c | sort -nr"),
+    ("show line 10 to 20 of data.csv", "sed -n '10,20p' data.csv"),
+    ("compare two files", "diff file1.txt file2.txt"),
+    # archives
+    ("compress the logs folder into a tar.gz", "tar -czf logs.tar.gz logs"),
+    ("extract backup.tar.gz", "tar -xzf backup.tar.gz"),
+    ("list the contents of archive.tar.gz", "tar -tzf archive.tar.gz"),
+    ("zip the photos directory", "zip -r photos.zip photos"),
+    ("unzip project.zip into the project folder", "unzip project.zip -d project"),
+    ("gzip the file dump.sql", "gzip dump.sql"),
+    # processes and performance
+    ("show all running processes", "ps aux"),
+    ("show the processes using the most memory", "ps aux --sort=-%mem | head -n 10"),
+    ("show the processes using the most cpu", "ps aux --sort=-%cpu | head -n 10"),
+    ("is nginx running", "pgrep -a nginx"),
+    ("kill all firefox processes", "killall firefox"),
+    ("show memory usage", "free -h"),
+    ("how long has the system been up", "uptime"),
+    ("show the load average and cpu statistics", "vmstat 1 5"),
+    ("show disk io statistics", "iostat -x 1 3"),
+    ("which process has port 8080 open", "lsof -i :8080"),
+    ("show files opened by process 1234", "lsof -p 1234"),
+    # system information
+    ("show the kernel version", "uname -r"),
+    ("show all system information", "uname -a"),
+    ("show cpu details", "lscpu"),
+    ("list block devices and partitions", "lsblk"),
+    ("list usb devices", "lsusb"),
+    ("list pci devices", "lspci"),
+    ("show mounted filesystems", "mount | column -t"),
+    ("what distribution is this", "cat /etc/os-release"),
+    ("show my username", "whoami"),
+    ("which groups am i in", "groups"),
+    ("show the hostname", "hostname"),
+    ("show the current date and time", "date"),
+    ("show environment variables", "printenv"),
+    ("show the PATH variable", "echo $PATH"),
+    # services and logs
+    ("show the status of the ssh service", "systemctl status ssh"),
+    ("restart nginx", "sudo systemctl restart nginx"),
+    ("list failed services", "systemctl --failed"),
+    ("list running services", "systemctl list-units --type=service --state=running"),
+    ("show nginx logs from the last hour", "journalctl -u nginx --since '1 hour ago'"),
+    ("show errors in the system log since boot", "journalctl -b -p err"),
+    ("show kernel messages", "dmesg | tail -n 50"),
+    # network
+    ("show my ip address", "ip -brief addr"),
+    ("show the routing table", "ip route"),
+    ("which ports are listening", "ss -tuln"),
+    ("show established connections", "ss -tn state established"),
+    ("ping google five times", "ping -c 5 google.com"),
+    ("look up the dns record of example.com", "dig example.com"),
+    ("download a file from a url", "wget https://example.com/file.tar.gz"),
+    ("fetch only the http headers of a site", "curl -I https://example.com"),
+    ("copy a file to a remote server", "scp file.txt user@server:/tmp/"),
+    ("sync the photos folder to the backup drive", "rsync -av photos/ /mnt/backup/photos/"),
+    # packages
+    ("update the package lists", "sudo apt update"),
+    ("install htop", "sudo apt install htop"),
+    ("list installed packages", "apt list --installed"),
+    ("search for a package about pdf", "apt search pdf"),
+    ("list installed python packages", "pip list"),
+    # development
+    ("show git status", "git status"),
+    ("show the last five commits", "git log --oneline -5"),
+    ("list running docker containers", "docker ps"),
+    ("run the python script app.py", "python3 app.py"),
+    ("list my cron jobs", "crontab -l"),
+    ("show my command history", "history | tail -n 20"),
+)
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9._+-]*|[~/*$][^\s]*")
+STOPWORDS = frozenset("""a an the to of in on at for from by with and or is are be me my i you your it its this
+that these those all any some what which who how do does can could please show list tell give get named called
+""".split())
+
+
+# Words users mix freely, mapped to the word the examples use
+SYNONYMS = {
+    "folder": "directory", "dir": "directory", "ram": "memory", "mem": "memory", "biggest": "largest",
+    "bigger": "larger", "big": "large", "delete": "remove", "erase": "remove", "launch": "run",
+    "execute": "run", "storage": "disk", "space": "disk", "ip": "address", "program": "process",
+    "app": "process", "running": "run", "edited": "modified", "changed": "modified", "uncompress": "extract",
+    "unpack": "extract", "decompress": "extract", "pack": "compress", "archive": "compress", "make": "create",
+    "dotfiles": "hidden", "top": "first", "beginning": "first", "end": "last", "watch": "follow",
+    "watching": "follow", "mention": "contain", "mentions": "contain", "containing": "contain", "stop": "kill",
+    "terminate": "kill", "processor": "cpu", "reachable": "ping", "journal": "log", "owner": "chown",
+    "ownership": "chown", "permissions": "chmod", "runnable": "executable",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _stem(word: str) -> str:
+    word = SYNONYMS.get(word, word)
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def features(text: str) -> Counter:
+    """Word unigrams and bigrams (stopwords dropped) plus within-word character trigrams"""
+    words = [_stem(w) for w in _TOKEN.findall(text.lower()) if w not in STOPWORDS]
+    counts: Counter = Counter()
+    for word in words:
+        counts["w:" + word] += 1.0
+        padded = f"^{word}$"
+        for i in range(len(padded) - 2):
+            counts["c:" + padded[i:i + 3]] += CHAR_WEIGHT
+    for a, b in zip(words, words[1:]):
+        counts[f"b:{a} {b}"] += 1.0
+    return counts
+
+
+def command_features(command: str) -> Counter:
+    """The program a command runs (after sudo), so requests naming it ("grep for ...") find it"""
+    words = command.split()
+    if words and words[0] == "sudo":
+        words = words[1:]
+    return Counter({"w:" + words[0]: 1.0}) if words else Counter()
+
+
+class Example:
+    __slots__ = ("request", "command", "source", "tokens")
+
+    def __init__(self, request: str, command: str, source: str = "builtin"):
+        self.request = request
+        self.command = command
+        self.source = source  # "builtin" or "history" (ran successfully in this shell)
+        self.tokens = estimate_tokens(self.render())
+
+    def render(self) -> str:
+        return f'User: "{self.request}"\nResponse: {self.command}\n'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"request": self.request, "command": self.command, "source": self.source}
+
+
+class ExampleStore:
+    """Vetted request -> command pairs in a TF-IDF matrix for nearest-neighbour selection
+
+    The matrix is kept sparse, as one posting list (example, weight) per
+    feature: a query touches only the columns of its own features, so a
+    selection costs tens of microseconds for a few hundred examples, less
+    than importing a dense array library would. Rows are L2-normalized, so
+    the accumulated dot products are cosine similarities. Examples added
+    while the shell runs (commands that ran successfully) are indexed on the
+    next selection.
+    """
+
+    def __init__(self, examples: Iterable[Tuple[str, str]] = EXAMPLES):
+        self.examples: List[Example] = []
+        self._keys = set()
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        self._idf: Dict[str, float] = {}
+        self._indexed = 0
+        self._lock = threading.Lock()
+        for request, command in examples:
+            self.add(request, command)
+
+    def add(self, request: str, command: str, source: str = "builtin") -> bool:
+        key = (" ".join(request.lower().split()), command.strip())
+        if not key[0] or not key[1] or key in self._keys:
+            return False
+        with self._lock:
+            self._keys.add(key)
+            self.examples.append(Example(" ".join(request.split()), command.strip(), source))
+        return True
+
+    def _index(self):
+        """Rebuild the matrix when examples were added (idf depends on all of them)"""
+        with self._lock:
+            if self._indexed == len(self.examples):
+                return
+            rows = [features(e.request) + command_features(e.command) for e in self.examples]
+            df: Counter = Counter()
+            for row in rows:
+                df.update(row.keys())
+            n = len(rows)
+            self._idf = {f: math.log((n + 1) / (count + 0.5)) for f, count in df.items()}
+            postings: Dict[str, List[Tuple[int, float]]] = {}
+            for i, row in enumerate(rows):
+                weights = {f: (1 + math.log(tf)) * self._idf[f] if tf >= 1 else tf * self._idf[f]
+                           for f, tf in row.items()}
+                norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+                for f, w in weights.items():
+                    postings.setdefault(f, []).append((i, w / norm))
+            self._postings = postings
+            self._indexed = n
+
+    def similar(self, request: str, limit: int = 10) -> List[Tuple[float, Example]]:
+        """Examples by cosine similarity to request, best first"""
+        self._index()
+        query = features(request)
+        weights = {f: ((1 + math.log(tf)) if tf >= 1 else tf) * self._idf[f]
+                   for f, tf in query.items() if f in self._idf}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if not norm:
+            return []
+        scores: Dict[int, float] = {}
+        for f, w in weights.items():
+            for i, weight in self._postings[f]:
+                scores[i] = scores.get(i, 0.0) + w * weight
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score / norm, self.examples[i]) for i, score in best]
+
+    def select(self, request: str, k: int = DEFAULT_K, max_tokens: int = DEFAULT_MAX_TOKENS,
+               min_score: float = MIN_SCORE) -> List[Example]:
+        """Up to k examples for the prompt: similar enough, distinct commands, within max_tokens
+
+        The best match is always included, so the answer format stays anchored
+        even for requests unlike any example.
+        """
+        chosen: List[Example] = []
+        commands = set()
+        used = 0
+        for rank, (score, example) in enumerate(self.similar(request, limit=4 * k)):
+            if len(chosen) == k:
+                break
+            if rank > 0 and score < min_score:
+                break
+            if example.command in commands or used + example.tokens > max_tokens and chosen:
+                continue
+            chosen.append(example)
+            commands.add(example.command)
+            used += example.tokens
+        if not chosen:
+            chosen = [self.examples[0]]
+        return chosen
+
+    def render(self, request: str, k: int = DEFAULT_K, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        """The "Examples:" block for request"""
+        return "Examples:\n" + "\n".join(e.render() for e in self.select(request, k, max_tokens))
+
+
+def main():
+    """CLI: show the examples selected for a request"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Few-shot example selection")
+    parser.add_argument("request", nargs="+")
+    parser.add_argument("-k", type=int, default=DEFAULT_K)
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS)
+    args = parser.parse_args()
+
+    store = ExampleStore()
+    request = " ".join(args.request)
+    store.select(request)  # index once
+    started = time.perf_counter()
+    for score, example in store.similar(request, limit=args.k * 2):
+        print(f"{score:5.2f}  {example.request:<50} {example.command}")
+    print()
+    text = store.render(request, args.k, args.max_tokens)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(text)
+    print(f"({estimate_tokens(text)} tokens; {elapsed:.3f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,749 @@
+#!/usr/bin/env python3
+"""
+Filename Index for LLM-powered Linux Distribution
+A persistent, memory-mapped index of every file under a root, kept current incrementally, for instant "where is my file" answers
+"""
+
+import bisect
+import ctypes
+import ctypes.util
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+from fs_tools import DEFAULT_EXCLUDES, ParallelWalker
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = os.path.expanduser("~/.cache/linuxai/file_index.bin")
+INDEX_EXCLUDES = DEFAULT_EXCLUDES + (".cache", ".venv", "venv", ".local/share/Trash")
+
+MAGIC = b"LAIFIDX1"
+_HEADER = struct.Struct("<8sIIIIQd")  # magic, version, entries, directories, root length, names length, built at
+VERSION = 1
+NO_PARENT = -1
+FILE_MTIME = -1  # mtime slot of non-directories
+# close() rewrites the index file only past this many overlay changes; below it the
+# next session's mtime rescan finds the same changes again more cheaply than a rewrite
+COMPACT_AFTER_CHANGES = 1000
+
+# inotify(7)
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+INDEX_INOTIFY_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF
+_INOTIFY_HEADER = struct.Struct("iIII")
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+def _pad(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def glob_to_regex(pattern: str) -> str:
+    """A shell glob as a regex matching one whole line of the names blob
+
+    Leading and trailing "*" become a missing anchor rather than [^\\n]*,
+    which lets the regex engine skip ahead instead of backtracking per line.
+    """
+    head, tail = pattern.startswith("*"), pattern.endswith("*")
+    pattern = pattern.strip("*")
+    out, i = [], 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "*":
+            out.append(r"[^\n]*")
+        elif c == "?":
+            out.append(r"[^\n]")
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1:i + 2] in ("!", "]") else i + 1)
+            if end == -1:
+                out.append(r"\[")
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ("" if head else "^") + "".join(out) + ("" if tail else "$")
+
+
+class _Base:
+    """The on-disk index, memory-mapped
+
+    Entries are stored in depth-first order with each directory's children
+    sorted by name, so every subtree is one contiguous range and a path is
+    stored only as its last component plus a link to its parent entry (the
+    shared prefix). The sections are:
+
+      names    every entry's name followed by a newline, so one regex scan
+               over the mapping answers substring and glob queries
+      folded   the same bytes lower-cased (ASCII), for case-insensitive scans
+               without the cost of re.IGNORECASE
+      mtimes   int64 per entry: directory mtime in ns, -1 for other entries
+      offsets  uint32 per entry (+1): where each name starts in names
+      parents  int32 per entry: index of the parent directory
+      ends     uint32 per entry: one past the last entry of its subtree
+      dirs     uint32 per directory: entry indices, for the mtime rescan
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise
+        magic, version, count, n_dirs, root_len, names_len, self.built_at = _HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} file index")
+        self.count = count
+        view = memoryview(self.map)
+        pos = _HEADER.size
+        self.root = os.fsdecode(bytes(view[pos:pos + root_len]))
+        pos += _pad(root_len)
+        self.names = view[pos:pos + names_len]
+        pos += _pad(names_len)
+        self.folded = view[pos:pos + names_len]
+        pos += _pad(names_len)
+        self.mtimes = view[pos:pos + 8 * count].cast("q")
+        pos += 8 * count
+        self.offsets = view[pos:pos + 4 * (count + 1)].cast("I")
+        pos += _pad(4 * (count + 1))
+        self.parents = view[pos:pos + 4 * count].cast("i")
+        pos += _pad(4 * count)
+        self.ends = view[pos:pos + 4 * count].cast("I")
+        pos += _pad(4 * count)
+        self.dirs = view[pos:pos + 4 * n_dirs].cast("I")
+        self._views = [self.names, self.folded, self.mtimes, self.offsets, self.parents, self.ends, self.dirs, view]
+
+    def close(self):
+        for view in getattr(self, "_views", ()):
+            view.release()
+        self._views = []
+        self.map.close()
+        self.file.close()
+
+    def name(self, i: int) -> bytes:
+        return bytes(self.names[self.offsets[i]:self.offsets[i + 1] - 1])
+
+    def path(self, i: int, cache: Optional[Dict[int, str]] = None) -> str:
+        """Full path of entry i; cache maps directory entries to paths already built"""
+        if i == 0:
+            return self.root
+        parent = self.parents[i]
+        if cache is not None:
+            parent_path = cache.get(parent)
+            if parent_path is None:
+                parent_path = cache[parent] = self.path(parent, cache)
+        else:
+            parent_path = self.path(parent)
+        return os.path.join(parent_path, os.fsdecode(self.name(i)))
+
+    def entry_at(self, position: int) -> int:
+        """Index of the entry whose name contains byte position of the names blob"""
+        return bisect.bisect_right(self.offsets, position) - 1
+
+    def children(self, i: int) -> Iterator[int]:
+        j, end = i + 1, self.ends[i]
+        while j < end:
+            yield j
+            j = self.ends[j]
+
+    def lookup(self, path: str) -> Optional[int]:
+        """Entry index of path, or None if it is not in the index"""
+        rel = os.path.relpath(path, self.root)
+        if rel == ".":
+            return 0
+        if rel.startswith(".." + os.sep) or rel == "..":
+            return None
+        i = 0
+        for part in os.fsencode(rel).split(b"/"):
+            for child in self.children(i):
+                if self.name(child) == part:
+                    i = child
+                    break
+            else:
+                return None
+        return i
+
+
+def write_index(path: str, root: str, root_mtime: int, entries: List[Tuple[Tuple[bytes, ...], int]],
+                built_at: float):
+    """Write entries (path components below root, mtime or -1) as an index file, atomically
+
+    entries must already be sorted by components, which is depth-first order.
+    """
+    count = len(entries) + 1  # entry 0 is the root itself
+    names = bytearray(b".\n")
+    mtimes = array("q", [root_mtime])
+    offsets = array("I", [0])
+    parents = array("i", [NO_PARENT])
+    ends = array("I", [count])
+    dirs = array("I", [0])
+    index_of: Dict[Tuple[bytes, ...], int] = {(): 0}
+    stack = [0]  # open directories, innermost last
+
+    for i, (parts, mtime) in enumerate(entries, 1):
+        parent = index_of.get(parts[:-1])
+        if parent is None:
+            raise ValueError(f"{b'/'.join(parts)!r} has no parent entry")
+        while stack[-1] != parent:
+            ends[stack.pop()] = i
+        offsets.append(len(names))
+        names += parts[-1].replace(b"\n", b"?") + b"\n"
+        mtimes.append(mtime)
+        parents.append(parent)
+        ends.append(i + 1)
+        if mtime != FILE_MTIME:
+            index_of[parts] = i
+            dirs.append(i)
+            stack.append(i)
+    while stack:
+        ends[stack.pop()] = count
+    offsets.append(len(names))
+
+    root_bytes = os.fsencode(root)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, count, len(dirs), len(root_bytes), len(names), built_at))
+        for section in (root_bytes, names, names.lower(), mtimes, offsets, parents, ends, dirs):
+            data = section.tobytes() if isinstance(section, array) else bytes(section)
+            f.write(data + b"\0" * (_pad(len(data)) - len(data)))
+    os.replace(tmp_path, path)
+
+
+class FileIndex:
+    """Filename index of a tree (the home directory by default)
+
+    The base index is a memory-mapped file written by build() or save().
+    Changes since then live in a small in-memory overlay: refresh() stats
+    every indexed directory and rescans only those whose mtime moved, and
+    hot directories (Downloads, the working directory, ...) are watched with
+    inotify and applied on the next query, so answers stay current without
+    walking the tree again. save() folds the overlay into a new base file.
+    """
+
+    def __init__(self, root: Optional[str] = None, path: str = DEFAULT_INDEX_PATH,
+                 exclude: Iterable[str] = INDEX_EXCLUDES):
+        self.root = os.path.abspath(root or os.path.expanduser("~"))
+        self.path = path
+        self.exclude = tuple(exclude)
+        self._exclude_names = {e for e in self.exclude if "/" not in e}
+        self._exclude_paths = {os.path.join(self.root, e) for e in self.exclude if "/" in e}
+        self.base: Optional[_Base] = None
+        self.added: Dict[str, int] = {}         # path -> mtime (-1 for files) of entries not in the base
+        self.added_children: Dict[str, Set[str]] = {}
+        self.removed: Set[str] = set()          # base paths (files or whole subtrees) that are gone
+        self.dir_mtimes: Dict[str, int] = {}    # directories rescanned since the base was written
+        self.changes = 0
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._closing = False
+        self._inotify = None
+        self._watches: Dict[int, str] = {}
+        self.stats = {"rescanned": 0, "refresh_ms": 0.0, "inotify_events": 0}
+
+    # Persistence
+
+    def load(self) -> bool:
+        """Map the index file; False if it is missing, unreadable or indexes another root"""
+        try:
+            base = _Base(self.path)
+        except (OSError, ValueError) as e:
+            logger.debug(f"No usable file index at {self.path}: {e}")
+            return False
+        if base.root != self.root:
+            base.close()
+            return False
+        with self._lock:
+            self._replace_base(base)
+        return True
+
+    def _replace_base(self, base: Optional[_Base]):
+        if self.base is not None:
+            self.base.close()
+        self.base = base
+        self.added.clear()
+        self.added_children.clear()
+        self.removed.clear()
+        self.dir_mtimes.clear()
+        self.changes = 0
+
+    def _excluded(self, path: str, name: str) -> bool:
+        return name in self._exclude_names or path in self._exclude_paths
+
+    def build(self, workers: Optional[int] = None):
+        """Walk the whole tree and write a fresh index"""
+        started = time.perf_counter()
+        prefix = len(self.root.rstrip("/")) + 1
+        root_mtime = os.lstat(self.root).st_mtime_ns
+
+        def visit(entry, depth):
+            if depth == 0:
+                return None
+            if entry.is_dir(follow_symlinks=False):
+                return os.fsencode(entry.path[prefix:]), entry.stat(follow_symlinks=False).st_mtime_ns
+            return os.fsencode(entry.path[prefix:]), FILE_MTIME
+
+        exclude = [os.path.join(self.root, e) if "/" in e else e for e in self.exclude]
+        walker = ParallelWalker([self.root], visit, workers, exclude=exclude, one_filesystem=True)
+        entries = [(rel.split(b"/"), mtime) for rel, mtime in walker]
+        self._write(root_mtime, entries)
+        logger.info(f"Indexed {len(entries)} paths under {self.root} in {time.perf_counter() - started:.2f}s")
+
+    def _write(self, root_mtime: int, entries: List[Tuple[List[bytes], int]]):
+        entries = [(tuple(parts), mtime) for parts, mtime in entries]
+        entries.sort()
+        write_index(self.path, self.root, root_mtime, entries, time.time())
+        with self._lock:
+            self._replace_base(_Base(self.path))
+
+    def save(self):
+        """Fold the overlay into a new index file (no-op when nothing changed)"""
+        with self._refresh_lock:
+            with self._lock:
+                if not self.changes or self.base is None:
+                    return
+                root_mtime = self.dir_mtimes.get(self.root, self.base.mtimes[0])
+                entries = [(os.fsencode(path[len(self.root) + 1:]).split(b"/"), mtime)
+                           for path, mtime in self._iter_paths()]
+            self._write(root_mtime, entries)
+
+    def _iter_paths(self) -> Iterator[Tuple[str, int]]:
+        """Every indexed path below the root with its mtime slot, overlay applied"""
+        base = self.base
+        stack: List[Tuple[int, str]] = [(0, self.root)]
+        skip_until = 0
+        for i in range(1, base.count):
+            if i < skip_until:
+                continue
+            parent = base.parents[i]
+            while stack[-1][0] != parent:
+                stack.pop()
+            path = os.path.join(stack[-1][1], os.fsdecode(base.name(i)))
+            if path in self.removed:
+                skip_until = base.ends[i]
+                continue
+            mtime = base.mtimes[i]
+            if mtime != FILE_MTIME:
+                mtime = self.dir_mtimes.get(path, mtime)
+                stack.append((i, path))
+            yield path, mtime
+        for path, mtime in self.added.items():
+            yield path, self.dir_mtimes.get(path, mtime)
+
+    def close(self):
+        self._closing = True  # stops a refresh running in another thread
+        if self.changes >= COMPACT_AFTER_CHANGES:
+            self.save()
+        if self._inotify is not None:
+            os.close(self._inotify)
+            self._inotify = None
+        with self._lock:
+            self._replace_base(None)
+
+    # Incremental updates
+
+    def refresh(self, max_seconds: Optional[float] = None) -> int:
+        """Rescan directories whose mtime changed since they were indexed; returns how many
+
+        With max_seconds the pass stops early; the rest is picked up next time.
+        """
+        with self._refresh_lock:
+            if self.base is None or self._closing:
+                return 0
+            return self._refresh(max_seconds)
+
+    def _refresh(self, max_seconds: Optional[float]) -> int:
+        started = time.perf_counter()
+        deadline = None if max_seconds is None else started + max_seconds
+        base = self.base
+        rescanned = 0
+        stack: List[Tuple[int, str]] = [(0, self.root)]
+        for i in base.dirs:
+            if self._closing or (deadline is not None and time.perf_counter() > deadline):
+                break
+            if i:
+                parent = base.parents[i]
+                while stack[-1][0] != parent:
+                    stack.pop()
+                path = os.path.join(stack[-1][1], os.fsdecode(base.name(i)))
+                stack.append((i, path))
+            else:
+                path = self.root
+            if self.removed and self._is_removed(path):
+                continue
+            rescanned += self._check_dir(path, self.dir_mtimes.get(path, base.mtimes[i]), i)
+        for path, mtime in list(self.added.items()):
+            if mtime != FILE_MTIME and path in self.added:
+                rescanned += self._check_dir(path, self.dir_mtimes.get(path, mtime), None)
+        self.stats["rescanned"] += rescanned
+        self.stats["refresh_ms"] = (time.perf_counter() - started) * 1000
+        return rescanned
+
+    def _check_dir(self, path: str, known_mtime: int, base_index: Optional[int]) -> int:
+        try:
+            st = os.lstat(path)
+        except OSError:
+            with self._lock:
+                self._remove(path)
+            return 0
+        if st.st_mtime_ns == known_mtime:
+            return 0
+        self._rescan_dir(path, st.st_mtime_ns, base_index)
+        return 1
+
+    def _rescan_dir(self, path: str, mtime: int, base_index: Optional[int] = None):
+        """Diff one directory's entries against the index"""
+        try:
+            with os.scandir(path) as it:
+                current = {entry.name: entry.is_dir(follow_symlinks=False) for entry in it
+                           if not self._excluded(entry.path, entry.name)}
+        except OSError:
+            return
+        with self._lock:
+            known = set(self.added_children.get(path, ()))
+            if self.base is not None:
+                if base_index is None and path not in self.added:
+                    base_index = self.base.lookup(path)
+                if base_index is not None:
+                    for child in self.base.children(base_index):
+                        child_path = os.path.join(path, os.fsdecode(self.base.name(child)))
+                        if child_path not in self.removed:
+                            known.add(child_path)
+            current_paths = {os.path.join(path, name): is_dir for name, is_dir in current.items()}
+            for child_path in known - current_paths.keys():
+                self._remove(child_path)
+            for child_path, is_dir in current_paths.items():
+                if child_path not in known:
+                    self._add_tree(child_path, is_dir)
+            self.dir_mtimes[path] = mtime
+            self.changes += 1
+
+    def _add(self, path: str, mtime: int) -> bool:
+        """Record a new path; False if it is a base entry coming back"""
+        self.changes += 1
+        if path in self.removed:
+            self.removed.discard(path)
+            if self.base is not None and self.base.lookup(path) is not None:
+                return False
+        self.added[path] = mtime
+        self.added_children.setdefault(os.path.dirname(path), set()).add(path)
+        return True
+
+    def _add_tree(self, path: str, is_dir: bool):
+        if not is_dir:
+            self._add(path, FILE_MTIME)
+            return
+        try:
+            mtime = os.lstat(path).st_mtime_ns
+        except OSError:
+            return
+        if not self._add(path, mtime):
+            # Its old entries are visible again; bring them up to date
+            self._rescan_dir(path, mtime)
+            return
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if self._excluded(entry.path, entry.name):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            self._add(entry.path, entry.stat(follow_symlinks=False).st_mtime_ns)
+                            stack.append(entry.path)
+                        else:
+                            self._add(entry.path, FILE_MTIME)
+            except OSError:
+                continue
+
+    def _remove(self, path: str):
+        if path in self.added:
+            # Drop it and everything added below it
+            prefix = path + "/"
+            for added in [p for p in self.added if p == path or p.startswith(prefix)]:
+                del self.added[added]
+                children = self.added_children.get(os.path.dirname(added))
+                if children is not None:
+                    children.discard(added)
+                self.added_children.pop(added, None)
+        else:
+            self.removed.add(path)
+        self.changes += 1
+
+    def _is_removed(self, path: str) -> bool:
+        while len(path) > len(self.root):
+            if path in self.removed:
+                return True
+            path = os.path.dirname(path)
+        return False
+
+    def watch(self, directories: Iterable[str]) -> int:
+        """Watch hot directories (not recursively) with inotify; returns how many are watched"""
+        if self._inotify is None:
+            fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                logger.warning(f"inotify unavailable: {os.strerror(ctypes.get_errno())}")
+                return 0
+            self._inotify = fd
+        for directory in directories:
+            directory = os.path.abspath(directory)
+            if not (directory == self.root or directory.startswith(self.root + "/")) or \
+                    directory in self._watches.values() or not os.path.isdir(directory):
+                continue
+            wd = _libc.inotify_add_watch(self._inotify, os.fsencode(directory), INDEX_INOTIFY_MASK)
+            if wd >= 0:
+                self._watches[wd] = directory
+        return len(self._watches)
+
+    def poll(self) -> int:
+        """Apply pending inotify events to the overlay; returns how many were read"""
+        if self._inotify is None:
+            return 0
+        events = 0
+        overflowed = False
+        while True:
+            try:
+                data = os.read(self._inotify, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + _INOTIFY_HEADER.size <= len(data):
+                wd, mask, _cookie, length = _INOTIFY_HEADER.unpack_from(data, offset)
+                offset += _INOTIFY_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events += 1
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                    continue
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if self._excluded(path, name):
+                    continue
+                with self._lock:
+                    if mask & (IN_DELETE | IN_MOVED_FROM):
+                        if path in self.added or not self._is_removed(path):
+                            self._remove(path)
+                    elif mask & (IN_CREATE | IN_MOVED_TO):
+                        self._add_tree(path, bool(mask & IN_ISDIR))
+        if overflowed:
+            for directory in list(self._watches.values()):
+                try:
+                    self._rescan_dir(directory, os.lstat(directory).st_mtime_ns)
+                except OSError:
+                    pass
+        self.stats["inotify_events"] += events
+        return events
+
+    # Queries
+
+    def search(self, pattern: str, mode: str = "substring", limit: int = 50, under: Optional[str] = None,
+               kind: Optional[str] = None, ignore_case: bool = True) -> Tuple[List[str], int]:
+        """Paths whose name matches; returns (up to limit paths, total number of matches)
+
+        mode is "substring", "glob" ("report*.pdf") or "ext" (pattern is one or
+        more comma separated extensions, "pdf" or "jpg,png"). kind restricts to
+        "file" or "dir"; under restricts to one subtree.
+        """
+        if mode not in ("substring", "glob", "ext"):
+            raise ValueError(f"Unknown search mode '{mode}', expected substring, glob or ext")
+        if ignore_case:
+            pattern = os.fsdecode(os.fsencode(pattern).lower())  # folded the way the folded section is
+        if mode == "substring":
+            regex = re.escape(pattern)
+        elif mode == "glob":
+            regex = glob_to_regex(pattern)
+        else:
+            extensions = [e.strip().lstrip(".") for e in pattern.split(",") if e.strip()]
+            regex = r"\.(?:" + "|".join(re.escape(e) for e in extensions) + r")$"
+        compiled = re.compile(os.fsencode(regex), re.MULTILINE)
+        under = os.path.abspath(under) if under is not None else None
+        self.poll()
+
+        with self._lock:
+            results: List[str] = []
+            total = 0
+            base = self.base
+            if base is not None:
+                low, high = 0, base.count
+                if under is not None:
+                    start = None if under in self.added else base.lookup(under)
+                    low, high = (start, base.ends[start]) if start is not None else (0, 0)
+                last = -1
+                paths: Dict[int, str] = {}
+                haystack = base.folded if ignore_case else base.names
+                for match in compiled.finditer(haystack, base.offsets[low], base.offsets[high]):
+                    i = base.entry_at(match.start())
+                    if i == last or i == 0:
+                        continue
+                    last = i
+                    if kind is not None and (base.mtimes[i] != FILE_MTIME) != (kind == "dir"):
+                        continue
+                    if self.removed:
+                        path = base.path(i, paths)
+                        if self._is_removed(path):
+                            continue
+                    elif len(results) < limit:
+                        path = base.path(i, paths)
+                    total += 1
+                    if len(results) < limit:
+                        results.append(path)
+                    elif kind is None and not self.removed:
+                        # Only the count is left: let the regex engine count whole lines
+                        rest = re.compile(compiled.pattern + rb"[^\n]*", re.MULTILINE)
+                        total += len(rest.findall(haystack, base.offsets[i + 1], base.offsets[high]))
+                        break
+            prefix = None if under is None else under.rstrip("/") + "/"
+            for path, mtime in self.added.items():
+                if prefix is not None and not path.startswith(prefix):
+                    continue
+                if kind is not None and (mtime != FILE_MTIME) != (kind == "dir"):
+                    continue
+                name = os.fsencode(os.path.basename(path))
+                if compiled.search(name.lower() if ignore_case else name):
+                    total += 1
+                    if len(results) < limit:
+                        results.append(path)
+        return results, total
+
+    def __len__(self) -> int:
+        with self._lock:
+            base = self.base.count - 1 if self.base is not None else 0
+            return base - len(self.removed) + len(self.added)
+
+
+# Natural language file-location requests
+
+EXTENSION_WORDS = {
+    "python": "py", "javascript": "js", "typescript": "ts", "java": "java", "rust": "rs", "go": "go",
+    "shell": "sh", "bash": "sh", "markdown": "md", "text": "txt", "pdf": "pdf", "json": "json",
+    "yaml": "yaml,yml", "csv": "csv", "log": "log", "html": "html,htm", "css": "css", "c": "c,h",
+    "c++": "cpp,cc,cxx,hpp,hh", "cpp": "cpp,cc,cxx,hpp,hh", "image": "png,jpg,jpeg,gif,webp,svg,bmp",
+    "photo": "jpg,jpeg,png,heic,raw", "picture": "png,jpg,jpeg,gif,webp",
+    "video": "mp4,mkv,webm,avi,mov", "movie": "mp4,mkv,webm,avi,mov",
+    "music": "mp3,flac,ogg,wav,m4a,opus", "audio": "mp3,flac,ogg,wav,m4a,opus",
+    "archive": "zip,tar,gz,tgz,xz,bz2,7z,rar", "zip": "zip", "iso": "iso", "deb": "deb",
+    "word": "doc,docx,odt", "document": "doc,docx,odt,pdf", "excel": "xls,xlsx,ods",
+    "spreadsheet": "xls,xlsx,ods,csv", "presentation": "ppt,pptx,odp", "config": "conf,cfg,ini,toml,yaml,yml",
+}
+
+_HERE = r"(?:\s+(?P<here>here|in\s+(?:this|the\s+current)\s+(?:folder|directory|dir)))?"
+_FILE_QUERIES = (
+    # "find all python files", "list my pdf files here", "show all *.log files"
+    re.compile(r"^(?:find|list|show|locate)\s+(?:me\s+)?(?:all\s+)?(?:(?:my|the)\s+)?"
+               r"(?P<ext>[\w.+*-]+)\s+(?:files|documents|images|photos|pictures|videos|songs)" + _HERE + r"\s*[.?!]?$", re.I),
+    # "where is my resume.pdf", "where are the backup files", "where's the config folder"
+    re.compile(r"^where(?:'s|\s+is|\s+are|\s+did\s+i\s+(?:put|save))\s+(?P<owner>my\s+|the\s+|a\s+)?"
+               r"(?P<name>.+?)(?:\s+(?P<kind>file|files|folder|folders|directory|directories))?"
+               r"(?:\s+(?:saved|stored|located))?\s*[.?!]?$", re.I),
+    # "find the file named notes.txt", "locate folder called projects", "find my file invoice"
+    re.compile(r"^(?:find|locate|search\s+for|look\s+for)\s+(?:my\s+|the\s+|a\s+)?"
+               r"(?P<kind>file|folder|directory)s?\s+(?:named\s+|called\s+)?(?P<name>\S+)" + _HERE + r"\s*[.?!]?$", re.I),
+)
+
+# Words that make a request about sizes, times or contents, which the index cannot answer
+_NOT_A_NAME = {"large", "big", "biggest", "largest", "huge", "old", "recent", "new", "newest", "modified",
+               "changed", "empty", "duplicate", "open", "running", "hidden", "all", "some", "any", "every"}
+
+
+def parse_file_query(text: str) -> Optional[Dict[str, Any]]:
+    """Recognize a file-location request; returns search() arguments plus a scope, or None"""
+    text = text.strip()
+    for number, regex in enumerate(_FILE_QUERIES):
+        match = regex.match(text)
+        if match is None:
+            continue
+        groups = match.groupdict()
+        here = bool(groups.get("here"))
+        if number == 0:
+            word = groups["ext"].lower()
+            if word in _NOT_A_NAME:
+                return None
+            if "*" in word or "?" in word:
+                return {"pattern": groups["ext"], "mode": "glob", "kind": "file", "scope": "cwd"}
+            extensions = EXTENSION_WORDS.get(word) or (EXTENSION_WORDS.get(word[:-1]) if word.endswith("s") else None)
+            if extensions is None:
+                if not re.fullmatch(r"\.?[a-z0-9]{1,5}", word):
+                    return None
+                extensions = word.lstrip(".")
+            # "find all python files" means the current directory, as find . would
+            return {"pattern": extensions, "mode": "ext", "kind": "file", "scope": "cwd"}
+        name = groups["name"].strip().strip("'\"")
+        if not name or name.lower() in _NOT_A_NAME or any(w in _NOT_A_NAME for w in name.lower().split()[:1]):
+            return None
+        if len(name.split()) > 3:
+            return None  # a sentence, not a file name
+        kind = (groups.get("kind") or "").lower()
+        if number == 1 and not kind and "my" not in (groups.get("owner") or "") and "." not in name \
+                and not any(c in name for c in "*?["):
+            return None  # "where is python" asks for a program, not a file
+        kind = "dir" if kind.startswith(("folder", "director")) else None
+        mode = "glob" if any(c in name for c in "*?[") else "substring"
+        if mode == "substring" and " " in name:
+            name = name.replace(" ", "*")
+            mode = "glob"
+            name = f"*{name}*"
+        return {"pattern": name, "mode": mode, "kind": kind, "scope": "cwd" if here else "all"}
+    return None
+
+
+def main():
+    """CLI for the filename index"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Persistent filename index")
+    parser.add_argument("pattern", nargs="?")
+    parser.add_argument("--root", help="tree to index (default: home directory)")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    parser.add_argument("--mode", choices=["substring", "glob", "ext"], default="substring")
+    parser.add_argument("--under")
+    parser.add_argument("-n", type=int, default=50)
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    index = FileIndex(args.root, args.index)
+    if args.rebuild or not index.load():
+        index.build()
+    else:
+        started = time.perf_counter()
+        rescanned = index.refresh()
+        print(f"refresh: {rescanned} directories rescanned in {(time.perf_counter() - started) * 1000:.0f} ms")
+    if args.pattern:
+        started = time.perf_counter()
+        paths, total = index.search(args.pattern, args.mode, args.n, args.under)
+        elapsed = (time.perf_counter() - started) * 1000
+        print("\n".join(paths))
+        print(f"({total} matches in {elapsed:.2f} ms, {len(index)} paths indexed)")
+    index.save()
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+"""
+Filesystem Tools for LLM-powered Linux Distribution
+Parallel os.scandir walks for finding files by name or size and measuring directories, without spawning find or du
+"""
+
+import fnmatch
+import heapq
+import logging
+import math
+import os
+import queue
+import re
+import shlex
+import stat
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Skipped by the API helpers (not by translated find/du commands, which keep their usual meaning)
+DEFAULT_EXCLUDES = (".git", ".hg", ".svn", "node_modules", "__pycache__")
+
+# Never descended into: walking them is slow, endless or meaningless
+PSEUDO_FILESYSTEMS = {"proc", "sysfs", "devtmpfs", "devpts", "cgroup", "cgroup2", "debugfs", "tracefs",
+                      "securityfs", "pstore", "bpf", "configfs", "fusectl", "mqueue", "hugetlbfs",
+                      "binfmt_misc", "autofs", "efivarfs", "selinuxfs", "rpc_pipefs", "nsfs"}
+
+SIZE_UNITS = {"c": 1, "w": 2, "b": 512, "k": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+BATCH_SIZE = 256
+MAX_ERRORS = 100
+
+
+class FileRecord:
+    """One file or directory found by a walk"""
+
+    __slots__ = ("path", "name", "kind", "size", "mtime", "depth")
+
+    def __init__(self, path: str, name: str, kind: str, size: int, mtime: float, depth: int):
+        self.path = path
+        self.name = name
+        self.kind = kind  # "file", "dir", "link" or "other"
+        self.size = size
+        self.mtime = mtime
+        self.depth = depth
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"path": self.path, "name": self.name, "type": self.kind, "size": self.size, "mtime": self.mtime}
+
+
+_pseudo_devices = None
+
+
+def pseudo_filesystem_devices() -> set:
+    """st_dev of every mounted pseudo filesystem (/proc, /sys, cgroups, ...), read once from mountinfo"""
+    global _pseudo_devices
+    if _pseudo_devices is None:
+        devices = set()
+        try:
+            with open("/proc/self/mountinfo") as f:
+                for line in f:
+                    fields = line.split()
+                    fstype = fields[fields.index("-") + 1]
+                    if fstype in PSEUDO_FILESYSTEMS:
+                        major, minor = fields[2].split(":")
+                        devices.add(os.makedev(int(major), int(minor)))
+        except (OSError, ValueError, IndexError):
+            pass
+        _pseudo_devices = devices
+    return _pseudo_devices
+
+
+def _compile_excludes(patterns: Iterable[str]) -> Tuple[frozenset, Optional[re.Pattern], Optional[re.Pattern]]:
+    """Split exclusions into exact names, name globs and path globs (patterns containing '/')"""
+    names, name_globs, path_globs = set(), [], []
+    for pattern in patterns:
+        if "/" in pattern:
+            path_globs.append(fnmatch.translate(os.path.abspath(pattern)))
+        elif any(c in pattern for c in "*?["):
+            name_globs.append(fnmatch.translate(pattern))
+        else:
+            names.add(pattern)
+    name_re = re.compile("|".join(name_globs)) if name_globs else None
+    path_re = re.compile("|".join(path_globs)) if path_globs else None
+    return frozenset(names), name_re, path_re
+
+
+def _kind(mode: int) -> str:
+    if stat.S_ISREG(mode):
+        return "file"
+    if stat.S_ISDIR(mode):
+        return "dir"
+    if stat.S_ISLNK(mode):
+        return "link"
+    return "other"
+
+
+class ParallelWalker:
+    """Walks directory trees with os.scandir on a pool of threads
+
+    Each worker keeps its own deque of directories: it pushes the
+    subdirectories it finds and pops the newest one (depth first, so the
+    deques stay short), and when it runs dry it steals the oldest directory
+    from another worker, which tends to be the largest remaining subtree.
+    scandir and stat release the GIL, so workers overlap their filesystem
+    waits. Results are handed to the consumer in batches through a bounded
+    queue: workers block when the consumer falls behind, so memory stays
+    bounded however large the tree is.
+
+    visit(entry, depth) runs in the worker threads for every entry (roots
+    included, as a _RootEntry) and returns a FileRecord to stream, or None.
+    """
+
+    def __init__(self, roots: Iterable[str], visit: Callable, workers: Optional[int] = None,
+                 exclude: Iterable[str] = (), one_filesystem: bool = True, max_depth: Optional[int] = None,
+                 timeout: Optional[float] = None, max_queued_batches: int = 64):
+        self.roots = list(roots) or ["."]
+        self.visit = visit
+        self.workers = workers or min(16, (os.cpu_count() or 1) * 4)
+        self.exclude_names, self.exclude_name_re, self.exclude_path_re = _compile_excludes(exclude)
+        self.one_filesystem = one_filesystem
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.skip_devices = pseudo_filesystem_devices()
+
+        self.errors: List[str] = []
+        self.stats = {"directories": 0, "entries": 0, "steals": 0, "timed_out": False}
+        self._deques = [deque() for _ in range(self.workers)]
+        self._results: queue.Queue = queue.Queue(maxsize=max_queued_batches)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0   # directories queued or being scanned
+        self._running = 0   # worker threads still alive
+        self._stop = False
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        for root in self.roots:
+            try:
+                st = os.stat(root)
+            except OSError as e:
+                self._error(root, e)
+                continue
+            record = self.visit(_RootEntry(root, st), 0)
+            if record is not None:
+                yield record
+            if stat.S_ISDIR(st.st_mode) and (self.max_depth is None or self.max_depth > 0):
+                self._deques[self._pending % self.workers].append((root, 1, st.st_dev))
+                self._pending += 1
+        if not self._pending:
+            return
+
+        self._running = self.workers
+        threads = [threading.Thread(target=self._work, args=(i,), name=f"fs-walk-{i}", daemon=True)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                batch = self._results.get()
+                if batch is None:
+                    break
+                yield from batch
+        finally:
+            # Also reached when the consumer stops iterating early
+            self._stop = True
+            with self._idle:
+                self._idle.notify_all()
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    self._results.get(timeout=0.05)  # unblock workers waiting on a full queue
+                except queue.Empty:
+                    pass
+            for thread in threads:
+                thread.join()
+        if self.stats["timed_out"]:
+            raise subprocess.TimeoutExpired("walk", self.timeout)
+
+    def _error(self, path: str, error: OSError):
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"'{path}': {error.strerror or error}")
+
+    def _take(self, index: int):
+        """Pop our newest directory, or steal the oldest one from another worker"""
+        own = self._deques[index]
+        try:
+            return own.pop()
+        except IndexError:
+            pass
+        for offset in range(1, self.workers):
+            victim = self._deques[(index + offset) % self.workers]
+            try:
+                item = victim.popleft()
+            except IndexError:
+                continue
+            self.stats["steals"] += 1
+            return item
+        return None
+
+    def _work(self, index: int):
+        batch: List[FileRecord] = []
+        try:
+            while not self._stop:
+                item = self._take(index)
+                if item is None:
+                    with self._idle:
+                        if self._pending == 0 or self._stop:
+                            break
+                        self._idle.wait(0.005)
+                    continue
+                try:
+                    found = self._scan(index, item, batch)
+                finally:
+                    with self._idle:
+                        self._pending += found - 1
+                        if found:
+                            self._idle.notify(found)
+                        elif self._pending == 0:
+                            self._idle.notify_all()
+                if len(batch) >= BATCH_SIZE:
+                    self._put(batch)
+                    batch = []
+                if self.deadline is not None and time.monotonic() > self.deadline:
+                    self.stats["timed_out"] = True
+                    self._stop = True
+        finally:
+            if batch:
+                self._put(batch)
+            with self._lock:
+                self._running -= 1
+                last = self._running == 0
+            if last:
+                self._put(None)
+
+    def _put(self, item):
+        while True:
+            try:
+                self._results.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                if self._stop and item is not None:
+                    return
+
+    def _scan(self, index: int, item: Tuple[str, int, int], batch: List[FileRecord]) -> int:
+        """Visit one directory's entries; returns how many subdirectories were queued"""
+        path, depth, device = item
+        own = self._deques[index]
+        visit = self.visit
+        descend = self.max_depth is None or depth < self.max_depth
+        found = entries = 0
+        try:
+            scanner = os.scandir(path)
+        except OSError as e:
+            self._error(path, e)
+            return 0
+        exclude_names, name_re, path_re = self.exclude_names, self.exclude_name_re, self.exclude_path_re
+        filtered = bool(exclude_names or name_re or path_re)
+        skip_devices, one_filesystem = self.skip_devices, self.one_filesystem
+        with scanner:
+            try:
+                for entry in scanner:
+                    entries += 1
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if is_dir and filtered:
+                            name = entry.name
+                            if name in exclude_names or (name_re is not None and name_re.match(name)) or (
+                                    path_re is not None and path_re.match(os.path.abspath(entry.path))):
+                                continue
+                        record = visit(entry, depth)
+                        if record is not None:
+                            batch.append(record)
+                        if is_dir and descend:
+                            child_device = entry.stat(follow_symlinks=False).st_dev
+                            if child_device in skip_devices or (one_filesystem and child_device != device):
+                                continue
+                            own.append((entry.path, depth + 1, child_device))
+                            found += 1
+                    except OSError as e:
+                        self._error(entry.path, e)
+            except OSError as e:
+                self._error(path, e)  # the directory vanished or went unreadable mid-listing
+        self.stats["directories"] += 1
+        self.stats["entries"] += entries
+        return found
+
+
+class _RootEntry:
+    """Quacks like os.DirEntry for a walk root, so visit() sees roots like any other entry"""
+
+    __slots__ = ("path", "name", "_stat")
+
+    def __init__(self, path: str, st: os.stat_result):
+        self.path = path
+        self.name = os.path.basename(os.path.normpath(path)) or path
+        self._stat = st
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return stat.S_ISDIR(self._stat.st_mode)
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return stat.S_ISREG(self._stat.st_mode)
+
+    def is_symlink(self) -> bool:
+        return False
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        return self._stat
+
+
+def _record(entry, depth: int, st: Optional[os.stat_result] = None) -> FileRecord:
+    st = st or entry.stat(follow_symlinks=False)
+    return FileRecord(entry.path, entry.name, _kind(st.st_mode), st.st_size, st.st_mtime, depth)
+
+
+def find_files(pattern: str = "*", roots: Iterable[str] = (".",), kind: Optional[str] = None,
+               ignore_case: bool = False, exclude: Iterable[str] = DEFAULT_EXCLUDES,
+               one_filesystem: bool = True, max_depth: Optional[int] = None,
+               workers: Optional[int] = None) -> Iterator[FileRecord]:
+    """Stream files whose name matches a glob ("*.py"), optionally only of one kind ("file", "dir", "link")"""
+    regex = re.compile(fnmatch.translate(pattern), re.IGNORECASE if ignore_case else 0)
+    match = regex.match
+
+    def visit(entry, depth):
+        if not match(entry.name):
+            return None
+        record = _record(entry, depth)
+        return record if kind is None or record.kind == kind else None
+
+    return iter(ParallelWalker(roots, visit, workers, exclude, one_filesystem, max_depth))
+
+
+def find_large_files(roots: Iterable[str] = (".",), n: int = 20, min_size: int = 1024 ** 2,
+                     exclude: Iterable[str] = DEFAULT_EXCLUDES, one_filesystem: bool = True,
+                     workers: Optional[int] = None) -> List[FileRecord]:
+    """The n largest regular files of at least min_size bytes, largest first
+
+    Only files above min_size leave the workers, and the consumer keeps an
+    n-element heap, so memory does not grow with the tree.
+    """
+    def visit(entry, depth):
+        if not entry.is_file(follow_symlinks=False):
+            return None
+        st = entry.stat(follow_symlinks=False)
+        return _record(entry, depth, st) if st.st_size >= min_size else None
+
+    walker = ParallelWalker(roots, visit, workers, exclude, one_filesystem)
+    return heapq.nlargest(n, walker, key=lambda r: r.size)
+
+
+def directory_size(roots: Iterable[str] = (".",), exclude: Iterable[str] = (), one_filesystem: bool = True,
+                   workers: Optional[int] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Total apparent size, allocated (du) size and file/directory counts of one or more trees
+
+    Files with several hard links are counted once, as du does.
+    """
+    totals: Dict[int, List[int]] = {}
+    seen_links = set()
+    links_lock = threading.Lock()
+
+    def visit(entry, depth):
+        st = entry.stat(follow_symlinks=False)
+        if st.st_nlink > 1 and not stat.S_ISDIR(st.st_mode):
+            key = (st.st_dev, st.st_ino)
+            with links_lock:
+                if key in seen_links:
+                    return None
+                seen_links.add(key)
+        counts = totals.get(threading.get_ident())
+        if counts is None:
+            counts = totals.setdefault(threading.get_ident(), [0, 0, 0, 0])
+        counts[0] += st.st_size
+        counts[1] += st.st_blocks * 512
+        counts[2 if stat.S_ISDIR(st.st_mode) else 3] += 1
+        return None
+
+    walker = ParallelWalker(roots, visit, workers, exclude, one_filesystem, timeout=timeout)
+    for _ in walker:
+        pass
+    size, disk, directories, files = (sum(column) for column in zip(*totals.values())) if totals else (0, 0, 0, 0)
+    return {"size": size, "disk_usage": disk, "directories": directories, "files": files,
+            "errors": walker.errors}
+
+
+def format_size(size: float) -> str:
+    """Human readable size the way du -h and ls -h print it (rounded up, 1024-based)"""
+    if size < 1024:
+        return str(int(size))
+    for unit in "KMGTPE":
+        size /= 1024
+        if size < 1024 or unit == "E":
+            if size < 10:
+                return f"{math.ceil(size * 10) / 10:.1f}{unit}"
+            return f"{math.ceil(size)}{unit}"
+
+
+def parse_size(text: str) -> int:
+    """"100M", "2G", "512k", "1.5GB" or plain bytes"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgtKMGT]?)i?[bB]?\s*", text)
+    if match is None:
+        raise ValueError(f"Invalid size '{text}'")
+    return int(float(match.group(1)) * 1024 ** " KMGT".index(match.group(2).upper() or " "))
+
+
+# Translating generated commands
+
+def _translate_find(args: List[str]):
+    roots = []
+    while args and not args[0].startswith("-") and args[0] not in ("(", "!"):
+        roots.append(args.pop(0))
+    name = ignore_case = kind = size_test = None
+    one_filesystem = False
+    max_depth = min_depth = None
+    while args:
+        option = args.pop(0)
+        if option in ("-xdev", "-mount"):
+            one_filesystem = True
+        elif option == "-print":
+            pass
+        elif option in ("-name", "-iname") and args and name is None:
+            name, ignore_case = args.pop(0), option == "-iname"
+        elif option == "-type" and args and args[0] in ("f", "d", "l") and kind is None:
+            kind = {"f": "file", "d": "dir", "l": "link"}[args.pop(0)]
+        elif option == "-maxdepth" and args and args[0].isdigit():
+            max_depth = int(args.pop(0))
+        elif option == "-mindepth" and args and args[0].isdigit():
+            min_depth = int(args.pop(0))
+        elif option == "-size" and args and size_test is None:
+            match = re.fullmatch(r"([+-]?)(\d+)([cwbkMGT]?)", args.pop(0))
+            if match is None:
+                return None
+            size_test = (match.group(1), int(match.group(2)), SIZE_UNITS[match.group(3) or "b"])
+        else:
+            return None  # -exec, -o, -mtime, ...: leave it to the real find
+    regex = re.compile(fnmatch.translate(name), re.IGNORECASE if ignore_case else 0) if name else None
+
+    def visit(entry, depth):
+        if min_depth is not None and depth < min_depth:
+            return None
+        if regex is not None and not regex.match(entry.name):
+            return None
+        if kind == "file" and not entry.is_file(follow_symlinks=False):
+            return None
+        if kind == "dir" and not entry.is_dir(follow_symlinks=False):
+            return None
+        if kind == "link" and not entry.is_symlink():
+            return None
+        if size_test is not None:
+            sign, count, unit = size_test
+            units = -(-entry.stat(follow_symlinks=False).st_size // unit)  # find rounds sizes up to whole units
+            if not (units > count if sign == "+" else units < count if sign == "-" else units == count):
+                return None
+        return FileRecord(entry.path, entry.name, kind or "", 0, 0.0, depth)
+
+    def run(timeout):
+        walker = ParallelWalker(roots or ["."], visit, one_filesystem=one_filesystem,
+                                max_depth=max_depth, timeout=timeout)
+        paths = sorted(record.path for record in walker)  # workers finish in any order
+        stderr = "".join(f"find: {error}\n" for error in walker.errors)
+        return "".join(path + "\n" for path in paths), stderr, 1 if walker.errors else 0
+    return run
+
+
+def _translate_du(args: List[str]):
+    human = summarize = total = False
+    paths = []
+    for arg in args:
+        if arg.startswith("--"):
+            if arg not in ("--summarize", "--human-readable", "--total"):
+                return None
+            summarize |= arg == "--summarize"
+            human |= arg == "--human-readable"
+            total |= arg == "--total"
+        elif arg.startswith("-") and len(arg) > 1:
+            if set(arg[1:]) - set("shc"):
+                return None  # per-directory listings and other options go to the real du
+            summarize |= "s" in arg
+            human |= "h" in arg
+            total |= "c" in arg
+        else:
+            paths.append(arg)
+    if not summarize:
+        return None
+
+    def run(timeout):
+        lines, errors, grand_total = [], [], 0
+        for path in paths or ["."]:
+            # du -s counts every mount below the path except the pseudo filesystems
+            result = directory_size([path], one_filesystem=False, timeout=timeout)
+            errors.extend(result["errors"])
+            grand_total += result["disk_usage"]
+            lines.append((result["disk_usage"], path))
+        if total:
+            lines.append((grand_total, "total"))
+        show = format_size if human else (lambda n: str(-(-n // 1024)))
+        stderr = "".join(f"du: cannot read {error}\n" for error in errors)
+        return "".join(f"{show(size)}\t{path}\n" for size, path in lines), stderr, 1 if errors else 0
+    return run
+
+
+def native_command(command: str) -> Optional[Callable[[Optional[float]], Tuple[str, str, int]]]:
+    """A native replacement for a plain find or du -s command line, or None
+
+    Only simple forms are translated (find with -name/-iname, -type, -size,
+    -maxdepth, -mindepth, -xdev; du -s with -h/-c); anything with pipes,
+    redirections, -exec or other options runs the real tool. The returned
+    function takes a timeout and returns (stdout, stderr, exit code).
+    """
+    if any(c in command for c in "|&;<>`$()"):
+        return None
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        return None
+    if not words:
+        return None
+    if words[0] == "find":
+        return _translate_find(words[1:])
+    if words[0] == "du":
+        return _translate_du(words[1:])
+    return None
+
+
+def run_native(command: str, cwd: Optional[str] = None, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Run command natively if it can be translated; same result shape as run_with_rusage, else None
+
+    Raises subprocess.TimeoutExpired if the walk outlives the timeout.
+    """
+    runner = native_command(command)
+    if runner is None:
+        return None
+    previous = os.getcwd()
+    if cwd is not None and cwd != previous:
+        os.chdir(cwd)
+    try:
+        stdout, stderr, returncode = runner(timeout)
+    except subprocess.TimeoutExpired:
+        raise subprocess.TimeoutExpired(command, timeout)
+    finally:
+        if cwd is not None and cwd != previous:
+            os.chdir(previous)
+    return {"pid": os.getpid(), "returncode": returncode, "stdout": stdout, "stderr": stderr, "rusage": None}
+
+
+def main():
+    """CLI for the filesystem tools"""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Parallel native find / large files / directory size")
+    parser.add_argument("--json", action="store_true", help="print one JSON record per line")
+    parser.add_argument("--workers", type=int)
+    sub = parser.add_subparsers(dest="tool", required=True)
+    find = sub.add_parser("find", help="find files by glob")
+    find.add_argument("pattern")
+    find.add_argument("paths", nargs="*", default=["."])
+    find.add_argument("--type", choices=["file", "dir", "link"])
+    find.add_argument("-i", action="store_true", help="ignore case")
+    large = sub.add_parser("large", help="largest files")
+    large.add_argument("paths", nargs="*", default=["."])
+    large.add_argument("-n", type=int, default=20)
+    large.add_argument("--min-size", default="1M")
+    size = sub.add_parser("size", help="directory size")
+    size.add_argument("paths", nargs="*", default=["."])
+    args = parser.parse_args()
+
+    if args.tool == "find":
+        for record in find_files(args.pattern, args.paths, args.type, args.i, workers=args.workers):
+            print(json.dumps(record.to_dict()) if args.json else record.path, flush=False)
+    elif args.tool == "large":
+        for record in find_large_files(args.paths, args.n, parse_size(args.min_size), workers=args.workers):
+            print(json.dumps(record.to_dict()) if args.json else f"{format_size(record.size):>8}  {record.path}")
+    else:
+        result = directory_size(args.paths, workers=args.workers)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"{format_size(result['disk_usage'])}\t{result['files']} files, {result['directories']} directories "
+                  f"({format_size(result['size'])} apparent)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Install Planner for LLM-powered Linux Distribution
+Resolves an apt install offline from the package index and plans parallel downloads and the install order
+"""
+
+import logging
+import shlex
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from fs_tools import format_size
+from package_index import PackageIndex, PackageRecord, compare_versions, parse_relations, version_satisfies
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Download and install estimates; rough on purpose, they only size the wait for the user
+DEFAULT_CONNECTIONS = 4
+LINK_BANDWIDTH = 12.5e6          # bytes/s the link sustains (100 Mbit/s)
+CONNECTION_BANDWIDTH = 5e6       # bytes/s one mirror connection sustains
+REQUEST_LATENCY = 0.15           # seconds of request/response overhead per file
+UNPACK_RATE = 80e6               # installed bytes/s dpkg unpacks
+CONFIGURE_SECONDS = 0.25         # per package: maintainer scripts and triggers
+
+APT_TOOLS = {"apt", "apt-get", "aptitude"}
+
+
+class InstallPlan:
+    """What `apt install` would fetch and in which order it would install it"""
+
+    def __init__(self, requested: List[str]):
+        self.requested = requested
+        self.selected: Dict[str, PackageRecord] = {}   # everything to fetch, new or upgraded
+        self.reasons: Dict[str, str] = {}              # name -> "requested", "depends" or "recommends"
+        self.required_by: Dict[str, str] = {}
+        self.upgrades: Dict[str, str] = {}             # name -> installed version
+        self.replaced_sizes: Dict[str, int] = {}       # name -> installed size (KiB) of the version replaced
+        self.already_installed: List[str] = []
+        self.optional: List[str] = []                  # fetched only because of Recommends
+        self.problems: List[str] = []
+        self.install_order: List[List[str]] = []       # groups; a group is a dependency cycle unpacked together
+        self.download_slots: List[List[str]] = []
+        self.download_seconds = 0.0
+        self.serial_download_seconds = 0.0
+        self.install_seconds = 0.0
+
+    @property
+    def download_bytes(self) -> int:
+        return sum(record.size for record in self.selected.values())
+
+    @property
+    def installed_size_delta(self) -> int:
+        """Change in installed size in bytes (upgrades count their difference)"""
+        return (sum(record.installed_size for record in self.selected.values()) -
+                sum(self.replaced_sizes.values())) * 1024
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requested": self.requested,
+            "fetch": [{"name": r.name, "version": r.version, "size": r.size, "reason": self.reasons[r.name],
+                       "upgrade_from": self.upgrades.get(r.name)} for r in self.selected.values()],
+            "already_installed": self.already_installed,
+            "optional": self.optional,
+            "problems": self.problems,
+            "install_order": self.install_order,
+            "download_slots": self.download_slots,
+            "download_bytes": self.download_bytes,
+            "installed_size_delta": self.installed_size_delta,
+            "download_seconds": self.download_seconds,
+            "serial_download_seconds": self.serial_download_seconds,
+            "install_seconds": self.install_seconds,
+        }
+
+
+class InstallPlanner:
+    """Resolves dependency closures against the installed and available packages, without apt
+
+    Like apt, the first alternative of an or-group is preferred unless
+    another one is already installed or selected, the newest version that
+    satisfies a versioned dependency is chosen, and an installed package that
+    is too old is upgraded. Conflicts and Breaks are not considered; apt
+    still has the final say when the command runs.
+    """
+
+    def __init__(self, index: PackageIndex, recommends: bool = True, connections: int = DEFAULT_CONNECTIONS):
+        self.index = index
+        self.recommends = recommends
+        self.connections = connections
+
+    def plan(self, requests: List[str]) -> InstallPlan:
+        plan = self._resolve(requests, self.recommends)
+        if self.recommends:
+            required = self._resolve(requests, False).selected
+            plan.optional = sorted(name for name in plan.selected if name not in required)
+        self._estimate(plan)
+        return plan
+
+    def _resolve(self, requests: List[str], recommends: bool) -> InstallPlan:
+        plan = InstallPlan(list(requests))
+        edges: Dict[str, Set[str]] = {}
+        queue: List[PackageRecord] = []
+
+        for request in requests:
+            name, _, pinned = request.partition("=")
+            record = self._pick(name, "=" if pinned else None, pinned or None, plan)
+            installed = self.index.installed.get(record.name if record is not None else name)
+            if record is None and (installed is None or pinned):
+                plan.problems.append(f"Unable to locate package {request}")
+                continue
+            if installed is not None and not pinned and (
+                    record is None or compare_versions(record.version, installed.version) <= 0):
+                plan.already_installed.append(f"{installed.name} {installed.version}")
+                continue
+            self._select(record, "requested", None, plan, queue)
+
+        while queue:
+            record = queue.pop()
+            edges.setdefault(record.name, set())
+            relations = [(relation, True) for relation in record.relations()]
+            if recommends:
+                relations += [(relation, False) for relation in parse_relations(record.recommends)]
+            for relation, hard in relations:
+                target = self._satisfied(relation, plan)
+                if target is None:
+                    for name, operator, version in relation:
+                        chosen = self._pick(name, operator, version, plan)
+                        if chosen is not None:
+                            self._select(chosen, "depends" if hard else "recommends", record.name, plan, queue)
+                            target = chosen.name
+                            break
+                if target is None:
+                    if hard:
+                        wanted = " | ".join(f"{n} ({o} {v})" if o else n for n, o, v in relation)
+                        plan.problems.append(f"{record.name} depends on {wanted}, which is not installable")
+                    continue
+                if target in plan.selected and target != record.name:
+                    edges[record.name].add(target)
+
+        plan.install_order = install_order(edges)
+        return plan
+
+    def _satisfied(self, relation, plan: InstallPlan) -> Optional[str]:
+        """Name of the selected or installed package already satisfying an or-group, or None"""
+        for name, operator, version in relation:
+            selected = plan.selected.get(name)
+            if selected is not None and version_satisfies(selected.version, operator, version):
+                return name
+            installed = self.index.installed.get(name)
+            if installed is not None and name not in plan.selected and \
+                    version_satisfies(installed.version, operator, version):
+                return name
+            if operator is None:
+                for record in plan.selected.values():
+                    if name in record.provides:
+                        return record.name
+                providers = self.index.providers(name)
+                if providers:
+                    return providers[0]
+        return None
+
+    def _pick(self, name: str, operator: Optional[str], version: Optional[str],
+              plan: InstallPlan) -> Optional[PackageRecord]:
+        """The newest available version of name (or of a provider of it) satisfying the constraint"""
+        for record in self.index.versions(name):
+            if version_satisfies(record.version, operator, version):
+                return record
+        if operator is None:
+            for provider in self.index.providers(name, installed=False):
+                candidate = self.index.candidate(provider)
+                if candidate is not None:
+                    return candidate
+        return None
+
+    def _select(self, record: PackageRecord, reason: str, parent: Optional[str], plan: InstallPlan,
+                queue: List[PackageRecord]):
+        if record.name in plan.selected:
+            return
+        plan.selected[record.name] = record
+        plan.reasons[record.name] = reason
+        if parent is not None:
+            plan.required_by[record.name] = parent
+        installed = self.index.installed.get(record.name)
+        if installed is not None:
+            plan.upgrades[record.name] = installed.version
+            plan.replaced_sizes[record.name] = installed.installed_size
+        queue.append(record)
+
+    def _estimate(self, plan: InstallPlan):
+        sizes = {name: record.size for name, record in plan.selected.items()}
+        plan.download_slots = schedule_downloads(sizes, self.connections)
+        per_connection = min(CONNECTION_BANDWIDTH, LINK_BANDWIDTH / max(1, len(plan.download_slots)))
+        plan.download_seconds = max(
+            (sum(sizes[name] for name in slot) / per_connection + len(slot) * REQUEST_LATENCY
+             for slot in plan.download_slots), default=0.0)
+        plan.serial_download_seconds = sum(sizes.values()) / min(CONNECTION_BANDWIDTH, LINK_BANDWIDTH) + \
+            len(sizes) * REQUEST_LATENCY
+        plan.install_seconds = sum(record.installed_size * 1024 / UNPACK_RATE + CONFIGURE_SECONDS
+                                   for record in plan.selected.values())
+
+
+def schedule_downloads(sizes: Dict[str, int], connections: int = DEFAULT_CONNECTIONS) -> List[List[str]]:
+    """Spread downloads over parallel connections, largest first onto the least loaded one (LPT)"""
+    slots: List[Tuple[int, int, List[str]]] = [(0, i, []) for i in range(min(connections, len(sizes)))]
+    for name in sorted(sizes, key=lambda n: (-sizes[n], n)):
+        load, i, names = min(slots)
+        names.append(name)
+        slots[i] = (load + sizes[name], i, names)
+    return [names for _, _, names in slots]
+
+
+def install_order(edges: Dict[str, Set[str]]) -> List[List[str]]:
+    """Dependencies before dependents; packages in a dependency cycle form one group (Tarjan's SCC)"""
+    index_of: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    groups: List[List[str]] = []
+    counter = 0
+    for start in sorted(edges):
+        if start in index_of:
+            continue
+        work = [(start, iter(sorted(edges.get(start, ()))))]
+        index_of[start] = lowlink[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack.add(start)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index_of:
+                    index_of[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(edges.get(child, ())))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                group = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    group.append(member)
+                    if member == node:
+                        break
+                groups.append(sorted(group))
+    return groups
+
+
+def parse_install_command(command: str) -> Optional[Dict[str, Any]]:
+    """Recognize `[sudo] apt[-get] install [-y] [--no-install-recommends] pkg[=version] ...`"""
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        return None
+    while words and (words[0] in ("sudo", "env") or "=" in words[0]):
+        words = words[1:]  # sudo, env and VAR=value prefixes
+    if len(words) < 3 or words[0] not in APT_TOOLS or words[1] != "install":
+        return None
+    packages = [word for word in words[2:] if not word.startswith("-")]
+    if not packages or any(word.endswith(".deb") or "/" in word for word in packages):
+        return None  # local .deb files and release pins are left to apt
+    return {"packages": packages, "recommends": "--no-install-recommends" not in words}
+
+
+def _duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s" if seconds >= 10 else f"{seconds:.1f}s"
+    return f"{seconds // 60:.0f}m{seconds % 60:02.0f}s"
+
+
+def format_plan(plan: InstallPlan) -> List[str]:
+    """Lines for the confirmation prompt"""
+    lines = [f"📦 Install plan for {' '.join(plan.requested)} (resolved offline from the apt lists):"]
+    for already in plan.already_installed:
+        lines.append(f"  {already} is already the newest version")
+    if plan.selected:
+        new = len(plan.selected) - len(plan.upgrades)
+        delta = plan.installed_size_delta
+        lines.append(f"  {new} new, {len(plan.upgrades)} upgraded: {format_size(plan.download_bytes)}B to download, "
+                     f"{'+' if delta >= 0 else '-'}{format_size(abs(delta))}B installed")
+        lines.append(f"  Download: {len(plan.download_slots)} parallel connections, ≈{_duration(plan.download_seconds)}"
+                     f" (≈{_duration(plan.serial_download_seconds)} one at a time)")
+        lines.append(f"  Install: ≈{_duration(plan.install_seconds)}, in this order:")
+        order = [group[0] if len(group) == 1 else f"[{' + '.join(group)}]" for group in plan.install_order]
+        lines.append("    " + ", ".join(order))
+        if plan.upgrades:
+            lines.append("  Upgrades: " + ", ".join(f"{name} {old} -> {plan.selected[name].version}"
+                                                    for name, old in sorted(plan.upgrades.items())))
+        if plan.optional:
+            size = sum(plan.selected[name].size for name in plan.optional)
+            lines.append(f"  Recommends pull in {len(plan.optional)} of these ({format_size(size)}B); "
+                         "--no-install-recommends skips them")
+    for problem in plan.problems:
+        lines.append(f"  ⚠️  {problem}")
+    return lines
+
+
+def main():
+    """CLI for the install planner"""
+    import argparse
+    import json
+
+    from package_index import APT_LISTS, DPKG_STATUS, DPKG_UPDATES
+
+    parser = argparse.ArgumentParser(description="Offline apt install planner")
+    parser.add_argument("packages", nargs="+")
+    parser.add_argument("--status", default=DPKG_STATUS)
+    parser.add_argument("--lists", default=APT_LISTS)
+    parser.add_argument("--no-install-recommends", action="store_true")
+    parser.add_argument("-j", "--connections", type=int, default=DEFAULT_CONNECTIONS)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    index = PackageIndex(args.status, args.lists, updates_dir=DPKG_UPDATES if args.status == DPKG_STATUS else None)
+    if not index.available:
+        print(f"No package lists in {args.lists}; run apt update first")
+    planner = InstallPlanner(index, recommends=not args.no_install_recommends, connections=args.connections)
+    plan = planner.plan(args.packages)
+    print(json.dumps(plan.to_dict(), indent=2) if args.json else "\n".join(format_plan(plan)))
+
+
+if __name__ == "__main__":
+    main()
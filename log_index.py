@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+Log Ingestion and Index for LLM-powered Linux Distribution
+Tails the systemd journal and plain log files incrementally and answers log questions from an in-memory index
+"""
+
+import bisect
+import heapq
+import json
+import logging
+import os
+import queue
+import re
+import select
+import subprocess
+import threading
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = os.path.expanduser("~/.cache/linuxai/log_index.json")
+BACKLOG_WAIT = 1.0  # longest a query waits for journalctl to deliver its backlog
+STARTUP_IDLE = 0.5  # journalctl silent this long before any output: nothing to catch up on
+BACKLOG_IDLE = 0.1  # silent this long after output: the backlog has been read
+
+PRIORITY_NAMES = ("emerg", "alert", "crit", "err", "warning", "notice", "info", "debug")
+PRIORITY_ALIASES = {"error": 3, "warn": 4, "critical": 2, "emergency": 0, "panic": 0}
+LOG_FILTERS = ("unit", "prio", "priority", "since", "until", "limit")
+
+# Plain log lines carry no priority; guess one from the message
+_PRIORITY_HINTS = (
+    (re.compile(r"\b(panic|emerg(ency)?)\b", re.I), 0),
+    (re.compile(r"\b(crit(ical)?|oops|call trace)\b", re.I), 2),
+    (re.compile(r"\b(err(or)?|fail(ed|ure)?|fatal|segfault|denied|oom-kill(er)?|killed process|code=(killed|dumped))\b", re.I), 3),
+    (re.compile(r"\bwarn(ing)?\b", re.I), 4),
+)
+
+_SYSLOG_LINE = re.compile(
+    r"^(?P<ts>\w{3} [ \d]\d \d\d:\d\d:\d\d|\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?(?:Z|[+-]\d\d:?\d\d)?)"
+    r" (?P<host>\S+) (?P<ident>[^\s\[:]+)(?:\[(?P<pid>\d+)\])?: ?(?P<message>.*)$"
+)
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9_.@-]*")
+_STOPWORDS = frozenset(("the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "is", "was",
+                        "with", "at", "by", "from", "it", "be", "as", "this", "that"))
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhdw])$")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+LogRecord = Tuple[float, int, str, str]  # (timestamp, priority, unit, message)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased message tokens used for the index, without stopwords"""
+    return [t.strip(".-") for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def parse_priority(value) -> Optional[int]:
+    """Accept 0-7 or a syslog priority name"""
+    if value is None or isinstance(value, int):
+        return value
+    value = str(value).lower()
+    if value.isdigit():
+        return int(value)
+    if value in PRIORITY_NAMES:
+        return PRIORITY_NAMES.index(value)
+    return PRIORITY_ALIASES.get(value)
+
+
+def parse_since(value, now: Optional[float] = None) -> Optional[float]:
+    """Turn "30m", "2h", "1d" or an absolute epoch timestamp into an epoch timestamp"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    match = _DURATION.match(str(value).strip())
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    return (now or time.time()) - float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+
+
+def guess_priority(message: str) -> int:
+    for pattern, priority in _PRIORITY_HINTS:
+        if pattern.search(message):
+            return priority
+    return 6
+
+
+def parse_journal_entry(line: bytes) -> Optional[Tuple[LogRecord, Optional[str]]]:
+    """Parse one line of `journalctl -o json` into a record and its journal cursor"""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    message = entry.get("MESSAGE", "")
+    if isinstance(message, list):  # non-UTF-8 messages are exported as byte arrays
+        message = bytes(message).decode(errors="replace")
+    elif message is None:
+        message = ""
+    unit = entry.get("_SYSTEMD_UNIT") or entry.get("SYSLOG_IDENTIFIER") or entry.get("_COMM") or "kernel"
+    timestamp = int(entry.get("__REALTIME_TIMESTAMP", 0)) / 1e6
+    priority = int(entry.get("PRIORITY", 6))
+    return (timestamp, priority, unit, message), entry.get("__CURSOR")
+
+
+def parse_syslog_line(line: bytes, default_unit: str = "syslog") -> Optional[Tuple[LogRecord, None]]:
+    """Parse a traditional syslog or RFC 3339 timestamped log line"""
+    text = line.decode(errors="replace").rstrip("\n")
+    if not text:
+        return None
+    match = _SYSLOG_LINE.match(text)
+    if match is None:
+        return (time.time(), guess_priority(text), default_unit, text), None
+
+    stamp = match.group("ts")
+    try:
+        if stamp[0].isdigit():
+            timestamp = datetime.fromisoformat(stamp.replace("Z", "+00:00")).timestamp()
+        else:
+            # BSD syslog omits the year; a date in the future belongs to last year
+            now = datetime.now()
+            parsed = datetime.strptime(f"{now.year} {stamp}", "%Y %b %d %H:%M:%S")
+            if parsed > now:
+                parsed = parsed.replace(year=now.year - 1)
+            timestamp = parsed.timestamp()
+    except ValueError:
+        timestamp = time.time()
+    message = match.group("message")
+    return (timestamp, guess_priority(message), match.group("ident"), message), None
+
+
+class FileSource:
+    """Incrementally reads new complete lines from a log file, following rotation
+
+    The cursor is the file's inode and the byte offset already consumed, so
+    reading resumes where it stopped unless the file has been replaced or
+    truncated.
+    """
+
+    def __init__(self, path: str, parser: Optional[Callable] = None, cursor: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.name = f"file:{path}"
+        default_unit = os.path.basename(path).split(".")[0]
+        self.parser = parser or (lambda line: parse_syslog_line(line, default_unit))
+        self.inode = (cursor or {}).get("inode")
+        self.offset = (cursor or {}).get("offset", 0)
+        self.journal_cursor = (cursor or {}).get("journal_cursor")
+
+    @property
+    def cursor(self) -> Dict[str, Any]:
+        return {"inode": self.inode, "offset": self.offset, "journal_cursor": self.journal_cursor}
+
+    def read_new(self, max_bytes: int = 64 * 1024 * 1024) -> List[LogRecord]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            self.inode, self.offset = st.st_ino, 0  # new or rotated file
+        if st.st_size == self.offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(min(st.st_size - self.offset, max_bytes))
+        end = data.rfind(b"\n") + 1  # leave a partially written last line for next time
+        records = []
+        for line in data[:end].splitlines():
+            parsed = self.parser(line)
+            if parsed is not None:
+                record, journal_cursor = parsed
+                records.append(record)
+                if journal_cursor:
+                    self.journal_cursor = journal_cursor
+        self.offset += end
+        return records
+
+    def wait_caught_up(self, timeout: float) -> bool:
+        return True  # read_new() reads the file directly
+
+    def close(self):
+        pass
+
+
+class JournalctlSource:
+    """Follows the live systemd journal through one long-running `journalctl -o json -f`"""
+
+    name = "journal"
+
+    def __init__(self, cursor: Optional[Dict[str, Any]] = None, since: str = "-1d"):
+        self.journal_cursor = (cursor or {}).get("journal_cursor")
+        self.lines: "queue.Queue[bytes]" = queue.Queue()
+        self.caught_up = threading.Event()
+        command = ["journalctl", "-o", "json", "--follow", "--no-pager"]
+        command += [f"--after-cursor={self.journal_cursor}"] if self.journal_cursor else [f"--since={since}"]
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.reader = threading.Thread(target=self._pump, name="journal-reader", daemon=True)
+        self.reader.start()
+
+    @property
+    def cursor(self) -> Dict[str, Any]:
+        return {"journal_cursor": self.journal_cursor}
+
+    def _pump(self):
+        """Queue complete lines; a pause in the output marks the end of the backlog"""
+        fd, pending, idle = self.process.stdout.fileno(), b"", STARTUP_IDLE
+        while True:
+            ready, _, _ = select.select([fd], [], [], idle)
+            if not ready:
+                self.caught_up.set()
+                idle = None  # live from here on: block until journalctl writes
+                continue
+            data = os.read(fd, 65536)
+            if not data:
+                break
+            if not self.caught_up.is_set():
+                idle = BACKLOG_IDLE
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                self.lines.put(line)
+        self.caught_up.set()
+
+    def wait_caught_up(self, timeout: float) -> bool:
+        """Wait (at most timeout seconds) until the entries journalctl had at start are queued"""
+        return self.caught_up.wait(timeout)
+
+    def read_new(self, max_lines: int = 100000) -> List[LogRecord]:
+        records = []
+        for _ in range(max_lines):
+            try:
+                line = self.lines.get_nowait()
+            except queue.Empty:
+                break
+            parsed = parse_journal_entry(line)
+            if parsed is not None:
+                record, self.journal_cursor = parsed[0], parsed[1] or self.journal_cursor
+                records.append(record)
+        return records
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+class LogIndex:
+    """Column-store of log records with posting lists by token, unit and priority
+
+    Records are kept in ingestion order in compact arrays; every posting list
+    is an ascending array of record ids, so queries walk candidates from the
+    newest end and stop as soon as enough matches are found.
+    """
+
+    def __init__(self, max_records: int = 500000):
+        self.max_records = max_records
+        # Records from one journal or log file arrive in time order, which lets a
+        # `since` scan stop at the first older record; mixed sources may not be
+        self.ordered = True
+        self.clear()
+
+    def clear(self):
+        self.times = array("d")
+        self.priorities = array("b")
+        self.unit_ids = array("I")
+        self.messages: List[str] = []
+        self.units: List[str] = []
+        self._unit_index: Dict[str, int] = {}
+        self.by_unit: Dict[int, array] = {}
+        self.by_priority: Dict[int, array] = {}
+        self.by_token: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def add(self, record: LogRecord):
+        timestamp, priority, unit, message = record
+        record_id = len(self.messages)
+        unit_id = self._unit_index.get(unit)
+        if unit_id is None:
+            unit_id = self._unit_index[unit] = len(self.units)
+            self.units.append(unit)
+
+        self.times.append(timestamp)
+        self.priorities.append(priority)
+        self.unit_ids.append(unit_id)
+        self.messages.append(message)
+        self.by_unit.setdefault(unit_id, array("I")).append(record_id)
+        self.by_priority.setdefault(priority, array("I")).append(record_id)
+        for token in set(tokenize(message)) | set(tokenize(unit.replace(".", " "))):
+            self.by_token.setdefault(token, array("I")).append(record_id)
+
+    def extend(self, records: Iterable[LogRecord]):
+        for record in records:
+            self.add(record)
+        if len(self.messages) > self.max_records:
+            self.compact(self.max_records // 2)
+
+    def compact(self, keep: int):
+        """Drop all but the newest `keep` records and rebuild the postings"""
+        records = [self.record(i) for i in range(len(self.messages) - keep, len(self.messages))]
+        self.clear()
+        for record in records:
+            self.add((record["time"], record["priority"], record["unit"], record["message"]))
+
+    def record(self, record_id: int) -> Dict[str, Any]:
+        return {
+            "time": self.times[record_id],
+            "priority": self.priorities[record_id],
+            "unit": self.units[self.unit_ids[record_id]],
+            "message": self.messages[record_id],
+        }
+
+    def _unit_matches(self, unit: str) -> List[int]:
+        """Unit ids equal to unit, or to unit + ".service" etc. when no suffix is given"""
+        if unit in self._unit_index:
+            return [self._unit_index[unit]]
+        return [uid for name, uid in self._unit_index.items() if name.split(".")[0] == unit]
+
+    def query(self, text: Optional[str] = None, unit: Optional[str] = None, priority=None,
+              since=None, until=None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest records matching every given filter
+
+        text matches records containing all of its tokens; priority keeps
+        records at that level or more severe; since/until take epoch seconds
+        or a duration like "2h".
+        """
+        now = time.time()
+        since, until = parse_since(since, now), parse_since(until, now)
+        max_priority = parse_priority(priority)
+
+        # Posting lists that must all contain a record; the shortest drives the scan
+        required: List[array] = []
+        for token in set(tokenize(text or "")):
+            postings = self.by_token.get(token)
+            if postings is None:
+                return []
+            required.append(postings)
+        required.sort(key=len)
+
+        unit_ids = self._unit_matches(unit) if unit is not None else None
+        if unit_ids == []:
+            return []
+        if unit_ids is not None and len(unit_ids) == 1:
+            required.insert(0, self.by_unit[unit_ids[0]])
+            required.sort(key=len)
+            unit_ids = None
+
+        if required:
+            candidates, others = reversed(required[0]), required[1:]
+        elif unit_ids is not None:
+            # Several units share the name (foo.service, foo.socket): merge their postings lazily
+            candidates = heapq.merge(*(reversed(self.by_unit[uid]) for uid in unit_ids), reverse=True)
+            others, unit_ids = [], None
+        elif max_priority is not None and max_priority < 7:
+            candidates = heapq.merge(*(reversed(ids) for p, ids in self.by_priority.items()
+                                       if p <= max_priority), reverse=True)
+            others = []
+        else:
+            candidates, others = range(len(self.messages) - 1, -1, -1), []
+
+        results = []
+        for record_id in candidates:
+            timestamp = self.times[record_id]
+            if until is not None and timestamp > until:
+                continue
+            if since is not None and timestamp < since:
+                if self.ordered:
+                    break
+                continue
+            if max_priority is not None and self.priorities[record_id] > max_priority:
+                continue
+            if unit_ids is not None and self.unit_ids[record_id] not in unit_ids:
+                continue
+            if any(not _contains(postings, record_id) for postings in others):
+                continue
+            results.append(self.record(record_id))
+            if len(results) >= limit:
+                break
+        results.sort(key=lambda r: r["time"], reverse=True)
+        return results
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "times": self.times.tolist(),
+            "priorities": self.priorities.tolist(),
+            "unit_ids": self.unit_ids.tolist(),
+            "units": self.units,
+            "messages": self.messages,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_records: int = 500000) -> "LogIndex":
+        index = cls(max_records)
+        units = data.get("units", [])
+        for timestamp, priority, unit_id, message in zip(data.get("times", []), data.get("priorities", []),
+                                                          data.get("unit_ids", []), data.get("messages", [])):
+            index.add((timestamp, priority, units[unit_id], message))
+        return index
+
+
+def _contains(postings: array, record_id: int) -> bool:
+    i = bisect.bisect_left(postings, record_id)
+    return i < len(postings) and postings[i] == record_id
+
+
+class LogIngestor:
+    """Owns the log sources, their saved cursors and the shared index"""
+
+    def __init__(self, state_path: str = DEFAULT_STATE_PATH, max_records: int = 500000):
+        self.state_path = state_path
+        self.sources = []
+        self.cursors: Dict[str, Dict[str, Any]] = {}
+        self.index = LogIndex(max_records)
+        self.lock = threading.Lock()
+        self.load_state()
+
+    def load_state(self):
+        """Restore the index and per-source cursors written by save_state()"""
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable log index state {self.state_path}: {e}")
+            return
+        self.cursors = state.get("cursors", {})
+        self.index = LogIndex.from_dict(state.get("index", {}), self.index.max_records)
+
+    def save_state(self):
+        state = {
+            "cursors": {**self.cursors, **{source.name: source.cursor for source in self.sources}},
+            "index": self.index.to_dict(),
+        }
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def add_file(self, path: str, journal_json: bool = False) -> FileSource:
+        """Tail a plain log file, or a file of `journalctl -o json` output"""
+        source = FileSource(path, parse_journal_entry if journal_json else None,
+                            self.cursors.get(f"file:{path}"))
+        self.sources.append(source)
+        if len(self.sources) > 1:
+            self.index.ordered = False
+        return source
+
+    def follow_journal(self, since: str = "-1d") -> Optional[JournalctlSource]:
+        """Follow the live journal, resuming after the saved cursor"""
+        try:
+            source = JournalctlSource(self.cursors.get("journal"), since)
+        except OSError as e:
+            logger.warning(f"Cannot follow the journal: {e}")
+            return None
+        self.sources.append(source)
+        if len(self.sources) > 1:
+            self.index.ordered = False
+        return source
+
+    def refresh(self) -> int:
+        """Ingest everything new from every source; returns the number of new records"""
+        added = 0
+        with self.lock:
+            for source in self.sources:
+                records = source.read_new()
+                self.index.extend(records)
+                added += len(records)
+        return added
+
+    def query(self, wait: float = BACKLOG_WAIT, **filters) -> List[Dict[str, Any]]:
+        """Newest matching records; the first query after follow_journal() waits briefly for its backlog"""
+        deadline = time.monotonic() + wait
+        for source in self.sources:
+            source.wait_caught_up(max(0.0, deadline - time.monotonic()))
+        self.refresh()
+        with self.lock:
+            return self.index.query(**filters)
+
+    def close(self):
+        for source in self.sources:
+            source.close()
+
+
+def is_log_query(query: str) -> bool:
+    """True when every word is a filter (unit:nginx since:1h), apart from one quoted phrase of text
+
+    The logs builtin only takes input this strict, so "logs from nginx yesterday"
+    stays a natural language request.
+    """
+    rest = re.sub(r"\"[^\"]*\"|'[^']*'", " ", query, count=1)
+    words = (word.partition(":") for word in rest.split())
+    return all(sep and value and name in LOG_FILTERS for name, sep, value in words)
+
+
+def parse_log_query(query: str) -> Dict[str, Any]:
+    """Split "unit:nginx prio:err since:2h connection refused" into query() filters"""
+    filters: Dict[str, Any] = {}
+    words = []
+    for word in query.split():
+        name, sep, value = word.partition(":")
+        if sep and value and name in LOG_FILTERS:
+            if name in ("prio", "priority"):
+                filters["priority"] = value
+            elif name == "limit":
+                filters["limit"] = int(value)
+            else:
+                filters[name] = value
+        else:
+            words.append(word)
+    if words:
+        filters["text"] = " ".join(words).strip("\"'")
+    return filters
+
+
+def format_log_record(record: Dict[str, Any]) -> str:
+    stamp = datetime.fromtimestamp(record["time"]).strftime("%Y-%m-%d %H:%M:%S")
+    priority = PRIORITY_NAMES[record["priority"]] if 0 <= record["priority"] < 8 else str(record["priority"])
+    return f"{stamp} {record['unit']} [{priority}] {record['message']}"
+
+
+def main():
+    """CLI for querying logs"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the LinuxAI log index")
+    parser.add_argument("query", nargs="*", help='e.g. "unit:nginx prio:err since:2h refused"')
+    parser.add_argument("--file", action="append", default=[], help="plain log file to tail")
+    parser.add_argument("--journal-file", action="append", default=[], help="journalctl -o json export to tail")
+    parser.add_argument("--journal", action="store_true", help="follow the live journal")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH)
+    args = parser.parse_args()
+
+    ingestor = LogIngestor(args.state)
+    for path in args.file:
+        ingestor.add_file(path)
+    for path in args.journal_file:
+        ingestor.add_file(path, journal_json=True)
+    if args.journal:
+        ingestor.follow_journal()
+
+    start = time.perf_counter()
+    results = ingestor.query(**parse_log_query(" ".join(args.query)))
+    elapsed = (time.perf_counter() - start) * 1000
+    for record in reversed(results):
+        print(format_log_record(record))
+    print(f"({len(results)} records from {len(ingestor.index)} indexed, {elapsed:.1f} ms)")
+    ingestor.save_state()
+    ingestor.close()
+
+
+if __name__ == "__main__":
+    main()
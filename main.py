@@ -6,18 +6,80 @@ Integrates NLP frontend with command orchestrator for complete natural language
 
 import sys
 import os
-from nlp_frontend import NLPFrontend
-from command_orchestrator import CommandOrchestrator
+import argparse
+import re
+import threading
+from resource_accounting import format_resources
+from tracing import span, tracer, turn
 import logging
 
+# nlp_frontend (which pulls in requests) and command_orchestrator are imported
+# on first use so the prompt appears before they have loaded
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PROMPT = "🤖 LinuxAI> "
+HISTORY_EXAMPLES = 300  # most used past requests offered as few-shot examples
+
 class LinuxAI:
-    def __init__(self):
-        self.nlp = NLPFrontend(model="llama3.2:1b")
-        self.orchestrator = CommandOrchestrator()
+    def __init__(self, speculative: bool = False, tools: bool = False):
+        self.speculative = speculative and not tools  # speculation pre-fetches single-command answers
+        self.tools = tools
+        self.speculation = None
+        self.completion = None  # completion.CompletionUI once the prompt runs
+        self._nlp = None
+        self._orchestrator = None
+        self._logs = None
+        self._processes = None
+        self._files = None
+        self._sizes = None
+        self._docs = None
+        self._downloads_alerted = False
+        self._indexer_stop = threading.Event()
+        self._init_lock = threading.RLock()
+        self._print_lock = threading.Lock()
+        self.readiness_thread = None
+        self.system_ready = None  # None while the background check is running
         self.session_active = True
+    
+    @property
+    def nlp(self):
+        """NLP frontend, created on first use"""
+        with self._init_lock:
+            if self._nlp is None:
+                from nlp_frontend import NLPFrontend
+                self._nlp = NLPFrontend(model="llama3.2:1b")
+                self._routing_defaults = {"model": self._nlp.model, "ollama_host": self._nlp.ollama_host}
+                self._nlp.tools_enabled = self.tools
+                self._nlp.log_loader = lambda: self.logs
+                from cwd_context import CwdContext
+                self._nlp.cwd_context = CwdContext(max_tokens=int(os.getenv("LINUXAI_CWD_TOKENS", "160")))
+            return self._nlp
+    
+    @property
+    def orchestrator(self):
+        """Command orchestrator, created on first use"""
+        with self._init_lock:
+            if self._orchestrator is None:
+                from command_orchestrator import CommandOrchestrator
+                self._orchestrator = CommandOrchestrator(native_tools=os.getenv("LINUXAI_NATIVE_FS") == "1")
+            return self._orchestrator
+    
+    @property
+    def logs(self):
+        """Log ingestor over the journal and /var/log, created on first use"""
+        with self._init_lock:
+            if self._logs is None:
+                import shutil
+                from log_index import LogIngestor
+                self._logs = LogIngestor()
+                if shutil.which("journalctl"):
+                    self._logs.follow_journal()
+                for path in ("/var/log/syslog", "/var/log/messages", "/var/log/kern.log"):
+                    if os.access(path, os.R_OK):
+                        self._logs.add_file(path)
+            return self._logs
         
     def display_banner(self):
         """Display startup banner"""
@@ -32,46 +94,129 @@ class LinuxAI:
         print("  history        - Show conversation history")
         print("  clear          - Clear command history")
         print("  status         - Check system status")
+        print("  usage          - Show resource usage per command")
+        print('  logs <filters> - Search logs, e.g. logs unit:nginx prio:err since:1h "refused"')
+        print("  top [cpu|mem|io] [N] - Show the top processes")
+        print("  metrics        - Show pipeline latency and throughput metrics")
+        print("  disk [path] [N] - Show the largest directories and files, from the size cache")
+        if self.speculative:
+            print("  speculation    - Show type-ahead inference hit rate")
         print()
         print("Examples:")
         print('  "show me my current directory"')
         print('  "list all files in this folder"')
         print('  "check how much disk space I have"')
         print('  "find all Python files"')
+        print()
+        print("Tab completes a request from your history; a completed request reruns its command without the LLM.")
         print("-" * 60)
     
-    def check_system_status(self):
+    def check_system_status(self, report=print) -> bool:
         """Check if all required components are available"""
-        print("Checking system status...")
+        report("Checking system status...")
         
         # Check Ollama
         if self.nlp.check_ollama_status():
-            print("✅ Ollama service: Online")
+            report("✅ Ollama service: Online")
         else:
-            print("❌ Ollama service: Offline")
-            print("   Please ensure Ollama is installed and running:")
-            print("   1. Install: curl -fsSL https://ollama.com/install.sh | sh")
-            print("   2. Start: ollama serve")
-            print("   3. Pull model: ollama pull llama3.2:1b")
+            report("❌ Ollama service: Offline")
+            report("   Please ensure Ollama is installed and running:")
+            report("   1. Install: curl -fsSL https://ollama.com/install.sh | sh")
+            report("   2. Start: ollama serve")
+            report("   3. Pull model: ollama pull llama3.2:1b")
             return False
         
         # Check model availability
         try:
             test_response = self.nlp.send_prompt_to_llm("test")
             if test_response:
-                print(f"✅ LLM model ({self.nlp.model}): Available")
+                report(f"✅ LLM model ({self.nlp.model}): Available")
             else:
-                print(f"❌ LLM model ({self.nlp.model}): Not responding")
+                report(f"❌ LLM model ({self.nlp.model}): Not responding")
                 return False
         except Exception as e:
-            print(f"❌ LLM model test failed: {e}")
+            report(f"❌ LLM model test failed: {e}")
             return False
         
-        print("✅ Command orchestrator: Ready")
-        print("✅ Security sandbox: Enabled" if self.orchestrator.sandbox_enabled else "⚠️  Security sandbox: Disabled")
-        print()
+        report("✅ Command orchestrator: Ready")
+        if self.orchestrator.zygote is not None and self.orchestrator.zygote.running:
+            report("✅ Security sandbox: Enabled (user + mount namespaces)")
+        elif self.orchestrator.sandbox_enabled:
+            report("⚠️  Security sandbox: Environment only (namespaces unavailable)")
+        else:
+            report("⚠️  Security sandbox: Disabled")
+        report("")
         return True
     
+    def apply_config(self, config):
+        """Apply daemon policy and routing configuration over the built-in defaults, as a fresh start would"""
+        nlp = self.nlp
+        routing = {**self._routing_defaults, **config.get("routing", {})}
+        nlp.model, nlp.ollama_host = routing["model"], routing["ollama_host"]
+        self.orchestrator.apply_policy(config.get("policy", {}))
+    
+    def prepare_session(self, history):
+        """Reuse this warm instance for a daemon session forked from it"""
+        self.nlp.conversation_history = list(history)
+        self.session_active = True
+        if self._orchestrator is not None:
+            self._orchestrator.after_fork()
+    
+    def load_indexes(self):
+        """Load the cached file, size and doc indexes now, without starting any thread
+
+        The daemon calls this once before forking so its sessions share the
+        loaded indexes; each session's background threads then only refresh
+        them. Indexes with no cache yet are still built by the session.
+        """
+        from doc_index import DocIndex
+        from file_index import FileIndex
+        from size_tree import SizeTree
+        for attribute, index_class, nlp_attribute in (("_files", FileIndex, "file_index"),
+                                                       ("_sizes", SizeTree, "size_tree"),
+                                                       ("_docs", DocIndex, "doc_index")):
+            index = index_class()
+            try:
+                loaded = index.load()
+            except Exception as e:
+                logger.warning(f"Could not load {nlp_attribute}: {e}")
+                loaded = False
+            if not loaded:
+                index.close()
+                continue
+            with self._init_lock:
+                setattr(self, attribute, index)
+            setattr(self.nlp, nlp_attribute, index)
+    
+    def start_sandbox(self):
+        """Create the orchestrator, which forks the sandbox zygote: call before any background thread starts"""
+        self.orchestrator
+    
+    def start_readiness_check(self):
+        """Run the startup status check in the background so the prompt is not delayed"""
+        self.readiness_thread = threading.Thread(
+            target=self._background_readiness_check, name="readiness-check", daemon=True
+        )
+        self.readiness_thread.start()
+    
+    def _background_readiness_check(self):
+        lines = []
+        try:
+            self.system_ready = self.check_system_status(report=lines.append)
+        except Exception as e:
+            lines.append(f"❌ Status check failed: {e}")
+            self.system_ready = False
+        
+        if self.system_ready:
+            lines.append("System ready! You can now interact with your Linux system using natural language.")
+        else:
+            lines.append("⚠️  System not ready. Natural language requests will fail until the issues above are fixed.")
+        
+        # Report in one block, then restore the prompt the user is typing at
+        with self._print_lock:
+            print("\n" + "\n".join(lines))
+            print(PROMPT, end="", flush=True)
+    
     def process_special_commands(self, user_input: str) -> bool:
         """Handle special commands that don't require LLM processing"""
         command = user_input.lower().strip()
@@ -91,7 +236,8 @@ class LinuxAI:
         
         elif command == 'clear':
             self.orchestrator.clear_history()
-            self.nlp.conversation_history.clear()
+            if self._nlp is not None:
+                self._nlp.conversation_history.clear()
             print("History cleared.")
             return True
         
@@ -99,17 +245,51 @@ class LinuxAI:
             self.check_system_status()
             return True
         
+        elif command == 'usage':
+            self.show_resource_usage()
+            return True
+        
+        elif command == 'logs' or command.startswith('logs ') and self.is_log_query(user_input.strip()[5:]):
+            self.search_logs(user_input.strip()[4:])
+            return True
+        
+        elif command == 'top' or command.startswith('top ') and self.is_top_query(command.split()[1:]):
+            self.show_top_processes(command.split()[1:])
+            return True
+        
+        elif command == 'metrics':
+            self.show_metrics()
+            return True
+        
+        elif command == 'disk' or command.startswith('disk ') and self.is_disk_query(user_input.strip().split()[1:]):
+            self.show_disk_builtin(user_input.strip().split()[1:])
+            return True
+        
+        elif command == 'speculation' and self.speculation is not None:
+            self.show_speculation_stats()
+            return True
+        
         return False
     
     def show_history(self):
         """Display conversation and command history"""
         print("\n--- Conversation History ---")
-        if self.nlp.conversation_history:
-            for i, entry in enumerate(self.nlp.conversation_history[-10:], 1):
+        if self._nlp is not None and self._nlp.conversation_history:
+            for i, entry in enumerate(self._nlp.conversation_history[-10:], 1):
                 print(f"\n{i}. User: {entry['user_input']}")
                 result = entry['parsed_result']
                 if result['type'] == 'command':
                     print(f"   Generated: {result['command']}")
+                elif result['type'] == 'files':
+                    print(f"   Found {result['total']} matching paths in the file index")
+                elif result['type'] == 'disk_usage':
+                    print(f"   Disk usage of {result['usage']['path']} from the size cache")
+                elif result['type'] == 'packages':
+                    print(f"   Answered from the package database: {result['lines'][0]}")
+                elif result['type'] == 'network':
+                    print(f"   Answered from /proc/net and netlink: {result['lines'][0]}")
+                elif result['type'] == 'answer':
+                    print(f"   Answered with tools ({', '.join(result['tools']) or 'none'}): {result['message'][:80]}")
                 else:
                     print(f"   Result: {result}")
         else:
@@ -120,13 +300,137 @@ class LinuxAI:
         if cmd_history:
             for i, entry in enumerate(cmd_history, 1):
                 status = "✅" if entry.get("success", False) else "❌"
-                print(f"{i}. {status} {entry['command']}")
+                if "resources" in entry:
+                    print(f"{i}. {status} {entry['command']}  [{format_resources(entry['resources'])}]")
+                else:
+                    print(f"{i}. {status} {entry['command']}")
         else:
             print("No command execution history yet.")
     
+    def show_resource_usage(self):
+        """Display aggregated resource usage per command name"""
+        print("\n--- Resource Usage by Command ---")
+        summary = self.orchestrator.get_resource_summary(limit=10)
+        if not summary:
+            print("No commands executed yet.")
+            return
+        
+        print(f"{'command':<12} {'runs':>5} {'avg wall':>10} {'avg cpu':>10} {'max rss':>10} {'total I/O':>10}")
+        for row in summary:
+            io_kb = (row["read_bytes"] + row["write_bytes"]) / 1024
+            print(f"{row['command']:<12} {row['count']:>5} {row['avg_wall_time']:>9.3f}s "
+                  f"{row['avg_cpu_time']:>9.3f}s {row['max_rss_kb'] / 1024:>8.1f}MB {io_kb:>8.0f}KB")
+    
+    @staticmethod
+    def is_log_query(query: str) -> bool:
+        """Filters only ("logs unit:nginx since:1h"); other "logs ..." input is a natural language request"""
+        from log_index import is_log_query
+        return is_log_query(query)
+    
+    def search_logs(self, query: str):
+        """Display the newest log lines matching a query"""
+        from log_index import parse_log_query, format_log_record
+        try:
+            filters = parse_log_query(query)
+            filters.setdefault("limit", 10)
+            records = self.logs.query(**filters)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        if not records:
+            print("No matching log entries.")
+            return
+        for record in reversed(records):
+            print(format_log_record(record))
+    
+    @staticmethod
+    def is_top_query(args) -> bool:
+        """A sort key and/or a count ("top mem 5"); "top processes by memory" is a natural language request"""
+        from process_table import SORT_KEYS
+        return all(arg.isdigit() or arg in SORT_KEYS for arg in args)
+    
+    def show_top_processes(self, args):
+        """Display the top processes by CPU, memory or I/O, read straight from /proc"""
+        from process_table import ProcessTable, format_process_table
+        by, count = "cpu", 10
+        for arg in args:
+            if arg.isdigit():
+                count = int(arg)
+            else:
+                by = arg
+        if self._processes is None:
+            # Keep the table between calls so CPU% is measured since the last look
+            self._processes = ProcessTable()
+        try:
+            print(format_process_table(self._processes.top(count, by)))
+        except ValueError as e:
+            print(f"❌ {e}")
+    
+    def show_metrics(self):
+        """Display LLM, validation and execution metrics recorded in this session"""
+        from metrics import REGISTRY
+        print("\n--- Metrics ---")
+        lines = REGISTRY.summary()
+        print("\n".join(lines) if lines else "No metrics recorded yet.")
+    
+    def start_speculation(self):
+        """Enable type-ahead inference on partially typed input"""
+        from speculative import SpeculativeInference
+        self.speculation = SpeculativeInference(
+            lambda text, cancel_event: self.nlp.send_prompt_to_llm(text, cancel_event=cancel_event),
+            context=lambda text: self.nlp.query_context(text),
+        )
+        if not self.speculation.start():
+            self.speculation = None
+    
+    def start_completion(self):
+        """Tab completion and ghost text from past requests; the model loads in the background"""
+        if os.getenv("LINUXAI_COMPLETION") == "0" or not sys.stdin.isatty():
+            return
+        from completion import CompletionModel, CompletionUI
+        self.completion = CompletionUI(CompletionModel(), PROMPT, ghost=os.getenv("LINUXAI_GHOST") != "0")
+        if not self.completion.install():
+            self.completion = None
+            return
+        
+        def load():
+            model = self.completion.model
+            model.load()
+            # Requests whose safe command ran successfully here are examples for similar requests
+            for entry in sorted(model.entries, key=lambda e: -e.score)[:HISTORY_EXAMPLES]:
+                if entry.command and self.is_example_command(entry.command):
+                    self.nlp.few_shot.add(entry.text, entry.command, source="history")
+        
+        threading.Thread(target=load, name="completion-load", daemon=True).start()
+    
+    def learn(self, user_input: str, command=None):
+        """Feed a finished turn to the completion model and, if its safe command ran, the few-shot examples"""
+        if self.completion is not None:
+            self.completion.model.learn(user_input, command)
+        if command and self.is_example_command(command):
+            self.nlp.few_shot.add(user_input, command, source="history")
+    
+    def is_example_command(self, command: str) -> bool:
+        """Only commands safe to run without confirmation may steer future prompts as examples"""
+        for part in re.split(r"\|\|?|&&|;", command):
+            words = part.split()
+            verdict = self.orchestrator.validate_command(words[0], words[1:]) if words else {}
+            if not verdict.get("allowed") or verdict.get("requires_confirmation"):
+                return False
+        return True
+    
+    def show_speculation_stats(self):
+        """Display type-ahead inference hit rate and latency saved"""
+        stats = self.speculation.get_stats()
+        print("\n--- Speculative Inference ---")
+        print(f"Speculative requests: {stats['speculations']} ({stats['cancelled']} cancelled)")
+        print(f"Exact hits: {stats['exact_hits']} | Prefix hits: {stats['prefix_hits']} | Misses: {stats['misses']}")
+        print(f"Hit rate: {stats['hit_rate'] * 100:.1f}% | Latency saved: {stats['latency_saved']:.2f}s")
+    
     def confirm_command_execution(self, command: str) -> bool:
         """Ask user for confirmation before executing command"""
         print(f"\nGenerated command: {command}")
+        self.show_install_plan(command)
         while True:
             response = input("Execute this command? (y/n/s): ").lower().strip()
             if response == 'y':
@@ -139,21 +443,44 @@ class LinuxAI:
             else:
                 print("Please enter 'y' for yes, 'n' for no, or 's' to skip.")
     
-    def execute_command_safely(self, command: str):
-        """Execute command with proper error handling and user feedback"""
+    def show_install_plan(self, command: str):
+        """For apt install commands, show what would be fetched and installed, resolved offline"""
+        from install_planner import InstallPlanner, format_plan, parse_install_command
+        request = parse_install_command(command)
+        if request is None:
+            return
+        try:
+            from package_index import DPKG_STATUS, PackageIndex
+            if self.nlp.package_index is None:
+                if not os.path.exists(DPKG_STATUS):
+                    return
+                self.nlp.package_index = PackageIndex()
+            index = self.nlp.package_index
+            if not index.available:
+                print("📦 No apt package lists yet, so no install plan (apt update fetches them)")
+                return
+            plan = InstallPlanner(index, recommends=request["recommends"]).plan(request["packages"])
+            print("\n".join(format_plan(plan)))
+        except Exception as e:
+            logger.warning(f"Install plan unavailable: {e}")
+    
+    def execute_command_safely(self, command: str) -> bool:
+        """Execute command with proper error handling and user feedback; True if it succeeded"""
         print(f"Executing: {command}")
         result = self.orchestrator.execute_shell_command(command)
+        if self.nlp.cwd_context is not None:
+            self.nlp.cwd_context.invalidate()  # the command may have changed files or git state
         
         if result.get("blocked"):
             print(f"🚫 Command blocked: {result['error']}")
-            return
+            return False
         
         if result.get("timeout"):
             print("⏰ Command timed out")
-            return
+            return False
         
         if result["success"]:
-            print("✅ Command executed successfully")
+            print(f"✅ Command executed successfully ({format_resources(result['resources'])})")
             if result["output"].strip():
                 print("\nOutput:")
                 print(result["output"])
@@ -162,59 +489,251 @@ class LinuxAI:
             if result["error"].strip():
                 print("Error:")
                 print(result["error"])
+        return result["success"]
+    
+    def show_files(self, result):
+        """Print paths found in the filename index"""
+        print(f"📁 {result['total']} match{'es' if result['total'] != 1 else ''} from the file index:")
+        for path in result["paths"]:
+            print(f"  {path}")
+        if result["total"] > len(result["paths"]):
+            print(f"  ... and {result['total'] - len(result['paths'])} more")
+    
+    def start_file_indexing(self):
+        """Load (or build) the filename index in the background and hand it to the NLP frontend"""
+        threading.Thread(target=self._background_file_indexing, name="file-index", daemon=True).start()
+    
+    def _background_file_indexing(self):
+        # Leave the first second to startup and the first prompt
+        if self._indexer_stop.wait(1.0):
+            return
+        try:
+            index = self._files
+            if index is None:
+                from file_index import FileIndex
+                index = FileIndex()
+                if not index.load():
+                    index.build()
+            home = os.path.expanduser("~")
+            index.watch([home, os.getcwd()] + [os.path.join(home, d) for d in ("Downloads", "Desktop", "Documents")])
+            with self._init_lock:
+                self._files = index
+            self.nlp.file_index = index
+            # Pick up what changed while no session was running, then keep checking
+            while True:
+                index.refresh(max_seconds=10.0)
+                if self._indexer_stop.wait(300):
+                    return
+        except Exception as e:
+            logger.warning(f"File index unavailable: {e}")
+    
+    def show_disk_usage(self, usage, dirs, files):
+        """Print cached directory totals with the largest directories and files below it"""
+        from size_tree import format_usage_report
+        print("💾 " + "\n".join(format_usage_report(usage, dirs, files, relative_to=usage["path"])))
+    
+    @staticmethod
+    def is_disk_query(args) -> bool:
+        """An existing directory and/or a count ("disk ~/src 5"); "disk usage of my home folder" is a request"""
+        from size_tree import resolve_query_path
+        paths = [arg for arg in args if not arg.isdigit()]
+        return not paths or len(paths) == 1 and os.path.isdir(resolve_query_path(paths[0]))
+    
+    def show_disk_builtin(self, args):
+        """The disk builtin: disk [path] [N]"""
+        count, path = 10, None
+        for arg in args:
+            if arg.isdigit():
+                count = int(arg)
+            else:
+                path = arg
+        if self._sizes is None:
+            print("The size cache is still loading; try again in a moment.")
+            return
+        from size_tree import resolve_query_path
+        path = resolve_query_path(path)
+        usage = self._sizes.usage(path)
+        if usage is None:
+            print(f"❌ {path} is not in the size cache (it covers {self._sizes.root})")
+            return
+        self.show_disk_usage(usage, self._sizes.largest_dirs(path, count, max_depth=1),
+                             self._sizes.largest_files(path, count))
+    
+    def start_size_tracking(self):
+        """Load (or build) the directory size tree in the background and keep it refreshed"""
+        threading.Thread(target=self._background_size_tracking, name="size-tree", daemon=True).start()
+    
+    def _background_size_tracking(self):
+        # Start after the file index, which answers the more common questions
+        if self._indexer_stop.wait(2.0):
+            return
+        try:
+            tree = self._sizes
+            if tree is None:
+                from size_tree import SizeTree
+                tree = SizeTree()
+                if not tree.load():
+                    tree.build()
+            with self._init_lock:
+                self._sizes = tree
+            self.nlp.size_tree = tree
+            downloads = os.path.join(tree.root, "Downloads")
+            self.check_downloads_size(tree)
+            tree.start_refresher(interval=60, max_ops=int(os.getenv("LINUXAI_SIZE_REFRESH_OPS", "5000")),
+                                 watch=[downloads] if os.path.isdir(downloads) else [],
+                                 on_refresh=self.check_downloads_size)
+        except Exception as e:
+            logger.warning(f"Size cache unavailable: {e}")
+    
+    def start_doc_indexing(self):
+        """Load (or build) the man page index in the background; it grounds LLM prompts in local docs"""
+        threading.Thread(target=self._background_doc_indexing, name="doc-index", daemon=True).start()
+    
+    def _background_doc_indexing(self):
+        # Last of the indexes: a first build parses every man page (a few seconds)
+        if self._indexer_stop.wait(3.0):
+            return
+        try:
+            index = self._docs
+            if index is None:
+                from doc_index import DocIndex
+                index = DocIndex()
+                if not index.load():
+                    index.build()
+            with self._init_lock:
+                self._docs = index
+            self.nlp.doc_index = index
+            # Packages installed or removed since the last session, then hourly
+            while True:
+                index.refresh()
+                if self._indexer_stop.wait(3600):
+                    return
+        except Exception as e:
+            logger.warning(f"Documentation index unavailable: {e}")
+    
+    def check_downloads_size(self, tree):
+        """Warn once when ~/Downloads grows past LINUXAI_DOWNLOADS_ALERT (default 10G)"""
+        from fs_tools import format_size, parse_size
+        usage = tree.usage(os.path.join(tree.root, "Downloads"))
+        if usage is None:
+            return
+        limit = parse_size(os.getenv("LINUXAI_DOWNLOADS_ALERT", "10G"))
+        if usage["disk_usage"] < limit * 0.9:
+            self._downloads_alerted = False  # re-arm once it has been cleaned up
+        elif usage["disk_usage"] > limit and not self._downloads_alerted:
+            self._downloads_alerted = True
+            with self._print_lock:
+                print(f"\n⚠️  Your Downloads folder is getting large ({format_size(usage['disk_usage'])}B). "
+                      "Ask \"show the largest files in Downloads\" to see what is taking the space.")
+                print(PROMPT, end="", flush=True)
+    
+    def handle_input(self, user_input: str):
+        """Handle one line of input: a builtin, or a natural language request"""
+        # Handle special commands
+        if self.process_special_commands(user_input):
+            if self.speculation is not None:
+                self.speculation.discard()
+            return
+        
+        # An accepted history suggestion brings its command along: no LLM request, only validation
+        accepted = self.completion.accepted(user_input) if self.completion is not None else None
+        if accepted is not None:
+            if self.speculation is not None:
+                self.speculation.discard()
+            print(f"⚡ From your history: {accepted}")
+            speculated = accepted
+        else:
+            # Reuse the type-ahead answer when the final text matches it
+            speculated = self.speculation.resolve(user_input) if self.speculation is not None else None
+            
+            # Process natural language input
+            print("🧠 Processing natural language input...")
+        result = self.nlp.process_input(user_input, llm_response=speculated)
+        
+        if result["type"] == "error":
+            print(f"❌ Error: {result['message']}")
+        
+        elif result["type"] == "clarification":
+            print(f"🤔 {result['message']}")
+        
+        elif result["type"] == "blocked":
+            print(f"🚫 {result['message']}")
+        
+        elif result["type"] == "files":
+            self.show_files(result)
+        
+        elif result["type"] == "disk_usage":
+            self.show_disk_usage(result["usage"], result["dirs"], result["files"])
+        
+        elif result["type"] == "packages":
+            print("📦 " + "\n".join(result["lines"]))
+        
+        elif result["type"] == "network":
+            print("🌐 " + "\n".join(result["lines"]))
+        
+        elif result["type"] == "answer":
+            print(f"💬 {result['message']}")
+            if result["tools"]:
+                print(f"   (from {len(result['tools'])} tool calls in {result['round_trips']} LLM round trips)")
+        
+        elif result["type"] == "command":
+            command = result["command"]
+            
+            # Check if command requires confirmation
+            cmd_name = command.split()[0] if command.split() else ""
+            validation = self.orchestrator.validate_command(cmd_name, command.split()[1:])
+            
+            if validation.get("requires_confirmation", False):
+                with span("confirmation_wait", "user"):
+                    confirmed = self.confirm_command_execution(command)
+                if not confirmed:
+                    return
+            
+            # Execute the command
+            executed = self.execute_command_safely(command)
+            self.nlp.conversation_history[-1]["executed"] = executed
+            self.learn(user_input, command if executed else None)
+        
+        else:
+            print(f"🤷 Unexpected result type: {result}")
+        
+        if result["type"] in ("files", "disk_usage", "packages", "network", "answer"):
+            self.learn(user_input)
     
     def run(self):
         """Main application loop"""
         self.display_banner()
+        # Forking a multithreaded process can deadlock the child, so the zygote comes first
+        self.start_sandbox()
         
-        # Check system status on startup
-        if not self.check_system_status():
-            print("⚠️  System not ready. Please fix the issues above and try again.")
-            return
-        
-        print("System ready! You can now interact with your Linux system using natural language.")
+        # Check system status in the background; input is accepted right away.
+        # Sessions forked from a warm daemon have already passed the check.
+        if not self.system_ready:
+            self.start_readiness_check()
+        if self.speculative:
+            self.start_speculation()
+        self.start_file_indexing()
+        self.start_size_tracking()
+        self.start_doc_indexing()
+        self.start_completion()
         print("Type 'help' for available commands.\n")
         
         while self.session_active:
             try:
-                user_input = input("🤖 LinuxAI> ").strip()
+                if self.speculation is not None:
+                    self.speculation.begin_input()
+                if self.completion is not None:
+                    self.completion.begin_input()
+                line = input(PROMPT)
+                if self.completion is not None:
+                    self.completion.end_input(line)
+                user_input = line.strip()
                 
                 if not user_input:
                     continue
                 
-                # Handle special commands
-                if self.process_special_commands(user_input):
-                    continue
-                
-                # Process natural language input
-                print("🧠 Processing natural language input...")
-                result = self.nlp.process_input(user_input)
-                
-                if result["type"] == "error":
-                    print(f"❌ Error: {result['message']}")
-                
-                elif result["type"] == "clarification":
-                    print(f"🤔 {result['message']}")
-                
-                elif result["type"] == "blocked":
-                    print(f"🚫 {result['message']}")
-                
-                elif result["type"] == "command":
-                    command = result["command"]
-                    
-                    # Check if command requires confirmation
-                    cmd_name = command.split()[0] if command.split() else ""
-                    validation = self.orchestrator.validate_command(cmd_name, command.split()[1:])
-                    
-                    if validation.get("requires_confirmation", False):
-                        if not self.confirm_command_execution(command):
-                            continue
-                    
-                    # Execute the command
-                    self.execute_command_safely(command)
-                
-                else:
-                    print(f"🤷 Unexpected result type: {result}")
+                with turn("turn", input=user_input[:80]):
+                    self.handle_input(user_input)
                     
             except KeyboardInterrupt:
                 print("\n\nExiting... 👋")
@@ -222,11 +741,73 @@ class LinuxAI:
             except Exception as e:
                 logger.error(f"Unexpected error: {e}")
                 print(f"❌ An unexpected error occurred: {e}")
+        
+        if self.speculation is not None:
+            self.speculation.stop()
+            self.show_speculation_stats()
+        if self.completion is not None:
+            self.completion.stop()
+            self.completion.model.save()
+        if self._orchestrator is not None:
+            self._orchestrator.shutdown()
+        if self._logs is not None:
+            self._logs.save_state()
+            self._logs.close()
+        self._indexer_stop.set()
+        if self._files is not None:
+            self._files.close()
+        if self._sizes is not None:
+            self._sizes.close()
+        if self._docs is not None:
+            self._docs.close()
+        tracer.flush()
 
 def main():
     """Entry point for the application"""
+    parser = argparse.ArgumentParser(description="LLM-powered Linux AI - Natural Language Shell")
+    parser.add_argument("--speculative", action="store_true",
+                        default=os.getenv("LINUXAI_SPECULATIVE") == "1",
+                        help="send partially typed input to the LLM ahead of Enter")
+    parser.add_argument("--tools", action="store_true",
+                        default=os.getenv("LINUXAI_TOOLS") == "1",
+                        help="let the model answer through native tool calls (needs a tool-capable model)")
+    parser.add_argument("--client", action="store_true",
+                        default=os.getenv("LINUXAI_CLIENT") == "1",
+                        help="run the session in the resident ai-system daemon")
+    parser.add_argument("--metrics", metavar="ADDRESS",
+                        default=os.getenv("LINUXAI_METRICS"),
+                        help="serve Prometheus metrics on a Unix socket path or [host:]port")
+    parser.add_argument("--trace", metavar="FILE",
+                        default=os.getenv("LINUXAI_TRACE"),
+                        help="write per-turn spans to FILE as a Chrome trace (Perfetto, chrome://tracing)")
+    parser.add_argument("--trace-sample", type=float, metavar="RATE",
+                        default=float(os.getenv("LINUXAI_TRACE_SAMPLE", "1.0")),
+                        help="fraction of turns to trace (default: all)")
+    parser.add_argument("--trace-slow-ms", type=float, metavar="MS",
+                        default=float(os.getenv("LINUXAI_TRACE_SLOW_MS", "0")),
+                        help="only keep traced turns that took at least MS milliseconds")
+    args = parser.parse_args()
+    
+    if args.client:
+        from ai_daemon import run_client
+        code = run_client("linuxai")
+        if code is not None:
+            sys.exit(code)
+        print("⚠️  ai-system daemon not reachable, starting locally")
+    
+    if args.trace:
+        tracer.configure(args.trace, args.trace_sample, args.trace_slow_ms)
+    
     try:
-        app = LinuxAI()
+        app = LinuxAI(speculative=args.speculative, tools=args.tools)
+        # The metrics server is the first thread; the sandbox zygote must be forked before it
+        app.start_sandbox()
+        if args.metrics:
+            from metrics import serve_metrics
+            try:
+                serve_metrics(args.metrics)
+            except OSError as e:
+                print(f"⚠️  Cannot serve metrics on {args.metrics}: {e}")
         app.run()
     except Exception as e:
         logger.error(f"Failed to start LinuxAI: {e}")
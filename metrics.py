@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Metrics for LLM-powered Linux Distribution
+In-process counters, gauges and fixed-bucket histograms, exported in the Prometheus text format
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self.lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value  # a single store needs no lock
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self.lock:
+            return list(self.counts), self.sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside the bucket it falls in"""
+        counts, _ = self.snapshot()
+        total = sum(counts)
+        if not total:
+            return None
+        rank, seen = q * total, 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class _Timer:
+    """Context manager observing the elapsed wall time into a histogram"""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: _HistogramChild):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class Metric:
+    """A named metric family; label values select (and create) a child series"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        key = tuple(str(kwargs[name]) for name in self.labelnames) if kwargs else tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def children(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        with self._lock:
+            return list(self._children.items())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+                for key, child in self.children()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, child in self.children():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metric families and renders them in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> List[str]:
+        """Human-readable lines for the REPL: counters as totals, histograms as count/mean/p50/p95"""
+        lines = []
+        for metric in self.metrics.values():
+            for key, child in metric.children():
+                label = metric.name + (f"{{{','.join(key)}}}" if key else "")
+                if isinstance(metric, Histogram):
+                    counts, total = child.snapshot()
+                    n = sum(counts)
+                    if n:
+                        lines.append(f"{label}: n={n} mean={total / n:.3f} "
+                                     f"p50={child.quantile(0.5):.3f} p95={child.quantile(0.95):.3f}")
+                elif child.value:
+                    lines.append(f"{label}: {_format_value(child.value)}")
+        return lines
+
+
+REGISTRY = MetricsRegistry()
+
+# Pipeline metrics shared by the NLP frontend, the orchestrator and the REPL
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "linuxai_llm_request_seconds", "End-to-end LLM request latency", ("model",))
+LLM_TTFT_SECONDS = REGISTRY.histogram(
+    "linuxai_llm_time_to_first_token_seconds", "Time until the LLM produced its first token", ("model",))
+LLM_TOKENS = REGISTRY.counter(
+    "linuxai_llm_tokens_total", "Prompt and generated tokens reported by the LLM", ("model", "kind"))
+LLM_TOKENS_PER_REQUEST = REGISTRY.histogram(
+    "linuxai_llm_generated_tokens", "Tokens generated per LLM request", ("model",), TOKEN_BUCKETS)
+LLM_ERRORS = REGISTRY.counter(
+    "linuxai_llm_errors_total", "Failed or cancelled LLM requests", ("model", "reason"))
+CACHE_REQUESTS = REGISTRY.counter(
+    "linuxai_cache_requests_total", "Cache lookups by cache and result (hit, prefix_hit, miss)", ("cache", "result"))
+VALIDATION_VERDICTS = REGISTRY.counter(
+    "linuxai_validation_verdicts_total", "Command validation outcomes", ("stage", "verdict"))
+COMMAND_SECONDS = REGISTRY.histogram(
+    "linuxai_command_seconds", "Wall time of executed commands", ("command",))
+COMMANDS = REGISTRY.counter(
+    "linuxai_commands_total", "Executed commands by result", ("command", "result"))
+LLM_ROUND_TRIPS = REGISTRY.histogram(
+    "linuxai_llm_round_trips", "LLM requests needed to answer one turn", ("model",), (1, 2, 3, 4, 5, 8))
+TOOL_CALLS = REGISTRY.counter(
+    "linuxai_tool_calls_total", "Executed tool calls by tool and result", ("tool", "result"))
+TOOL_SECONDS = REGISTRY.histogram(
+    "linuxai_tool_seconds", "Wall time of tool calls", ("tool",))
+
+
+def _handler(registry: MetricsRegistry):
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes would flood the shell's log
+
+    return MetricsHandler
+
+
+def serve_metrics(address: str, registry: MetricsRegistry = REGISTRY):
+    """Serve /metrics on a Unix socket path or a localhost TCP port, from a daemon thread
+
+    address is either a filesystem path ("/run/user/1000/linuxai-metrics.sock",
+    scrape with curl --unix-socket) or "[host:]port" (host defaults to 127.0.0.1).
+    """
+    # Imported here so that importing metrics stays cheap at startup
+    import socketserver
+    from http.server import HTTPServer
+
+    if "/" in address:
+        if os.path.exists(address):
+            os.unlink(address)
+        server_class = type("UnixHTTPServer", (socketserver.ThreadingMixIn, socketserver.UnixStreamServer),
+                            {"daemon_threads": True})
+        server = server_class(address, _handler(registry))
+    else:
+        host, _, port = address.rpartition(":")
+        server_class = type("ThreadingHTTPServer", (socketserver.ThreadingMixIn, HTTPServer),
+                            {"daemon_threads": True})
+        server = server_class((host or "127.0.0.1", int(port)), _handler(registry))
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info(f"Serving metrics on {address}")
+    return server
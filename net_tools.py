@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+Network Tools for LLM-powered Linux Distribution
+Native socket, interface and route introspection from /proc/net and rtnetlink, without running ss, netstat or ip
+"""
+
+import logging
+import os
+import re
+import socket
+import struct
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INET_PROTOCOLS = ("tcp", "tcp6", "udp", "udp6")
+
+TCP_STATES = {
+    0x01: "ESTAB", 0x02: "SYN-SENT", 0x03: "SYN-RECV", 0x04: "FIN-WAIT-1", 0x05: "FIN-WAIT-2",
+    0x06: "TIME-WAIT", 0x07: "CLOSE", 0x08: "CLOSE-WAIT", 0x09: "LAST-ACK", 0x0A: "LISTEN",
+    0x0B: "CLOSING", 0x0C: "NEW-SYN-RECV",
+}
+UDP_STATES = {0x01: "ESTAB", 0x07: "UNCONN"}
+UNIX_TYPES = {1: "stream", 2: "dgram", 5: "seqpacket"}
+SO_ACCEPTCON = 0x00010000  # /proc/net/unix flag of listening sockets
+
+# netlink(7), rtnetlink(7), sock_diag(7)
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+RTM_NEWLINK, RTM_GETLINK = 16, 18
+RTM_NEWADDR, RTM_GETADDR = 20, 22
+RTM_NEWROUTE, RTM_GETROUTE = 24, 26
+IFLA_ADDRESS, IFLA_IFNAME, IFLA_MTU, IFLA_OPERSTATE, IFLA_STATS64 = 1, 3, 4, 16, 23
+IFA_ADDRESS, IFA_LOCAL, IFA_LABEL = 1, 2, 3
+RTA_DST, RTA_OIF, RTA_GATEWAY, RTA_PRIORITY, RTA_PREFSRC, RTA_TABLE = 1, 4, 5, 6, 7, 15
+RT_TABLE_MAIN = 254
+RTN_UNICAST = 1
+IFF_UP, IFF_LOOPBACK = 0x1, 0x8
+OPER_STATES = {0: "unknown", 1: "notpresent", 2: "down", 3: "lowerlayerdown", 4: "testing", 5: "dormant", 6: "up"}
+
+_NLMSG = struct.Struct("=IHHII")
+_RTATTR = struct.Struct("=HH")
+_IFINFOMSG = struct.Struct("=BxHiII")
+_IFADDRMSG = struct.Struct("=BBBBI")
+_RTMSG = struct.Struct("=BBBBBBBBI")
+_INET_DIAG_REQ = struct.Struct("=BBBBI")  # followed by a 48-byte inet_diag_sockid
+_INET_DIAG_PORTS = struct.Struct(">HH")  # inet_diag_sockid ports are in network byte order
+
+
+class SocketRecord:
+    """One socket from /proc/net, with its owning processes once resolved"""
+
+    __slots__ = ("protocol", "state", "local_address", "local_port", "remote_address", "remote_port",
+                 "uid", "inode", "path", "processes")
+
+    def __init__(self, protocol: str, state: str, local_address: str, local_port: int, remote_address: str,
+                 remote_port: int, uid: int, inode: int, path: str = ""):
+        self.protocol = protocol
+        self.state = state
+        self.local_address = local_address
+        self.local_port = local_port
+        self.remote_address = remote_address
+        self.remote_port = remote_port
+        self.uid = uid
+        self.inode = inode
+        self.path = path
+        self.processes: List[Tuple[int, str]] = []  # (pid, name)
+
+    @property
+    def listening(self) -> bool:
+        return self.state == "LISTEN" or (self.protocol.startswith("udp") and self.state == "UNCONN")
+
+    @property
+    def local(self) -> str:
+        if self.protocol == "unix":
+            return self.path or "*"
+        return _endpoint(self.local_address, self.local_port)
+
+    @property
+    def remote(self) -> str:
+        if self.protocol == "unix":
+            return "*"
+        return _endpoint(self.remote_address, self.remote_port)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"protocol": self.protocol, "state": self.state, "local": self.local, "remote": self.remote,
+                "local_port": self.local_port, "remote_port": self.remote_port, "uid": self.uid,
+                "inode": self.inode, "processes": [{"pid": pid, "name": name} for pid, name in self.processes]}
+
+
+def _endpoint(address: str, port: int) -> str:
+    host = "*" if address in ("0.0.0.0", "::") else address
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+def _decode_address(hex_address: str) -> str:
+    """/proc/net hex addresses are 32-bit words in host byte order"""
+    raw = bytes.fromhex(hex_address)
+    if len(raw) == 4:
+        return socket.inet_ntop(socket.AF_INET, struct.pack("<I", struct.unpack(">I", raw)[0]))
+    words = struct.unpack(">4I", raw)
+    packed = struct.pack("<4I", *words)
+    if packed[:12] == b"\0" * 10 + b"\xff\xff":
+        return socket.inet_ntop(socket.AF_INET, packed[12:])  # IPv4-mapped
+    return socket.inet_ntop(socket.AF_INET6, packed)
+
+
+def read_inet_sockets(protocol: str, proc: str = "/proc", states: Optional[Set[int]] = None,
+                      port: Optional[int] = None) -> List[SocketRecord]:
+    """Parse /proc/net/{tcp,tcp6,udp,udp6}, filtering on the raw fields before decoding anything"""
+    names = UDP_STATES if protocol.startswith("udp") else TCP_STATES
+    port_hex = None if port is None else f":{port:04X}"
+    records = []
+    try:
+        with open(os.path.join(proc, "net", protocol)) as f:
+            lines = f.read().splitlines()[1:]
+    except OSError:
+        return records
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 10:
+            continue
+        state = int(fields[3], 16)
+        if states is not None and state not in states:
+            continue
+        local, remote = fields[1], fields[2]
+        if port_hex is not None and not local.endswith(port_hex) and not remote.endswith(port_hex):
+            continue
+        local_address, local_port = local.split(":")
+        remote_address, remote_port = remote.split(":")
+        records.append(SocketRecord(protocol, names.get(state, f"{state:02X}"),
+                                    _decode_address(local_address), int(local_port, 16),
+                                    _decode_address(remote_address), int(remote_port, 16),
+                                    int(fields[7]), int(fields[9])))
+    return records
+
+
+def read_unix_sockets(proc: str = "/proc", listening_only: bool = False) -> List[SocketRecord]:
+    """Parse /proc/net/unix"""
+    records = []
+    try:
+        with open(os.path.join(proc, "net", "unix")) as f:
+            lines = f.read().splitlines()[1:]
+    except OSError:
+        return records
+    for line in lines:
+        fields = line.split(None, 7)
+        if len(fields) < 7:
+            continue
+        flags = int(fields[3], 16)
+        listening = bool(flags & SO_ACCEPTCON)
+        if listening_only and not listening:
+            continue
+        state = "LISTEN" if listening else ("ESTAB" if fields[5] == "03" else "UNCONN")
+        path = fields[7].strip() if len(fields) > 7 else ""
+        records.append(SocketRecord("unix", state, "", 0, "", 0, -1, int(fields[6]), path))
+    return records
+
+
+def _inet_diag(protocol: str, states: int) -> List[SocketRecord]:
+    """Dump inet sockets over NETLINK_SOCK_DIAG, letting the kernel filter by state
+
+    This is what ss uses. It avoids formatting /proc/net/tcp as text for every
+    socket, which dominates the cost on hosts with many connections.
+    """
+    family = socket.AF_INET6 if protocol.endswith("6") else socket.AF_INET
+    names = UDP_STATES if protocol.startswith("udp") else TCP_STATES
+    request = _INET_DIAG_REQ.pack(family, socket.IPPROTO_UDP if protocol.startswith("udp") else socket.IPPROTO_TCP,
+                                  0, 0, states) + bytes(48)
+    records = []
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_SOCK_DIAG) as sock:
+        for _, data, offset, _ in _netlink_dump(sock, SOCK_DIAG_BY_FAMILY, request):
+            state = data[offset + 1]
+            sport, dport = _INET_DIAG_PORTS.unpack_from(data, offset + 4)
+            src, dst = data[offset + 8:offset + 24], data[offset + 24:offset + 40]
+            uid, inode = struct.unpack_from("=II", data, offset + 64)
+            records.append(SocketRecord(protocol, names.get(state, f"{state:02X}"), _diag_address(family, src), sport,
+                                        _diag_address(family, dst), dport, uid, inode))
+    return records
+
+
+def _diag_address(family: int, raw: bytes) -> str:
+    if family == socket.AF_INET:
+        return socket.inet_ntop(family, raw[:4])
+    if raw[:12] == b"\0" * 10 + b"\xff\xff":
+        return socket.inet_ntop(socket.AF_INET, raw[12:])  # IPv4-mapped
+    return socket.inet_ntop(family, raw)
+
+
+def _process_name(proc: str, pid: str) -> str:
+    try:
+        with open(os.path.join(proc, pid, "comm")) as f:
+            return f.read().strip()
+    except OSError:
+        return "?"
+
+
+# inode -> (pid, fd) of the last holder seen; checked with one readlink before a /proc scan
+_holders: Dict[int, Tuple[str, str]] = {}
+
+
+def resolve_processes(records: List[SocketRecord], proc: str = "/proc"):
+    """Fill in the processes holding each socket, by scanning /proc/*/fd for socket:[inode] links
+
+    Processes owned by the sockets' uids are scanned first, and the scan
+    stops as soon as every inode has a holder, so looking up a few
+    listening sockets reads a handful of fd tables instead of all of them.
+    Holders found by earlier scans are re-checked first and skip the scan entirely.
+    Sockets of other users' processes stay unresolved without privileges, as with ss -p.
+    """
+    wanted: Dict[int, List[SocketRecord]] = {}
+    for record in records:
+        if record.inode:
+            wanted.setdefault(record.inode, []).append(record)
+    if not wanted:
+        return
+    names: Dict[str, str] = {}
+    found: Set[int] = set()
+
+    def add(inode: int, pid: str):
+        if pid not in names:
+            names[pid] = _process_name(proc, pid)
+        for record in wanted[inode]:
+            if not any(p == int(pid) for p, _ in record.processes):
+                record.processes.append((int(pid), names[pid]))
+        found.add(inode)
+
+    # Small queries settle for the first holder; shared sockets (forked servers) may have more
+    exhaustive = len(records) > 64
+    if not exhaustive:
+        for inode in wanted:
+            cached = _holders.get(inode)
+            if cached is None:
+                continue
+            try:
+                if os.readlink(os.path.join(proc, cached[0], "fd", cached[1])) == f"socket:[{inode}]":
+                    add(inode, cached[0])
+            except OSError:
+                _holders.pop(inode, None)
+        if len(found) == len(wanted):
+            return
+    if len(_holders) > 65536:
+        _holders.clear()
+
+    uids = {record.uid for record in records if record.uid >= 0}
+    pids = [name for name in os.listdir(proc) if name.isdigit()]
+    if uids and len(uids) < 3:
+        owned, others = [], []
+        for pid in pids:
+            try:
+                (owned if os.stat(os.path.join(proc, pid)).st_uid in uids else others).append(pid)
+            except OSError:
+                continue
+        pids = owned + others
+    for pid in pids:
+        fd_dir = os.path.join(proc, pid, "fd")
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                target = os.readlink(os.path.join(fd_dir, fd))
+            except OSError:
+                continue
+            if not target.startswith("socket:["):
+                continue
+            inode = int(target[8:-1])
+            _holders[inode] = (pid, fd)
+            if inode in wanted:
+                add(inode, pid)
+        if not exhaustive and len(found) == len(wanted):
+            break
+
+
+def sockets(protocols: Iterable[str] = INET_PROTOCOLS, listening: Optional[bool] = None,
+            port: Optional[int] = None, process: Optional[str] = None, with_processes: bool = True,
+            proc: str = "/proc") -> List[SocketRecord]:
+    """Sockets matching structured filters: protocol, listening or not, a local or remote port, a process name
+
+    inet sockets come from sock_diag netlink when it is available (and proc
+    is the live /proc), otherwise from /proc/net/{tcp,tcp6,udp,udp6}.
+    """
+    records: List[SocketRecord] = []
+    for protocol in protocols:
+        if protocol == "unix":
+            records.extend(read_unix_sockets(proc, listening_only=bool(listening)))
+            continue
+        listen_state = 0x0A if protocol.startswith("tcp") else 0x07
+        found = None
+        if proc == "/proc":
+            try:
+                found = _inet_diag(protocol, 1 << listen_state if listening else 0xFFFFFFFF)
+            except OSError as e:
+                logger.debug(f"sock_diag unavailable for {protocol}: {e}")
+        if found is None:
+            found = read_inet_sockets(protocol, proc, {listen_state} if listening else None, port)
+        records.extend(found)
+    if port is not None:
+        records = [r for r in records if port in (r.local_port, r.remote_port)]
+    if listening is not None:
+        records = [r for r in records if r.listening == listening]
+    if with_processes or process:
+        resolve_processes(records, proc)
+    if process:
+        records = [r for r in records if any(process in name for _, name in r.processes)]
+    return records
+
+
+def listeners(port: Optional[int] = None, protocols: Iterable[str] = INET_PROTOCOLS,
+              proc: str = "/proc") -> List[SocketRecord]:
+    """Listening TCP and bound UDP sockets, optionally on one port, with their processes"""
+    return sockets(protocols, listening=True, port=port, proc=proc)
+
+
+# rtnetlink
+
+def _attributes(data: bytes, offset: int, end: int) -> Dict[int, bytes]:
+    attributes = {}
+    while offset + _RTATTR.size <= end:
+        length, kind = _RTATTR.unpack_from(data, offset)
+        if length < _RTATTR.size:
+            break
+        attributes[kind & 0x3FFF] = data[offset + _RTATTR.size:offset + length]
+        offset += (length + 3) & ~3
+    return attributes
+
+
+def _netlink_dump(sock: socket.socket, message_type: int, body: bytes) -> Iterable[Tuple[int, bytes, int, int]]:
+    """Send one netlink dump request; yields (type, buffer, payload offset, message end)"""
+    sock.bind((0, 0))
+    sequence = 1
+    sock.send(_NLMSG.pack(_NLMSG.size + len(body), message_type, NLM_F_REQUEST | NLM_F_DUMP, sequence, 0) + body)
+    while True:
+        data = sock.recv(65536)
+        offset = 0
+        while offset + _NLMSG.size <= len(data):
+            length, kind, _, seq, _ = _NLMSG.unpack_from(data, offset)
+            if length < _NLMSG.size:
+                return
+            if seq == sequence:
+                if kind == NLMSG_DONE:
+                    return
+                if kind == NLMSG_ERROR:
+                    error = -struct.unpack_from("=i", data, offset + _NLMSG.size)[0]
+                    raise OSError(error, os.strerror(error))
+                yield kind, data, offset + _NLMSG.size, offset + length
+            offset += (length + 3) & ~3
+
+
+def _dump(message_type: int, body: bytes) -> Iterable[Tuple[int, bytes, int, int]]:
+    """One rtnetlink dump"""
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE) as sock:
+        yield from _netlink_dump(sock, message_type, body)
+
+
+def _format_address(family: int, raw: bytes) -> str:
+    return socket.inet_ntop(family, raw) if family in (socket.AF_INET, socket.AF_INET6) else raw.hex()
+
+
+def interfaces() -> List[Dict[str, Any]]:
+    """Links with their state, MAC, MTU, traffic counters and addresses (like ip -s addr)"""
+    links: Dict[int, Dict[str, Any]] = {}
+    for kind, data, offset, end in _dump(RTM_GETLINK, _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)):
+        if kind != RTM_NEWLINK:
+            continue
+        _, _, index, flags, _ = _IFINFOMSG.unpack_from(data, offset)
+        attributes = _attributes(data, offset + _IFINFOMSG.size, end)
+        stats = attributes.get(IFLA_STATS64)
+        rx_packets, tx_packets, rx_bytes, tx_bytes = struct.unpack_from("=4Q", stats) if stats else (0, 0, 0, 0)
+        links[index] = {
+            "index": index,
+            "name": attributes.get(IFLA_IFNAME, b"").rstrip(b"\0").decode(),
+            "up": bool(flags & IFF_UP),
+            "loopback": bool(flags & IFF_LOOPBACK),
+            "state": OPER_STATES.get(attributes.get(IFLA_OPERSTATE, b"\0")[0], "unknown"),
+            "mac": ":".join(f"{b:02x}" for b in attributes.get(IFLA_ADDRESS, b"")),
+            "mtu": struct.unpack("=I", attributes[IFLA_MTU])[0] if IFLA_MTU in attributes else 0,
+            "rx_bytes": rx_bytes, "tx_bytes": tx_bytes, "rx_packets": rx_packets, "tx_packets": tx_packets,
+            "addresses": [],
+        }
+    for kind, data, offset, end in _dump(RTM_GETADDR, _IFADDRMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)):
+        if kind != RTM_NEWADDR:
+            continue
+        family, prefix, _, scope, index = _IFADDRMSG.unpack_from(data, offset)
+        attributes = _attributes(data, offset + _IFADDRMSG.size, end)
+        raw = attributes.get(IFA_LOCAL) or attributes.get(IFA_ADDRESS)
+        if raw is None or index not in links:
+            continue
+        links[index]["addresses"].append(f"{_format_address(family, raw)}/{prefix}")
+    return [links[index] for index in sorted(links)]
+
+
+def routes(family: int = socket.AF_UNSPEC, table: int = RT_TABLE_MAIN) -> List[Dict[str, Any]]:
+    """Unicast routes of one routing table (like ip route / ip -6 route)"""
+    names = {link["index"]: link["name"] for link in _links_only()}
+    found = []
+    for kind, data, offset, end in _dump(RTM_GETROUTE, _RTMSG.pack(family, 0, 0, 0, 0, 0, 0, 0, 0)):
+        if kind != RTM_NEWROUTE:
+            continue
+        route_family, dst_len, _, _, route_table, protocol, scope, route_type, _ = _RTMSG.unpack_from(data, offset)
+        attributes = _attributes(data, offset + _RTMSG.size, end)
+        if RTA_TABLE in attributes:
+            route_table = struct.unpack("=I", attributes[RTA_TABLE])[0]
+        if route_table != table or route_type != RTN_UNICAST:
+            continue
+        destination = f"{_format_address(route_family, attributes[RTA_DST])}/{dst_len}" \
+            if RTA_DST in attributes else "default"
+        oif = struct.unpack("=i", attributes[RTA_OIF])[0] if RTA_OIF in attributes else 0
+        found.append({
+            "destination": destination,
+            "gateway": _format_address(route_family, attributes[RTA_GATEWAY]) if RTA_GATEWAY in attributes else None,
+            "device": names.get(oif, str(oif) if oif else None),
+            "source": _format_address(route_family, attributes[RTA_PREFSRC]) if RTA_PREFSRC in attributes else None,
+            "metric": struct.unpack("=I", attributes[RTA_PRIORITY])[0] if RTA_PRIORITY in attributes else 0,
+            "family": "inet6" if route_family == socket.AF_INET6 else "inet",
+        })
+    return found
+
+
+def _links_only() -> List[Dict[str, Any]]:
+    links = []
+    for kind, data, offset, end in _dump(RTM_GETLINK, _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)):
+        if kind == RTM_NEWLINK:
+            index = _IFINFOMSG.unpack_from(data, offset)[2]
+            name = _attributes(data, offset + _IFINFOMSG.size, end).get(IFLA_IFNAME, b"").rstrip(b"\0").decode()
+            links.append({"index": index, "name": name})
+    return links
+
+
+def default_gateway() -> Optional[Dict[str, Any]]:
+    for route in routes(socket.AF_INET):
+        if route["destination"] == "default":
+            return route
+    return None
+
+
+# Formatting and natural language questions
+
+def format_sockets(records: List[SocketRecord]) -> List[str]:
+    """ss-style lines"""
+    lines = [f"{'proto':<6} {'state':<11} {'local':<28} {'remote':<28} process"]
+    for r in sorted(records, key=lambda r: (r.protocol, r.local_port, r.local)):
+        owners = ", ".join(f"{name} (pid {pid})" for pid, name in r.processes) or "-"
+        lines.append(f"{r.protocol:<6} {r.state:<11} {r.local:<28} {r.remote:<28} {owners}")
+    return lines
+
+
+def format_interfaces(links: List[Dict[str, Any]]) -> List[str]:
+    from fs_tools import format_size
+    lines = []
+    for link in links:
+        lines.append(f"{link['name']:<12} {link['state']:<8} {', '.join(link['addresses']) or '-'}")
+        lines.append(f"{'':<12} mac {link['mac'] or '-'}  mtu {link['mtu']}  "
+                     f"rx {format_size(link['rx_bytes'])}B  tx {format_size(link['tx_bytes'])}B")
+    return lines
+
+
+def format_routes(found: List[Dict[str, Any]]) -> List[str]:
+    lines = []
+    for route in found:
+        via = f" via {route['gateway']}" if route["gateway"] else ""
+        src = f" src {route['source']}" if route["source"] else ""
+        metric = f" metric {route['metric']}" if route["metric"] else ""
+        lines.append(f"{route['destination']}{via} dev {route['device']}{src}{metric}")
+    return lines
+
+
+_PORT = r"(?:port\s+)?(?P<port>\d{1,5})"
+_NETWORK_QUERIES = (
+    # "who is listening on 8080", "what is using port 5432", "which process listens on port 80"
+    ("port", re.compile(r"^(?:who|what|which\s+(?:process|program|app|service))(?:'s|\s+is)?\s+"
+                        r"(?:listening|listens|running|using|bound|binding|occupying|on)\s+(?:on\s+|to\s+)?" + _PORT +
+                        r"\s*\??$", re.I)),
+    ("port", re.compile(r"^(?:is\s+(?:anything|something|any\s*thing)\s+)?(?:listening|running)\s+on\s+" + _PORT +
+                        r"\s*\??$", re.I)),
+    ("port", re.compile(r"^(?:is\s+)?port\s+(?P<port>\d{1,5})\s+(?:in\s+use|open|taken|free)\s*\??$", re.I)),
+    # "what ports are open", "show listening ports", "list open ports"
+    ("listening", re.compile(r"^(?:(?:what|which)\s+ports\s+are\s+(?:open|listening|in\s+use)|"
+                             r"(?:show|list)\s+(?:me\s+)?(?:all\s+)?(?:the\s+)?(?:open|listening)\s+(?:ports|sockets))"
+                             r"\s*\??$", re.I)),
+    # "show active connections", "list established connections"
+    ("connections", re.compile(r"^(?:show|list)\s+(?:me\s+)?(?:all\s+)?(?:the\s+)?(?:my\s+)?"
+                               r"(?:active|open|established|network|tcp)\s+connections\s*\??$", re.I)),
+    # "what is my ip address", "show network interfaces"
+    ("interfaces", re.compile(r"^(?:what(?:'s|\s+is|\s+are)\s+my\s+(?:local\s+)?ip(?:\s+address(?:es)?)?|"
+                              r"(?:show|list)\s+(?:me\s+)?(?:my\s+|the\s+)?(?:network\s+interfaces|interfaces|"
+                              r"ip\s+addresses|network\s+cards))\s*\??$", re.I)),
+    # "what is my default gateway", "show the routing table"
+    ("routes", re.compile(r"^(?:what(?:'s|\s+is)\s+my\s+(?:default\s+)?(?:gateway|route)|"
+                          r"(?:show|list)\s+(?:me\s+)?(?:the\s+|my\s+)?(?:routing\s+table|routes|ip\s+routes))\s*\??$", re.I)),
+)
+
+
+def parse_network_query(text: str) -> Optional[Dict[str, Any]]:
+    """Recognize a network question; returns {"kind", "port"} or None"""
+    text = text.strip()
+    for kind, regex in _NETWORK_QUERIES:
+        match = regex.match(text)
+        if match is not None:
+            port = match.groupdict().get("port")
+            if port is not None and not 0 < int(port) < 65536:
+                return None
+            return {"kind": kind, "port": int(port) if port else None}
+    return None
+
+
+def answer_network_query(query: Dict[str, Any]) -> List[str]:
+    """Answer a parse_network_query() result as lines of text"""
+    kind = query["kind"]
+    if kind == "port":
+        port = query["port"]
+        found = sockets(INET_PROTOCOLS, listening=True, port=port)
+        found = [r for r in found if r.local_port == port]
+        if not found:
+            return [f"Nothing is listening on port {port}."]
+        return [f"Listening on port {port}:"] + format_sockets(found)
+    if kind == "listening":
+        found = listeners()
+        return [f"{len(found)} listening sockets:"] + format_sockets(found)
+    if kind == "connections":
+        found = [r for r in sockets(("tcp", "tcp6"), listening=False) if r.state == "ESTAB"]
+        return [f"{len(found)} established TCP connections:"] + format_sockets(found)
+    if kind == "interfaces":
+        return format_interfaces(interfaces())
+    gateway = default_gateway()
+    lines = [f"Default gateway: {gateway['gateway']} on {gateway['device']}" if gateway and gateway["gateway"]
+             else "No default gateway."]
+    return lines + format_routes(routes())
+
+
+def main():
+    """CLI for the network tools"""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Native socket, interface and route introspection")
+    parser.add_argument("what", choices=["listen", "sockets", "unix", "interfaces", "routes", "ask"])
+    parser.add_argument("args", nargs="*", help="a port for listen/sockets, or a question for ask")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    port = int(args.args[0]) if args.args and args.args[0].isdigit() else None
+    if args.what == "ask":
+        query = parse_network_query(" ".join(args.args))
+        print("\n".join(answer_network_query(query)) if query else "Not a network question")
+        return
+    if args.what in ("listen", "sockets", "unix"):
+        protocols = ("unix",) if args.what == "unix" else INET_PROTOCOLS
+        found = sockets(protocols, listening=True if args.what == "listen" else None, port=port)
+        print(json.dumps([r.to_dict() for r in found], indent=2) if args.json else "\n".join(format_sockets(found)))
+    elif args.what == "interfaces":
+        links = interfaces()
+        print(json.dumps(links, indent=2) if args.json else "\n".join(format_interfaces(links)))
+    else:
+        found = routes()
+        print(json.dumps(found, indent=2) if args.json else "\n".join(format_routes(found)))
+
+
+if __name__ == "__main__":
+    main()
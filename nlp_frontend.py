@@ -5,11 +5,17 @@ Handles user input and interfaces with Ollama for LLM processing
 """
 
 import json
-import requests
+import os
 import subprocess
 import sys
+import threading
+import time
 from typing import Dict, Any, Optional
 import logging
+from metrics import (LLM_REQUEST_SECONDS, LLM_TTFT_SECONDS, LLM_TOKENS, LLM_TOKENS_PER_REQUEST,
+                     LLM_ERRORS, LLM_ROUND_TRIPS, VALIDATION_VERDICTS)
+from tracing import annotate, span, traced
+from few_shot import ExampleStore
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,17 +25,42 @@ class NLPFrontend:
         self.ollama_host = ollama_host
         self.model = model
         self.conversation_history = []
+        self.file_index = None  # a file_index.FileIndex, set by the shell once it has loaded
+        self.size_tree = None   # a size_tree.SizeTree, likewise
+        self.package_index = None  # a package_index.PackageIndex, loaded on the first package question
+        self.log_loader = None  # returns the log_index.LogIngestor, started on first use, for the search_logs tool
+        self.process_table = None  # a process_table.ProcessTable, created by the first process tool call
+        self.cwd_context = None  # a cwd_context.CwdContext; its snapshot tells the model where the user is
+        self.few_shot = ExampleStore()  # vetted request -> command pairs; the most similar go into the prompt
+        self.few_shot_k = 3
+        self.few_shot_tokens = int(os.getenv("LINUXAI_FEW_SHOT_TOKENS", "45"))
+        self.doc_index = None  # a doc_index.DocIndex; its passages ground the command prompt
+        self.doc_budget_ms = float(os.getenv("LINUXAI_DOC_BUDGET_MS", "20"))
+        self.tools_enabled = False  # answer through Ollama tool calling (tool_registry.py) instead of one command
+        self.max_tool_rounds = 4
+        self._tool_executor = None
+        self._query_contexts: Dict[tuple, str] = {}  # (prompt, example store, doc index) -> query_context()
+        self._context_lock = threading.Lock()
         
     def check_ollama_status(self) -> bool:
         """Check if Ollama service is running and accessible"""
+        import requests  # deferred: costs ~100ms at startup
+        
         try:
-            response = requests.get(f"{self.ollama_host}/api/tags")
+            response = requests.get(f"{self.ollama_host}/api/tags", timeout=5)
             return response.status_code == 200
         except requests.exceptions.RequestException:
             return False
     
-    def send_prompt_to_llm(self, prompt: str) -> Optional[str]:
-        """Send user input to LLM via Ollama and return response"""
+    @traced(category="llm")
+    def send_prompt_to_llm(self, prompt: str, cancel_event=None) -> Optional[str]:
+        """Send user input to LLM via Ollama and return response
+
+        With a cancel_event the response is streamed, and setting the event closes
+        the connection so Ollama stops generating; None is returned in that case.
+        """
+        import requests
+        
         system_prompt = """You are an AI assistant integrated into a Linux operating system. 
 Your primary task is to interpret natural language commands and convert them into appropriate shell commands.
 
@@ -38,45 +69,215 @@ Rules:
 2. If the request is unclear or potentially dangerous, ask for clarification
 3. For complex tasks, break them down into safe, simple commands
 4. Always consider security and never suggest commands that could harm the system
-
-Examples:
-User: "show me my current directory"
-Response: pwd
-
-User: "list all files"  
-Response: ls -la
-
-User: "create a folder called test"
-Response: mkdir test
-
-User: "check disk usage"
-Response: df -h
 """
+        # The rules and the directory snapshot are the same for every request, so
+        # Ollama's prefix cache keeps covering them; text chosen per request
+        # (examples, manual passages) goes after them, right before the request.
+        directory = self.directory_context()
+        if directory:
+            system_prompt += f"\n{directory}\nResolve files the user mentions against this directory.\n"
         
+        started = time.perf_counter()
         try:
             payload = {
                 "model": self.model,
-                "prompt": f"{system_prompt}\n\nUser: {prompt}\nResponse:",
-                "stream": False
+                "prompt": f"{system_prompt}\n{self.query_context(prompt)}\n\nUser: {prompt}\nResponse:",
+                "stream": cancel_event is not None
             }
             
             response = requests.post(
                 f"{self.ollama_host}/api/generate",
                 json=payload,
-                timeout=30
+                timeout=30,
+                stream=cancel_event is not None
             )
             
-            if response.status_code == 200:
+            if response.status_code == 200 and cancel_event is not None:
+                with response:
+                    chunks = []
+                    chunk = {}
+                    first_token = None
+                    for line in response.iter_lines():
+                        if cancel_event.is_set():
+                            LLM_ERRORS.labels(self.model, "cancelled").inc()
+                            return None
+                        if line:
+                            chunk = json.loads(line)
+                            if first_token is None and chunk.get("response"):
+                                first_token = time.perf_counter() - started
+                            chunks.append(chunk.get("response", ""))
+                            if chunk.get("done"):
+                                break
+                self.record_llm_metrics(chunk, started, first_token)
+                return "".join(chunks).strip()
+            elif response.status_code == 200:
                 result = response.json()
+                self.record_llm_metrics(result, started)
                 return result.get("response", "").strip()
             else:
                 logger.error(f"Ollama API error: {response.status_code}")
+                LLM_ERRORS.labels(self.model, f"http_{response.status_code}").inc()
                 return None
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to connect to Ollama: {e}")
+            LLM_ERRORS.labels(self.model, "connection").inc()
             return None
     
+    def directory_context(self) -> str:
+        """Cached snapshot of the working directory (entries, file types, git status), or an empty string"""
+        if self.cwd_context is None:
+            return ""
+        with span("cwd_context", "context"):
+            try:
+                return self.cwd_context.render()
+            except Exception as e:
+                logger.warning(f"Directory context failed: {e}")
+                return ""
+    
+    def query_context(self, prompt: str) -> str:
+        """The prompt text chosen for this request: few-shot examples, then manual page passages
+
+        The last few results are kept, so asking again for the same text (as a
+        speculative request and its resolution do) costs nothing and gives the
+        same answer.
+        """
+        key = (prompt, id(self.few_shot), len(self.few_shot.examples), id(self.doc_index))
+        context = self._query_contexts.get(key)
+        if context is None:
+            context = self.few_shot_examples(prompt)
+            reference = self.reference_docs(prompt)
+            if reference:
+                context += f"\nReference from the local manual pages (options available on this system):\n{reference}\n"
+            with self._context_lock:
+                self._query_contexts[key] = context
+                while len(self._query_contexts) > 8:
+                    self._query_contexts.pop(next(iter(self._query_contexts)))
+        return context
+    
+    def few_shot_examples(self, prompt: str) -> str:
+        """The "Examples:" block: the stored examples most similar to the prompt, within few_shot_tokens"""
+        with span("few_shot", "context"):
+            block = self.few_shot.render(prompt, self.few_shot_k, self.few_shot_tokens)
+            annotate(chars=len(block))
+        return block
+    
+    def reference_docs(self, prompt: str) -> str:
+        """Passages of the installed man pages and --help output most relevant to the prompt, or ""
+
+        The search stops at doc_budget_ms so a slow disk never delays the LLM request.
+        """
+        if self.doc_index is None:
+            return ""
+        with span("doc_context", "context"):
+            try:
+                reference = self.doc_index.context(prompt, budget_ms=self.doc_budget_ms)
+            except Exception as e:
+                logger.warning(f"Documentation lookup failed: {e}")
+                return ""
+            annotate(chars=len(reference))
+        return reference
+    
+    @traced(category="llm")
+    def chat_with_tools(self, prompt: str, max_rounds: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Answer through Ollama's /api/chat with the native tools of tool_registry.py
+
+        Every tool call of one model response runs concurrently and all results
+        go back in a single follow-up request, so a compound question ("is nginx
+        running, what listens on 80 and how full is /var?") costs two round trips
+        instead of one per part. The last round offers no tools, forcing an answer.
+        Returns None when the model does not support tools (tools are then
+        disabled for the session and the caller falls back to send_prompt_to_llm).
+        """
+        import requests
+        from tool_registry import TOOLS, ToolExecutor, format_result
+        
+        max_rounds = max_rounds or self.max_tool_rounds
+        if self._tool_executor is None:
+            self._tool_executor = ToolExecutor(TOOLS, context=self)
+        executor = self._tool_executor
+        executor.new_turn()
+        
+        messages = [
+            {"role": "system", "content": """You are an AI assistant integrated into a Linux operating system.
+Answer questions about this system from the provided tools. Request every tool call you need at once:
+they run in parallel. When the user asks to change or run something, call run_command with one safe shell command.
+Keep answers short and base them only on the tool results."""},
+            {"role": "user", "content": prompt},
+        ]
+        used = []
+        for round_trip in range(1, max_rounds + 1):
+            payload = {"model": self.model, "messages": messages, "stream": False}
+            if round_trip < max_rounds:
+                payload["tools"] = TOOLS.schemas()
+            started = time.perf_counter()
+            try:
+                response = requests.post(f"{self.ollama_host}/api/chat", json=payload, timeout=60)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Failed to connect to Ollama: {e}")
+                LLM_ERRORS.labels(self.model, "connection").inc()
+                return {"type": "error", "message": "Failed to get response from LLM"}
+            if response.status_code == 400 and "tools" in response.text:
+                logger.warning(f"{self.model} does not support tool calling; using single commands")
+                LLM_ERRORS.labels(self.model, "no_tools").inc()
+                self.tools_enabled = False
+                return None
+            if response.status_code != 200:
+                logger.error(f"Ollama API error: {response.status_code}")
+                LLM_ERRORS.labels(self.model, f"http_{response.status_code}").inc()
+                return {"type": "error", "message": "Failed to get response from LLM"}
+            result = response.json()
+            self.record_llm_metrics(result, started)
+            message = result.get("message", {})
+            calls = [call.get("function", {}) for call in message.get("tool_calls") or []]
+            if not calls:
+                LLM_ROUND_TRIPS.labels(self.model).observe(round_trip)
+                annotate(round_trips=round_trip, tool_calls=len(used))
+                return {"type": "answer", "message": message.get("content", "").strip(), "tools": used,
+                        "round_trips": round_trip}
+            
+            proposed = [call for call in calls if call.get("name") == "run_command"]
+            if proposed:
+                LLM_ROUND_TRIPS.labels(self.model).observe(round_trip)
+                annotate(round_trips=round_trip, tool_calls=len(used))
+                try:
+                    arguments = TOOLS.get("run_command").validate(proposed[0].get("arguments") or {})
+                except ValueError as e:  # includes malformed JSON argument strings
+                    logger.warning(f"Invalid run_command arguments from {self.model}: {e}")
+                    return {"type": "clarification", "tools": used, "round_trips": round_trip,
+                            "message": "I could not read the command the model proposed. Could you rephrase?"}
+                parsed = self.parse_llm_response(arguments["command"])
+                parsed.update(tools=used, round_trips=round_trip)
+                return parsed
+            
+            with span("tool_calls", "tools"):
+                annotate(calls=len(calls))
+                results = executor.run(calls)
+            used.extend(call.get("name", "") for call in calls)
+            messages.append(message)
+            for call, output in zip(calls, results):
+                messages.append({"role": "tool", "tool_name": call.get("name", ""), "content": format_result(output)})
+        return {"type": "error", "message": "No answer from the LLM after tool calls"}
+    
+    def record_llm_metrics(self, final: Dict[str, Any], started: float, first_token: Optional[float] = None):
+        """Record latency, time to first token and token counts for one completed request
+
+        Without streaming, the time to first token is taken from Ollama's own
+        load and prompt evaluation durations (nanoseconds) in the final message.
+        """
+        LLM_REQUEST_SECONDS.labels(self.model).observe(time.perf_counter() - started)
+        if first_token is None and "prompt_eval_duration" in final:
+            first_token = (final.get("load_duration", 0) + final["prompt_eval_duration"]) / 1e9
+        if first_token is not None:
+            LLM_TTFT_SECONDS.labels(self.model).observe(first_token)
+        prompt_tokens, generated = final.get("prompt_eval_count", 0), final.get("eval_count", 0)
+        LLM_TOKENS.labels(self.model, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(self.model, "generated").inc(generated)
+        LLM_TOKENS_PER_REQUEST.labels(self.model).observe(generated)
+        annotate(model=self.model, prompt_tokens=prompt_tokens, generated_tokens=generated,
+                 ttft_ms=round(first_token * 1000, 1) if first_token is not None else None)
+    
+    @traced()
     def parse_llm_response(self, response: str) -> Dict[str, Any]:
         """Parse LLM response and extract command information"""
         if not response:
@@ -114,21 +315,126 @@ Response: df -h
         ]
         
         if any(pattern in command.lower() for pattern in dangerous_patterns):
+            VALIDATION_VERDICTS.labels("nlp", "blocked").inc()
             return {"type": "blocked", "message": f"Command blocked for safety: {command}"}
         
         return {"type": "command", "command": command}
     
-    def process_input(self, user_input: str) -> Dict[str, Any]:
-        """Main processing function for user input"""
+    @traced()
+    def answer_file_query(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """Answer "where is my X" / "find all python files" from the filename index, without the LLM
+
+        Returns None when the input is not a file-location request, the index
+        does not cover the directory asked about, or nothing matched (the LLM
+        may still know better, e.g. for files outside the index).
+        """
+        if self.file_index is None:
+            return None
+        from file_index import parse_file_query
+        query = parse_file_query(user_input)
+        if query is None:
+            return None
+        under = None
+        if query["scope"] == "cwd":
+            under = os.getcwd()
+            root = self.file_index.root
+            if under != root and not under.startswith(root.rstrip("/") + "/"):
+                return None
+        paths, total = self.file_index.search(query["pattern"], query["mode"], limit=50,
+                                              under=under, kind=query["kind"])
+        annotate(matches=total)
+        if not total:
+            return None
+        if under is not None:
+            paths = [os.path.join(".", os.path.relpath(path, under)) for path in paths]
+        return {"type": "files", "paths": paths, "total": total, "query": query}
+    
+    def answer_disk_query(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """Answer "what is using my disk" / "largest files in Downloads" from the size tree, without the LLM
+
+        Returns None when the input is not a disk-usage request or the
+        directory asked about is outside the cached tree.
+        """
+        if self.size_tree is None:
+            return None
+        from size_tree import parse_disk_query
+        query = parse_disk_query(user_input)
+        if query is None:
+            return None
+        usage = self.size_tree.usage(query["path"])
+        if usage is None:
+            return None
+        dirs = self.size_tree.largest_dirs(query["path"], query["n"], max_depth=1) \
+            if query["what"] in ("summary", "dirs") else []
+        files = self.size_tree.largest_files(query["path"], query["n"]) \
+            if query["what"] in ("summary", "files") else []
+        annotate(directories=usage["directories"])
+        return {"type": "disk_usage", "usage": usage, "dirs": dirs, "files": files, "query": query}
+    
+    def answer_package_query(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """Answer "is docker installed?" / "what version of X do I have?" from the dpkg database, without the LLM"""
+        from package_index import DPKG_STATUS, PackageIndex, answer_package_query, parse_package_query
+        query = parse_package_query(user_input)
+        if query is None:
+            return None
+        if self.package_index is None:
+            if not os.path.exists(DPKG_STATUS):
+                return None  # not a dpkg-based system
+            self.package_index = PackageIndex()
+        return {"type": "packages", "lines": answer_package_query(self.package_index, query), "query": query}
+    
+    def answer_network_query(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """Answer "who is listening on 8080?" / "what is my ip?" from /proc/net and rtnetlink, without the LLM"""
+        from net_tools import answer_network_query, parse_network_query
+        query = parse_network_query(user_input)
+        if query is None:
+            return None
+        try:
+            lines = answer_network_query(query)
+        except OSError as e:
+            logger.warning(f"Network introspection failed: {e}")
+            return None
+        return {"type": "network", "lines": lines, "query": query}
+    
+    @traced()
+    def process_input(self, user_input: str, llm_response: Optional[str] = None) -> Dict[str, Any]:
+        """Main processing function for user input
+
+        A precomputed llm_response (e.g. from speculative inference) skips the LLM call.
+        """
         if not user_input.strip():
             return {"type": "error", "message": "Empty input"}
         
-        # Check Ollama availability
-        if not self.check_ollama_status():
-            return {"type": "error", "message": "Ollama service not available"}
+        # File-location, disk-usage, package and network questions are answered from local data
+        local = self.answer_file_query(user_input) or self.answer_disk_query(user_input) or \
+            self.answer_package_query(user_input) or self.answer_network_query(user_input)
+        if local is not None:
+            self.conversation_history.append({
+                "user_input": user_input,
+                "llm_response": None,
+                "parsed_result": local
+            })
+            return local
         
-        # Send to LLM
-        llm_response = self.send_prompt_to_llm(user_input)
+        if llm_response is None:
+            # Check Ollama availability
+            with span("ollama_health", "llm"):
+                available = self.check_ollama_status()
+            if not available:
+                return {"type": "error", "message": "Ollama service not available"}
+            
+            if self.tools_enabled:
+                parsed = self.chat_with_tools(user_input)
+                if parsed is not None:
+                    self.conversation_history.append({
+                        "user_input": user_input,
+                        "llm_response": parsed.get("message") or parsed.get("command"),
+                        "parsed_result": parsed
+                    })
+                    return parsed
+            
+            # Send to LLM
+            llm_response = self.send_prompt_to_llm(user_input)
         if not llm_response:
             return {"type": "error", "message": "Failed to get response from LLM"}
         
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Package Index for LLM-powered Linux Distribution
+Parses the dpkg status database and apt package lists into an in-memory index for instant package queries
+"""
+
+import glob
+import logging
+import os
+import platform
+import re
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DPKG_STATUS = "/var/lib/dpkg/status"
+DPKG_UPDATES = "/var/lib/dpkg/updates"
+APT_LISTS = "/var/lib/apt/lists"
+
+_MACHINE_ARCHES = {"x86_64": "amd64", "aarch64": "arm64", "armv7l": "armhf", "i686": "i386", "i386": "i386",
+                   "ppc64le": "ppc64el", "s390x": "s390x", "riscv64": "riscv64"}
+NATIVE_ARCH = _MACHINE_ARCHES.get(platform.machine(), platform.machine())
+
+# Only the fields the index keeps are extracted from each stanza
+_FIELDS = re.compile(rb"^(Package|Status|Version|Architecture|Provides|Depends|Pre-Depends|Recommends|"
+                     rb"Installed-Size|Size|Filename|Section|Description|Essential|Priority|SHA256):[ \t]*(.*)$", re.M)
+_STANZA_BREAK = re.compile(rb"\n\s*\n")
+_RELATION = re.compile(r"^\s*([a-z0-9][a-z0-9+.-]*)(?::[a-z0-9-]+)?\s*(?:\(\s*(<<|<=|=|>=|>>|<|>)\s*([^)\s]+)\s*\))?")
+
+# A relation is a list of alternatives: [(name, operator or None, version or None), ...]
+Relation = List[Tuple[str, Optional[str], Optional[str]]]
+
+
+class PackageRecord:
+    """One stanza of the status file or of a Packages list"""
+
+    __slots__ = ("name", "version", "arch", "status", "provides", "depends", "pre_depends", "recommends",
+                 "installed_size", "size", "filename", "section", "summary", "essential", "priority", "sha256",
+                 "origin")
+
+    def __init__(self, fields: Dict[str, str], origin: str):
+        self.name = fields["Package"]
+        self.version = fields.get("Version", "")
+        self.arch = fields.get("Architecture", "all")
+        status = fields.get("Status")
+        self.status = status.split()[-1] if status else None  # "installed", "config-files", ...
+        self.provides = tuple(alternatives[0][0] for alternatives in parse_relations(fields.get("Provides", "")))
+        self.depends = fields.get("Depends", "")
+        self.pre_depends = fields.get("Pre-Depends", "")
+        self.recommends = fields.get("Recommends", "")
+        self.installed_size = int(fields.get("Installed-Size") or 0)  # KiB
+        self.size = int(fields.get("Size") or 0)                      # bytes of the .deb
+        self.filename = fields.get("Filename")
+        self.section = fields.get("Section", "")
+        self.summary = fields.get("Description", "")
+        self.essential = fields.get("Essential") == "yes"
+        self.priority = fields.get("Priority", "")
+        self.sha256 = fields.get("SHA256")
+        self.origin = origin
+
+    @property
+    def installed(self) -> bool:
+        return self.status in ("installed", "half-configured", "unpacked", "triggers-awaited", "triggers-pending")
+
+    def relations(self, recommends: bool = False) -> List[Relation]:
+        """Pre-Depends and Depends (and optionally Recommends), parsed"""
+        text = ", ".join(part for part in (self.pre_depends, self.depends, self.recommends if recommends else "")
+                         if part)
+        return parse_relations(text)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "version": self.version, "arch": self.arch, "status": self.status,
+                "installed_size_kb": self.installed_size, "size": self.size, "section": self.section,
+                "summary": self.summary, "provides": list(self.provides)}
+
+    def __repr__(self) -> str:
+        return f"PackageRecord({self.name} {self.version} {self.arch} {self.status or self.origin})"
+
+
+def parse_relations(text: str) -> List[Relation]:
+    """Parse a Depends-style field: "a (>= 1.0), b | c:any, d [amd64] <!nocheck>" """
+    relations = []
+    for group in text.split(","):
+        alternatives = []
+        for alternative in group.split("|"):
+            match = _RELATION.match(alternative)
+            if match is not None:
+                alternatives.append((match.group(1), match.group(2), match.group(3)))
+        if alternatives:
+            relations.append(alternatives)
+    return relations
+
+
+def _order(c: str) -> int:
+    if c == "~":
+        return -1
+    if c.isalpha():
+        return ord(c)
+    return ord(c) + 256
+
+
+def _compare_fragment(a: str, b: str) -> int:
+    """dpkg's verrevcmp: alternate non-digit runs (by _order) and digit runs (numerically)"""
+    i = j = 0
+    while i < len(a) or j < len(b):
+        first_diff = 0
+        while (i < len(a) and not a[i].isdigit()) or (j < len(b) and not b[j].isdigit()):
+            ac = _order(a[i]) if i < len(a) and not a[i].isdigit() else 0
+            bc = _order(b[j]) if j < len(b) and not b[j].isdigit() else 0
+            if ac != bc:
+                return ac - bc
+            i += 1
+            j += 1
+        start = i
+        while i < len(a) and a[i].isdigit():
+            i += 1
+        a_number = int(a[start:i] or 0)
+        start = j
+        while j < len(b) and b[j].isdigit():
+            j += 1
+        b_number = int(b[start:j] or 0)
+        if a_number != b_number:
+            first_diff = a_number - b_number
+        if first_diff:
+            return first_diff
+    return 0
+
+
+def _split_version(version: str) -> Tuple[int, str, str]:
+    epoch, _, rest = version.partition(":") if ":" in version else ("0", "", version)
+    upstream, _, revision = rest.rpartition("-") if "-" in rest else (rest, "", "0")
+    return int(epoch or 0), upstream, revision
+
+
+def compare_versions(a: str, b: str) -> int:
+    """Compare two Debian versions the way dpkg --compare-versions does: <0, 0 or >0"""
+    a_epoch, a_upstream, a_revision = _split_version(a)
+    b_epoch, b_upstream, b_revision = _split_version(b)
+    if a_epoch != b_epoch:
+        return a_epoch - b_epoch
+    return _compare_fragment(a_upstream, b_upstream) or _compare_fragment(a_revision, b_revision)
+
+
+def version_satisfies(version: str, operator: Optional[str], wanted: Optional[str]) -> bool:
+    if operator is None:
+        return True
+    result = compare_versions(version, wanted)
+    return {"<<": result < 0, "<": result <= 0, "<=": result <= 0, "=": result == 0,
+            ">=": result >= 0, ">": result >= 0, ">>": result > 0}[operator]
+
+
+def _read(path: str) -> bytes:
+    if path.endswith(".gz"):
+        import gzip
+        opener = gzip.open
+    elif path.endswith(".xz"):
+        import lzma
+        opener = lzma.open
+    else:
+        opener = open
+    with opener(path, "rb") as f:
+        return f.read()
+
+
+class _Source:
+    """One parsed file, with its records cached by stanza so a rewrite only parses what changed"""
+
+    __slots__ = ("path", "signature", "records")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.signature = None
+        self.records: Dict[bytes, PackageRecord] = {}
+
+    def load(self, signature) -> Tuple[List[PackageRecord], int]:
+        """Parse the file; returns its records and how many stanzas were new"""
+        data = _read(self.path)
+        previous, records, parsed = self.records, {}, 0
+        for stanza in _STANZA_BREAK.split(data):
+            stanza = stanza.strip()
+            if not stanza:
+                continue
+            record = previous.get(stanza)
+            if record is None:
+                fields = {key.decode(): value.decode(errors="replace").strip()
+                          for key, value in _FIELDS.findall(stanza)}
+                if "Package" not in fields:
+                    continue
+                record = PackageRecord(fields, self.path)
+                parsed += 1
+            records[stanza] = record
+        self.records = records
+        self.signature = signature
+        return list(records.values()), parsed
+
+
+class PackageIndex:
+    """Installed and available packages, keyed by name and by what they provide
+
+    The dpkg status file (plus the pending records in dpkg's updates
+    directory) gives the installed set; apt's Packages lists give what can
+    be installed. refresh() stats those files and re-reads only the ones
+    whose mtime or size changed, reusing the records of unchanged stanzas.
+    Queries call refresh() at most every check_interval seconds.
+    """
+
+    def __init__(self, status_path: str = DPKG_STATUS, lists_dir: Optional[str] = APT_LISTS,
+                 updates_dir: Optional[str] = DPKG_UPDATES, arch: str = NATIVE_ARCH, check_interval: float = 2.0):
+        self.status_path = status_path
+        self.lists_dir = lists_dir
+        self.updates_dir = updates_dir
+        self.arch = arch
+        self.check_interval = check_interval
+        self.installed: Dict[str, PackageRecord] = {}
+        self.available: Dict[str, List[PackageRecord]] = {}
+        self._installed_provides: Dict[str, List[str]] = {}
+        self._available_provides: Dict[str, List[str]] = {}
+        self._rdepends: Optional[Dict[str, Set[str]]] = None
+        self._sources: Dict[str, _Source] = {}
+        self._status_signature = None
+        self._lists_signature = None
+        self._checked = 0.0
+        self._lock = threading.RLock()
+        self.refresh(force=True)
+
+    # Loading
+
+    def _status_files(self) -> List[str]:
+        paths = [self.status_path]
+        if self.updates_dir and os.path.isdir(self.updates_dir):
+            paths.extend(sorted(p for p in glob.glob(os.path.join(self.updates_dir, "*"))
+                                if os.path.basename(p).isdigit()))
+        return paths
+
+    def _list_files(self) -> List[str]:
+        if not self.lists_dir:
+            return []
+        return sorted(p for p in glob.glob(os.path.join(self.lists_dir, "*_Packages*"))
+                      if p.endswith(("_Packages", ".gz", ".xz")))
+
+    @staticmethod
+    def _signature(paths: Iterable[str]) -> Tuple:
+        signature = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def _load(self, paths: List[str], signature: Tuple) -> Tuple[List[PackageRecord], int]:
+        records, parsed = [], 0
+        stamps = {path: (mtime, size) for path, mtime, size in signature}
+        for path in paths:
+            if path not in stamps:
+                continue
+            source = self._sources.get(path)
+            if source is None:
+                source = self._sources[path] = _Source(path)
+            if source.signature == stamps[path]:
+                records.extend(source.records.values())
+                continue
+            try:
+                found, new = source.load(stamps[path])
+            except OSError as e:
+                logger.warning(f"Cannot read {path}: {e}")
+                continue
+            records.extend(found)
+            parsed += new
+        for path in [path for path in self._sources if path not in stamps and path in paths]:
+            del self._sources[path]
+        return records, parsed
+
+    def refresh(self, force: bool = False) -> int:
+        """Re-read the files that changed since the last look; returns the number of stanzas parsed"""
+        now = time.monotonic()
+        if not force and now - self._checked < self.check_interval:
+            return 0
+        with self._lock:
+            self._checked = now
+            parsed = 0
+            status_paths = self._status_files()
+            signature = self._signature(status_paths)
+            if signature != self._status_signature:
+                records, new = self._load(status_paths, signature)
+                parsed += new
+                installed: Dict[str, PackageRecord] = {}
+                for record in records:  # later files (the updates journal) override the status file
+                    key = self._key(record)
+                    if record.installed:
+                        installed[key] = record
+                    else:
+                        installed.pop(key, None)
+                self.installed = installed
+                self._installed_provides = self._provides_map(installed.values())
+                self._status_signature = signature
+                self._rdepends = None
+
+            list_paths = self._list_files()
+            signature = self._signature(list_paths)
+            if signature != self._lists_signature:
+                records, new = self._load(list_paths, signature)
+                parsed += new
+                available: Dict[str, List[PackageRecord]] = {}
+                for record in records:
+                    if record.arch in (self.arch, "all"):
+                        available.setdefault(record.name, []).append(record)
+                for versions in available.values():
+                    if len(versions) > 1:
+                        versions.sort(key=_VersionKey, reverse=True)
+                self.available = available
+                self._available_provides = self._provides_map(v[0] for v in available.values())
+                self._lists_signature = signature
+            if parsed:
+                logger.debug(f"Package index: parsed {parsed} stanzas")
+            return parsed
+
+    def _key(self, record: PackageRecord) -> str:
+        """Native and arch-all packages by name, foreign ones as name:arch"""
+        return record.name if record.arch in (self.arch, "all") else f"{record.name}:{record.arch}"
+
+    @staticmethod
+    def _provides_map(records: Iterable[PackageRecord]) -> Dict[str, List[str]]:
+        provides: Dict[str, List[str]] = {}
+        for record in records:
+            for virtual in record.provides:
+                provides.setdefault(virtual, []).append(record.name)
+        return provides
+
+    # Queries
+
+    def is_installed(self, name: str) -> bool:
+        """Whether a package, or something providing it, is installed"""
+        self.refresh()
+        return name in self.installed or name in self._installed_provides
+
+    def version(self, name: str) -> Optional[str]:
+        """Installed version of a package, or None"""
+        self.refresh()
+        record = self.installed.get(name)
+        return record.version if record is not None else None
+
+    def get(self, name: str) -> Optional[PackageRecord]:
+        self.refresh()
+        return self.installed.get(name)
+
+    def providers(self, name: str, installed: bool = True) -> List[str]:
+        """Packages providing a virtual package name"""
+        self.refresh()
+        return list((self._installed_provides if installed else self._available_provides).get(name, ()))
+
+    def candidate(self, name: str) -> Optional[PackageRecord]:
+        """The newest installable version of a package, or None"""
+        self.refresh()
+        versions = self.available.get(name)
+        return versions[0] if versions else None
+
+    def versions(self, name: str) -> List[PackageRecord]:
+        """Every available version, newest first"""
+        self.refresh()
+        return list(self.available.get(name, ()))
+
+    def rdepends(self, name: str, recommends: bool = False) -> List[str]:
+        """Installed packages that depend on a package or on something it provides"""
+        self.refresh()
+        with self._lock:
+            if self._rdepends is None:
+                self._rdepends = self._build_rdepends()
+            targets = [name]
+            record = self.installed.get(name)
+            if record is not None:
+                targets.extend(record.provides)
+            found = set()
+            for target in targets:
+                found.update(self._rdepends.get(target, ()))
+                if recommends:
+                    found.update(self._rdepends.get(f"recommends:{target}", ()))
+            found.discard(name)
+            return sorted(found)
+
+    def _build_rdepends(self) -> Dict[str, Set[str]]:
+        reverse: Dict[str, Set[str]] = {}
+        for record in self.installed.values():
+            for relation in parse_relations(f"{record.pre_depends}, {record.depends}"):
+                for target, _, _ in relation:
+                    reverse.setdefault(target, set()).add(record.name)
+            for relation in parse_relations(record.recommends):
+                for target, _, _ in relation:
+                    reverse.setdefault(f"recommends:{target}", set()).add(record.name)
+        return reverse
+
+    def search(self, pattern: str, installed: bool = True, limit: int = 20) -> List[str]:
+        """Package names matching a regular expression"""
+        self.refresh()
+        compiled = re.compile(pattern)
+        names = self.installed if installed else self.available
+        return sorted(name for name in names if compiled.search(name))[:limit]
+
+    def resolve_name(self, name: str) -> List[str]:
+        """Installed package names meant by a loose name: itself, its providers, or e.g. docker -> docker.io"""
+        name = name.lower()
+        if name in self.installed:
+            return [name]
+        providers = self.providers(name)
+        if providers:
+            return providers
+        match = self.obvious_match(name)
+        return [match] if match else []
+
+    def obvious_match(self, name: str, installed: bool = True) -> Optional[str]:
+        """The one package a loose name plainly means: docker -> docker.io, but not python -> python-apt-common"""
+        matches = self.search(rf"^{re.escape(name.lower())}(?:\.[a-z]+|[0-9][0-9.]*)$", installed=installed, limit=2)
+        return matches[0] if len(matches) == 1 else None
+
+    def related(self, name: str, limit: int = 5) -> List[str]:
+        """Installed packages whose names extend a name, shortest first: python -> python3, python3-minimal"""
+        matches = self.search(rf"^{re.escape(name.lower())}(?:[0-9.-]|$)", limit=1000)
+        return sorted(matches, key=lambda match: (len(match), match))[:limit]
+
+    def __len__(self) -> int:
+        return len(self.installed)
+
+
+class _VersionKey:
+    """Sort key ordering records by Debian version"""
+
+    __slots__ = ("version",)
+
+    def __init__(self, record: PackageRecord):
+        self.version = record.version
+
+    def __lt__(self, other: "_VersionKey") -> bool:
+        return compare_versions(self.version, other.version) < 0
+
+
+# Natural language package questions
+
+_PACKAGE_NAME = r"(?P<name>[a-z0-9][a-z0-9+.-]*)"
+_PACKAGE_QUERIES = (
+    ("installed", re.compile(r"^(?:is|are)\s+(?:the\s+)?" + _PACKAGE_NAME +
+                             r"(?:\s+package)?\s+installed(?:\s+on\s+(?:this|my)\s+(?:system|machine|computer))?\s*\??$", re.I)),
+    ("installed", re.compile(r"^do\s+i\s+have\s+(?:the\s+)?" + _PACKAGE_NAME + r"(?:\s+package)?\s+installed\s*\??$", re.I)),
+    ("version", re.compile(r"^what\s+version\s+of\s+(?:the\s+)?" + _PACKAGE_NAME +
+                           r"(?:\s+package)?\s+(?:do\s+i\s+have|is\s+installed)(?:\s+installed)?\s*\??$", re.I)),
+    ("version", re.compile(r"^(?:which|what)\s+" + _PACKAGE_NAME + r"\s+version\s+(?:do\s+i\s+have|is\s+installed)\s*\??$", re.I)),
+    ("rdepends", re.compile(r"^(?:what|which)\s+(?:installed\s+)?packages\s+(?:depend|rely)\s+on\s+" + _PACKAGE_NAME +
+                            r"\s*\??$", re.I)),
+    ("rdepends", re.compile(r"^what\s+(?:needs|uses|requires)\s+(?:the\s+)?" + _PACKAGE_NAME + r"\s+package\s*\??$", re.I)),
+)
+
+
+def parse_package_query(text: str) -> Optional[Dict[str, str]]:
+    """Recognize "is docker installed?", "what version of python3 do I have?" or "what packages depend on libssl3?" """
+    text = text.strip()
+    for kind, regex in _PACKAGE_QUERIES:
+        match = regex.match(text)
+        if match is not None:
+            return {"kind": kind, "name": match.group("name").lower()}
+    return None
+
+
+def answer_package_query(index: PackageIndex, query: Dict[str, str], limit: int = 20) -> List[str]:
+    """Answer a parse_package_query() result as lines of text, listing at most limit dependents"""
+    name = query["name"]
+    names = index.resolve_name(name)
+    if query["kind"] == "rdepends":
+        target = names[0] if names else name
+        dependents = index.rdepends(target)
+        if not dependents:
+            return [f"No installed package depends on {target}."]
+        lines = [f"{len(dependents)} installed packages depend on {target}:", "  " + " ".join(dependents[:limit])]
+        if len(dependents) > limit:
+            lines.append(f"  ... and {len(dependents) - limit} more")
+        return lines
+    if not names:
+        available = [name] if index.candidate(name) else index.providers(name, installed=False) or \
+            [match for match in [index.obvious_match(name, installed=False)] if match]
+        candidate = index.candidate(available[0]) if available else None
+        related = index.related(name)
+        if related:
+            # Say what is there rather than presenting one of them as the answer
+            lines = [f"{name} is not installed; related installed packages: {', '.join(related)}"]
+            if candidate is not None:
+                lines.append(f"  {candidate.name} {candidate.version} is available: sudo apt install {candidate.name}")
+            return lines
+        if candidate is not None:
+            return [f"{name} is not installed ({candidate.name} {candidate.version} is available: "
+                    f"sudo apt install {candidate.name})."]
+        return [f"{name} is not installed."]
+    lines = []
+    for match in names:
+        record = index.get(match)
+        if record is None:
+            continue
+        label = match if match == name else f"{match} (provides {name})" if name in record.provides else match
+        lines.append(f"{label} {record.version} is installed ({record.arch}, {record.installed_size} KiB)")
+        candidate = index.candidate(match)
+        if candidate is not None and compare_versions(candidate.version, record.version) > 0:
+            lines.append(f"  {candidate.version} is available")
+    return lines
+
+
+def main():
+    """CLI for the package index"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="dpkg/apt package index")
+    parser.add_argument("query", nargs="*", help='a package name, or a question like "is git installed?"')
+    parser.add_argument("--status", default=DPKG_STATUS)
+    parser.add_argument("--lists", default=APT_LISTS)
+    parser.add_argument("--rdepends", action="store_true", help="list installed packages depending on the package")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = PackageIndex(args.status, args.lists, updates_dir=DPKG_UPDATES if args.status == DPKG_STATUS else None)
+    print(f"{len(index)} installed, {len(index.available)} available "
+          f"(loaded in {(time.perf_counter() - started) * 1000:.0f} ms)")
+    if not args.query:
+        return
+    text = " ".join(args.query)
+    query = parse_package_query(text) or {"kind": "rdepends" if args.rdepends else "installed", "name": text}
+    print("\n".join(answer_package_query(index, query)))
+
+
+if __name__ == "__main__":
+    main()
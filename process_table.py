@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Process Table for LLM-powered Linux Distribution
+Scans /proc natively and answers top-N process questions without running ps
+"""
+
+import heapq
+import logging
+import os
+import pwd
+import time
+from typing import Dict, Any, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+SORT_KEYS = {
+    "cpu": lambda p: p.cpu_percent,
+    "rss": lambda p: p.rss,
+    "mem": lambda p: p.rss,
+    "io": lambda p: p.io_rate,
+}
+
+
+def _read(path: str, size: int = 4096) -> Optional[bytes]:
+    """Read a small /proc file with one open/read/close; None if the process is gone or unreadable"""
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, size)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+class ProcessSample:
+    """Latest state of one process plus what is needed to compute rates from the previous sample"""
+
+    __slots__ = ("pid", "starttime", "comm", "cmdline", "uid", "state", "ppid", "threads",
+                 "cpu_ticks", "rss", "read_bytes", "write_bytes",
+                 "cpu_percent", "io_rate", "sampled_at", "raw_stat")
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.cmdline = ""
+        self.uid = -1
+        self.read_bytes = self.write_bytes = 0
+        self.cpu_percent = 0.0
+        self.io_rate = 0.0
+        self.sampled_at = None
+        self.raw_stat = b""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pid": self.pid,
+            "ppid": self.ppid,
+            "name": self.comm,
+            "command": self.cmdline or f"[{self.comm}]",
+            "user": _username(self.uid),
+            "state": self.state,
+            "threads": self.threads,
+            "cpu_percent": self.cpu_percent,
+            "rss_bytes": self.rss,
+            "read_bytes": self.read_bytes,
+            "write_bytes": self.write_bytes,
+            "io_rate": self.io_rate,
+        }
+
+
+_usernames: Dict[int, str] = {}
+
+
+def _username(uid: int) -> str:
+    name = _usernames.get(uid)
+    if name is None:
+        try:
+            name = pwd.getpwuid(uid).pw_name
+        except KeyError:
+            name = str(uid)
+        _usernames[uid] = name
+    return name
+
+
+class ProcessTable:
+    """Incremental snapshot of /proc
+
+    Every refresh re-reads /proc/<pid>/stat for each process, but only parses
+    it when the bytes changed since the last refresh. status and cmdline are
+    read once per process (again after an exec changes its name), and
+    /proc/<pid>/io only for processes that ran since the previous sample.
+    """
+
+    def __init__(self, proc: str = "/proc", track_io: bool = True):
+        self.proc = proc
+        self.track_io = track_io
+        self.processes: Dict[int, ProcessSample] = {}
+        self.boot_time = self._read_boot_time()
+        self.last_refresh = None
+        self.stats = {"refreshes": 0, "scanned": 0, "parsed": 0, "new": 0, "exited": 0, "refresh_ms": 0.0}
+
+    def _read_boot_time(self) -> float:
+        for line in (_read(os.path.join(self.proc, "stat"), 1 << 16) or b"").splitlines():
+            if line.startswith(b"btime "):
+                return float(line.split()[1])
+        return time.time() - time.monotonic()
+
+    def refresh(self) -> Dict[int, ProcessSample]:
+        """Bring the table up to date with /proc"""
+        started = time.perf_counter()
+        now = time.time()
+        seen = set()
+        parsed = new = 0
+
+        with os.scandir(self.proc) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.isdigit():
+                    continue
+                pid = int(name)
+                base = f"{self.proc}/{name}"
+                raw = _read(base + "/stat", 1024)
+                if raw is None:
+                    continue  # exited between scandir and read
+                seen.add(pid)
+
+                sample = self.processes.get(pid)
+                if sample is not None and sample.raw_stat == raw:
+                    # Nothing changed: it has not run since the last refresh
+                    sample.cpu_percent = 0.0
+                    sample.io_rate = 0.0
+                    sample.sampled_at = now
+                    continue
+
+                close = raw.rfind(b")")
+                fields = raw[close + 2:].split()
+                starttime = int(fields[19])
+                if sample is not None and sample.starttime != starttime:
+                    sample = None  # PID was reused by a new process
+
+                comm = raw[raw.find(b"(") + 1:close].decode(errors="replace")
+                ticks = int(fields[11]) + int(fields[12])
+                if sample is None:
+                    sample = ProcessSample(pid)
+                    sample.starttime = starttime
+                    self._read_static(sample, base)
+                    # First sight: average over the process lifetime, as ps does
+                    age = now - (self.boot_time + starttime / CLK_TCK)
+                    sample.cpu_percent = 100.0 * ticks / CLK_TCK / age if age > 0 else 0.0
+                    self.processes[pid] = sample
+                    new += 1
+                else:
+                    elapsed = now - sample.sampled_at
+                    sample.cpu_percent = 100.0 * (ticks - sample.cpu_ticks) / CLK_TCK / elapsed if elapsed > 0 else 0.0
+                    if comm != sample.comm:
+                        self._read_static(sample, base)  # exec'd a new program
+
+                if self.track_io:
+                    self._read_io(sample, base, now)
+                sample.comm = comm
+                sample.state = fields[0].decode()
+                sample.ppid = int(fields[1])
+                sample.threads = int(fields[17])
+                sample.rss = int(fields[21]) * PAGE_SIZE
+                sample.cpu_ticks = ticks
+                sample.sampled_at = now
+                sample.raw_stat = raw
+                parsed += 1
+
+        gone = self.processes.keys() - seen
+        for pid in gone:
+            del self.processes[pid]
+
+        self.last_refresh = now
+        self.stats["refreshes"] += 1
+        self.stats["scanned"] = len(seen)
+        self.stats["parsed"] = parsed
+        self.stats["new"] = new
+        self.stats["exited"] = len(gone)
+        self.stats["refresh_ms"] = (time.perf_counter() - started) * 1000
+        return self.processes
+
+    def _read_static(self, sample: ProcessSample, base: str):
+        status = _read(base + "/status", 8192) or b""
+        for line in status.splitlines():
+            if line.startswith(b"Uid:"):
+                sample.uid = int(line.split()[1])
+                break
+        cmdline = _read(base + "/cmdline", 4096) or b""
+        sample.cmdline = cmdline.rstrip(b"\0").replace(b"\0", b" ").decode(errors="replace")
+
+    def _read_io(self, sample: ProcessSample, base: str, now: float):
+        # Only readable for our own processes unless we are root
+        data = _read(base + "/io", 512)
+        if data is None:
+            return
+        counters = {}
+        for line in data.splitlines():
+            key, _, value = line.partition(b":")
+            if key in (b"read_bytes", b"write_bytes"):
+                counters[key] = int(value)
+        read_bytes, write_bytes = counters.get(b"read_bytes", 0), counters.get(b"write_bytes", 0)
+        if sample.sampled_at is not None:
+            elapsed = now - sample.sampled_at
+            delta = read_bytes - sample.read_bytes + write_bytes - sample.write_bytes
+            sample.io_rate = delta / elapsed if elapsed > 0 else 0.0
+        sample.read_bytes, sample.write_bytes = read_bytes, write_bytes
+
+    def top(self, n: int = 10, by: str = "cpu", refresh: bool = True) -> List[Dict[str, Any]]:
+        """The n processes with the highest CPU%, RSS or I/O rate"""
+        if by not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{by}', expected one of: {', '.join(SORT_KEYS)}")
+        if refresh:
+            self.refresh()
+        return [p.to_dict() for p in heapq.nlargest(n, self.processes.values(), key=SORT_KEYS[by])]
+
+    def find(self, name: str) -> List[Dict[str, Any]]:
+        """Processes whose name or command line contains name"""
+        self.refresh()
+        name = name.lower()
+        return [p.to_dict() for p in self.processes.values()
+                if name in p.comm.lower() or name in p.cmdline.lower()]
+
+
+def format_process_table(processes: List[Dict[str, Any]]) -> str:
+    lines = [f"{'PID':>7} {'USER':<10} {'CPU%':>6} {'RSS':>9} {'I/O/s':>9}  COMMAND"]
+    for p in processes:
+        lines.append(f"{p['pid']:>7} {p['user'][:10]:<10} {p['cpu_percent']:>6.1f} "
+                     f"{p['rss_bytes'] / 1048576:>7.1f}MB {p['io_rate'] / 1024:>7.0f}KB  {' '.join(p['command'].split())[:60]}")
+    return "\n".join(lines)
+
+
+def main():
+    """CLI for the process table"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Top processes from /proc")
+    parser.add_argument("--by", choices=sorted(SORT_KEYS), default="cpu")
+    parser.add_argument("-n", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between the two samples")
+    args = parser.parse_args()
+
+    table = ProcessTable()
+    table.refresh()
+    time.sleep(args.interval)
+    print(format_process_table(table.top(args.n, args.by)))
+    print(f"({table.stats['scanned']} processes, {table.stats['parsed']} changed, "
+          f"refresh {table.stats['refresh_ms']:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
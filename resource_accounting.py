@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Resource Accounting for LLM-powered Linux Distribution
+Collects per-command wall time, CPU, memory and block I/O from rusage and cgroup v2
+"""
+
+import logging
+import os
+import selectors
+import signal
+import subprocess
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# rusage block counts are in 512-byte units
+BLOCK_SIZE = 512
+
+
+def rusage_to_dict(ru) -> Dict[str, Any]:
+    """Convert a struct rusage into a JSON-friendly dict"""
+    return {
+        "user_time": ru.ru_utime,
+        "system_time": ru.ru_stime,
+        "max_rss_kb": ru.ru_maxrss,
+        "read_bytes": ru.ru_inblock * BLOCK_SIZE,
+        "write_bytes": ru.ru_oublock * BLOCK_SIZE,
+    }
+
+
+def collect_output(stdout_fd: int, stderr_fd: int, deadline: Optional[float] = None) -> Optional[Tuple[bytes, bytes]]:
+    """Read two pipes until EOF, returning (stdout, stderr) or None if the deadline passes"""
+    chunks = {stdout_fd: [], stderr_fd: []}
+    sel = selectors.DefaultSelector()
+    for fd in chunks:
+        sel.register(fd, selectors.EVENT_READ)
+    try:
+        while sel.get_map():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            for key, _ in sel.select(remaining):
+                data = os.read(key.fd, 65536)
+                if data:
+                    chunks[key.fd].append(data)
+                else:
+                    sel.unregister(key.fd)
+    finally:
+        sel.close()
+    return b"".join(chunks[stdout_fd]), b"".join(chunks[stderr_fd])
+
+
+def run_with_rusage(command: str, env: Dict[str, str], cwd: str,
+                    timeout: Optional[float] = None, on_start=None) -> Dict[str, Any]:
+    """Run a shell command like subprocess.run, reaping it with wait4 to get its rusage
+
+    Raises subprocess.TimeoutExpired if the command outlives the timeout.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    process = subprocess.Popen(
+        command,
+        shell=True,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        cwd=cwd,
+        start_new_session=True,
+    )
+    if on_start is not None:
+        on_start(process.pid)
+
+    try:
+        output = collect_output(process.stdout.fileno(), process.stderr.fileno(), deadline)
+        if output is None:
+            os.killpg(process.pid, signal.SIGKILL)
+            os.wait4(process.pid, 0)
+            raise subprocess.TimeoutExpired(command, timeout)
+        _, status, ru = os.wait4(process.pid, 0)
+    finally:
+        process.stdout.close()
+        process.stderr.close()
+        # Already reaped by wait4 above
+        process.returncode = 0
+
+    return {
+        "pid": process.pid,
+        "returncode": os.waitstatus_to_exitcode(status),
+        "stdout": output[0].decode(errors="replace"),
+        "stderr": output[1].decode(errors="replace"),
+        "rusage": rusage_to_dict(ru),
+    }
+
+
+def find_cgroup2_dir() -> Optional[str]:
+    """Return this process's cgroup v2 directory, if the unified hierarchy is mounted"""
+    mount_point = None
+    try:
+        with open("/proc/self/mountinfo") as f:
+            for line in f:
+                fields = line.split(" - ")
+                if len(fields) == 2 and fields[1].split()[0] == "cgroup2":
+                    mount_point = fields[0].split()[4]
+                    break
+        if mount_point is None:
+            return None
+        with open("/proc/self/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    path = os.path.join(mount_point, line[3:].strip().lstrip("/"))
+                    return path if os.path.isdir(path) else None
+    except OSError:
+        pass
+    return None
+
+
+def _read_keyed(path: str) -> Dict[str, int]:
+    values = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 2:
+                values[parts[0]] = int(parts[1])
+    return values
+
+
+class CgroupLeaf:
+    """Per-command cgroup v2 leaf, used to account for every process a command spawns
+
+    Only created when this process may write to its own cgroup directory, e.g. in
+    a delegated systemd user slice. Controllers that are not enabled are skipped.
+    """
+
+    def __init__(self, parent: str, name: str):
+        self.path = os.path.join(parent, name)
+        self.attached = False
+
+    @classmethod
+    def create(cls, name: str) -> Optional["CgroupLeaf"]:
+        parent = find_cgroup2_dir()
+        if parent is None or not os.access(parent, os.W_OK):
+            return None
+        leaf = cls(parent, name)
+        try:
+            os.mkdir(leaf.path)
+        except OSError:
+            return None
+        return leaf
+
+    def attach(self, pid: int) -> bool:
+        """Move a process into the leaf; its future children follow automatically"""
+        try:
+            with open(os.path.join(self.path, "cgroup.procs"), "w") as f:
+                f.write(str(pid))
+            self.attached = True
+            return True
+        except OSError as e:
+            logger.debug(f"Could not attach {pid} to {self.path}: {e}")
+            return False
+
+    def read_usage(self) -> Dict[str, Any]:
+        """Read whatever CPU, memory and I/O totals the enabled controllers expose"""
+        usage = {}
+        if not self.attached:
+            return usage
+        try:
+            cpu = _read_keyed(os.path.join(self.path, "cpu.stat"))
+            usage["user_time"] = cpu["user_usec"] / 1e6
+            usage["system_time"] = cpu["system_usec"] / 1e6
+        except (OSError, KeyError):
+            pass
+        try:
+            with open(os.path.join(self.path, "memory.peak")) as f:
+                usage["max_rss_kb"] = int(f.read()) // 1024
+        except (OSError, ValueError):
+            pass
+        try:
+            read_bytes = write_bytes = 0
+            with open(os.path.join(self.path, "io.stat")) as f:
+                for line in f:
+                    for field in line.split()[1:]:
+                        key, _, value = field.partition("=")
+                        if key == "rbytes":
+                            read_bytes += int(value)
+                        elif key == "wbytes":
+                            write_bytes += int(value)
+            usage["read_bytes"] = read_bytes
+            usage["write_bytes"] = write_bytes
+        except OSError:
+            pass
+        return usage
+
+    def remove(self):
+        try:
+            os.rmdir(self.path)
+        except OSError:
+            # Lingering background processes keep the leaf busy; leave it behind
+            pass
+
+
+class ResourceStats:
+    """Aggregate resource usage per command name"""
+
+    FIELDS = ("wall_time", "user_time", "system_time", "read_bytes", "write_bytes")
+
+    def __init__(self):
+        self.by_command = {}
+
+    def record(self, cmd_name: str, resources: Dict[str, Any]):
+        entry = self.by_command.setdefault(cmd_name, {
+            "count": 0, "max_rss_kb": 0, **{field: 0.0 for field in self.FIELDS}
+        })
+        entry["count"] += 1
+        for field in self.FIELDS:
+            entry[field] += resources.get(field) or 0
+        entry["max_rss_kb"] = max(entry["max_rss_kb"], resources.get("max_rss_kb") or 0)
+
+    def summary(self, sort_by: str = "wall_time", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return per-command totals and averages, most expensive first"""
+        rows = []
+        for cmd_name, entry in self.by_command.items():
+            row = {"command": cmd_name, **entry}
+            row["avg_wall_time"] = entry["wall_time"] / entry["count"]
+            row["avg_cpu_time"] = (entry["user_time"] + entry["system_time"]) / entry["count"]
+            rows.append(row)
+        rows.sort(key=lambda row: row.get(sort_by, 0), reverse=True)
+        return rows[:limit] if limit else rows
+
+    def average_cost(self, cmd_name: str) -> Optional[Dict[str, float]]:
+        """Average wall and CPU time for a command name, or None if never run"""
+        entry = self.by_command.get(cmd_name)
+        if not entry:
+            return None
+        return {
+            "wall_time": entry["wall_time"] / entry["count"],
+            "cpu_time": (entry["user_time"] + entry["system_time"]) / entry["count"],
+            "max_rss_kb": entry["max_rss_kb"],
+        }
+
+    def clear(self):
+        self.by_command.clear()
+
+
+def format_resources(resources: Dict[str, Any]) -> str:
+    """One-line human readable resource summary"""
+    cpu = (resources.get("user_time") or 0) + (resources.get("system_time") or 0)
+    io = (resources.get("read_bytes") or 0) + (resources.get("write_bytes") or 0)
+    return (f"{resources.get('wall_time', 0):.3f}s wall | {cpu:.3f}s CPU | "
+            f"{(resources.get('max_rss_kb') or 0) / 1024:.1f} MB RSS | {io / 1024:.0f} KB I/O")
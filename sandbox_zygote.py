@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Sandbox Zygote for LLM-powered Linux Distribution
+Pre-initialized namespace sandbox that forks ready-to-exec children for command execution
+"""
+
+import ctypes
+import ctypes.util
+import itertools
+import json
+import logging
+import os
+import resource
+import selectors
+import signal
+import socket
+import subprocess
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from resource_accounting import collect_output, rusage_to_dict
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Constants from <sched.h> and <sys/mount.h>
+CLONE_NEWNS = 0x00020000
+CLONE_NEWUSER = 0x10000000
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_NOEXEC = 0x8
+MS_REMOUNT = 0x20
+MS_BIND = 0x1000
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+PR_SET_PDEATHSIG = 1
+
+# Paths that are bind-mounted read-only inside the sandbox
+DEFAULT_READONLY_PATHS = ('/usr', '/etc', '/bin', '/sbin', '/lib', '/lib64', '/boot', '/opt')
+
+# Resource limits applied once in the zygote and inherited by every child
+DEFAULT_RLIMITS = {
+    resource.RLIMIT_CORE: 0,
+    resource.RLIMIT_NOFILE: 1024,
+    resource.RLIMIT_FSIZE: 1024 ** 3,
+}
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+def _check(ret: int, what: str):
+    if ret != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, f"{what}: {os.strerror(err)}")
+
+
+def _write_file(path: str, data: str):
+    with open(path, "w") as f:
+        f.write(data)
+
+
+def _remount_readonly(path: str):
+    """Bind-mount a path onto itself and remount it read-only, keeping locked flags"""
+    _check(_libc.mount(path.encode(), path.encode(), None, MS_BIND | MS_REC, None),
+           f"bind {path}")
+    # Flags inherited from the parent namespace are locked and must be preserved
+    st_flags = os.statvfs(path).f_flag
+    flags = MS_BIND | MS_REMOUNT | MS_RDONLY
+    if st_flags & os.ST_NOSUID:
+        flags |= MS_NOSUID
+    if st_flags & os.ST_NODEV:
+        flags |= MS_NODEV
+    if st_flags & os.ST_NOEXEC:
+        flags |= MS_NOEXEC
+    _check(_libc.mount(None, path.encode(), None, flags, None), f"remount {path}")
+
+
+def enter_sandbox(readonly_paths=DEFAULT_READONLY_PATHS, rlimits: Optional[Dict[int, int]] = None):
+    """Move the calling process into fresh user and mount namespaces with a read-only view.
+
+    The uid/gid are mapped onto themselves so files keep their usual ownership,
+    and all capabilities gained in the new user namespace are dropped on exec.
+    """
+    uid, gid = os.getuid(), os.getgid()
+    _check(_libc.unshare(CLONE_NEWUSER | CLONE_NEWNS), "unshare")
+
+    _write_file("/proc/self/setgroups", "deny")
+    _write_file("/proc/self/uid_map", f"{uid} {uid} 1")
+    _write_file("/proc/self/gid_map", f"{gid} {gid} 1")
+
+    # Keep our mounts from propagating back to the host
+    _check(_libc.mount(b"none", b"/", None, MS_REC | MS_PRIVATE, None), "make / private")
+    for path in readonly_paths:
+        if os.path.isdir(path) and not os.path.islink(path):
+            _remount_readonly(path)
+
+    for limit, value in (DEFAULT_RLIMITS if rlimits is None else rlimits).items():
+        soft, hard = resource.getrlimit(limit)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        resource.setrlimit(limit, (value, value if hard == resource.RLIM_INFINITY else hard))
+
+
+def _spawn_child(request: Dict[str, Any], fds: List[int]) -> int:
+    """Start the shell command from inside the zygote, returning its pid.
+
+    subprocess uses vfork when it can, so the child shares the zygote's
+    namespaces and rlimits without copying its address space.
+    """
+    process = subprocess.Popen(
+        ["/bin/sh", "-c", request["command"]],
+        stdin=subprocess.DEVNULL,
+        stdout=fds[0],
+        stderr=fds[1],
+        env=request.get("env") or {},
+        cwd=request.get("cwd") or "/",
+        start_new_session=True,
+        restore_signals=True,
+    )
+    # The zygote reaps children itself with wait4 to collect their rusage
+    process.returncode = 0
+    return process.pid
+
+
+def _zygote_main(sock: socket.socket, readonly_paths, rlimits):
+    """Zygote event loop: fork children on request and report their exit status"""
+    # Own process group, so terminal Ctrl-C reaches the REPL but not the zygote
+    os.setpgid(0, 0)
+    _libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0)
+
+    def send(message: Dict[str, Any]):
+        sock.send(json.dumps(message).encode())
+
+    try:
+        enter_sandbox(readonly_paths, rlimits)
+    except OSError as e:
+        send({"event": "error", "message": str(e)})
+        return
+    send({"event": "ready", "pid": os.getpid()})
+
+    sel = selectors.DefaultSelector()
+    sel.register(sock, selectors.EVENT_READ, None)
+    children = {}
+
+    while True:
+        for key, _ in sel.select():
+            if key.data is None:
+                msg, fds, _, _ = socket.recv_fds(sock, 1 << 20, 2)
+                if not msg:
+                    for req_id, pid in children.values():
+                        try:
+                            os.killpg(pid, signal.SIGKILL)
+                        except ProcessLookupError:
+                            pass
+                    return
+                request = json.loads(msg)
+
+                if request["op"] == "spawn":
+                    try:
+                        pid = _spawn_child(request, fds)
+                    except OSError as e:
+                        send({"id": request["id"], "event": "started", "pid": None})
+                        send({"id": request["id"], "event": "exited", "returncode": 127,
+                              "rusage": None, "error": str(e)})
+                        continue
+                    finally:
+                        for fd in fds:
+                            os.close(fd)
+                    pidfd = os.pidfd_open(pid)
+                    children[pidfd] = (request["id"], pid)
+                    sel.register(pidfd, selectors.EVENT_READ, pidfd)
+                    send({"id": request["id"], "event": "started", "pid": pid})
+
+                elif request["op"] == "kill":
+                    for req_id, pid in children.values():
+                        if req_id == request["id"]:
+                            try:
+                                os.killpg(pid, request.get("signal", signal.SIGKILL))
+                            except ProcessLookupError:
+                                pass
+            else:
+                pidfd = key.data
+                req_id, pid = children.pop(pidfd)
+                sel.unregister(pidfd)
+                os.close(pidfd)
+                _, status, ru = os.wait4(pid, 0)
+                send({
+                    "id": req_id,
+                    "event": "exited",
+                    "returncode": os.waitstatus_to_exitcode(status),
+                    "rusage": rusage_to_dict(ru),
+                })
+
+
+class SandboxZygote:
+    """Pre-initialized sandbox process that forks isolated children on request.
+
+    Namespace setup, the read-only bind view and rlimits are paid for once when
+    the zygote starts; every command afterwards only costs a fork and an exec.
+    """
+
+    def __init__(self, readonly_paths=DEFAULT_READONLY_PATHS, rlimits: Optional[Dict[int, int]] = None):
+        self.readonly_paths = tuple(readonly_paths)
+        self.rlimits = rlimits
+        self.pid = None
+        self._sock = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    @property
+    def running(self) -> bool:
+        return self._sock is not None
+
+    def start(self) -> bool:
+        """Fork the zygote and wait until its namespaces are ready"""
+        if self.running:
+            return True
+
+        parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        pid = os.fork()
+        if pid == 0:
+            parent_sock.close()
+            try:
+                _zygote_main(child_sock, self.readonly_paths, self.rlimits)
+            finally:
+                os._exit(0)
+
+        child_sock.close()
+        ready = json.loads(parent_sock.recv(1 << 20) or b'{"event": "error", "message": "zygote exited"}')
+        if ready["event"] != "ready":
+            logger.warning(f"Sandbox zygote unavailable: {ready.get('message')}")
+            parent_sock.close()
+            os.waitpid(pid, 0)
+            return False
+
+        self.pid = pid
+        self._sock = parent_sock
+        logger.info(f"Sandbox zygote started (pid {pid})")
+        return True
+
+    def stop(self):
+        """Shut down the zygote and any children it still owns"""
+        if not self.running:
+            return
+        self._sock.close()
+        self._sock = None
+        try:
+            os.waitpid(self.pid, 0)
+        except ChildProcessError:
+            pass
+        self.pid = None
+
+    def detach(self):
+        """Drop this process's handle on a zygote inherited across fork, leaving it running"""
+        if self.running:
+            self._sock.close()
+            self._sock = None
+            self.pid = None
+
+    def _send(self, message: Dict[str, Any], fds: Tuple[int, ...] = ()) -> int:
+        message.setdefault("id", next(self._ids))
+        socket.send_fds(self._sock, [json.dumps(message).encode()], list(fds))
+        return message["id"]
+
+    def _wait_event(self, req_id: int, event: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while (req_id, event) not in self._pending:
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"no '{event}' event for request {req_id}")
+                    self._sock.settimeout(remaining)
+                try:
+                    data = self._sock.recv(1 << 20)
+                except socket.timeout:
+                    continue
+                finally:
+                    self._sock.settimeout(None)
+                if not data:
+                    raise ConnectionError("sandbox zygote exited")
+                message = json.loads(data)
+                self._pending[(message["id"], message["event"])] = message
+            return self._pending.pop((req_id, event))
+
+    def spawn(self, command: str, stdout_fd: int, stderr_fd: int,
+              env: Optional[Dict[str, str]] = None, cwd: Optional[str] = None) -> Tuple[int, int]:
+        """Start a shell command in the sandbox, returning (request id, pid)"""
+        req_id = self._send(
+            {"op": "spawn", "command": command, "env": env or {}, "cwd": cwd or os.getcwd()},
+            (stdout_fd, stderr_fd),
+        )
+        return req_id, self._wait_event(req_id, "started")["pid"]
+
+    def kill(self, req_id: int, sig: int = signal.SIGKILL):
+        """Signal the process group of a running child"""
+        self._send({"op": "kill", "id": req_id, "signal": int(sig)})
+
+    def wait(self, req_id: int, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Wait for a child to exit, returning its exit code and rusage"""
+        return self._wait_event(req_id, "exited", timeout)
+
+    def run(self, command: str, env: Optional[Dict[str, str]] = None,
+            cwd: Optional[str] = None, timeout: Optional[float] = None, on_start=None) -> Dict[str, Any]:
+        """Run a command to completion, capturing its output like subprocess.run
+
+        Raises subprocess.TimeoutExpired if the command outlives the timeout.
+        """
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        try:
+            req_id, pid = self.spawn(command, out_w, err_w, env=env, cwd=cwd)
+        finally:
+            os.close(out_w)
+            os.close(err_w)
+        if on_start is not None and pid is not None:
+            on_start(pid)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            output = collect_output(out_r, err_r, deadline)
+        finally:
+            os.close(out_r)
+            os.close(err_r)
+
+        try:
+            if output is None:
+                raise TimeoutError
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.1)
+            exited = self.wait(req_id, remaining)
+        except TimeoutError:
+            self.kill(req_id)
+            self.wait(req_id)
+            raise subprocess.TimeoutExpired(command, timeout)
+
+        return {
+            "pid": pid,
+            "returncode": exited["returncode"],
+            "stdout": output[0].decode(errors="replace"),
+            "stderr": output[1].decode(errors="replace") + exited.get("error", ""),
+            "rusage": exited["rusage"],
+        }
+
+
+def main():
+    """Interactive CLI for testing the sandbox zygote"""
+    zygote = SandboxZygote()
+    if not zygote.start():
+        print("❌ Sandbox zygote could not be started (are unprivileged user namespaces enabled?)")
+        return
+
+    print("LLM-powered Linux AI - Sandbox Zygote")
+    print("Type 'exit' to quit")
+    print("-" * 50)
+
+    try:
+        while True:
+            command = input("\nsandbox$ ").strip()
+            if command.lower() == 'exit':
+                break
+            if not command:
+                continue
+            try:
+                result = zygote.run(command, env=dict(os.environ), timeout=30)
+            except subprocess.TimeoutExpired:
+                print("⏰ Command timed out")
+                continue
+            print(result["stdout"], end="")
+            print(result["stderr"], end="")
+            print(f"[exit code: {result['returncode']}]")
+    except (KeyboardInterrupt, EOFError):
+        print("\nExiting...")
+    finally:
+        zygote.stop()
+
+
+if __name__ == "__main__":
+    main()
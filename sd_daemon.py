@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+systemd integration for the ai-system daemon
+Implements the sd_notify and socket activation (sd_listen_fds) protocols without libsystemd
+"""
+
+import logging
+import os
+import socket
+import time
+from typing import List
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SD_LISTEN_FDS_START = 3
+
+
+def notify(*states: str) -> bool:
+    """Send state lines (READY=1, RELOADING=1, STATUS=...) to $NOTIFY_SOCKET
+
+    Returns False when not running under a notify-aware service manager.
+    """
+    address = os.getenv("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC) as sock:
+            sock.sendto("\n".join(states).encode(), address)
+        return True
+    except OSError as e:
+        logger.warning(f"sd_notify failed: {e}")
+        return False
+
+
+def notify_ready(status: str = "") -> bool:
+    return notify("READY=1", *([f"STATUS={status}"] if status else []))
+
+
+def notify_reloading(status: str = "") -> bool:
+    # systemd >= 253 needs MONOTONIC_USEC to match RELOADING=1 with the reload job
+    monotonic_usec = time.clock_gettime_ns(time.CLOCK_MONOTONIC) // 1000
+    return notify("RELOADING=1", f"MONOTONIC_USEC={monotonic_usec}",
+                  *([f"STATUS={status}"] if status else []))
+
+
+def notify_stopping(status: str = "") -> bool:
+    return notify("STOPPING=1", *([f"STATUS={status}"] if status else []))
+
+
+def notify_status(status: str) -> bool:
+    return notify(f"STATUS={status}")
+
+
+def listen_fds(unset_environment: bool = True) -> List[socket.socket]:
+    """Sockets passed by socket activation, wrapped as socket objects
+
+    LISTEN_PID must name this process, otherwise the fds were meant for
+    someone else (e.g. inherited by a child) and are ignored.
+    """
+    try:
+        if int(os.getenv("LISTEN_PID", "0")) != os.getpid():
+            return []
+        count = int(os.getenv("LISTEN_FDS", "0"))
+    except ValueError:
+        return []
+    finally:
+        if unset_environment:
+            for name in ("LISTEN_PID", "LISTEN_FDS", "LISTEN_FDNAMES"):
+                os.environ.pop(name, None)
+
+    sockets = []
+    for fd in range(SD_LISTEN_FDS_START, SD_LISTEN_FDS_START + count):
+        os.set_inheritable(fd, False)
+        sockets.append(socket.socket(fileno=fd))
+    return sockets
@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+"""
+Directory Size Tree for LLM-powered Linux Distribution
+A persistent per-directory size cache, refreshed incrementally by directory mtime, for instant "what is using my disk" answers
+"""
+
+import heapq
+import json
+import logging
+import os
+import re
+import stat
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from fs_tools import ParallelWalker, format_size, parse_size, pseudo_filesystem_devices
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_TREE_PATH = os.path.expanduser("~/.cache/linuxai/size_tree.json")
+TREE_VERSION = 1
+TOP_FILES = 10  # largest files kept per directory; largest_files(n) is exact for n <= TOP_FILES
+# Files that grow in place do not change their directory's mtime, so every
+# directory is also rescanned once it has gone this long without a scan
+RESCAN_AFTER = 6 * 3600
+
+
+class DirNode:
+    """One directory: its own files, plus aggregates over its whole subtree"""
+
+    __slots__ = ("name", "parent", "children", "mtime_ns", "scanned", "size", "disk", "files", "newest", "top",
+                 "total_size", "total_disk", "total_files", "total_dirs", "total_newest", "biggest", "removed")
+
+    def __init__(self, name: str, parent: Optional["DirNode"]):
+        self.name = name
+        self.parent = parent
+        self.children: Dict[str, "DirNode"] = {}
+        self.mtime_ns = 0      # 0 until the directory has been scanned
+        self.scanned = 0.0
+        self.size = self.disk = self.files = 0
+        self.newest = 0.0
+        self.top: List[Tuple[int, str]] = []   # (size, name), largest first
+        self.total_size = self.total_disk = self.total_files = self.total_dirs = 0
+        self.total_newest = 0.0
+        self.biggest = 0       # largest file anywhere in the subtree
+        self.removed = False
+
+    @property
+    def path(self) -> str:
+        names = []
+        node = self
+        while node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        return os.path.join(node.name, *reversed(names)) if names else node.name
+
+    def recompute(self):
+        """Recompute the max-style aggregates, which cannot be updated by deltas"""
+        newest = self.newest
+        biggest = self.top[0][0] if self.top else 0
+        for child in self.children.values():
+            if child.total_newest > newest:
+                newest = child.total_newest
+            if child.biggest > biggest:
+                biggest = child.biggest
+        self.total_newest = newest
+        self.biggest = biggest
+
+
+class SizeTree:
+    """Aggregate size, file count and newest mtime for every directory under a root
+
+    Built once with a parallel walk, then kept current by refresh(): each
+    directory whose mtime changed (or whose last scan is older than
+    RESCAN_AFTER) has only its own entries rescanned, and the size and count
+    deltas are added to its ancestors. New subdirectories are queued and
+    scanned by later refreshes, so a refresh stays within its I/O budget even
+    when a large tree appears at once. Sizes count every hard link, unlike du.
+    """
+
+    def __init__(self, root: Optional[str] = None, path: str = DEFAULT_TREE_PATH, one_filesystem: bool = True):
+        self.root = os.path.abspath(root or os.path.expanduser("~"))
+        self.path = path
+        self.one_filesystem = one_filesystem
+        self.node: Optional[DirNode] = None
+        self.built_at = 0.0
+        self.dirty = False
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._order: List[DirNode] = []          # round-robin refresh order
+        self._cursor = 0
+        self._pending: deque = deque()           # new directories not scanned yet
+        self._device = None
+        self._skip_devices = pseudo_filesystem_devices()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    # Building and persistence
+
+    def build(self, workers: Optional[int] = None):
+        """Scan the whole tree with a parallel walk"""
+        started = time.perf_counter()
+        nodes: Dict[str, DirNode] = {}
+        root_node = DirNode(self.root, None)
+        nodes[self.root] = root_node
+
+        def node_for(path: str) -> DirNode:
+            node = nodes.get(path)
+            if node is None:
+                parent_path, name = os.path.split(path)
+                parent = node_for(parent_path)
+                node = nodes[path] = parent.children[name] = DirNode(name, parent)
+            return node
+
+        def visit(entry, depth):
+            st = entry.stat(follow_symlinks=False)
+            return entry.path, stat.S_ISDIR(st.st_mode), st.st_size, st.st_blocks * 512, st.st_mtime_ns, st.st_dev
+
+        now = time.time()
+        device = os.stat(self.root).st_dev
+        walker = ParallelWalker([self.root], visit, workers, one_filesystem=self.one_filesystem)
+        for path, is_dir, size, disk, mtime_ns, entry_device in walker:
+            if is_dir:
+                if entry_device != device and (self.one_filesystem or entry_device in self._skip_devices):
+                    continue  # a mount point the walk does not descend into
+                node = root_node if path == self.root else node_for(path)
+                node.mtime_ns = mtime_ns
+                node.scanned = now
+                node.newest = max(node.newest, mtime_ns / 1e9)
+                continue
+            parent_path, name = os.path.split(path)
+            node = node_for(parent_path)
+            node.size += size
+            node.disk += disk
+            node.files += 1
+            node.newest = max(node.newest, mtime_ns / 1e9)
+            # node.top is a bounded min-heap until the walk ends
+            if len(node.top) < TOP_FILES:
+                heapq.heappush(node.top, (size, name))
+            elif size > node.top[0][0]:
+                heapq.heapreplace(node.top, (size, name))
+        for node in nodes.values():
+            node.top.sort(reverse=True)
+
+        with self._lock:
+            self._set_root(root_node)
+            self.built_at = now
+            self.dirty = True
+        logger.info(f"Size tree built: {len(self._order)} directories under {self.root} "
+                    f"in {time.perf_counter() - started:.1f}s")
+
+    def _set_root(self, root_node: DirNode):
+        self.node = root_node
+        self._order = list(self._iter_nodes(root_node))
+        for node in reversed(self._order):  # children before parents
+            self._aggregate(node)
+        self._cursor = 0
+        self._pending = deque(node for node in self._order if node.mtime_ns == 0)
+        try:
+            self._device = os.stat(self.root).st_dev
+        except OSError:
+            self._device = None
+
+    @staticmethod
+    def _iter_nodes(top: DirNode) -> Iterator[DirNode]:
+        stack = [top]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children.values())
+
+    @staticmethod
+    def _aggregate(node: DirNode):
+        node.total_size, node.total_disk, node.total_files, node.total_dirs = node.size, node.disk, node.files, 0
+        for child in node.children.values():
+            node.total_size += child.total_size
+            node.total_disk += child.total_disk
+            node.total_files += child.total_files
+            node.total_dirs += child.total_dirs + 1
+        node.recompute()
+
+    def load(self) -> bool:
+        """Load the saved tree; False when there is none for this root"""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable size tree {self.path}: {e}")
+            return False
+        if state.get("version") != TREE_VERSION or state.get("root") != self.root:
+            return False
+        nodes = {"": DirNode(self.root, None)}
+        # Parents sort before their children, so every parent exists already
+        for relative in sorted(state["dirs"]):
+            mtime_ns, scanned, size, disk, files, newest, top = state["dirs"][relative]
+            if relative:
+                parent_path, _, name = relative.rpartition("/")
+                parent = nodes.get(parent_path)
+                if parent is None:
+                    continue
+                node = nodes[relative] = parent.children[name] = DirNode(name, parent)
+            else:
+                node = nodes[""]
+            node.mtime_ns, node.scanned, node.size, node.disk, node.files, node.newest = \
+                mtime_ns, scanned, size, disk, files, newest
+            node.top = [(s, n) for s, n in top]
+        with self._lock:
+            self._set_root(nodes[""])
+            self.built_at = state.get("built_at", 0.0)
+            self.dirty = False
+        return True
+
+    def save(self):
+        """Write the tree atomically"""
+        with self._lock:
+            if self.node is None:
+                return
+            prefix = len(self.root.rstrip("/")) + 1
+            dirs = {}
+            for node in self._iter_nodes(self.node):
+                relative = node.path[prefix:] if node is not self.node else ""
+                dirs[relative] = [node.mtime_ns, node.scanned, node.size, node.disk, node.files, node.newest,
+                                  node.top]
+            state = {"version": TREE_VERSION, "root": self.root, "built_at": self.built_at, "dirs": dirs}
+            self.dirty = False
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        self.stop_refresher()
+        if self.dirty:
+            self.save()
+
+    # Incremental refresh
+
+    def refresh(self, max_ops: Optional[int] = 5000, under: Optional[str] = None) -> int:
+        """Rescan changed directories, spending at most about max_ops stat/scandir calls
+
+        Queued new directories go first, then directories in round-robin
+        order from where the previous refresh stopped (or, with under, every
+        directory of that subtree). Returns the number of directories rescanned.
+        """
+        with self._refresh_lock:
+            if self.node is None:
+                return 0
+            budget = [max_ops if max_ops is not None else float("inf")]
+            rescanned = self._scan_pending(budget)
+            if under is not None:
+                with self._lock:
+                    top = self._find(under)
+                    nodes = list(self._iter_nodes(top)) if top is not None else []
+                for node in nodes:
+                    if budget[0] <= 0:
+                        break
+                    if not node.removed:
+                        rescanned += self._check(node, budget)
+                return rescanned + self._scan_pending(budget)
+            visited = 0
+            while budget[0] > 0 and visited < len(self._order):
+                if self._cursor >= len(self._order):
+                    self._cursor = 0
+                    self._order = [node for node in self._order if not node.removed]
+                    if not self._order:
+                        break
+                node = self._order[self._cursor]
+                self._cursor += 1
+                visited += 1
+                if not node.removed:
+                    rescanned += self._check(node, budget)
+            # Directories found by this refresh are scanned with what is left of the budget
+            return rescanned + self._scan_pending(budget)
+
+    def _scan_pending(self, budget: List[float]) -> int:
+        rescanned = 0
+        while self._pending and budget[0] > 0:
+            node = self._pending.popleft()
+            if not node.removed and node.mtime_ns == 0:
+                rescanned += self._check(node, budget)
+        return rescanned
+
+    def _check(self, node: DirNode, budget: List[float]) -> int:
+        path = node.path
+        budget[0] -= 1
+        try:
+            st = os.lstat(path)
+        except OSError:
+            if node.parent is not None:
+                with self._lock:
+                    self._detach(node)
+            return 0
+        if not stat.S_ISDIR(st.st_mode):
+            if node.parent is not None:
+                with self._lock:
+                    self._detach(node)
+            return 0
+        if st.st_mtime_ns == node.mtime_ns and time.time() - node.scanned < RESCAN_AFTER:
+            return 0
+        self._rescan(node, path, st, budget)
+        return 1
+
+    def _rescan(self, node: DirNode, path: str, st: os.stat_result, budget: List[float]):
+        """Rescan one directory's own entries and push the differences up the tree"""
+        size = disk = files = 0
+        newest = st.st_mtime_ns / 1e9
+        entries: List[Tuple[int, str]] = []
+        subdirs: Dict[str, int] = {}
+        try:
+            with os.scandir(path) as scanner:
+                for entry in scanner:
+                    budget[0] -= 1
+                    try:
+                        entry_st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if stat.S_ISDIR(entry_st.st_mode):
+                        subdirs[entry.name] = entry_st.st_dev
+                        continue
+                    size += entry_st.st_size
+                    disk += entry_st.st_blocks * 512
+                    files += 1
+                    if entry_st.st_mtime > newest:
+                        newest = entry_st.st_mtime
+                    entries.append((entry_st.st_size, entry.name))
+        except OSError as e:
+            logger.debug(f"Cannot rescan {path}: {e}")
+            return
+
+        with self._lock:
+            self._propagate(node, size - node.size, disk - node.disk, files - node.files, 0)
+            node.size, node.disk, node.files, node.newest = size, disk, files, newest
+            node.top = heapq.nlargest(TOP_FILES, entries)
+            node.mtime_ns = st.st_mtime_ns
+            node.scanned = time.time()
+            for name in [name for name in node.children if name not in subdirs]:
+                self._detach(node.children[name])
+            for name, device in subdirs.items():
+                if name in node.children or device in self._skip_devices or (
+                        self.one_filesystem and self._device is not None and device != self._device):
+                    continue
+                child = node.children[name] = DirNode(name, node)
+                self._order.append(child)
+                self._pending.append(child)
+                self._propagate(node, 0, 0, 0, 1)
+            self._recompute_up(node)
+            self.dirty = True
+
+    def _detach(self, node: DirNode):
+        """Drop a vanished directory and its subtree from the aggregates"""
+        parent = node.parent
+        if parent is None or parent.children.get(node.name) is not node:
+            return
+        del parent.children[node.name]
+        self._propagate(parent, -node.total_size, -node.total_disk, -node.total_files, -node.total_dirs - 1)
+        for gone in self._iter_nodes(node):
+            gone.removed = True
+        self._recompute_up(parent)
+        self.dirty = True
+
+    @staticmethod
+    def _propagate(node: Optional[DirNode], size: int, disk: int, files: int, dirs: int):
+        while node is not None:
+            node.total_size += size
+            node.total_disk += disk
+            node.total_files += files
+            node.total_dirs += dirs
+            node = node.parent
+
+    @staticmethod
+    def _recompute_up(node: Optional[DirNode]):
+        while node is not None:
+            node.recompute()
+            node = node.parent
+
+    # Background refresh
+
+    def start_refresher(self, interval: float = 60.0, max_ops: int = 5000, watch: Iterable[str] = (),
+                        on_refresh: Optional[Callable[["SizeTree"], None]] = None, save_every: int = 10):
+        """Refresh every interval seconds in a daemon thread, within max_ops stat calls per round
+
+        Watched subtrees (e.g. ~/Downloads) are checked completely every round
+        before the round-robin pass; on_refresh runs after each round.
+        """
+        if self._refresher is not None:
+            return
+        watch = list(watch)
+
+        def loop():
+            rounds = 0
+            while not self._stop.wait(interval):
+                try:
+                    for path in watch:
+                        self.refresh(max_ops // (2 * len(watch)), under=path)
+                    self.refresh(max_ops // 2 if watch else max_ops)
+                    if on_refresh is not None:
+                        on_refresh(self)
+                    rounds += 1
+                    if self.dirty and rounds % save_every == 0:
+                        self.save()
+                except Exception as e:
+                    logger.warning(f"Size tree refresh failed: {e}")
+
+        self._refresher = threading.Thread(target=loop, name="size-tree-refresh", daemon=True)
+        self._refresher.start()
+
+    def stop_refresher(self):
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+    # Queries
+
+    def _find(self, path: str) -> Optional[DirNode]:
+        path = os.path.abspath(os.path.expanduser(path))
+        if self.node is None:
+            return None
+        if path == self.root:
+            return self.node
+        prefix = self.root.rstrip("/") + "/"
+        if not path.startswith(prefix):
+            return None
+        node = self.node
+        for name in path[len(prefix):].split("/"):
+            node = node.children.get(name)
+            if node is None:
+                return None
+        return node
+
+    def covers(self, path: str) -> bool:
+        with self._lock:
+            return self._find(path) is not None
+
+    @staticmethod
+    def _describe(node: DirNode) -> Dict[str, Any]:
+        return {"path": node.path, "size": node.total_size, "disk_usage": node.total_disk,
+                "files": node.total_files, "directories": node.total_dirs, "newest": node.total_newest,
+                "complete": node.mtime_ns != 0}
+
+    def usage(self, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Cached totals for a directory, or None when it is not in the tree"""
+        with self._lock:
+            node = self._find(path or self.root)
+            return None if node is None else self._describe(node)
+
+    def largest_dirs(self, path: Optional[str] = None, n: int = 10,
+                     max_depth: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The n largest directories below path, by total disk usage
+
+        A directory is never larger than its parent, so a best-first
+        expansion from path visits only about n directories.
+        """
+        with self._lock:
+            top = self._find(path or self.root)
+            if top is None:
+                return []
+            heap = [(-child.total_disk, id(child), child, 1) for child in top.children.values()]
+            heapq.heapify(heap)
+            results = []
+            while heap and len(results) < n:
+                _, _, node, depth = heapq.heappop(heap)
+                results.append(self._describe(node))
+                if max_depth is None or depth < max_depth:
+                    for child in node.children.values():
+                        heapq.heappush(heap, (-child.total_disk, id(child), child, depth + 1))
+            return results
+
+    def largest_files(self, path: Optional[str] = None, n: int = 10) -> List[Tuple[str, int]]:
+        """The n largest files below path as (path, size), found best-first by subtree maximum"""
+        with self._lock:
+            top = self._find(path or self.root)
+            if top is None:
+                return []
+            heap = [(-top.biggest, 0, id(top), top)]
+            results = []
+            while heap and len(results) < n:
+                size, kind, _, item = heapq.heappop(heap)
+                if kind == 1:
+                    results.append((item, -size))
+                    continue
+                base = item.path
+                for file_size, name in item.top:
+                    heapq.heappush(heap, (-file_size, 1, id(name), os.path.join(base, name)))
+                for child in item.children.values():
+                    if child.biggest:
+                        heapq.heappush(heap, (-child.biggest, 0, id(child), child))
+            return results
+
+    def __len__(self) -> int:
+        with self._lock:
+            return 0 if self.node is None else self.node.total_dirs + 1
+
+    @property
+    def pending(self) -> int:
+        """Directories found but not scanned yet"""
+        return sum(1 for node in self._pending if node.mtime_ns == 0 and not node.removed)
+
+
+# Natural language disk-usage requests
+
+_DISK_QUERIES = (
+    # "what is using my disk", "what's taking up space in Downloads", "what uses the most space in ~/src"
+    re.compile(r"^what(?:'s|\s+is)?\s+(?:using|taking(?:\s+up)?|eating|filling(?:\s+up)?|uses(?:\s+the\s+most)?)\s+"
+               r"(?:(?:all\s+)?(?:my|the)\s+)?(?:disk(?:\s+space)?|space|storage)(?:\s+(?:in|under|on)\s+(?P<path>.+?))?"
+               r"\s*[.?!]?$", re.I),
+    # "show the largest files in Downloads", "find large files", "list the 5 biggest folders in ~/src"
+    re.compile(r"^(?:find|show|list|what\s+are)\s+(?:me\s+)?(?:the\s+|my\s+)?(?:(?P<n>\d+)\s+)?"
+               r"(?:largest|biggest|large|big|huge)\s+(?P<what>files|folders|directories|dirs)"
+               r"(?:\s+(?:in|under|on)\s+(?P<path2>.+?)|\s+(?P<here>here))?\s*[.?!]?$", re.I),
+    # "how big is my Downloads folder", "how much space does ~/Videos use"
+    re.compile(r"^how\s+(?:big|large)\s+is\s+(?:my\s+|the\s+)?(?P<path3>\S+?)(?:\s+(?:folder|directory|dir))?\s*[.?!]?$"
+               r"|^how\s+much\s+(?:space|disk(?:\s+space)?)\s+(?:does|is)\s+(?:my\s+|the\s+)?(?P<path4>\S+?)"
+               r"(?:\s+(?:folder|directory|dir))?\s+(?:use|using|take|taking(?:\s+up)?)\s*[.?!]?$", re.I),
+)
+
+
+def resolve_query_path(text: Optional[str], home: Optional[str] = None) -> str:
+    """Turn "Downloads", "my downloads folder", "~/src" or "here" into a directory path"""
+    home = home or os.path.expanduser("~")
+    if not text:
+        return home
+    text = re.sub(r"^(?:my|the)\s+|\s+(?:folder|directory|dir)$", "", text.strip().strip("'\""), flags=re.I)
+    if text.lower() in ("here", "this folder", "this directory", "the current directory", "."):
+        return os.getcwd()
+    if text.lower() in ("home", "~"):
+        return home
+    if text.startswith(("/", "~")):
+        return os.path.abspath(os.path.expanduser(text))
+    candidate = os.path.join(home, text)
+    if os.path.isdir(candidate):
+        return candidate
+    try:
+        for name in os.listdir(home):  # "downloads" means ~/Downloads
+            if name.lower() == text.lower():
+                return os.path.join(home, name)
+    except OSError:
+        pass
+    return candidate
+
+
+def parse_disk_query(text: str) -> Optional[Dict[str, Any]]:
+    """Recognize a disk-usage request; returns {"path", "what": "summary"|"files"|"dirs", "n"} or None"""
+    text = text.strip()
+    for number, regex in enumerate(_DISK_QUERIES):
+        match = regex.match(text)
+        if match is None:
+            continue
+        groups = match.groupdict()
+        if number == 0:
+            return {"path": resolve_query_path(groups["path"]), "what": "summary", "n": 10}
+        if number == 1:
+            what = "files" if groups["what"].lower() == "files" else "dirs"
+            return {"path": resolve_query_path(groups["path2"] or groups["here"]), "what": what,
+                    "n": int(groups["n"] or 10)}
+        return {"path": resolve_query_path(groups["path3"] or groups["path4"]), "what": "total", "n": 0}
+    return None
+
+
+def format_usage_report(usage: Dict[str, Any], dirs: List[Dict[str, Any]], files: List[Tuple[str, int]],
+                        relative_to: Optional[str] = None) -> List[str]:
+    """du/ls -h style lines for a usage() total plus its largest directories and files"""
+    def name(path):
+        return os.path.relpath(path, relative_to) if relative_to else path
+
+    lines = [f"{format_size(usage['disk_usage']):>7}  {usage['path']}  "
+             f"({usage['files']} files, {usage['directories']} directories"
+             f"{'' if usage['complete'] else ', still scanning'})"]
+    if dirs:
+        lines.append("Largest directories:")
+        lines.extend(f"{format_size(d['disk_usage']):>7}  {name(d['path'])}" for d in dirs)
+    if files:
+        lines.append("Largest files:")
+        lines.extend(f"{format_size(size):>7}  {name(path)}" for path, size in files)
+    return lines
+
+
+def main():
+    """CLI for the size tree"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incremental directory size tree")
+    parser.add_argument("path", nargs="?", help="directory to report on (default: the root)")
+    parser.add_argument("--root", help="tree to cache (default: home directory)")
+    parser.add_argument("--state", default=DEFAULT_TREE_PATH)
+    parser.add_argument("-n", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=1, help="directory depth to list (0: unlimited)")
+    parser.add_argument("--max-ops", type=int, default=None, help="refresh I/O budget in stat calls")
+    parser.add_argument("--alert", help="exit 2 when path uses more than this much, e.g. 10G")
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    tree = SizeTree(args.root, args.state)
+    if args.rebuild or not tree.load():
+        tree.build()
+    else:
+        started = time.perf_counter()
+        rescanned = tree.refresh(args.max_ops)
+        print(f"refresh: {rescanned} directories rescanned in {(time.perf_counter() - started) * 1000:.0f} ms")
+    path = args.path or tree.root
+    usage = tree.usage(path)
+    if usage is None:
+        print(f"{path} is not under {tree.root}")
+        tree.close()
+        raise SystemExit(1)
+    print("\n".join(format_usage_report(usage, tree.largest_dirs(path, args.n, args.depth or None),
+                                        tree.largest_files(path, args.n), relative_to=path)))
+    tree.close()
+    if args.alert and usage["disk_usage"] > parse_size(args.alert):
+        raise SystemExit(2)
+
+
+if __name__ == "__main__":
+    main()
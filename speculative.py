@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Speculative Inference for LLM-powered Linux Distribution
+Sends partially typed input to the LLM in the background so the answer is ready when Enter is pressed
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
+from metrics import CACHE_REQUESTS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Speculation:
+    """A background LLM request for one snapshot of the input line"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.cancel_event = threading.Event()
+        self.started = time.monotonic()
+        self.finished = None
+        self.future = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+class SpeculativeInference:
+    """Type-ahead inference driven by the readline line buffer.
+
+    While input() is blocked, a watcher thread samples readline's line buffer.
+    Once the text has been stable for the debounce interval, it is sent to the LLM.
+    On Enter, resolve() reuses the result if the final text is identical; if the
+    final text only extends it, the request has still warmed Ollama's KV prefix
+    cache, provided the prompt text chosen per request (context) is the same
+    for both. Anything else is cancelled.
+    """
+
+    def __init__(self, infer: Callable[[str, threading.Event], Optional[str]],
+                 debounce: float = 0.35, min_chars: int = 8, poll_interval: float = 0.05,
+                 context: Optional[Callable[[str], str]] = None):
+        self.infer = infer
+        self.context = context  # prompt text placed before the user's input, chosen for that input
+        self.debounce = debounce
+        self.min_chars = min_chars
+        self.poll_interval = poll_interval
+        self.current = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculative")
+        self._watcher = None
+        self._stop = threading.Event()
+        self._prompting = threading.Event()
+        self.stats = {
+            "speculations": 0,
+            "exact_hits": 0,
+            "prefix_hits": 0,
+            "misses": 0,
+            "cancelled": 0,
+            "latency_saved": 0.0,
+        }
+
+    def start(self) -> bool:
+        """Start watching the readline buffer; returns False if readline is unavailable"""
+        try:
+            import readline
+        except ImportError:
+            logger.warning("readline not available, speculative inference disabled")
+            return False
+
+        def watch():
+            last_text, last_change = "", time.monotonic()
+            while not self._stop.wait(self.poll_interval):
+                if not self._prompting.is_set():
+                    last_text = ""
+                    continue
+                text = readline.get_line_buffer().strip()
+                now = time.monotonic()
+                if text != last_text:
+                    last_text, last_change = text, now
+                elif now - last_change >= self.debounce:
+                    self.observe(text)
+
+        self._watcher = threading.Thread(target=watch, name="speculative-watcher", daemon=True)
+        self._watcher.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            if self.current is not None:
+                self.current.cancel()
+                self.current = None
+        self._executor.shutdown(wait=False)
+
+    def begin_input(self):
+        """Mark that the REPL is waiting at its prompt, so the line buffer is live"""
+        self._prompting.set()
+
+    def observe(self, text: str):
+        """Speculate on a debounced snapshot of the input line"""
+        if len(text) < self.min_chars:
+            return
+        with self._lock:
+            if self.current is not None:
+                if self.current.text == text:
+                    return
+                self.current.cancel()
+                self.stats["cancelled"] += 1
+
+            speculation = Speculation(text)
+            speculation.future = self._executor.submit(self._run, speculation)
+            self.current = speculation
+            self.stats["speculations"] += 1
+
+    def _run(self, speculation: Speculation) -> Optional[str]:
+        if speculation.cancel_event.is_set():
+            return None
+        try:
+            return self.infer(speculation.text, speculation.cancel_event)
+        finally:
+            speculation.finished = time.monotonic()
+
+    def resolve(self, final_text: str) -> Optional[str]:
+        """Return the speculated LLM response for the submitted text, if it can be reused"""
+        final_text = final_text.strip()
+        submitted = time.monotonic()
+        self._prompting.clear()
+        with self._lock:
+            speculation, self.current = self.current, None
+
+        if speculation is None:
+            return None
+
+        if speculation.text == final_text:
+            response = speculation.future.result()
+            if response:
+                # Only the inference time that elapsed before Enter was actually saved
+                done = speculation.finished or submitted
+                self.stats["exact_hits"] += 1
+                CACHE_REQUESTS.labels("speculative", "hit").inc()
+                self.stats["latency_saved"] += min(done, submitted) - speculation.started
+                return response
+            self.stats["misses"] += 1
+            CACHE_REQUESTS.labels("speculative", "miss").inc()
+            return None
+
+        # The answer is for different text either way. When the final prompt extends the
+        # speculated one, the prefill already done stays in Ollama's KV prefix cache. That
+        # takes the same per-request context (examples, docs) before the user's text.
+        speculation.cancel()
+        self.stats["cancelled"] += 1
+        if final_text.startswith(speculation.text) and (
+                self.context is None or self.context(speculation.text) == self.context(final_text)):
+            self.stats["prefix_hits"] += 1
+            CACHE_REQUESTS.labels("speculative", "prefix_hit").inc()
+        else:
+            self.stats["misses"] += 1
+            CACHE_REQUESTS.labels("speculative", "miss").inc()
+        return None
+
+    def discard(self):
+        """Cancel any in-flight speculation, e.g. when a builtin was entered"""
+        self._prompting.clear()
+        with self._lock:
+            speculation, self.current = self.current, None
+        if speculation is not None:
+            speculation.cancel()
+            self.stats["cancelled"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and latency saved so far"""
+        resolved = self.stats["exact_hits"] + self.stats["prefix_hits"] + self.stats["misses"]
+        stats = dict(self.stats)
+        stats["hit_rate"] = self.stats["exact_hits"] / resolved if resolved else 0.0
+        return stats
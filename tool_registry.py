@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Tool Registry for LLM-powered Linux Distribution
+Native system functions with JSON schemas, offered to the model through Ollama's tools interface
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional
+
+from metrics import CACHE_REQUESTS, TOOL_CALLS, TOOL_SECONDS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_RESULT_CHARS = 4000  # per tool result sent back to the model
+MAX_WORKERS = 8
+
+_JSON_TYPES = {"string": str, "integer": int, "number": (int, float), "boolean": bool, "object": dict, "array": list}
+
+
+class Tool:
+    """One registered function and its JSON schema"""
+
+    __slots__ = ("name", "description", "parameters", "function", "terminal")
+
+    def __init__(self, name: str, description: str, parameters: Dict[str, Any], function: Callable,
+                 terminal: bool = False):
+        self.name = name
+        self.description = description
+        self.parameters = parameters
+        self.function = function
+        self.terminal = terminal  # ends the turn instead of being executed (e.g. proposing a shell command)
+
+    def schema(self) -> Dict[str, Any]:
+        """The entry for Ollama's tools field"""
+        return {"type": "function",
+                "function": {"name": self.name, "description": self.description, "parameters": self.parameters}}
+
+    def validate(self, arguments: Any) -> Dict[str, Any]:
+        """Check arguments against the schema, coercing the numbers small models send as strings
+
+        Raises ValueError with a message meant for the model.
+        """
+        if isinstance(arguments, str):
+            arguments = json.loads(arguments) if arguments.strip() else {}
+        if not isinstance(arguments, dict):
+            raise ValueError("arguments must be an object")
+        properties = self.parameters.get("properties", {})
+        checked = {}
+        for key, value in arguments.items():
+            spec = properties.get(key)
+            if spec is None:
+                continue  # models invent parameters; ignore them rather than fail the call
+            kind = spec.get("type")
+            if kind in ("integer", "number") and isinstance(value, str):
+                try:
+                    value = int(value) if kind == "integer" else float(value)
+                except ValueError:
+                    raise ValueError(f"{key} must be a {kind}")
+            if kind in _JSON_TYPES and (not isinstance(value, _JSON_TYPES[kind]) or
+                                        (kind in ("integer", "number") and isinstance(value, bool))):
+                raise ValueError(f"{key} must be a {kind}")
+            if "enum" in spec and value not in spec["enum"]:
+                raise ValueError(f"{key} must be one of {', '.join(map(str, spec['enum']))}")
+            checked[key] = value
+        missing = [key for key in self.parameters.get("required", ()) if key not in checked]
+        if missing:
+            raise ValueError(f"missing required argument(s): {', '.join(missing)}")
+        return checked
+
+
+class ToolRegistry:
+    """Functions the model may call, registered with the tool() decorator
+
+    Every function receives the shared context object (the NLP frontend, which
+    holds the file index, size tree and package index) followed by its
+    validated arguments, and returns something JSON-serializable.
+    """
+
+    def __init__(self):
+        self.tools: Dict[str, Tool] = {}
+
+    def tool(self, description: str, parameters: Optional[Dict[str, Any]] = None, name: Optional[str] = None,
+             terminal: bool = False):
+        """Register the decorated function; parameters is a JSON schema object"""
+        def register(function: Callable) -> Callable:
+            tool_name = name or function.__name__
+            if tool_name in self.tools:
+                raise ValueError(f"Tool '{tool_name}' is already registered")
+            self.tools[tool_name] = Tool(tool_name, description,
+                                         parameters or {"type": "object", "properties": {}},
+                                         function, terminal)
+            return function
+        return register
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self.tools.get(name)
+
+    def schemas(self) -> List[Dict[str, Any]]:
+        return [tool.schema() for tool in self.tools.values()]
+
+
+def _cache_key(name: str, arguments: Dict[str, Any]) -> str:
+    return name + json.dumps(arguments, sort_keys=True, default=str)
+
+
+class ToolExecutor:
+    """Runs all tool calls from one model response concurrently
+
+    Identical calls (same tool, same arguments) share one execution for the
+    rest of the turn, whether they arrive in the same response or a later one;
+    new_turn() forgets them, since the system may have changed in between.
+    """
+
+    def __init__(self, registry: ToolRegistry, context: Any = None, max_workers: int = MAX_WORKERS,
+                 timeout: float = 20.0):
+        self.registry = registry
+        self.context = context
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._cache: Dict[str, Any] = {}  # key -> Future
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "executed": 0, "cached": 0, "errors": 0, "batches": 0}
+
+    def new_turn(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _invoke(self, tool: Tool, arguments: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = tool.function(self.context, **arguments)
+            TOOL_CALLS.labels(tool.name, "ok").inc()
+            return result
+        except Exception as e:
+            logger.warning(f"Tool {tool.name} failed: {e}")
+            TOOL_CALLS.labels(tool.name, "error").inc()
+            self.stats["errors"] += 1
+            return {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            TOOL_SECONDS.labels(tool.name).observe(time.perf_counter() - started)
+
+    def submit(self, name: str, arguments: Any):
+        """Start one call (or join an identical one); returns a Future of its result"""
+        self.stats["calls"] += 1
+        tool = self.registry.get(name)
+        done = Future()
+        if tool is None:
+            done.set_result({"error": f"unknown tool '{name}'"})
+            return done
+        try:
+            arguments = tool.validate(arguments)
+        except ValueError as e:
+            done.set_result({"error": f"invalid arguments: {e}"})
+            return done
+        key = _cache_key(name, arguments)
+        with self._lock:
+            future = self._cache.get(key)
+            if future is not None:
+                self.stats["cached"] += 1
+                CACHE_REQUESTS.labels("tool", "hit").inc()
+                return future
+            CACHE_REQUESTS.labels("tool", "miss").inc()
+            self.stats["executed"] += 1
+            future = self._pool.submit(self._invoke, tool, arguments)
+            self._cache[key] = future
+        return future
+
+    def run(self, calls: List[Dict[str, Any]]) -> List[Any]:
+        """Execute [{"name", "arguments"}, ...] together; results come back in call order"""
+        self.stats["batches"] += 1
+        futures = [self.submit(call.get("name", ""), call.get("arguments") or {}) for call in calls]
+        deadline = time.monotonic() + self.timeout
+        results = []
+        for call, future in zip(calls, futures):
+            try:
+                results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except Exception as e:  # a timeout; the worker keeps running but the turn moves on
+                results.append({"error": f"{call.get('name')} did not finish: {type(e).__name__}"})
+        return results
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+def format_result(result: Any, limit: int = MAX_RESULT_CHARS) -> str:
+    """A tool result as the content of a tool message, truncated to keep the follow-up prompt small"""
+    text = result if isinstance(result, str) else json.dumps(result, default=str, separators=(",", ":"))
+    if len(text) > limit:
+        text = text[:limit] + f"... [truncated {len(text) - limit} characters]"
+    return text
+
+
+# Built-in tools: thin wrappers over the native modules
+
+TOOLS = ToolRegistry()
+
+
+def _integer(description: str, default: int) -> Dict[str, Any]:
+    return {"type": "integer", "description": f"{description} (default {default})"}
+
+
+@TOOLS.tool("Propose one shell command for the user to review and run. Use it only when the user asks to change "
+            "something or the answer needs a command none of the other tools provides.",
+            {"type": "object", "properties": {"command": {"type": "string", "description": "The shell command"}},
+             "required": ["command"]}, terminal=True)
+def run_command(context, command: str):
+    return {"command": command}
+
+
+@TOOLS.tool("Uptime, load average, CPU count, memory and swap usage, and root filesystem usage")
+def system_status(context):
+    from fs_tools import format_size
+    with open("/proc/meminfo") as f:
+        meminfo = {line.split(":")[0]: int(line.split()[1]) * 1024 for line in f if line.split()[1:]}
+    with open("/proc/uptime") as f:
+        uptime = float(f.read().split()[0])
+    root = os.statvfs("/")
+    return {
+        "uptime_hours": round(uptime / 3600, 1),
+        "load_average": list(os.getloadavg()),
+        "cpus": os.cpu_count(),
+        "memory_total": format_size(meminfo.get("MemTotal", 0)),
+        "memory_available": format_size(meminfo.get("MemAvailable", 0)),
+        "swap_used": format_size(meminfo.get("SwapTotal", 0) - meminfo.get("SwapFree", 0)),
+        "root_size": format_size(root.f_blocks * root.f_frsize),
+        "root_free": format_size(root.f_bavail * root.f_frsize),
+    }
+
+
+@TOOLS.tool("Free and used space of each mounted filesystem (like df -h)")
+def filesystems(context):
+    from fs_tools import format_size, pseudo_filesystem_devices
+    pseudo = pseudo_filesystem_devices()
+    mounts, seen = [], set()
+    with open("/proc/self/mounts") as f:
+        for line in f:
+            device, mountpoint = line.split()[:2]
+            mountpoint = mountpoint.replace("\\040", " ")
+            try:
+                st = os.stat(mountpoint)
+                fs = os.statvfs(mountpoint)
+            except OSError:
+                continue
+            if st.st_dev in pseudo or st.st_dev in seen or not fs.f_blocks:
+                continue
+            seen.add(st.st_dev)
+            used = (fs.f_blocks - fs.f_bfree) * fs.f_frsize
+            mounts.append({"device": device, "mountpoint": mountpoint, "size": format_size(fs.f_blocks * fs.f_frsize),
+                           "used": format_size(used), "available": format_size(fs.f_bavail * fs.f_frsize),
+                           "use_percent": round(100 * used / (used + fs.f_bavail * fs.f_frsize or 1))})
+    return mounts
+
+
+@TOOLS.tool("The busiest processes by CPU, memory or disk I/O",
+            {"type": "object", "properties": {
+                "sort_by": {"type": "string", "enum": ["cpu", "mem", "io"], "description": "Sort key (default cpu)"},
+                "limit": _integer("Number of processes", 10)}})
+def top_processes(context, sort_by: str = "cpu", limit: int = 10):
+    table = getattr(context, "process_table", None)
+    if table is None:
+        from process_table import ProcessTable
+        table = ProcessTable()
+        table.refresh()
+        time.sleep(0.1)  # CPU% needs two samples
+        if context is not None:
+            context.process_table = table
+    fields = ("pid", "user", "name", "cpu_percent", "rss_bytes", "io_rate", "command")
+    return [{key: p[key] for key in fields} for p in table.top(max(1, min(limit, 50)), by=sort_by)]
+
+
+@TOOLS.tool("Processes whose name or command line contains a string",
+            {"type": "object", "properties": {"name": {"type": "string", "description": "Process name, e.g. nginx"}},
+             "required": ["name"]})
+def find_processes(context, name: str):
+    from process_table import ProcessTable
+    table = getattr(context, "process_table", None) or ProcessTable()
+    return table.find(name)[:20]
+
+
+@TOOLS.tool("Disk usage of a directory with its largest subdirectories and files",
+            {"type": "object", "properties": {
+                "path": {"type": "string", "description": "Directory (default: home directory)"},
+                "limit": _integer("Number of largest entries", 5)}})
+def disk_usage(context, path: str = "~", limit: int = 5):
+    from fs_tools import directory_size, find_large_files, format_size
+    path = os.path.abspath(os.path.expanduser(path))
+    tree = getattr(context, "size_tree", None)
+    if tree is not None and tree.covers(path):
+        usage = tree.usage(path)
+        return {"path": path, "disk_usage": format_size(usage["disk_usage"]), "files": usage["files"],
+                "largest_directories": [{"path": d["path"], "disk_usage": format_size(d["disk_usage"])}
+                                        for d in tree.largest_dirs(path, limit, max_depth=1)],
+                "largest_files": [{"path": p, "size": format_size(s)} for p, s in tree.largest_files(path, limit)],
+                "source": "size cache"}
+    totals = directory_size([path], timeout=10)
+    return {"path": path, "disk_usage": format_size(totals["disk_usage"]), "files": totals["files"],
+            "largest_files": [{"path": r.path, "size": format_size(r.size)}
+                              for r in find_large_files([path], limit)]}
+
+
+@TOOLS.tool("Find files or directories by name in the home directory",
+            {"type": "object", "properties": {
+                "pattern": {"type": "string", "description": "Name, part of a name, or a glob like *.pdf"},
+                "limit": _integer("Maximum number of paths", 20)},
+             "required": ["pattern"]})
+def find_files(context, pattern: str, limit: int = 20):
+    limit = max(1, min(limit, 200))
+    index = getattr(context, "file_index", None)
+    mode = "glob" if any(c in pattern for c in "*?[") else "substring"
+    if index is not None:
+        paths, total = index.search(pattern, mode, limit=limit)
+        return {"paths": paths, "total": total}
+    import itertools
+    from fs_tools import find_files as walk
+    glob = pattern if mode == "glob" else f"*{pattern}*"
+    paths = [r.path for r in itertools.islice(walk(glob, [os.path.expanduser("~")], ignore_case=True), limit)]
+    return {"paths": paths, "total": len(paths)}
+
+
+@TOOLS.tool("Whether a Debian package is installed, its version, and the version apt would install",
+            {"type": "object", "properties": {"name": {"type": "string", "description": "Package or command name"}},
+             "required": ["name"]})
+def package_info(context, name: str):
+    from package_index import DPKG_STATUS, PackageIndex
+    index = getattr(context, "package_index", None)
+    if index is None:
+        if not os.path.exists(DPKG_STATUS):
+            return {"error": "not a dpkg-based system"}
+        index = PackageIndex()
+        if context is not None:
+            context.package_index = index
+    names = index.resolve_name(name)
+    candidate = index.candidate(names[0] if names else name)
+    result = {"installed": [index.get(match).to_dict() for match in names],
+              "candidate_version": candidate.version if candidate else None}
+    if not names:
+        result["related_installed"] = index.related(name)
+    return result
+
+
+@TOOLS.tool("Listening TCP/UDP sockets and the processes holding them",
+            {"type": "object", "properties": {
+                "port": {"type": "integer", "description": "Only this port (default: all)"}}})
+def listening_ports(context, port: Optional[int] = None):
+    from net_tools import listeners
+    return [{"protocol": r.protocol, "local": r.local,
+             "processes": [f"{name} (pid {pid})" for pid, name in r.processes]} for r in listeners(port)]
+
+
+@TOOLS.tool("Network interfaces with their state, addresses and traffic, plus the routing table")
+def network_config(context):
+    from net_tools import interfaces, routes
+    return {"interfaces": [{key: link[key] for key in ("name", "state", "addresses", "mac", "rx_bytes", "tx_bytes")}
+                           for link in interfaces()],
+            "routes": routes()}
+
+
+@TOOLS.tool("Search system logs (journal and /var/log), newest first",
+            {"type": "object", "properties": {
+                "text": {"type": "string", "description": "Words the entries must contain"},
+                "unit": {"type": "string", "description": "systemd unit or program, e.g. nginx"},
+                "priority": {"type": "string", "enum": ["emerg", "alert", "crit", "err", "warning", "notice", "info",
+                                                        "debug"], "description": "Minimum severity"},
+                "since": {"type": "string", "description": "How far back, e.g. 2h or 1d"},
+                "limit": _integer("Maximum entries", 20)}})
+def search_logs(context, text: Optional[str] = None, unit: Optional[str] = None, priority: Optional[str] = None,
+                since: Optional[str] = None, limit: int = 20):
+    from log_index import format_log_record
+    loader = getattr(context, "log_loader", None)
+    if loader is None:
+        return {"error": "no log index in this session"}
+    logs = loader()
+    logs.refresh()
+    return [format_log_record(record) for record in
+            logs.query(text=text, unit=unit, priority=priority, since=since, limit=max(1, min(limit, 100)))]
+
+
+def main():
+    """CLI: list the tool schemas or call tools directly"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Native tools offered to the LLM")
+    parser.add_argument("calls", nargs="*", help='NAME or NAME=\'{"arg": value}\' (all run concurrently)')
+    args = parser.parse_args()
+
+    if not args.calls:
+        print(json.dumps(TOOLS.schemas(), indent=2))
+        return
+    calls = []
+    for spec in args.calls:
+        name, _, arguments = spec.partition("=")
+        calls.append({"name": name, "arguments": json.loads(arguments) if arguments else {}})
+    executor = ToolExecutor(TOOLS)
+    started = time.perf_counter()
+    results = executor.run(calls)
+    for call, result in zip(calls, results):
+        print(f"{call['name']}: {format_result(result)}")
+    print(f"{len(calls)} calls in {(time.perf_counter() - started) * 1000:.0f} ms ({executor.stats})")
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
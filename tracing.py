@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Tracing for LLM-powered Linux Distribution
+Per-turn span trees, sampled and exported as Chrome trace / Perfetto JSON
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The span a new span would be a child of; _UNSAMPLED inside a turn that was not sampled
+_current: contextvars.ContextVar = contextvars.ContextVar("linuxai_span", default=None)
+_UNSAMPLED = object()
+
+
+class _NoopSpan:
+    """Returned whenever nothing is recorded, so disabled tracing costs one call"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _UnsampledTurn(_NoopSpan):
+    """Marks the context as unsampled so spans nested in the turn are no-ops too"""
+
+    __slots__ = ("token",)
+
+    def __enter__(self):
+        self.token = _current.set(_UNSAMPLED)
+        return self
+
+    def __exit__(self, *exc):
+        _current.reset(self.token)
+        return False
+
+
+class Span:
+    __slots__ = ("name", "category", "args", "start_ns", "end_ns", "tid", "turn", "token")
+
+    def __init__(self, name: str, category: str, args: Dict[str, Any], turn: "Turn"):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.turn = turn
+        self.end_ns = None
+
+    def set(self, **attrs):
+        """Attach attributes, shown under "args" in the trace viewer"""
+        self.args.update(attrs)
+
+    def __enter__(self):
+        self.tid = threading.get_native_id()
+        self.token = _current.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        _current.reset(self.token)
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self.turn.spans.append(self)
+        if self.turn.root is self:
+            self.turn.tracer._finish(self.turn)
+        return False
+
+
+class Turn:
+    """The span tree for one REPL turn"""
+
+    __slots__ = ("tracer", "root", "spans")
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        self.root = None
+        self.spans: List[Span] = []
+
+
+class Tracer:
+    """Records span trees per turn and keeps the sampled ones for export
+
+    Turns are head-sampled with sample_rate; of those, turns faster than
+    slow_ms are dropped (tail sampling), so a long session can keep only
+    the turns worth looking at. Kept events go to a bounded buffer written
+    out by flush().
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.sample_rate = 1.0
+        self.slow_ms = 0.0
+        self._random = None
+        self.events = deque(maxlen=200000)
+        self.turns_kept = 0
+        self.turns_dropped = 0
+        self._lock = threading.Lock()
+        self._atexit = False
+
+    def configure(self, path: Optional[str], sample_rate: float = 1.0, slow_ms: float = 0.0):
+        """Enable tracing into path (a .json file), or disable it with path=None"""
+        self.path = path
+        self.enabled = bool(path)
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        if sample_rate < 1.0:
+            import random  # only needed for sampling; keeps `import tracing` cheap at startup
+            self._random = random.random
+        if self.enabled and not self._atexit:
+            atexit.register(self.flush)
+            self._atexit = True
+
+    def turn(self, name: str = "turn", category: str = "turn", **args):
+        """Open the root span of a new trace (one per REPL turn)"""
+        if not self.enabled:
+            return _NOOP
+        if self.sample_rate < 1.0 and self._random() >= self.sample_rate:
+            return _UnsampledTurn()
+        turn = Turn(self)
+        turn.root = Span(name, category, args, turn)
+        return turn.root
+
+    def span(self, name: str, category: str = "linuxai", **args):
+        """Open a child span of the current turn; a no-op outside a sampled turn"""
+        if not self.enabled:
+            return _NOOP
+        parent = _current.get()
+        if parent is None or parent is _UNSAMPLED:
+            return _NOOP
+        return Span(name, category, args, parent.turn)
+
+    def _finish(self, turn: Turn):
+        root = turn.root
+        if (root.end_ns - root.start_ns) / 1e6 < self.slow_ms:
+            self.turns_dropped += 1
+            return
+        pid = os.getpid()
+        events = [{
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": span.start_ns / 1000,
+            "dur": (span.end_ns - span.start_ns) / 1000,
+            "pid": pid,
+            "tid": span.tid,
+            "args": {k: v if isinstance(v, (int, float, bool)) or v is None else str(v)
+                     for k, v in span.args.items()},
+        } for span in turn.spans]
+        with self._lock:
+            self.events.extend(events)
+            self.turns_kept += 1
+
+    def flush(self, path: Optional[str] = None):
+        """Write every kept span so far as a Chrome trace JSON file (open in Perfetto or chrome://tracing)
+
+        "{pid}" in the path is replaced by the process id, so sessions forked
+        from the daemon each write their own file.
+        """
+        path = path or self.path
+        if not path:
+            return
+        path = path.replace("{pid}", str(os.getpid()))
+        with self._lock:
+            events = list(self.events)
+        if not events:
+            return
+        metadata = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": "linuxai"}}]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote {self.turns_kept} traced turns to {path}")
+
+
+tracer = Tracer()
+span = tracer.span
+turn = tracer.turn
+
+
+def traced(name: Optional[str] = None, category: str = "linuxai"):
+    """Decorator running the function inside a span named after it"""
+    def decorate(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def annotate(**attrs):
+    """Attach attributes to the innermost open span, if this turn is being traced"""
+    if tracer.enabled:
+        current = _current.get()
+        if current is not None and current is not _UNSAMPLED:
+            current.set(**attrs)
+
+
+def configure_from_env():
+    """LINUXAI_TRACE=<file.json>, LINUXAI_TRACE_SAMPLE=<0..1>, LINUXAI_TRACE_SLOW_MS=<ms>"""
+    path = os.getenv("LINUXAI_TRACE")
+    if path:
+        tracer.configure(path, float(os.getenv("LINUXAI_TRACE_SAMPLE", "1.0")),
+                         float(os.getenv("LINUXAI_TRACE_SLOW_MS", "0")))